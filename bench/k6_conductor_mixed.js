@@ -0,0 +1,111 @@
+import http from 'k6/http';
+import { check } from 'k6';
+import { Trend, Rate } from 'k6/metrics';
+
+/**
+ * k6 Load Test: conductor-api /rag/search latency while /extract jobs run
+ *
+ * Phase 1 (0-30s):  only /rag/search            -> rag_latency_baseline
+ * Phase 2 (30-90s): /rag/search + /extract load -> rag_latency_under_extract
+ *
+ * p99 of both trends should stay close: a slow Tika parse must not block
+ * the search on the same uvicorn worker.
+ *
+ * Run:
+ *   k6 run --env BASE_URL=http://localhost:8010 \
+ *          --env EXTRACT_FILE=/data/samples/large.pdf bench/k6_conductor_mixed.js
+ *
+ * EXTRACT_FILE is a path as seen from inside the conductor-api container.
+ */
+
+const ragBaseline = new Trend('rag_latency_baseline', true);
+const ragUnderExtract = new Trend('rag_latency_under_extract', true);
+const extractLatency = new Trend('extract_latency', true);
+const ragSuccess = new Rate('rag_success');
+
+const BASE = __ENV.BASE_URL || 'http://localhost:8010';
+const EXTRACT_FILE = __ENV.EXTRACT_FILE || '/data/samples/large.pdf';
+const BASELINE_S = 30;
+// Allowed p99 degradation under extract load (ms), see thresholds
+const P99_LIMIT_MS = Number(__ENV.P99_LIMIT_MS || 1500);
+
+export const options = {
+    scenarios: {
+        rag_search: {
+            executor: 'constant-arrival-rate',
+            rate: 10,
+            timeUnit: '1s',
+            duration: '90s',
+            preAllocatedVUs: 20,
+            maxVUs: 50,
+            exec: 'ragSearch',
+        },
+        extract: {
+            executor: 'constant-vus',
+            vus: 4,
+            startTime: `${BASELINE_S}s`,
+            duration: '60s',
+            gracefulStop: '60s',
+            exec: 'extract',
+        },
+    },
+    summaryTrendStats: ['avg', 'med', 'p(95)', 'p(99)', 'max'],
+    thresholds: {
+        rag_latency_baseline: [`p(99)<${P99_LIMIT_MS}`],
+        rag_latency_under_extract: [`p(99)<${P99_LIMIT_MS}`],
+        rag_success: ['rate>0.99'],
+    },
+};
+
+const QUERIES = [
+    'Rechnung Telekom 2024',
+    'Mietvertrag Kündigungsfrist',
+    'Steuerbescheid Einkommensteuer',
+    'Versicherungsschein Kfz',
+    'Protokoll Besprechung Projekt',
+];
+
+const startedAt = Date.now();
+
+export function ragSearch() {
+    const query = QUERIES[Math.floor(Math.random() * QUERIES.length)];
+    const res = http.post(`${BASE}/rag/search`, JSON.stringify({ query: query, limit: 10 }), {
+        headers: { 'Content-Type': 'application/json' },
+        timeout: '30s',
+    });
+
+    const ok = check(res, { 'rag status is 200': (r) => r.status === 200 });
+    ragSuccess.add(ok);
+
+    const elapsedS = (Date.now() - startedAt) / 1000;
+    (elapsedS < BASELINE_S ? ragBaseline : ragUnderExtract).add(res.timings.duration);
+}
+
+export function extract() {
+    const res = http.post(`${BASE}/extract`, JSON.stringify({ file_path: EXTRACT_FILE, prefer_markdown: true }), {
+        headers: { 'Content-Type': 'application/json' },
+        timeout: '180s',
+    });
+    check(res, { 'extract status is 200 or 503': (r) => r.status === 200 || r.status === 503 });
+    extractLatency.add(res.timings.duration);
+}
+
+export function handleSummary(data) {
+    const m = data.metrics;
+    const p99 = (name) => m[name]?.values?.['p(99)'];
+    const base = p99('rag_latency_baseline');
+    const loaded = p99('rag_latency_under_extract');
+    const ratio = base && loaded ? (loaded / base).toFixed(2) : 'N/A';
+
+    return {
+        'stdout': `
+=== conductor-api: /rag/search unter /extract-Last ===
+p99 /rag/search (nur Suche):     ${base?.toFixed(0) || 'N/A'} ms
+p99 /rag/search (mit /extract):  ${loaded?.toFixed(0) || 'N/A'} ms
+Verhältnis:                      ${ratio}x
+p95 /extract:                    ${m.extract_latency?.values?.['p(95)']?.toFixed(0) || 'N/A'} ms
+RAG Success Rate:                ${((m.rag_success?.values?.rate || 0) * 100).toFixed(1)}%
+`,
+        'bench/k6_conductor_results.json': JSON.stringify(data, null, 2),
+    };
+}
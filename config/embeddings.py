@@ -12,6 +12,7 @@ Usage:
     from config.embeddings import get_embedding_model, EMBEDDING_CONFIG
 """
 
+import os
 from dataclasses import dataclass
 from typing import Optional
 from enum import Enum
@@ -43,6 +44,8 @@ class EmbeddingConfig:
     batch_size: int
     normalize: bool = True
     device: str = "cuda"  # cuda, cpu, mps
+    # Matryoshka-trainiert: die ersten n Dimensionen sind selbst ein Embedding
+    matryoshka: bool = False
 
 
 # =============================================================================
@@ -64,6 +67,7 @@ EMBEDDING_CONFIGS = {
         dimensions=1024,
         max_tokens=8192,
         batch_size=16,
+        matryoshka=True,
     ),
 
     EmbeddingModel.QWEN3_EMBEDDING_1_5B: EmbeddingConfig(
@@ -71,6 +75,7 @@ EMBEDDING_CONFIGS = {
         dimensions=1536,
         max_tokens=8192,
         batch_size=8,
+        matryoshka=True,
     ),
 
     EmbeddingModel.JINA_V3: EmbeddingConfig(
@@ -78,6 +83,7 @@ EMBEDDING_CONFIGS = {
         dimensions=1024,
         max_tokens=8192,
         batch_size=16,
+        matryoshka=True,
     ),
 
     EmbeddingModel.BGE_M3: EmbeddingConfig(
@@ -94,6 +100,7 @@ EMBEDDING_CONFIGS = {
         max_tokens=32768,
         batch_size=4,  # Reduced for 8GB VRAM
         device="cuda",
+        matryoshka=True,
     ),
 }
 
@@ -127,6 +134,40 @@ def get_embedding_model(experimental: bool = False) -> str:
     return config.model_id
 
 
+# =============================================================================
+# DIMENSIONSREDUKTION (Index-Zeit)
+# =============================================================================
+
+# none | truncate (nur Matryoshka-Modelle) | pca (gefittet, neben der Collection gespeichert)
+EMBEDDING_REDUCE = os.getenv("EMBEDDING_REDUCE", "none").lower()
+EMBEDDING_REDUCE_MODES = ("none", "truncate", "pca")
+EMBEDDING_REDUCED_DIM = int(os.getenv("EMBEDDING_REDUCED_DIM", "256"))
+# Kandidaten der reduzierten Suche pro Treffer für das Rerank mit voller Dimension
+EMBEDDING_RERANK_OVERSAMPLING = int(os.getenv("EMBEDDING_RERANK_OVERSAMPLING", "4"))
+# Namen der Vektoren in der Collection bei aktiver Reduktion
+REDUCED_VECTOR_NAME = "reduced"
+FULL_VECTOR_NAME = "full"
+
+
+def get_reduction(experimental: bool = False, reduce: Optional[str] = None, reduced_dim: Optional[int] = None) -> tuple:
+    """
+    Reduktions-Modus und Zieldimension für das Modell.
+
+    Returns:
+        (mode, dim) - ("none", volle Dimension) ohne Reduktion
+    """
+    config = get_embedding_config(experimental)
+    mode = (reduce or EMBEDDING_REDUCE).lower()
+    dim = reduced_dim or EMBEDDING_REDUCED_DIM
+    if mode not in EMBEDDING_REDUCE_MODES:
+        raise ValueError(f"Unbekannte Reduktion: {mode} (erlaubt: {', '.join(EMBEDDING_REDUCE_MODES)})")
+    if mode == "none" or dim >= config.dimensions:
+        return "none", config.dimensions
+    if mode == "truncate" and not config.matryoshka:
+        raise ValueError(f"{config.model_id} ist nicht Matryoshka-trainiert, EMBEDDING_REDUCE=pca verwenden")
+    return mode, dim
+
+
 # =============================================================================
 # MIGRATION HELPER
 # =============================================================================
@@ -163,13 +204,77 @@ def get_migration_info() -> dict:
 # QDRANT COLLECTION CONFIG
 # =============================================================================
 
-def get_qdrant_collection_config(experimental: bool = False) -> dict:
+# Payload-Indexe für serverseitige Filter (Feld -> Qdrant field_schema).
+# Filter auf indexierten Feldern werden während der HNSW-Traversierung
+# ausgewertet statt nach der Suche. Zeitfelder kommen aus prepare_for_indexing.
+QDRANT_PAYLOAD_INDEXES = {
+    "source_type": "keyword",
+    "extension": "keyword",
+    "category": "keyword",
+    "tags": "keyword",
+    "file_created_timestamp": "integer",
+    "year_created": "integer",
+    # Chunk-Collapsing / Aufräumen alter Points, "gleicher Ordner"
+    "parent_id": "keyword",
+    "folder": "keyword",
+}
+
+
+# Vektor-Quantisierung in Qdrant: none | int8 | binary
+# Quantisierte Vektoren liegen im RAM, die float32-Originale auf Disk
+# und werden nur zum Rescoring der (oversampelten) Kandidaten gelesen.
+# Speicher/Recall je Modus: scripts/benchmarks/quantization_benchmark.py
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+QDRANT_QUANTIZATION_MODES = ("none", "int8", "binary")
+# Kandidaten-Faktor fürs Rescoring (binary verliert mehr, braucht mehr Kandidaten);
+# QDRANT_RESCORE_OVERSAMPLING überschreibt den Default des Modus
+QDRANT_RESCORE_OVERSAMPLING_DEFAULTS = {"int8": 2.0, "binary": 3.0}
+
+
+def _quantization_mode(quantization: Optional[str]) -> str:
+    mode = (quantization or QDRANT_QUANTIZATION).lower()
+    if mode not in QDRANT_QUANTIZATION_MODES:
+        raise ValueError(f"Unbekannte Quantisierung: {mode} (erlaubt: {', '.join(QDRANT_QUANTIZATION_MODES)})")
+    return mode
+
+
+def get_qdrant_quantization_config(quantization: Optional[str] = None) -> Optional[dict]:
+    """Qdrant quantization_config für den Modus (None = volle Präzision)."""
+    mode = _quantization_mode(quantization)
+    if mode == "int8":
+        return {"scalar": {"type": "int8", "quantile": 0.99, "always_ram": True}}
+    if mode == "binary":
+        return {"binary": {"always_ram": True}}
+    return None
+
+
+def get_qdrant_collection_config(
+    experimental: bool = False,
+    quantization: Optional[str] = None,
+    reduce: Optional[str] = None,
+    reduced_dim: Optional[int] = None,
+) -> dict:
     """
     Generiert Qdrant Collection-Konfiguration.
+
+    Payload-Indexe werden nicht beim Anlegen der Collection übergeben
+    (Qdrant erwartet sie einzeln), siehe get_qdrant_payload_indexes().
+
+    Mit Dimensionsreduktion bekommt die Collection zwei benannte Vektoren:
+    REDUCED_VECTOR_NAME (im HNSW) und FULL_VECTOR_NAME (ohne HNSW, auf Disk,
+    nur fürs Rerank der Kandidaten).
+
+    Args:
+        experimental: True für experimentelles Modell
+        quantization: none | int8 | binary (Default: QDRANT_QUANTIZATION)
+        reduce: none | truncate | pca (Default: EMBEDDING_REDUCE)
+        reduced_dim: Zieldimension (Default: EMBEDDING_REDUCED_DIM)
     """
     config = get_embedding_config(experimental)
+    quantization_config = get_qdrant_quantization_config(quantization)
+    mode, dim = get_reduction(experimental, reduce, reduced_dim)
 
-    return {
+    collection = {
         "vectors": {
             "size": config.dimensions,
             "distance": "Cosine",
@@ -182,3 +287,48 @@ def get_qdrant_collection_config(experimental: bool = False) -> dict:
             "ef_construct": 100,
         },
     }
+    if mode != "none":
+        collection["vectors"] = {
+            REDUCED_VECTOR_NAME: {"size": dim, "distance": "Cosine"},
+            FULL_VECTOR_NAME: {
+                "size": config.dimensions,
+                "distance": "Cosine",
+                "on_disk": True,
+                "hnsw_config": {"m": 0},  # kein Graph, nur Rerank per ID
+            },
+        }
+    if quantization_config:
+        # Originale auf Disk, nur die quantisierten Vektoren im RAM
+        index_vector = collection["vectors"] if mode == "none" else collection["vectors"][REDUCED_VECTOR_NAME]
+        index_vector["on_disk"] = True
+        collection["quantization_config"] = quantization_config
+    return collection
+
+
+def get_qdrant_search_params(quantization: Optional[str] = None) -> dict:
+    """
+    "params" für Qdrant-Suchen: Kandidaten auf den quantisierten Vektoren,
+    Rescoring der oversampelten Top-k mit den Originalen von Disk.
+
+    Leer bei voller Präzision.
+    """
+    mode = _quantization_mode(quantization)
+    if mode == "none":
+        return {}
+    return {
+        "quantization": {
+            "ignore": False,
+            "rescore": True,
+            "oversampling": float(os.getenv("QDRANT_RESCORE_OVERSAMPLING") or QDRANT_RESCORE_OVERSAMPLING_DEFAULTS[mode]),
+        }
+    }
+
+
+def get_qdrant_payload_indexes() -> dict:
+    """
+    Payload-Indexe für die Collection (Feld -> field_schema).
+
+    Angelegt von QdrantIndexer.ensure_payload_indexes() beim ersten
+    Indexer der Ingest-Pfade; das Anlegen ist idempotent.
+    """
+    return dict(QDRANT_PAYLOAD_INDEXES)
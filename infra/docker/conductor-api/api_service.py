@@ -10,16 +10,26 @@ Endpoints:
 - /feedback - User-Korrektur Tracking
 - /extract - Tika HTML→Markdown Extraktion
 - /stats - Statistiken und Metriken
+
+Nebenläufigkeit:
+- Ein gepoolter httpx.AsyncClient für Tika/Qdrant/Ollama (Startup)
+- HTML→Markdown läuft in einem begrenzten Thread-Pool
+- Pro Endpoint-Gruppe ein Concurrency-Limit (503 + Retry-After bei Überlast)
 """
 
 import os
 import json
+import time
+import uuid
+import asyncio
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 import sqlite3
 import re
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from dataclasses import dataclass, asdict
 from enum import Enum
 
@@ -49,12 +59,74 @@ REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 QDRANT_URL = os.getenv("QDRANT_URL", "http://qdrant:6333")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
+# Nur an Qdrant-Requests hängen, nie an den geteilten Client (Tika/Ollama/...)
+QDRANT_HEADERS = {"api-key": QDRANT_API_KEY} if QDRANT_API_KEY else {}
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
 
 # Data paths (mounted volumes)
 DATA_DIR = Path(os.getenv("DATA_DIR", "/data"))
 FEEDBACK_DB_PATH = DATA_DIR / "feedback_tracker.db"
 
+# Hybrid-Suche für /rag/search (spiegelt USE_HYBRID_SEARCH aus config/feature_flags.py)
+USE_HYBRID_SEARCH = os.getenv("USE_HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+# Shadow Ledger (read-only gemountet) mit files_fts-Index aus smart_ingest
+LEDGER_DB_PATH = Path(os.getenv("LEDGER_DB_PATH", "/ledger/shadow_ledger.db"))
+QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "neural_vault")
+EMBED_OLLAMA_MODEL = os.getenv("EMBED_OLLAMA_MODEL", "nomic-embed-text")
+CHUNK_OVERFETCH = max(1, int(os.getenv("CHUNK_OVERFETCH", "4")))
+# Vektor-Quantisierung (spiegelt QDRANT_QUANTIZATION aus config/embeddings.py):
+# Kandidaten auf int8/binary, Rescoring mit den Originalen von Disk
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+QDRANT_RESCORE_OVERSAMPLING = float(os.getenv(
+    "QDRANT_RESCORE_OVERSAMPLING", "3.0" if QDRANT_QUANTIZATION == "binary" else "2.0"
+))
+QDRANT_SEARCH_PARAMS = {} if QDRANT_QUANTIZATION == "none" else {
+    "quantization": {"ignore": False, "rescore": True, "oversampling": QDRANT_RESCORE_OVERSAMPLING}
+}
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "30"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+# Gleicher Namespace wie scripts/services/qdrant_indexer.py (stabile Point-IDs)
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1b55-2a4e-5c57-9a8e-3d1f0e6b9c21")
+# Dateiendungen je source_type (alles andere = "document"); Payload-Feld "extension"
+# ist in Qdrant indexiert (config/embeddings.get_qdrant_payload_indexes)
+MEDIA_EXTENSIONS = {
+    "video": [".mp4", ".mkv", ".avi", ".mov"],
+    "audio": [".mp3", ".wav", ".flac", ".m4a"],
+    "image": [".jpg", ".png", ".tiff", ".bmp"],
+}
+
+# Reranking für /rag/search: Cross-Encoder läuft in neural-search-api (/api/rerank),
+# conductor-api lädt kein Modell (512M Limit). K x m Kandidaten, Latenzbudget in ms.
+NEURAL_SEARCH_URL = os.getenv("NEURAL_SEARCH_URL", "http://neural-search-api:8040")
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+RERANK_MULTIPLIER = int(os.getenv("RERANK_MULTIPLIER", "3"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+# Zuschlag auf das Budget für Netzwerk/Serialisierung, danach Retrieval-Reihenfolge
+RERANK_TIMEOUT_SLACK_S = float(os.getenv("RERANK_TIMEOUT_SLACK_S", "0.5"))
+
+# Payload-Projektion für /rag/search: nur die Felder, die _source_preview liest,
+# plus vorberechneter "excerpt" (scripts/utils/chunking.py). Volltext lädt
+# /sources/{id} bei Bedarf; Chunk-Text nur als Reranker-Eingabe.
+SOURCE_PAYLOAD_FIELDS = [
+    "id", "parent_id", "filename", "file_path", "extension", "file_created",
+    "file_modified", "indexed_at", "tags", "confidence", "excerpt",
+    "thumbnail_url", "page_thumbnail_url", "timecode_start", "timestamp_start",
+    "start_time", "timecode_end", "timestamp_end", "end_time", "page",
+    "page_number", "total_pages", "pages_total", "ocr_text", "ocr", "ocr_result",
+] + (["text"] if RERANK_ENABLED else [])
+
+# Nebenläufigkeit (pro uvicorn-Worker)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+MARKDOWN_POOL_SIZE = int(os.getenv("MARKDOWN_POOL_SIZE", "2"))
+EXTRACT_CONCURRENCY = int(os.getenv("EXTRACT_CONCURRENCY", "4"))
+RAG_SEARCH_CONCURRENCY = int(os.getenv("RAG_SEARCH_CONCURRENCY", "32"))
+SOURCES_CONCURRENCY = int(os.getenv("SOURCES_CONCURRENCY", "32"))
+# Max. Wartezeit auf einen freien Slot, danach 503
+CONCURRENCY_WAIT_S = float(os.getenv("CONCURRENCY_WAIT_S", "10"))
+
 # =============================================================================
 # PYDANTIC MODELS
 # =============================================================================
@@ -267,6 +339,13 @@ def create_chunk_for_rag(
 # TIKA EXTRACTOR
 # =============================================================================
 
+async def _read_file_chunks(filepath: Path, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """Liest eine Datei blockweise im Thread (Upload-Body ohne Event-Loop-Blockade)."""
+    with open(filepath, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
 class TikaExtractor:
     """Extrahiert Dokumenteninhalte via Apache Tika."""
 
@@ -325,6 +404,95 @@ class TikaExtractor:
                 "format": "error"
             }
 
+    async def extract_async(
+        self,
+        client: httpx.AsyncClient,
+        executor: ThreadPoolExecutor,
+        filepath: Path,
+        prefer_markdown: bool = True,
+        include_metadata: bool = False,
+        include_html: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Async-Variante von extract().
+
+        Tika-Requests laufen über den gepoolten httpx-Client (Upload in
+        Blöcken), die CPU-lastige HTML→Markdown-Konvertierung im Thread-Pool.
+        """
+        filepath = Path(filepath)
+
+        if not filepath.exists():
+            return {
+                "text": "",
+                "success": False,
+                "error": f"Datei nicht gefunden: {filepath}",
+                "format": "error"
+            }
+
+        try:
+            metadata_task = None
+            if include_metadata:
+                metadata_task = asyncio.create_task(
+                    self._put_async(client, self.tika_url.replace("/tika", "/meta"), filepath, "application/json", 30)
+                )
+
+            result = None
+            if prefer_markdown:
+                response = await self._put_async(client, self.tika_url, filepath, "text/html", self.timeout)
+                if response is not None and response.status_code == 200:
+                    html = response.text
+                    loop = asyncio.get_running_loop()
+                    text = await loop.run_in_executor(executor, self._html_to_markdown, html)
+                    result = {
+                        "text": text,
+                        "html": html if include_html else None,
+                        "format": "markdown",
+                        "success": True
+                    }
+
+            if result is None:
+                response = await self._put_async(client, self.tika_url, filepath, "text/plain", self.timeout)
+                text = response.text.strip() if response is not None and response.status_code == 200 else None
+                result = {
+                    "text": text or "",
+                    "format": "plain",
+                    "success": bool(text)
+                }
+
+            metadata = None
+            if metadata_task:
+                response = await metadata_task
+                if response is not None and response.status_code == 200:
+                    metadata = response.json()
+            result["metadata"] = metadata
+            return result
+
+        except Exception as e:
+            return {
+                "text": "",
+                "success": False,
+                "error": str(e),
+                "format": "error"
+            }
+
+    async def _put_async(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        filepath: Path,
+        accept: str,
+        timeout: float
+    ) -> Optional[httpx.Response]:
+        try:
+            return await client.put(
+                url,
+                content=_read_file_chunks(filepath),
+                headers={"Accept": accept, "Content-Length": str(filepath.stat().st_size)},
+                timeout=timeout
+            )
+        except httpx.HTTPError:
+            return None
+
     def _extract_html(self, filepath: Path) -> Optional[str]:
         try:
             with open(filepath, "rb") as f:
@@ -611,6 +779,36 @@ app.add_middleware(
 tika_extractor = TikaExtractor()
 feedback_tracker = FeedbackTracker()
 
+# Gepoolter HTTP-Client und Markdown-Pool (Startup/Shutdown)
+http_client: Optional[httpx.AsyncClient] = None
+markdown_executor: Optional[ThreadPoolExecutor] = None
+
+# Concurrency-Limits pro Endpoint-Gruppe: langsame Extraktionen dürfen
+# die Suche nicht aushungern
+ENDPOINT_LIMITS = {
+    "extract": asyncio.Semaphore(EXTRACT_CONCURRENCY),
+    "rag_search": asyncio.Semaphore(RAG_SEARCH_CONCURRENCY),
+    "sources": asyncio.Semaphore(SOURCES_CONCURRENCY),
+}
+
+
+@asynccontextmanager
+async def endpoint_slot(name: str):
+    """Belegt einen Slot der Endpoint-Gruppe; 503 wenn keiner frei wird."""
+    semaphore = ENDPOINT_LIMITS[name]
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=CONCURRENCY_WAIT_S)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{name} ausgelastet, bitte erneut versuchen",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        yield
+    finally:
+        semaphore.release()
+
 
 # =============================================================================
 # ENDPOINTS
@@ -626,38 +824,27 @@ async def health_check():
         "ollama": False
     }
 
-    # Check Tika
-    try:
-        response = requests.get(TIKA_URL.replace("/tika", "/tika"), timeout=5)
-        services["tika"] = response.status_code == 200
-    except Exception:
-        pass
-
-    # Check Redis
-    try:
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD)
-        services["redis"] = r.ping()
-    except Exception:
-        pass
-
-    # Check Qdrant
-    try:
-        headers = {}
-        QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-        if QDRANT_API_KEY:
-            headers["api-key"] = QDRANT_API_KEY
-            
-        response = requests.get(f"{QDRANT_URL}/collections", headers=headers, timeout=5)
-        services["qdrant"] = response.status_code == 200
-    except Exception:
-        pass
+    async def http_ok(url: str, headers: Optional[dict] = None) -> bool:
+        try:
+            response = await http_client.get(url, headers=headers, timeout=5.0)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
 
-    # Check Ollama
-    try:
-        response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        services["ollama"] = response.status_code == 200
-    except Exception:
-        pass
+    def redis_ok() -> bool:
+        try:
+            r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD)
+            return bool(r.ping())
+        except Exception:
+            return False
+
+    # Alle Checks parallel
+    services["tika"], services["redis"], services["qdrant"], services["ollama"] = await asyncio.gather(
+        http_ok(TIKA_URL),
+        asyncio.to_thread(redis_ok),
+        http_ok(f"{QDRANT_URL}/collections", QDRANT_HEADERS),
+        http_ok(f"{OLLAMA_URL}/api/tags")
+    )
 
     all_healthy = all(services.values())
 
@@ -707,11 +894,14 @@ async def get_confusion_matrix():
 @app.post("/extract", response_model=ExtractResult)
 async def extract_document(request: ExtractRequest):
     """Extrahiert Text aus einem Dokument via Tika."""
-    result = tika_extractor.extract(
-        filepath=Path(request.file_path),
-        prefer_markdown=request.prefer_markdown,
-        include_metadata=request.include_metadata
-    )
+    async with endpoint_slot("extract"):
+        result = await tika_extractor.extract_async(
+            http_client,
+            markdown_executor,
+            filepath=Path(request.file_path),
+            prefer_markdown=request.prefer_markdown,
+            include_metadata=request.include_metadata
+        )
 
     return ExtractResult(
         text=result.get("text", ""),
@@ -730,7 +920,10 @@ async def extract_with_context(
 ):
     """Extrahiert Text und fügt Context Header hinzu."""
     path = Path(file_path)
-    result = tika_extractor.extract(filepath=path, prefer_markdown=True)
+    async with endpoint_slot("extract"):
+        result = await tika_extractor.extract_async(
+            http_client, markdown_executor, filepath=path, prefer_markdown=True
+        )
 
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
@@ -791,6 +984,10 @@ class LocalSearchRequest(BaseModel):
     limit: int = Field(default=10, ge=1, le=50)
     source_types: Optional[List[str]] = None  # ["document", "audio", "video", "image"]
     include_web: bool = False  # Hybrid-Modus
+    rerank: bool = True
+    # Über-Fetch-Faktor (K x m) und Latenzbudget; None = Server-Defaults
+    rerank_multiplier: Optional[int] = Field(default=None, ge=1, le=10)
+    rerank_budget_ms: Optional[float] = Field(default=None, ge=0, le=5000)
 
 class SourcePreview(BaseModel):
     """Source-Preview mit Timecodes/Seitenangaben."""
@@ -823,109 +1020,354 @@ class RAGSearchResult(BaseModel):
     sources: List[SourcePreview]
     total_results: int
     processing_time_ms: int
+    reranked: int = 0  # Kandidaten, die innerhalb des Budgets neu bewertet wurden
+    timings: Optional[Dict[str, Any]] = None  # dense_ms, lexical_ms, rerank_ms, Treffer je Leg
+
+
+async def _rag_dense_search(
+    client: httpx.AsyncClient,
+    query: str,
+    limit: int,
+    qdrant_filter: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Dense-Leg: Query-Embedding (Ollama) + gefilterte ANN-Suche, ein Treffer pro Dokument."""
+    response = await client.post(
+        f"{OLLAMA_URL}/api/embeddings",
+        json={"model": EMBED_OLLAMA_MODEL, "prompt": query},
+        timeout=30.0
+    )
+    vector = response.json().get("embedding") if response.status_code == 200 else None
+    if not vector:
+        return []
+
+    body = {
+        "vector": vector,
+        "limit": limit * CHUNK_OVERFETCH,
+        "with_payload": {"include": ["parent_id", "id"]},
+        "with_vector": False
+    }
+    if qdrant_filter:
+        body["filter"] = qdrant_filter
+    if QDRANT_SEARCH_PARAMS:
+        body["params"] = QDRANT_SEARCH_PARAMS
+    response = await client.post(
+        f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/search",
+        json=body,
+        headers=QDRANT_HEADERS,
+        timeout=10.0
+    )
+    if response.status_code != 200:
+        return []
+
+    hits, seen = [], set()
+    for point in response.json().get("result", []):
+        payload = point.get("payload") or {}
+        key = str(payload.get("parent_id") or payload.get("id") or point["id"])
+        if key in seen:
+            continue
+        seen.add(key)
+        hits.append({"id": point["id"], "key": key, "payload": None})
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+def _fts_query(query: str) -> str:
+    """FTS5-MATCH-Ausdruck: Terme in Anführungszeichen, mit OR verknüpft (BM25 rankt)."""
+    terms = re.findall(r"\w[\w\-.@]*", query.lower())
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in dict.fromkeys(terms))
+
+
+def _rag_lexical_search(query: str, limit: int, source_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Lexikalisches Leg: BM25 über files_fts im Shadow Ledger (läuft im Thread)."""
+    match = _fts_query(query)
+    if not match or not LEDGER_DB_PATH.exists():
+        return []
+
+    # source_types wie im Dense-Leg per Dateiendung, aber in SQL
+    type_sql, params = "", [match]
+    if source_types:
+        media = [ext for extensions in MEDIA_EXTENSIONS.values() for ext in extensions]
+        clauses = []
+        for source_type in dict.fromkeys(source_types):
+            if source_type in MEDIA_EXTENSIONS:
+                exts = MEDIA_EXTENSIONS[source_type]
+                clauses.append("(" + " OR ".join(["lower(f.current_filename) LIKE ?"] * len(exts)) + ")")
+                params += [f"%{ext}" for ext in exts]
+            elif source_type == "document":
+                clauses.append("NOT (" + " OR ".join(["lower(f.current_filename) LIKE ?"] * len(media)) + ")")
+                params += [f"%{ext}" for ext in media]
+        type_sql = " AND (" + " OR ".join(clauses) + ")" if clauses else " AND 0"
+
+    conn = sqlite3.connect(f"file:{LEDGER_DB_PATH}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(f"""
+            SELECT f.sha256, f.current_filename, f.current_path, f.category, f.tags,
+                   f.updated_at, snippet(files_fts, 4, '', '', ' … ', 48),
+                   bm25(files_fts, 2.0, 2.0, 0.5, 1.0, 1.0) AS rank
+            FROM files_fts JOIN files f ON f.id = files_fts.rowid
+            WHERE files_fts MATCH ?{type_sql}
+            ORDER BY rank
+            LIMIT ?
+        """, (*params, limit)).fetchall()
+    finally:
+        conn.close()
+
+    hits = []
+    for sha256, filename, path, category, tags, updated_at, snippet, _ in rows:
+        try:
+            tags = json.loads(tags) if tags else []
+        except (TypeError, ValueError):
+            tags = []
+        hits.append({
+            "id": str(uuid.uuid5(POINT_ID_NAMESPACE, f"{sha256}:0")),
+            "key": sha256,
+            "payload": {
+                "id": sha256,
+                "filename": filename,
+                "file_path": path,
+                "category": category,
+                "tags": tags,
+                "indexed_at": updated_at,
+                "text": snippet or "",
+                "excerpt": snippet or "",
+            },
+        })
+    return hits
+
+
+def _rrf_fuse(legs: List[Tuple[List[Dict[str, Any]], float]], limit: int) -> List[Dict[str, Any]]:
+    """Gewichtete Reciprocal Rank Fusion: score = Σ weight / (k + rang)."""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for hits, weight in legs:
+        for rank, hit in enumerate(hits, 1):
+            entry = fused.setdefault(hit["key"], {**hit, "score": 0.0})
+            entry["score"] += weight / (HYBRID_RRF_K + rank)
+    return sorted(fused.values(), key=lambda h: h["score"], reverse=True)[:limit]
+
+
+async def _rag_rerank(
+    client: httpx.AsyncClient,
+    query: str,
+    candidates: List[Tuple[str, Dict[str, Any], str]],
+    top_k: int,
+    budget_ms: float
+) -> Tuple[List[Tuple[str, Dict[str, Any], str]], int]:
+    """
+    Cross-Encoder-Reranking über neural-search-api /api/rerank.
+
+    Nicht bewertete Kandidaten (Budget abgelaufen) folgen in Retrieval-Reihenfolge.
+    Returns: (Top-K Kandidaten, Anzahl neu bewerteter Kandidaten)
+    """
+    response = await client.post(
+        f"{NEURAL_SEARCH_URL}/api/rerank",
+        json={
+            "query": query,
+            "candidates": [
+                {"id": point_id, "text": payload.get("text") or payload.get("excerpt") or ""}
+                for point_id, payload, _ in candidates
+            ],
+            "topK": top_k,
+            "budgetMs": budget_ms,
+        },
+        timeout=budget_ms / 1000 + RERANK_TIMEOUT_SLACK_S
+    )
+    response.raise_for_status()
+    data = response.json()
+    by_id = {point_id: (point_id, payload, source_type) for point_id, payload, source_type in candidates}
+    ranked = [by_id[r["id"]] for r in data.get("results", []) if r["id"] in by_id]
+    return ranked[:top_k], int(data.get("reranked", 0))
+
+
+async def _full_text(client: httpx.AsyncClient, payload: Dict[str, Any]) -> str:
+    """Volltext eines Points; bei Chunk-Points liegt extracted_text am Chunk 0."""
+    if payload.get("extracted_text"):
+        return payload["extracted_text"]
+    parent_id = payload.get("parent_id")
+    if parent_id and payload.get("chunk_index"):
+        first_id = str(uuid.uuid5(POINT_ID_NAMESPACE, f"{parent_id}:0"))
+        response = await client.post(
+            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points",
+            json={"ids": [first_id], "with_payload": {"include": ["extracted_text"]}, "with_vector": False},
+            headers=QDRANT_HEADERS,
+            timeout=10.0
+        )
+        if response.status_code == 200:
+            for point in response.json().get("result", []):
+                text = (point.get("payload") or {}).get("extracted_text")
+                if text:
+                    return text
+    return payload.get("text") or ""
+
+
+def _source_type(filename: str) -> str:
+    ext = Path(filename).suffix.lower()
+    for source_type, extensions in MEDIA_EXTENSIONS.items():
+        if ext in extensions:
+            return source_type
+    return "document"
+
+
+def _source_type_filter(source_types: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    """
+    Qdrant-Filter für source_types (über den Payload-Index auf "extension"),
+    damit gefiltert wird, während die ANN-Suche läuft, statt danach.
+    "document" = alles, was keine Medien-Endung hat.
+    """
+    if not source_types:
+        return None
+    media = [ext for extensions in MEDIA_EXTENSIONS.values() for ext in extensions]
+    clauses = []
+    for source_type in dict.fromkeys(source_types):
+        if source_type in MEDIA_EXTENSIONS:
+            clauses.append({"key": "extension", "match": {"any": MEDIA_EXTENSIONS[source_type]}})
+        elif source_type == "document":
+            clauses.append({"must_not": [{"key": "extension", "match": {"any": media}}]})
+    return {"should": clauses} if clauses else None
+
+
+def _source_preview(point_id: str, payload: Dict[str, Any], source_type: str) -> SourcePreview:
+    thumbnail_url = payload.get("thumbnail_url") or payload.get("page_thumbnail_url")
+    if source_type == "image" and not thumbnail_url:
+        thumbnail_url = f"/sources/{point_id}/thumbnail"
+    text = payload.get("excerpt") or payload.get("text", "") or ""
+
+    return SourcePreview(
+        id=point_id,
+        filename=payload.get("filename", "Unknown"),
+        source_type=source_type,
+        text_snippet=text[:300] + "..." if len(text) > 300 else text,
+        confidence=payload.get("confidence") or 0.0,
+        timecode_start=payload.get("timecode_start") or payload.get("timestamp_start") or payload.get("start_time"),
+        timecode_end=payload.get("timecode_end") or payload.get("timestamp_end") or payload.get("end_time"),
+        page_number=payload.get("page") or payload.get("page_number"),
+        total_pages=payload.get("total_pages") or payload.get("pages_total"),
+        thumbnail_url=thumbnail_url,
+        ocr_text=payload.get("ocr_text") or payload.get("ocr") or payload.get("ocr_result"),
+        file_path=payload.get("file_path", ""),
+        folder=str(Path(payload.get("file_path", "")).parent) if payload.get("file_path") else None,
+        file_extension=payload.get("extension") or Path(payload.get("filename", "")).suffix.lower(),
+        file_created=payload.get("file_created"),
+        file_modified=payload.get("file_modified"),
+        indexed_at=payload.get("indexed_at"),
+        tags=payload.get("tags", []) or []
+    )
 
 
 @app.post("/rag/search", response_model=RAGSearchResult)
 async def rag_local_search(request: LocalSearchRequest):
-    """Lokale Dokumenten-Suche via Qdrant für Perplexica RAG."""
-    import time
+    """
+    Lokale Dokumenten-Suche für Perplexica RAG.
+
+    Hybrid: Dense (Qdrant) und BM25 (Shadow Ledger FTS5) laufen parallel
+    und werden per Reciprocal Rank Fusion pro Dokument zusammengeführt.
+    Danach werden K x m Kandidaten innerhalb des Latenzbudgets per
+    Cross-Encoder neu gerankt (Fallback: Retrieval-Reihenfolge).
+    """
     start_time = time.time()
-    
     sources = []
-    
+    reranked = 0
+    timings: Dict[str, Any] = {}
+    use_rerank = RERANK_ENABLED and request.rerank
+    multiplier = (request.rerank_multiplier or RERANK_MULTIPLIER) if use_rerank else 1
+    candidate_limit = request.limit * multiplier
+    depth = max(candidate_limit, HYBRID_CANDIDATES)
+    # source_types als Qdrant-Filter: filtert während der ANN-Suche
+    qdrant_filter = _source_type_filter(request.source_types)
+
+    async def timed(name: str, coro):
+        t0 = time.perf_counter()
+        try:
+            hits = await coro
+        except Exception as e:
+            print(f"⚠️ RAG {name}-Suche fehlgeschlagen: {e}")
+            hits = []
+        timings[f"{name}_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        timings[f"{name}_hits"] = len(hits)
+        return hits
+
     try:
-        # Qdrant Vector Search
-        QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-        headers = {"api-key": QDRANT_API_KEY} if QDRANT_API_KEY else {}
-        
-        # Einfache Suche (später: Embedding-basiert)
-        # Für jetzt: Scroll durch Collection und Filter
-        response = requests.post(
-            f"{QDRANT_URL}/collections/neural_vault/points/scroll",
-            headers=headers,
-            json={
-                "limit": request.limit,
-                "with_payload": True,
-                "with_vector": False
-            },
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            points = data.get("result", {}).get("points", [])
-            
-            for point in points:
-                payload = point.get("payload", {})
-                
-                # Source Type ermitteln
-                ext = Path(payload.get("filename", "")).suffix.lower()
-                if ext in [".mp4", ".mkv", ".avi", ".mov"]:
-                    source_type = "video"
-                elif ext in [".mp3", ".wav", ".flac", ".m4a"]:
-                    source_type = "audio"
-                elif ext in [".jpg", ".png", ".tiff", ".bmp"]:
-                    source_type = "image"
-                else:
-                    source_type = "document"
-                
-                # Filter nach source_types wenn angegeben
-                if request.source_types and source_type not in request.source_types:
-                    continue
-                
-                thumbnail_url = payload.get("thumbnail_url") or payload.get("page_thumbnail_url")
-                if source_type == "image" and not thumbnail_url:
-                    thumbnail_url = f"/sources/{point.get('id')}/thumbnail"
-
-                source = SourcePreview(
-                    id=str(point.get("id", "")),
-                    filename=payload.get("filename", "Unknown"),
-                    source_type=source_type,
-                    text_snippet=payload.get("text", "")[:300] + "..." if len(payload.get("text", "")) > 300 else payload.get("text", ""),
-                    confidence=payload.get("confidence", 0.0),
-                    timecode_start=payload.get("timecode_start") or payload.get("timestamp_start") or payload.get("start_time"),
-                    timecode_end=payload.get("timecode_end") or payload.get("timestamp_end") or payload.get("end_time"),
-                    page_number=payload.get("page") or payload.get("page_number"),
-                    total_pages=payload.get("total_pages") or payload.get("pages_total"),
-                    thumbnail_url=thumbnail_url,
-                    ocr_text=payload.get("ocr_text") or payload.get("ocr") or payload.get("ocr_result"),
-                    file_path=payload.get("file_path", ""),
-                    folder=str(Path(payload.get("file_path", "")).parent) if payload.get("file_path") else None,
-                    file_extension=payload.get("extension") or Path(payload.get("filename", "")).suffix.lower(),
-                    file_created=payload.get("file_created"),
-                    file_modified=payload.get("file_modified"),
-                    indexed_at=payload.get("indexed_at"),
-                    tags=payload.get("tags", []) or []
+        async with endpoint_slot("rag_search"):
+            legs = [timed("dense", _rag_dense_search(http_client, request.query, depth, qdrant_filter))]
+            if USE_HYBRID_SEARCH:
+                legs.append(timed("lexical", asyncio.to_thread(
+                    _rag_lexical_search, request.query, depth, request.source_types
+                )))
+            results = await asyncio.gather(*legs)
+            weights = [HYBRID_DENSE_WEIGHT, HYBRID_LEXICAL_WEIGHT]
+            hits = _rrf_fuse(list(zip(results, weights)), depth)
+
+            dense_ids = [h["id"] for h in hits if h["payload"] is None]
+            payloads = {}
+            if dense_ids:
+                response = await http_client.post(
+                    f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points",
+                    json={
+                        "ids": dense_ids,
+                        "with_payload": {"include": SOURCE_PAYLOAD_FIELDS},
+                        "with_vector": False
+                    },
+                    headers=QDRANT_HEADERS,
+                    timeout=10.0
                 )
-                sources.append(source)
-                
+                if response.status_code == 200:
+                    payloads = {str(p["id"]): p.get("payload", {}) for p in response.json().get("result", [])}
+
+            candidates = []
+            for hit in hits:
+                payload = hit["payload"] if hit["payload"] is not None else payloads.get(str(hit["id"]))
+                if not payload:
+                    continue
+                candidates.append((str(hit["id"]), payload, _source_type(payload.get("filename", ""))))
+                if len(candidates) >= candidate_limit:
+                    break
+
+            if use_rerank and len(candidates) > 1:
+                budget_ms = request.rerank_budget_ms if request.rerank_budget_ms is not None else RERANK_BUDGET_MS
+                timings["rerank_candidates"] = len(candidates)
+                t0 = time.perf_counter()
+                try:
+                    candidates, reranked = await _rag_rerank(
+                        http_client, request.query, candidates, request.limit, budget_ms
+                    )
+                except Exception as e:
+                    print(f"⚠️ RAG Reranking übersprungen: {e}")
+                timings["rerank_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+        sources = [
+            _source_preview(point_id, payload, source_type)
+            for point_id, payload, source_type in candidates[:request.limit]
+        ]
+
+    except HTTPException:
+        raise
     except Exception as e:
         # Fallback: Bei Fehler leere Liste
-        pass
-    
+        print(f"⚠️ RAG-Suche fehlgeschlagen: {e}")
+
     processing_time = int((time.time() - start_time) * 1000)
-    
+
     return RAGSearchResult(
         query=request.query,
         sources=sources,
         total_results=len(sources),
-        processing_time_ms=processing_time
+        processing_time_ms=processing_time,
+        reranked=reranked,
+        timings=timings
     )
 
 
 @app.get("/sources/{source_id}")
 async def get_source_details(source_id: str):
-    """Detailinformationen zu einer Quelle inkl. Timecodes."""
+    """Detailinformationen zu einer Quelle inkl. Timecodes und Volltext."""
     try:
-        QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
-        headers = {"api-key": QDRANT_API_KEY} if QDRANT_API_KEY else {}
-        
-        response = requests.get(
-            f"{QDRANT_URL}/collections/neural_vault/points/{source_id}",
-            headers=headers,
-            timeout=10
-        )
-        
+        async with endpoint_slot("sources"):
+            response = await http_client.get(
+                f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/{source_id}",
+                headers=QDRANT_HEADERS,
+                timeout=10.0
+            )
+
         if response.status_code == 200:
             data = response.json()
             payload = data.get("result", {}).get("payload", {})
@@ -942,6 +1384,7 @@ async def get_source_details(source_id: str):
                 "file_created": payload.get("file_created"),
                 "file_modified": payload.get("file_modified"),
                 "text": payload.get("text"),
+                "full_text": await _full_text(http_client, payload),
                 "source_type": payload.get("source_type"),
                 "timecodes": payload.get("timecodes", []),
                 "page": payload.get("page"),
@@ -951,7 +1394,9 @@ async def get_source_details(source_id: str):
                 "indexed_at": payload.get("indexed_at"),
                 "tags": payload.get("tags", []) or []
             }
-            
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -992,8 +1437,30 @@ async def stream_source_media(
 @app.on_event("startup")
 async def startup():
     """Initialisierung beim Start."""
+    global http_client, markdown_executor
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS // 2
+        ),
+        timeout=30.0
+    )
+    markdown_executor = ThreadPoolExecutor(
+        max_workers=MARKDOWN_POOL_SIZE,
+        thread_name_prefix="markdown"
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Gepoolte Ressourcen freigeben."""
+    if http_client:
+        await http_client.aclose()
+    if markdown_executor:
+        markdown_executor.shutdown(wait=False)
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -9,6 +9,7 @@ Unified GPU Service combining:
 
 Endpoints:
     POST /process/document  - Unified processing with auto-routing
+    POST /process/document/path - Same, for a file on the shared volume (no upload)
     POST /process/pdf       - PDF extraction via Docling
     POST /process/ocr       - OCR via Surya
     POST /process/pii       - PII detection via GLiNER
@@ -41,6 +42,11 @@ logger = logging.getLogger("document-processor")
 DEVICE = os.getenv("PROCESSOR_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
 GLINER_MODEL = os.getenv("GLINER_MODEL", "urchade/gliner_small-v2.1")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "Alibaba-NLP/gte-Qwen3-Embedding-0.6B")
+# Shared micro-batching embedding server; empty = local model in this process
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "")
+EMBEDDING_SERVICE_TIMEOUT_S = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT_S", "60"))
+# Same setting for server and local model (config/embeddings.py: normalize=True)
+EMBED_NORMALIZE = os.getenv("EMBED_NORMALIZE", "true").lower() == "true"
 SURYA_LANGS = os.getenv("SURYA_LANGS", "de,en").split(",")
 LANCEDB_PATH = os.getenv("LANCEDB_PATH", "/data/lancedb")
 
@@ -99,6 +105,26 @@ def get_embed_model():
     return Models.embed_model
 
 
+def encode_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts via the embedding server (coalesced with the other ingest
+    paths), falling back to the local model if it is unset or unreachable.
+    """
+    if EMBEDDING_SERVICE_URL:
+        import httpx
+        try:
+            response = httpx.post(
+                f"{EMBEDDING_SERVICE_URL}/embed/batch",
+                json={"texts": texts, "model": EMBED_MODEL, "normalize": EMBED_NORMALIZE},
+                timeout=EMBEDDING_SERVICE_TIMEOUT_S,
+            )
+            response.raise_for_status()
+            return response.json()["embeddings"]
+        except Exception as e:
+            logger.warning(f"Embedding server failed, using local model: {e}")
+    return get_embed_model().encode(texts, normalize_embeddings=EMBED_NORMALIZE).tolist()
+
+
 def get_surya():
     """Lazy load Surya OCR models."""
     if Models.surya_models is None:
@@ -163,6 +189,12 @@ class DocumentResult(BaseModel):
     metadata: Dict[str, Any] = {}
 
 
+class ProcessPathRequest(BaseModel):
+    filepath: str
+    processor: ProcessorType = ProcessorType.AUTO
+    langs: str = "de,en"
+
+
 class PiiRequest(BaseModel):
     text: str
     labels: List[str] = ["person", "iban", "date", "phone_number", "email"]
@@ -374,28 +406,50 @@ async def process_document(
             shutil.copyfileobj(file.file, tmp)
             tmp_path = tmp.name
 
-        # Auto-routing
-        if processor == ProcessorType.AUTO:
-            processor = get_processor(file.filename)
-            logger.info(f"Auto-routed {file.filename} → {processor.value}")
+        try:
+            return run_processor(tmp_path, file.filename, processor, langs)
+        finally:
+            # Cleanup
+            os.remove(tmp_path)
+
+    except Exception as e:
+        logger.error(f"Processing error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Process
-        if processor == ProcessorType.SURYA:
-            lang_list = [l.strip() for l in langs.split(",")]
-            result = process_with_surya(tmp_path, lang_list)
-        else:
-            result = process_with_docling(tmp_path)
 
-        # Cleanup
-        os.remove(tmp_path)
+@app.post("/process/document/path", response_model=DocumentResult)
+async def process_document_path(request: ProcessPathRequest):
+    """
+    Process a file that is visible on the shared data volume.
 
-        return result
+    Avoids the multipart upload (and the temp copy) for workers that
+    mount the same volume.
+    """
+    path = Path(request.filepath)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: {request.filepath}")
 
+    try:
+        return run_processor(str(path), path.name, request.processor, request.langs)
     except Exception as e:
         logger.error(f"Processing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def run_processor(file_path: str, filename: str, processor: ProcessorType, langs: str) -> DocumentResult:
+    """Route a local file to Docling or Surya and process it."""
+    # Auto-routing
+    if processor == ProcessorType.AUTO:
+        processor = get_processor(filename)
+        logger.info(f"Auto-routed {filename} → {processor.value}")
+
+    # Process
+    if processor == ProcessorType.SURYA:
+        lang_list = [l.strip() for l in langs.split(",")]
+        return process_with_surya(file_path, lang_list)
+    return process_with_docling(file_path)
+
+
 @app.post("/process/pdf", response_model=DocumentResult)
 async def process_pdf(file: UploadFile = File(...)):
     """Process PDF with Docling (97.9% table accuracy)."""
@@ -447,8 +501,7 @@ def detect_pii(request: PiiRequest):
 @app.post("/vector/embed")
 def create_embedding(payload: VectorStoreRequest):
     """Generate embedding for text."""
-    model = get_embed_model()
-    vector = model.encode(payload.text).tolist()
+    [vector] = encode_texts([payload.text])
     return {"vector": vector, "dim": len(vector)}
 
 
@@ -457,11 +510,10 @@ def store_vector(payload: VectorStoreRequest):
     """Store document in LanceDB."""
     import pyarrow as pa
 
-    model = get_embed_model()
     db = get_lancedb()
 
     # Generate embedding
-    vector = model.encode(payload.text).tolist()
+    [vector] = encode_texts([payload.text])
 
     # Table name
     table_name = "conductor_docs"
@@ -487,10 +539,9 @@ def store_vector(payload: VectorStoreRequest):
 @app.post("/vector/search")
 def search_vectors(payload: VectorSearchRequest):
     """Semantic search in LanceDB."""
-    model = get_embed_model()
     db = get_lancedb()
 
-    query_vec = model.encode(payload.query).tolist()
+    [query_vec] = encode_texts([payload.query])
 
     try:
         table = db.open_table("conductor_docs")
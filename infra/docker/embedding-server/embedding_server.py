@@ -0,0 +1,364 @@
+"""
+Neural Vault Embedding Server
+=============================
+
+One embedding service for all ingest paths (smart_ingest, file_indexer,
+VectorService, document-processor, neural-worker).
+
+Concurrent requests are coalesced per model into dynamic micro-batches:
+a batch is dispatched once EMBED_MAX_BATCH texts are queued or the oldest
+text has waited EMBED_MAX_WAIT_MS. Each batch is sorted by (estimated) token
+length and split so that padding stays below EMBED_MAX_BATCH_TOKENS, then
+encoded in one model call. CPU-only hosts thus get real batch throughput
+even when every caller sends a single text.
+
+Backends:
+    - Models listed in EMBED_OLLAMA_MODELS are forwarded to Ollama /api/embed
+      (same vectors as the existing Qdrant collection)
+    - Models listed in EMBED_LOCAL_MODELS are loaded with sentence-transformers
+
+Endpoints:
+    POST /embed/batch   - Embed a list of texts
+    POST /embed         - Embed a single text
+    GET  /metrics       - Batch statistics per model
+    GET  /health        - Health check
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+# Logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("embedding-server")
+
+# Configuration
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
+EMBED_DEFAULT_MODEL = os.getenv("EMBED_DEFAULT_MODEL", "nomic-embed-text")
+EMBED_OLLAMA_MODELS = [m.strip() for m in os.getenv("EMBED_OLLAMA_MODELS", "nomic-embed-text").split(",") if m.strip()]
+EMBED_LOCAL_MODELS = [m.strip() for m in os.getenv(
+    "EMBED_LOCAL_MODELS",
+    "Alibaba-NLP/gte-Qwen3-Embedding-0.6B,paraphrase-multilingual-MiniLM-L12-v2",
+).split(",") if m.strip()]
+EMBED_DEVICE = os.getenv("EMBED_DEVICE", "cpu")
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "10"))
+EMBED_MAX_BATCH_TOKENS = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "16384"))
+EMBED_MAX_CHARS = int(os.getenv("EMBED_MAX_CHARS", "8000"))
+EMBED_REQUEST_MAX_TEXTS = int(os.getenv("EMBED_REQUEST_MAX_TEXTS", "1024"))
+OLLAMA_TIMEOUT_S = float(os.getenv("OLLAMA_TIMEOUT_S", "120"))
+
+EncodeFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token); only used for ordering and padding."""
+    return len(text) // 4 + 1
+
+
+def plan_batches(texts: List[str], max_batch: int, max_batch_tokens: int) -> List[List[int]]:
+    """
+    Sort texts by estimated token length and cut them into sub-batches.
+
+    A sub-batch is closed when it reaches max_batch texts or when its padded
+    size (texts x longest text) would exceed max_batch_tokens.
+
+    Returns:
+        Lists of indices into texts, shortest texts first
+    """
+    order = sorted(range(len(texts)), key=lambda i: estimate_tokens(texts[i]))
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        longest = estimate_tokens(texts[i])  # sorted: the new text is the longest
+        if current and (len(current) >= max_batch or (len(current) + 1) * longest > max_batch_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent embed calls for one model into dynamic batches.
+
+    Callers await embed(texts); a single worker task drains the queue, waits
+    at most max_wait_ms for more texts, and dispatches length-sorted
+    sub-batches to encode_fn. Results are routed back per text.
+    """
+
+    def __init__(
+        self,
+        encode_fn: EncodeFn,
+        max_batch: int = EMBED_MAX_BATCH,
+        max_wait_ms: float = EMBED_MAX_WAIT_MS,
+        max_batch_tokens: int = EMBED_MAX_BATCH_TOKENS,
+    ):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self.max_batch_tokens = max_batch_tokens
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        # Statistics
+        self.batches = 0
+        self.texts = 0
+        self.encode_ms: deque = deque(maxlen=200)
+        self.batch_sizes: deque = deque(maxlen=200)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Queue texts and wait for their vectors (order preserved)."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait((text[:EMBED_MAX_CHARS], future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _collect(self) -> list:
+        """Block for the first item, then gather more until full or max_wait elapsed."""
+        items = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait_s
+        while len(items) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            items = [(text, future) for text, future in items if not future.done()]
+            texts = [text for text, _ in items]
+            for batch in plan_batches(texts, self.max_batch, self.max_batch_tokens):
+                await self._dispatch([items[i] for i in batch])
+
+    async def _dispatch(self, items: list):
+        start = time.perf_counter()
+        try:
+            vectors = await self.encode_fn([text for text, _ in items])
+            if len(vectors) != len(items):
+                raise RuntimeError(f"Backend returned {len(vectors)} vectors for {len(items)} texts")
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(items)} failed: {e}")
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(items, vectors):
+            if not future.done():
+                future.set_result(vector)
+        self.batches += 1
+        self.texts += len(items)
+        self.batch_sizes.append(len(items))
+        self.encode_ms.append((time.perf_counter() - start) * 1000)
+
+    def metrics(self) -> Dict:
+        sizes = list(self.batch_sizes)
+        latencies = sorted(self.encode_ms)
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "queued": self.queue.qsize(),
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "p50_encode_ms": round(latencies[len(latencies) // 2], 2) if latencies else 0.0,
+            "p95_encode_ms": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else 0.0,
+        }
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+http_client: Optional[httpx.AsyncClient] = None
+encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+local_models: Dict[str, object] = {}
+batchers: Dict[str, MicroBatcher] = {}
+
+
+def get_local_model(model_name: str):
+    """Lazy load a sentence-transformers model (one instance per model)."""
+    if model_name not in local_models:
+        from sentence_transformers import SentenceTransformer
+        logger.info(f"Loading embedding model: {model_name} ({EMBED_DEVICE})...")
+        local_models[model_name] = SentenceTransformer(model_name, device=EMBED_DEVICE, trust_remote_code=True)
+    return local_models[model_name]
+
+
+def ollama_encoder(model_name: str) -> EncodeFn:
+    async def encode(texts: List[str]) -> List[List[float]]:
+        response = await http_client.post(
+            f"{OLLAMA_URL}/api/embed",
+            json={"model": model_name, "input": texts},
+            timeout=OLLAMA_TIMEOUT_S,
+        )
+        response.raise_for_status()
+        return response.json().get("embeddings", [])
+    return encode
+
+
+def local_encoder(model_name: str) -> EncodeFn:
+    def encode_sync(texts: List[str]) -> List[List[float]]:
+        model = get_local_model(model_name)
+        # Texts arrive length-sorted; one forward pass per planned sub-batch
+        return model.encode(texts, batch_size=len(texts)).tolist()
+
+    async def encode(texts: List[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(encode_executor, encode_sync, texts)
+    return encode
+
+
+def get_batcher(model_name: Optional[str]) -> MicroBatcher:
+    """Batcher for a configured model; unknown models are rejected."""
+    model_name = model_name or EMBED_DEFAULT_MODEL
+    if model_name not in batchers:
+        if model_name in EMBED_OLLAMA_MODELS:
+            batchers[model_name] = MicroBatcher(ollama_encoder(model_name))
+        elif model_name in EMBED_LOCAL_MODELS:
+            batchers[model_name] = MicroBatcher(local_encoder(model_name))
+        else:
+            raise HTTPException(status_code=400, detail=f"Model not served: {model_name}")
+    return batchers[model_name]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client
+    http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=20))
+    logger.info(f"Embedding server: ollama={EMBED_OLLAMA_MODELS} local={EMBED_LOCAL_MODELS} "
+                f"max_batch={EMBED_MAX_BATCH} max_wait_ms={EMBED_MAX_WAIT_MS}")
+    yield
+    for batcher in batchers.values():
+        await batcher.stop()
+    await http_client.aclose()
+
+
+app = FastAPI(
+    title="Neural Vault Embedding Server",
+    description="Micro-batching embedding service for all ingest paths",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+
+# =============================================================================
+# API
+# =============================================================================
+
+class EmbedBatchRequest(BaseModel):
+    texts: List[str] = Field(..., max_length=EMBED_REQUEST_MAX_TEXTS)
+    model: Optional[str] = None
+    normalize: bool = True
+
+
+class EmbedBatchResponse(BaseModel):
+    model: str
+    dim: int
+    embeddings: List[List[float]]
+    ms: float
+
+
+class EmbedRequest(BaseModel):
+    text: str
+    model: Optional[str] = None
+    normalize: bool = True
+
+
+class EmbedResponse(BaseModel):
+    model: str
+    dim: int
+    embedding: List[float]
+
+
+def l2_normalize(vectors: List[List[float]]) -> List[List[float]]:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).tolist()
+
+
+async def embed_texts(texts: List[str], model: Optional[str], normalize: bool) -> List[List[float]]:
+    """
+    Embed through the model's batcher. Normalization is applied per request,
+    so callers with and without it still share one batch.
+    """
+    batcher = get_batcher(model)
+    try:
+        vectors = await batcher.embed(texts)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Embedding backend failed: {e}")
+    return l2_normalize(vectors) if normalize else vectors
+
+
+@app.post("/embed/batch", response_model=EmbedBatchResponse)
+async def embed_batch(request: EmbedBatchRequest):
+    """Embed a list of texts; vectors are returned in request order."""
+    start = time.perf_counter()
+    embeddings = await embed_texts(request.texts, request.model, request.normalize) if request.texts else []
+    return EmbedBatchResponse(
+        model=request.model or EMBED_DEFAULT_MODEL,
+        dim=len(embeddings[0]) if embeddings else 0,
+        embeddings=embeddings,
+        ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed_one(request: EmbedRequest):
+    """Embed a single text (coalesced with concurrent callers)."""
+    [embedding] = await embed_texts([request.text], request.model, request.normalize)
+    return EmbedResponse(model=request.model or EMBED_DEFAULT_MODEL, dim=len(embedding), embedding=embedding)
+
+
+@app.get("/metrics")
+async def metrics():
+    return {model: batcher.metrics() for model, batcher in batchers.items()}
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "healthy",
+        "default_model": EMBED_DEFAULT_MODEL,
+        "models": {"ollama": EMBED_OLLAMA_MODELS, "local": EMBED_LOCAL_MODELS},
+        "loaded": list(local_models),
+        "max_batch": EMBED_MAX_BATCH,
+        "max_wait_ms": EMBED_MAX_WAIT_MS,
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8045)
@@ -2,22 +2,35 @@
 Neural Search API - RAG Search with LLM Synthesis and Streaming
 ================================================================
 Provides intelligent search over indexed documents with:
-- Semantic search via Qdrant
+- Hybrid search: Qdrant (query embedding + ANN) fused with BM25 over the
+  shadow ledger full-text index (reciprocal rank fusion)
 - LLM synthesis with inline citations (Ollama)
 - Real-time streaming responses (SSE)
+- Two-level query-result cache in Redis (exact + semantic), invalidated
+  by the collection version the indexer bumps on every write
+- Cross-encoder reranking of over-fetched candidates under a latency budget
 - Pipeline status monitoring
 """
 
 import os
 import json
 import asyncio
+import base64
 import hashlib
 import logging
-from datetime import datetime
-from typing import Optional, List, AsyncGenerator
+import re
+import sqlite3
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Tuple, AsyncGenerator
 from contextlib import asynccontextmanager
 
 import httpx
+import numpy as np
 import redis.asyncio as redis
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
@@ -46,6 +59,89 @@ QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
 MAX_SOURCES = int(os.getenv("MAX_SOURCES", "8"))
 MIN_CONFIDENCE = float(os.getenv("MIN_CONFIDENCE", "0.5"))
 
+# Query Embedding Configuration
+# Must match the model that produced the vectors in QDRANT_COLLECTION
+# (smart_ingest/file_indexer use Ollama "nomic-embed-text").
+EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-ai/nomic-embed-text-v1.5")
+EMBED_OLLAMA_MODEL = os.getenv("EMBED_OLLAMA_MODEL", "nomic-embed-text")
+EMBED_POOL_SIZE = int(os.getenv("EMBED_POOL_SIZE", "2"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+# Chunk-Points: Über-Fetch-Faktor für das Parent-Collapsing
+CHUNK_OVERFETCH = max(1, int(os.getenv("CHUNK_OVERFETCH", "4")))
+
+# Vector quantization (mirrors config/embeddings.py QDRANT_QUANTIZATION):
+# ANN runs on the int8/binary vectors, the oversampled candidates are
+# rescored with the on-disk originals.
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+QDRANT_RESCORE_OVERSAMPLING = float(os.getenv(
+    "QDRANT_RESCORE_OVERSAMPLING", "3.0" if QDRANT_QUANTIZATION == "binary" else "2.0"
+))
+QDRANT_SEARCH_PARAMS = {} if QDRANT_QUANTIZATION == "none" else {
+    "quantization": {"ignore": False, "rescore": True, "oversampling": QDRANT_RESCORE_OVERSAMPLING}
+}
+
+# Hybrid Search (mirrors config/feature_flags.py USE_HYBRID_SEARCH)
+USE_HYBRID_SEARCH = os.getenv("USE_HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+# Shadow ledger (mounted read-only) with the files_fts index from smart_ingest
+LEDGER_DB_PATH = os.getenv("LEDGER_DB_PATH", "/ledger/shadow_ledger.db")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "30"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+# Same namespace as scripts/services/qdrant_indexer.py (stable point ids)
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1b55-2a4e-5c57-9a8e-3d1f0e6b9c21")
+
+# Collection stats (documentsTotal) are refreshed in the background
+COLLECTION_STATS_INTERVAL_S = float(os.getenv("COLLECTION_STATS_INTERVAL_S", "30"))
+
+# Pipeline status snapshot: all probes run concurrently in the background
+PIPELINE_STATUS_INTERVAL_S = float(os.getenv("PIPELINE_STATUS_INTERVAL_S", "2"))
+PIPELINE_PROBE_TIMEOUT_S = float(os.getenv("PIPELINE_PROBE_TIMEOUT_S", "2"))
+DOCUMENT_PROCESSOR_URL = os.getenv("DOCUMENT_PROCESSOR_URL", "http://document-processor:8005")
+ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "http://orchestrator:8020")
+INTAKE_QUEUES = ["intake:priority", "intake:normal", "intake:bulk"]
+
+# Query-result cache (Redis, shared across replicas)
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_CACHE_TTL_S = int(os.getenv("QUERY_CACHE_TTL_S", "3600"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "2000"))
+# Level 2: min. cosine similarity and number of recent entries compared
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0.95"))
+QUERY_CACHE_SEMANTIC_SCAN = int(os.getenv("QUERY_CACHE_SEMANTIC_SCAN", "128"))
+# Bumped by scripts/services/qdrant_indexer.py after every write
+COLLECTION_VERSION_KEY = f"neural:collection_version:{QDRANT_COLLECTION}"
+
+# Reranking (mirrors ENABLE_RERANKING; scoring follows services/reranker.py)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "svalabs/cross-electra-melange-german")
+# Candidates fetched per result (K x m) and latency budget per request
+RERANK_MULTIPLIER = int(os.getenv("RERANK_MULTIPLIER", "3"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_MAX_BATCH_CHARS = int(os.getenv("RERANK_MAX_BATCH_CHARS", "16000"))
+RERANK_SNIPPET_CHARS = int(os.getenv("RERANK_SNIPPET_CHARS", "1000"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+
+# Payload projection for search hits: only the fields convert_hit_to_source
+# reads plus the precomputed "excerpt" (scripts/utils/chunking.py). The full
+# text (extracted_text, up to 50k chars) is loaded lazily via /api/sources/{id};
+# the chunk text (<= CHUNK_MAX_CHARS) is only needed as reranker input, and
+# for older points without an excerpt (EXCERPT_FALLBACK_FIELDS, fetched lazily).
+SOURCE_PAYLOAD_FIELDS = [
+    "id", "parent_id", "chunk_index", "filename", "title", "path", "file_path",
+    "extension", "file_created", "file_modified", "tags", "confidence", "excerpt",
+    "metadata", "extractor", "extracted_via", "page", "page_number", "line",
+    "line_range", "timestamp", "start_time", "timestamp_start", "duration",
+    "speakers", "transcript", "bounding_box",
+] + (["text"] if RERANK_ENABLED else [])
+EXCERPT_MAX_CHARS = 500
+EXCERPT_FALLBACK_FIELDS = ["text", "content"]
+
+# Related documents (/api/sources/{id}/similar): Qdrant recommend on the
+# stored vector, small per-id result cache (also keyed by collection version)
+SIMILAR_CACHE_SIZE = int(os.getenv("SIMILAR_CACHE_SIZE", "256"))
+SIMILAR_CACHE_TTL_S = float(os.getenv("SIMILAR_CACHE_TTL_S", "300"))
+
 
 # =============================================================================
 # Pydantic Models
@@ -86,6 +182,7 @@ class Source(BaseModel):
     transcript: Optional[List[TranscriptLine]] = None
     extractedVia: str = "Tika"
     boundingBox: Optional[BoundingBox] = None
+    fullText: Optional[str] = None  # only set by /api/sources/{id}
 
 
 class Citation(BaseModel):
@@ -97,7 +194,53 @@ class Citation(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     limit: int = Field(default=8, ge=1, le=20)
+    # types, extensions, categories, tags (any-match lists), yearFrom/yearTo,
+    # createdAfter/createdBefore (ISO dates); see build_qdrant_filter
     filters: Optional[dict] = None
+    rerank: bool = True
+    # Over-fetch factor (K x m candidates) and rerank latency budget;
+    # None = server defaults (RERANK_MULTIPLIER / RERANK_BUDGET_MS)
+    rerankMultiplier: Optional[int] = Field(default=None, ge=1, le=10)
+    rerankBudgetMs: Optional[float] = Field(default=None, ge=0, le=5000)
+
+
+class RerankCandidate(BaseModel):
+    id: str
+    text: str
+
+
+class RerankRequest(BaseModel):
+    query: str
+    candidates: List[RerankCandidate] = Field(..., max_length=500)
+    topK: int = Field(default=10, ge=1, le=200)
+    budgetMs: Optional[float] = Field(default=None, ge=0, le=5000)
+
+
+class RerankResult(BaseModel):
+    id: str
+    score: Optional[float] = None  # None = not scored within the budget
+
+
+class RerankResponse(BaseModel):
+    results: List[RerankResult]
+    reranked: int
+    rerankMs: float
+
+
+class SearchTimings(BaseModel):
+    embedMs: float = 0.0
+    annMs: float = 0.0
+    lexicalMs: float = 0.0
+    payloadMs: float = 0.0
+    llmMs: float = 0.0
+    firstTokenMs: float = 0.0
+    cache: Optional[str] = None  # "exact" | "semantic" on a cache hit
+    rerankMs: float = 0.0
+    rerankCandidates: int = 0
+    reranked: int = 0  # candidates actually scored within the budget
+    embedCached: bool = False
+    denseHits: int = 0
+    lexicalHits: int = 0
 
 
 class SearchResponse(BaseModel):
@@ -108,6 +251,7 @@ class SearchResponse(BaseModel):
     sources: List[Source]
     timestamp: datetime
     processingTimeMs: int
+    timings: Optional[SearchTimings] = None
 
 
 class FollowUpQuestion(BaseModel):
@@ -124,7 +268,9 @@ class PipelineStatus(BaseModel):
     workersTotal: int
     queueDepth: int
     indexedDocuments: int
-    lastSync: datetime
+    lastSync: datetime  # time of the snapshot
+    snapshotAgeS: float = 0.0
+    refreshMs: float = 0.0  # duration of the concurrent probe round
 
 
 class SearchProgress(BaseModel):
@@ -154,11 +300,30 @@ http_client: Optional[httpx.AsyncClient] = None
 # Active search sessions for progress tracking
 active_searches: dict[str, SearchProgress] = {}
 
+# In-process query embedding model, shared by a small thread pool
+embed_model = None
+embed_executor: Optional[ThreadPoolExecutor] = None
+query_embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+
+# Background-refreshed collection stats (no Qdrant call per search)
+collection_stats: dict = {"documentsTotal": 0, "refreshedAt": None}
+stats_task: Optional[asyncio.Task] = None
+
+# Background-refreshed pipeline status (/api/pipeline/status, /api/status/system)
+pipeline_snapshot: dict = {"status": None, "qdrantOnline": False, "refreshedAt": None}
+pipeline_task: Optional[asyncio.Task] = None
+
+# Query-result cache (set up once Redis is connected)
+query_cache: Optional["QueryResultCache"] = None
+
+# Cross-encoder reranker (model loaded in the background at startup)
+reranker: Optional["CrossEncoderReranker"] = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
-    global redis_client, http_client
+    global redis_client, http_client, embed_executor, stats_task, pipeline_task, query_cache, reranker
 
     # Startup
     logger.info("Starting Neural Search API...")
@@ -173,6 +338,8 @@ async def lifespan(app: FastAPI):
         )
         await redis_client.ping()
         logger.info("✓ Redis connected")
+        if QUERY_CACHE_ENABLED:
+            query_cache = QueryResultCache(redis_client)
     except Exception as e:
         logger.warning(f"Redis connection failed: {e}")
         redis_client = None
@@ -185,16 +352,37 @@ async def lifespan(app: FastAPI):
     http_client = httpx.AsyncClient(headers=headers, timeout=120.0)
     logger.info("✓ HTTP client initialized")
 
+    # Embedding pool (model is loaded lazily on first query)
+    embed_executor = ThreadPoolExecutor(
+        max_workers=EMBED_POOL_SIZE,
+        thread_name_prefix="query-embed"
+    )
+
+    stats_task = asyncio.create_task(collection_stats_loop())
+    pipeline_task = asyncio.create_task(pipeline_status_loop())
+
+    if RERANK_ENABLED:
+        reranker = CrossEncoderReranker()
+        reranker.start_loading()
+
     logger.info("Neural Search API ready!")
 
     yield
 
     # Shutdown
     logger.info("Shutting down Neural Search API...")
+    if stats_task:
+        stats_task.cancel()
+    if pipeline_task:
+        pipeline_task.cancel()
     if redis_client:
         await redis_client.close()
     if http_client:
         await http_client.aclose()
+    if embed_executor:
+        embed_executor.shutdown(wait=False)
+    if reranker:
+        reranker.executor.shutdown(wait=False)
 
 
 # =============================================================================
@@ -237,21 +425,21 @@ def extract_keywords(query: str) -> List[str]:
     return keywords[:6]  # Max 6 keywords
 
 
+SOURCE_TYPE_MAP = {
+    'pdf': 'pdf',
+    'doc': 'pdf', 'docx': 'pdf',
+    'mp3': 'audio', 'wav': 'audio', 'm4a': 'audio', 'ogg': 'audio',
+    'mp4': 'video', 'mkv': 'video', 'avi': 'video', 'mov': 'video',
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image',
+    'eml': 'email', 'msg': 'email',
+    'txt': 'text', 'md': 'text', 'json': 'text', 'xml': 'text',
+}
+
+
 def detect_source_type(filename: str, metadata: dict) -> str:
     """Detect source type from filename and metadata."""
     ext = filename.lower().split('.')[-1] if '.' in filename else ''
-
-    type_map = {
-        'pdf': 'pdf',
-        'doc': 'pdf', 'docx': 'pdf',
-        'mp3': 'audio', 'wav': 'audio', 'm4a': 'audio', 'ogg': 'audio',
-        'mp4': 'video', 'mkv': 'video', 'avi': 'video', 'mov': 'video',
-        'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image',
-        'eml': 'email', 'msg': 'email',
-        'txt': 'text', 'md': 'text', 'json': 'text', 'xml': 'text',
-    }
-
-    return type_map.get(ext, 'text')
+    return SOURCE_TYPE_MAP.get(ext, 'text')
 
 
 def detect_extractor(metadata: dict) -> str:
@@ -291,7 +479,7 @@ def convert_hit_to_source(hit: dict, index: int) -> Source:
         fileModified=payload.get('file_modified'),
         tags=payload.get('tags', []) or [],
         confidence=confidence,
-        excerpt=payload.get('content', payload.get('text', ''))[:500],
+        excerpt=payload.get('excerpt') or (payload.get('content') or payload.get('text') or '')[:EXCERPT_MAX_CHARS],
         extractedVia=detect_extractor(metadata),
     )
 
@@ -330,27 +518,884 @@ def convert_hit_to_source(hit: dict, index: int) -> Source:
     return source
 
 
-async def search_qdrant(query: str, limit: int = 8) -> List[dict]:
-    """Search documents in Qdrant (baseline scroll fallback)."""
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() start mark."""
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def get_embed_model():
+    """Lazy load the query embedding model (None if unavailable)."""
+    global embed_model
+    if embed_model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"Loading query embedding model: {EMBED_MODEL}...")
+            embed_model = SentenceTransformer(EMBED_MODEL, trust_remote_code=True)
+        except Exception as e:
+            logger.warning(f"Local embedding model unavailable, using Ollama: {e}")
+            embed_model = False
+    return embed_model or None
+
+
+def _encode_query(query: str) -> Optional[List[float]]:
+    """Encode a query with the local model (runs in embed_executor)."""
+    model = get_embed_model()
+    if model is None:
+        return None
+    return model.encode(query, normalize_embeddings=True).tolist()
+
+
+async def embed_query(query: str) -> tuple[Optional[List[float]], bool]:
+    """
+    Compute the query embedding.
+
+    Uses the pooled in-process model, falls back to Ollama embeddings.
+    Results are cached per query string (LRU).
+
+    Returns:
+        (vector, cached)
+    """
+    key = query.strip()
+    cached = query_embedding_cache.get(key)
+    if cached is not None:
+        query_embedding_cache.move_to_end(key)
+        return cached, True
+
+    vector = None
     try:
-        response = await http_client.post(
-            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/scroll",
-            json={
-                "limit": limit,
-                "with_payload": True,
-                "with_vector": False
-            },
-            timeout=10.0
+        loop = asyncio.get_running_loop()
+        vector = await loop.run_in_executor(embed_executor, _encode_query, key)
+    except Exception as e:
+        logger.error(f"Local query embedding failed: {e}")
+
+    if vector is None:
+        try:
+            response = await http_client.post(
+                f"{OLLAMA_URL}/api/embeddings",
+                json={"model": EMBED_OLLAMA_MODEL, "prompt": key},
+                timeout=30.0
+            )
+            if response.status_code == 200:
+                vector = response.json().get("embedding")
+        except Exception as e:
+            logger.error(f"Ollama query embedding failed: {e}")
+
+    if vector:
+        query_embedding_cache[key] = vector
+        if len(query_embedding_cache) > EMBED_CACHE_SIZE:
+            query_embedding_cache.popitem(last=False)
+    return vector, False
+
+
+def normalize_query(query: str) -> str:
+    """Level-1 cache key text: NFKC, casefolded, punctuation stripped, single spaces."""
+    text = unicodedata.normalize("NFKC", query).casefold()
+    return " ".join(re.sub(r"[^\w\s\-.@€$%]", " ", text).split())
+
+
+class QueryResultCache:
+    """
+    Two-level query-result cache in Redis (shared across replicas).
+
+    Level 1: normalized query -> sources + answer
+    Level 2: cosine match of the query embedding against the most recently
+             used entries, so paraphrases ("Rechnungen Telekom") are served too
+
+    Every entry carries the collection version it was computed against; the
+    indexer bumps that version on each write, so older entries are never
+    served. Bounded by a TTL per entry and an LRU (sorted set by last access).
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        namespace: str = QDRANT_COLLECTION,
+        ttl_s: int = QUERY_CACHE_TTL_S,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        similarity: float = QUERY_CACHE_SIMILARITY,
+        semantic_scan: int = QUERY_CACHE_SEMANTIC_SCAN,
+        version_key: str = COLLECTION_VERSION_KEY,
+    ):
+        self.client = client
+        self.prefix = f"qcache:{namespace}"
+        self.lru_key = f"{self.prefix}:lru"
+        self.vectors_key = f"{self.prefix}:vectors"
+        self.version_key = version_key
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.semantic_scan = semantic_scan
+
+    @staticmethod
+    def scope(limit: int, filters: Optional[dict] = None, options: Optional[dict] = None) -> str:
+        """Requests only share entries with the same limit, filters and options."""
+        raw = json.dumps({"limit": limit, "filters": filters or {}, "options": options or {}}, sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+    def entry_key(self, query: str, scope: str) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode()).hexdigest()
+        return f"{self.prefix}:entry:{scope}:{digest}"
+
+    async def version(self) -> int:
+        """Current collection version (0 if the indexer never bumped it)."""
+        return int(await self.client.get(self.version_key) or 0)
+
+    async def get(self, query: str, scope: str) -> Optional[dict]:
+        """Level 1: exact match on the normalized query."""
+        key = self.entry_key(query, scope)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self.version_key)
+        pipe.get(key)
+        pipe.zscore(self.lru_key, key)
+        version, raw, last_used = await pipe.execute()
+        return await self._accept(key, raw, int(version or 0), referenced=last_used is not None)
+
+    async def get_similar(self, vector: List[float], scope: str) -> Optional[dict]:
+        """Level 2: nearest recent entry by cosine similarity."""
+        keys = [
+            k for k in await self.client.zrevrange(self.lru_key, 0, self.semantic_scan - 1)
+            if k.startswith(f"{self.prefix}:entry:{scope}:")
+        ]
+        if not keys:
+            return None
+        encoded = await self.client.hmget(self.vectors_key, keys)
+        candidates = [(k, v) for k, v in zip(keys, encoded) if v]
+        if not candidates:
+            return None
+
+        matrix = np.stack([np.frombuffer(base64.b64decode(v), dtype=np.float32) for _, v in candidates])
+        query_vec = self._unit(vector)
+        if matrix.shape[1] != query_vec.shape[0]:
+            return None
+        scores = matrix @ query_vec
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+
+        key = candidates[best][0]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(self.version_key)
+        pipe.get(key)
+        version, raw = await pipe.execute()
+        return await self._accept(key, raw, int(version or 0), referenced=True)
+
+    async def put(
+        self,
+        query: str,
+        scope: str,
+        version: int,
+        vector: Optional[List[float]],
+        sources: List[dict],
+        answer: str
+    ) -> None:
+        """
+        Stores a result. `version` must be read before retrieval started, so a
+        write racing with the search marks the entry stale instead of fresh.
+        """
+        key = self.entry_key(query, scope)
+        entry = {"query": query, "version": version, "sources": sources, "answer": answer}
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(key, json.dumps(entry), ex=self.ttl_s)
+        pipe.zadd(self.lru_key, {key: time.time()})
+        if vector:
+            encoded = base64.b64encode(self._unit(vector).tobytes()).decode()
+            pipe.hset(self.vectors_key, key, encoded)
+        pipe.zcard(self.lru_key)
+        *_, size = await pipe.execute()
+
+        if size > self.max_entries:
+            evicted = [k for k, _ in await self.client.zpopmin(self.lru_key, size - self.max_entries)]
+            if evicted:
+                await self._drop(evicted)
+
+    async def _accept(self, key: str, raw: Optional[str], version: int, referenced: bool) -> Optional[dict]:
+        """`referenced`: the key is still listed in the LRU (so it was stored once)."""
+        if raw is None:
+            # Expired via TTL: drop the dangling LRU/vector references.
+            # A plain miss was never stored, so there is nothing to delete.
+            if referenced:
+                await self._drop([key])
+            return None
+        entry = json.loads(raw)
+        if entry.get("version") != version:
+            await self._drop([key])
+            return None
+        await self.client.zadd(self.lru_key, {key: time.time()})
+        return entry
+
+    async def _drop(self, keys: List[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(*keys)
+        pipe.zrem(self.lru_key, *keys)
+        pipe.hdel(self.vectors_key, *keys)
+        await pipe.execute()
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+
+def cache_options(request: SearchRequest) -> dict:
+    """Request options that change the result set (part of the cache scope)."""
+    if not request.rerank:
+        return {"rerank": False}
+    return {"rerankMultiplier": request.rerankMultiplier or RERANK_MULTIPLIER}
+
+
+def fully_reranked(request: SearchRequest, timings: SearchTimings) -> bool:
+    """
+    Whether the result matches its cache scope: with rerank requested, only
+    results the loaded model scored completely (no budget cut-off) are cached.
+    """
+    if reranker is None or not request.rerank:
+        return True
+    if reranker.model is None:
+        return False
+    return timings.reranked >= timings.rerankCandidates or timings.rerankCandidates <= 1
+
+
+async def cached_result(query: str, scope: str, timings: SearchTimings) -> Tuple[Optional[dict], int]:
+    """
+    Looks up both cache levels.
+
+    Returns:
+        (entry or None, collection version to stamp a new entry with)
+    """
+    if query_cache is None:
+        return None, 0
+    try:
+        entry = await query_cache.get(query, scope)
+        if entry:
+            timings.cache = "exact"
+            return entry, entry["version"]
+        version = await query_cache.version()
+        vector, _ = await embed_query(query)
+        entry = await query_cache.get_similar(vector, scope) if vector else None
+        if entry:
+            timings.cache = "semantic"
+        return entry, version
+    except Exception as e:
+        logger.warning(f"Query cache lookup failed: {e}")
+        return None, 0
+
+
+async def store_result(query: str, scope: str, version: int, sources: List["Source"], answer: str) -> None:
+    """Stores a computed answer (no-op without Redis)."""
+    if query_cache is None or not sources:
+        return
+    try:
+        vector = query_embedding_cache.get(query.strip())
+        await query_cache.put(query, scope, version, vector, [s.model_dump(mode="json") for s in sources], answer)
+    except Exception as e:
+        logger.warning(f"Query cache store failed: {e}")
+
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder reranking with pair-score LRU and length-sorted micro-batches.
+
+    Mirrors services/reranker.RerankingService (the repo-level service cannot
+    be imported into this image). Scoring runs in a single-worker executor;
+    with a deadline, candidates are scored in retrieval-order windows and
+    scoring stops once the next batch would end past the deadline.
+    """
+
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL,
+        batch_size: int = RERANK_BATCH_SIZE,
+        max_batch_chars: int = RERANK_MAX_BATCH_CHARS,
+        snippet_chars: int = RERANK_SNIPPET_CHARS,
+        cache_size: int = RERANK_CACHE_SIZE,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_batch_chars = max_batch_chars
+        self.snippet_chars = snippet_chars
+        self.cache_size = cache_size
+        self.model = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._loading: Optional[asyncio.Future] = None
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._last_batch_s: Dict[int, float] = {}
+
+    def start_loading(self) -> None:
+        """Loads the model in the executor without blocking the caller."""
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().run_in_executor(self.executor, self._load)
+
+    def _load(self) -> None:
+        try:
+            from sentence_transformers import CrossEncoder
+            logger.info(f"Loading reranker: {self.model_name}...")
+            self.model = CrossEncoder(self.model_name)
+            logger.info("✓ Reranker ready")
+        except Exception as e:
+            logger.warning(f"Reranker unavailable: {e}")
+
+    @staticmethod
+    def hit_text(hit: dict) -> str:
+        payload = hit.get("payload") or {}
+        return payload.get("text") or payload.get("excerpt") or payload.get("content") or ""
+
+    async def rerank(
+        self,
+        query: str,
+        hits: List[dict],
+        top_k: int,
+        budget_ms: Optional[float] = None
+    ) -> Tuple[List[dict], int]:
+        """
+        Returns (top_k hits, number of hits actually reranked).
+
+        Scored hits come first by rerank score, unscored hits follow in
+        retrieval order. The budget includes waiting for the executor.
+        """
+        if self.model is None or len(hits) <= 1:
+            self.start_loading()
+            return hits[:top_k], 0
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+        items = [(str(h["id"]), self.hit_text(h)) for h in hits]
+        loop = asyncio.get_running_loop()
+        scores = await loop.run_in_executor(self.executor, self.score, query, items, deadline)
+
+        scored = sorted(
+            ((hit, score) for hit, score in zip(hits, scores) if score is not None),
+            key=lambda pair: pair[1],
+            reverse=True
+        )
+        for hit, score in scored:
+            hit["rerankScore"] = score
+        ranked = [hit for hit, _ in scored] + [h for h, score in zip(hits, scores) if score is None]
+        return ranked[:top_k], len(scored)
+
+    def score(
+        self,
+        query: str,
+        items: List[Tuple[str, str]],
+        deadline: Optional[float] = None
+    ) -> List[Optional[float]]:
+        """
+        Pair scores for (id, text) items; None where the deadline hit first.
+        Cached by the text actually scored: lexical hits reuse the chunk-0 id
+        with an FTS snippet, so the id alone would mix up scores.
+        """
+        query_hash = hashlib.sha1(query.encode()).hexdigest()[:16]
+        snippets = {i: text[:self.snippet_chars] for i, (_, text) in enumerate(items)}
+        keys = [(query_hash, hashlib.sha1(snippets[i].encode()).hexdigest()) for i in range(len(items))]
+        scores: List[Optional[float]] = [self._cache.get(key) for key in keys]
+        misses = [i for i, score in enumerate(scores) if score is None]
+
+        window = max(1, len(misses)) if deadline is None else self.batch_size * 2
+        batches = [
+            batch
+            for start in range(0, len(misses), window)
+            for batch in self._length_buckets(misses[start:start + window], snippets)
+        ]
+        for batch in batches:
+            expected_s = self._last_batch_s.get(len(batch), 0.0)
+            if deadline is not None and time.perf_counter() + expected_s > deadline:
+                break
+            t0 = time.perf_counter()
+            batch_scores = self.model.predict(
+                [(query, snippets[i]) for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False
+            )
+            self._last_batch_s[len(batch)] = time.perf_counter() - t0
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+                self._cache[keys[i]] = scores[i]
+
+        for key, score in zip(keys, scores):
+            if score is not None:
+                self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return scores
+
+    def _length_buckets(self, indices: List[int], snippets: Dict[int, str]) -> List[List[int]]:
+        """Length-sorted batches bounded by batch_size and padded size."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for i in sorted(indices, key=lambda i: len(snippets[i])):
+            padded = (len(current) + 1) * max(1, len(snippets[i]))
+            if current and (len(current) >= self.batch_size or padded > self.max_batch_chars):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+
+async def retrieve(request: SearchRequest, timings: SearchTimings) -> List[dict]:
+    """
+    Retrieval for the search endpoints: over-fetch K x m fused candidates,
+    rerank them within the latency budget and return the top K.
+    """
+    use_rerank = reranker is not None and request.rerank
+    multiplier = (request.rerankMultiplier or RERANK_MULTIPLIER) if use_rerank else 1
+    hits = await search_qdrant(request.query, request.limit * multiplier, timings, request.filters)
+    if not use_rerank:
+        return hits[:request.limit]
+
+    budget_ms = request.rerankBudgetMs if request.rerankBudgetMs is not None else RERANK_BUDGET_MS
+    t0 = time.perf_counter()
+    ranked, reranked = await reranker.rerank(request.query, hits, request.limit, budget_ms)
+    timings.rerankMs = elapsed_ms(t0)
+    timings.rerankCandidates = len(hits)
+    timings.reranked = reranked
+    return ranked
+
+
+async def refresh_collection_stats() -> None:
+    """Refresh the cached collection stats once."""
+    try:
+        response = await http_client.get(
+            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}",
+            timeout=5.0
         )
         if response.status_code == 200:
-            data = response.json()
-            return data.get("result", {}).get("points", [])
+            stats = response.json().get("result", {})
+            collection_stats["documentsTotal"] = stats.get("points_count", 0) or stats.get("vectors_count", 0)
+            collection_stats["refreshedAt"] = time.time()
+    except Exception as e:
+        logger.debug(f"Qdrant stats refresh failed: {e}")
+
+
+async def collection_stats_loop() -> None:
+    """Keeps collection_stats fresh every COLLECTION_STATS_INTERVAL_S."""
+    while True:
+        await refresh_collection_stats()
+        await asyncio.sleep(COLLECTION_STATS_INTERVAL_S)
+
+
+async def probe_gpu() -> dict:
+    """GPU status from the document-processor health endpoint."""
+    try:
+        response = await http_client.get(f"{DOCUMENT_PROCESSOR_URL}/health", timeout=PIPELINE_PROBE_TIMEOUT_S)
+        if response.status_code == 200:
+            return response.json().get("gpu") or {}
+    except Exception as e:
+        logger.debug(f"Document processor not available: {e}")
+    return {}
+
+
+async def probe_queue_depth() -> int:
+    """Total intake queue depth: XLEN of all queues in one pipelined round trip."""
+    if not redis_client:
+        return 0
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for queue in INTAKE_QUEUES:
+            pipe.xlen(queue)
+        lengths = await pipe.execute(raise_on_error=False)
+        return sum(length for length in lengths if isinstance(length, int))
+    except Exception as e:
+        logger.debug(f"Redis queue check failed: {e}")
+        return 0
+
+
+async def probe_workers() -> dict:
+    """Worker counts from the orchestrator."""
+    try:
+        response = await http_client.get(f"{ORCHESTRATOR_URL}/stats", timeout=PIPELINE_PROBE_TIMEOUT_S)
+        if response.status_code == 200:
+            return response.json()
+    except Exception as e:
+        logger.debug(f"Orchestrator not available: {e}")
+    return {}
+
+
+async def probe_qdrant() -> Optional[int]:
+    """Indexed point count, None if Qdrant is unreachable."""
+    try:
+        response = await http_client.get(
+            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}",
+            timeout=PIPELINE_PROBE_TIMEOUT_S
+        )
+        if response.status_code == 200:
+            stats = response.json().get("result", {})
+            return stats.get("points_count", 0) or stats.get("vectors_count", 0)
+    except Exception as e:
+        logger.debug(f"Qdrant stats failed: {e}")
+    return None
+
+
+async def refresh_pipeline_status() -> None:
+    """Runs all status probes concurrently and replaces the snapshot."""
+    t0 = time.perf_counter()
+    gpu, queue_depth, workers, points = await asyncio.gather(
+        probe_gpu(), probe_queue_depth(), probe_workers(), probe_qdrant()
+    )
+    now = time.time()
+    pipeline_snapshot["status"] = PipelineStatus(
+        gpuStatus="online" if gpu.get("available") else "offline",
+        gpuModel=gpu.get("name", "Unknown"),
+        vramUsage=gpu.get("memory_used_percent", 0),
+        workersActive=workers.get("active_workers", 0),
+        workersTotal=workers.get("total_workers", 3),
+        queueDepth=queue_depth,
+        indexedDocuments=points or 0,
+        lastSync=datetime.fromtimestamp(now),
+        refreshMs=elapsed_ms(t0)
+    )
+    pipeline_snapshot["qdrantOnline"] = points is not None
+    pipeline_snapshot["refreshedAt"] = now
+
+
+async def pipeline_status_loop() -> None:
+    """Keeps pipeline_snapshot fresh every PIPELINE_STATUS_INTERVAL_S."""
+    while True:
+        try:
+            await refresh_pipeline_status()
+        except Exception as e:
+            logger.warning(f"Pipeline status refresh failed: {e}")
+        await asyncio.sleep(PIPELINE_STATUS_INTERVAL_S)
+
+
+async def stream_llm_tokens(query: str, sources: List[Source], queue: asyncio.Queue) -> None:
+    """Runs the streaming LLM call and forwards tokens; None marks the end."""
+    try:
+        async for chunk in generate_llm_response(query, sources, stream=True):
+            await queue.put(chunk)
+    finally:
+        await queue.put(None)
+
+
+async def fetch_payloads(point_ids: List, fields: Optional[List[str]] = SOURCE_PAYLOAD_FIELDS) -> dict:
+    """Fetch payloads for the given point ids in one request (projected to `fields`)."""
+    if not point_ids:
+        return {}
+    response = await http_client.post(
+        f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points",
+        json={
+            "ids": point_ids,
+            "with_payload": {"include": fields} if fields else True,
+            "with_vector": False
+        },
+        timeout=10.0
+    )
+    if response.status_code != 200:
+        logger.warning(f"Qdrant payload fetch failed: {response.status_code}")
+        return {}
+    return {str(p["id"]): p.get("payload", {}) for p in response.json().get("result", [])}
+
+
+async def backfill_excerpts(hits: List[dict]) -> None:
+    """
+    Points indexed before excerpts were precomputed carry only their text:
+    load text/content for just those hits in one request (payloads updated in place).
+    """
+    missing = [
+        h for h in hits
+        if not any((h.get("payload") or {}).get(f) for f in ["excerpt", *EXCERPT_FALLBACK_FIELDS])
+    ]
+    if not missing:
+        return
+    payloads = await fetch_payloads([h["id"] for h in missing], EXCERPT_FALLBACK_FIELDS)
+    for h in missing:
+        h["payload"] = {**(h.get("payload") or {}), **payloads.get(str(h["id"]), {})}
+
+
+def collapse_by_parent(scored: List[dict], limit: int) -> List[dict]:
+    """
+    Keeps the best-scoring chunk per parent document.
+
+    Points without parent_id (legacy one-vector-per-file points) are their
+    own parent. Input must be sorted by score (Qdrant order).
+    """
+    seen = set()
+    collapsed = []
+    for point in scored:
+        parent = (point.get("payload") or {}).get("parent_id") or point["id"]
+        if parent in seen:
+            continue
+        seen.add(parent)
+        collapsed.append(point)
+        if len(collapsed) >= limit:
+            break
+    return collapsed
+
+
+def _filter_extensions(filters: dict) -> List[str]:
+    """Extensions (with dot) selected by the `types` and `extensions` filters."""
+    extensions = [
+        f".{ext}" for ext, kind in SOURCE_TYPE_MAP.items() if kind in (filters.get("types") or [])
+    ]
+    extensions += ["." + e.lower().lstrip(".") for e in filters.get("extensions") or []]
+    return list(dict.fromkeys(extensions))
+
+
+def build_qdrant_filter(filters: Optional[dict]) -> Optional[dict]:
+    """
+    Translates request filters into a Qdrant filter, so filtering happens
+    inside the ANN traversal instead of after it. All fields are payload
+    indexes (config/embeddings.get_qdrant_payload_indexes).
+    """
+    if not filters:
+        return None
+    must = []
+    if filters.get("types") or filters.get("extensions"):
+        must.append({"key": "extension", "match": {"any": _filter_extensions(filters)}})
+    for field, key in (("categories", "category"), ("tags", "tags")):
+        if filters.get(field):
+            must.append({"key": key, "match": {"any": list(filters[field])}})
+
+    years = {op: filters[name] for op, name in (("gte", "yearFrom"), ("lte", "yearTo")) if filters.get(name)}
+    if years:
+        must.append({"key": "year_created", "range": years})
+    created = {}
+    for op, name in (("gte", "createdAfter"), ("lte", "createdBefore")):
+        if filters.get(name):
+            try:
+                created[op] = int(datetime.fromisoformat(str(filters[name])).timestamp())
+            except ValueError:
+                logger.warning(f"Ignoring invalid date in filter {name}: {filters[name]}")
+    if created:
+        must.append({"key": "file_created_timestamp", "range": created})
+    return {"must": must} if must else None
+
+
+def ledger_filter(filters: Optional[dict]) -> Optional[Tuple[str, list]]:
+    """
+    The same filters as SQL over the ledger's files table for the lexical leg.
+
+    Returns ("", []) without filters and None if a filter cannot be
+    evaluated on the ledger (creation dates are only in Qdrant payloads);
+    the lexical leg is skipped then.
+    """
+    if not filters:
+        return "", []
+    if any(filters.get(name) for name in ("yearFrom", "yearTo", "createdAfter", "createdBefore")):
+        return None
+    clauses, params = [], []
+    extensions = _filter_extensions(filters)
+    if extensions:
+        clauses.append("(" + " OR ".join(["lower(f.current_filename) LIKE ?"] * len(extensions)) + ")")
+        params += [f"%{ext}" for ext in extensions]
+    if filters.get("categories"):
+        clauses.append(f"f.category IN ({', '.join('?' * len(filters['categories']))})")
+        params += list(filters["categories"])
+    if filters.get("tags"):
+        clauses.append(
+            "EXISTS (SELECT 1 FROM json_each(CASE WHEN json_valid(f.tags) THEN f.tags ELSE '[]' END) "
+            f"WHERE value IN ({', '.join('?' * len(filters['tags']))}))"
+        )
+        params += list(filters["tags"])
+    return "".join(f" AND {c}" for c in clauses), params
+
+
+async def dense_search(
+    query: str,
+    limit: int,
+    timings: SearchTimings,
+    qdrant_filter: Optional[dict] = None
+) -> List[dict]:
+    """
+    Dense leg: query embedding + (filtered) ANN search, collapsed per parent document.
+
+    Only parent_id/id are fetched here; full payloads are loaded for the
+    final (fused) hits in search_qdrant.
+    """
+    t0 = time.perf_counter()
+    vector, cached = await embed_query(query)
+    timings.embedMs = elapsed_ms(t0)
+    timings.embedCached = cached
+    if not vector:
+        logger.warning("No query embedding available")
+        return []
+
+    body = {
+        "vector": vector,
+        "limit": limit * CHUNK_OVERFETCH,
+        "with_payload": {"include": ["parent_id", "id"]},
+        "with_vector": False
+    }
+    if qdrant_filter:
+        body["filter"] = qdrant_filter
+    if QDRANT_SEARCH_PARAMS:
+        body["params"] = QDRANT_SEARCH_PARAMS
+    t0 = time.perf_counter()
+    response = await http_client.post(
+        f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/search",
+        json=body,
+        timeout=10.0
+    )
+    timings.annMs = elapsed_ms(t0)
+    if response.status_code != 200:
         logger.warning(f"Qdrant search failed: {response.status_code}")
+        return []
+
+    hits = []
+    for point in collapse_by_parent(response.json().get("result", []), limit):
+        payload = point.get("payload") or {}
+        hits.append({
+            "id": point["id"],
+            "score": point.get("score"),
+            "key": str(payload.get("parent_id") or payload.get("id") or point["id"]),
+            "payload": None,
+        })
+    timings.denseHits = len(hits)
+    return hits
+
+
+def fts_query(query: str) -> str:
+    """Builds an FTS5 MATCH expression: quoted terms joined with OR (BM25 ranks)."""
+    terms = re.findall(r"\w[\w\-.@]*", query.lower())
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in dict.fromkeys(terms))
+
+
+def _lexical_search(query: str, limit: int, where: str = "", params: Optional[list] = None) -> List[dict]:
+    """BM25 over the ledger's files_fts index (runs in a worker thread)."""
+    match = fts_query(query)
+    if not match or not os.path.exists(LEDGER_DB_PATH):
+        return []
+    conn = sqlite3.connect(f"file:{LEDGER_DB_PATH}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            """
+            SELECT f.sha256, f.current_filename, f.current_path, f.category,
+                   f.mime_type, f.tags,
+                   snippet(files_fts, 4, '', '', ' … ', 48),
+                   bm25(files_fts, 2.0, 2.0, 0.5, 1.0, 1.0) AS rank
+            FROM files_fts JOIN files f ON f.id = files_fts.rowid
+            WHERE files_fts MATCH ?""" + where + """
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, *(params or []), limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    hits = []
+    for sha256, filename, path, category, mime_type, tags, snippet, rank in rows:
+        try:
+            tags = json.loads(tags) if tags else []
+        except (TypeError, ValueError):
+            tags = []
+        hits.append({
+            "id": str(uuid.uuid5(POINT_ID_NAMESPACE, f"{sha256}:0")),
+            "score": -rank,
+            "key": sha256,
+            "payload": {
+                "id": sha256,
+                "parent_id": sha256,
+                "filename": filename,
+                "file_path": path,
+                "category": category,
+                "mime_type": mime_type,
+                "tags": tags,
+                "text": snippet or "",
+                "excerpt": snippet or "",
+            },
+        })
+    return hits
+
+
+async def lexical_search(
+    query: str,
+    limit: int,
+    timings: SearchTimings,
+    filters: Optional[dict] = None
+) -> List[dict]:
+    """Lexical leg: BM25 over the shadow ledger, off the event loop."""
+    sql_filter = ledger_filter(filters)
+    if sql_filter is None:
+        return []
+    t0 = time.perf_counter()
+    try:
+        hits = await asyncio.to_thread(_lexical_search, query, limit, *sql_filter)
+    except sqlite3.Error as e:
+        logger.warning(f"Lexical search unavailable: {e}")
+        hits = []
+    timings.lexicalMs = elapsed_ms(t0)
+    timings.lexicalHits = len(hits)
+    return hits
+
+
+def rrf_fuse(
+    legs: List[Tuple[List[dict], float]],
+    limit: int,
+    k: int = HYBRID_RRF_K
+) -> List[dict]:
+    """
+    Weighted reciprocal rank fusion: score = sum(weight / (k + rank)).
+
+    Hits are matched across legs by their document key; the first leg's
+    hit (and point id) wins when a document appears in several legs.
+    """
+    fused: Dict[str, dict] = {}
+    for hits, weight in legs:
+        for rank, hit in enumerate(hits, 1):
+            entry = fused.setdefault(hit["key"], {**hit, "score": 0.0})
+            entry["score"] += weight / (k + rank)
+    return sorted(fused.values(), key=lambda h: h["score"], reverse=True)[:limit]
+
+
+async def search_qdrant(
+    query: str,
+    limit: int = 8,
+    timings: Optional[SearchTimings] = None,
+    filters: Optional[dict] = None
+) -> List[dict]:
+    """
+    Hybrid search: Qdrant ANN fused with BM25 over the shadow ledger.
+
+    Stages (timed into `timings`):
+        1. embed   - query embedding (cached per query string)
+        2. ann     - /points/search (only parent_id), over-fetched and
+                     collapsed so one long document cannot fill all slots
+        2b. lexical - FTS5/BM25 in a worker thread, concurrent with 1+2
+        3. fusion  - reciprocal rank fusion per document
+        4. payload - one batched payload fetch for the dense hit ids,
+                     projected to SOURCE_PAYLOAD_FIELDS (no full text);
+                     chunk text only for hits without an excerpt
+
+    Request filters are applied inside both legs (Qdrant filter / SQL).
+    With USE_HYBRID_SEARCH disabled only the dense leg runs.
+    """
+    timings = timings if timings is not None else SearchTimings()
+    qdrant_filter = build_qdrant_filter(filters)
+    try:
+        if USE_HYBRID_SEARCH:
+            depth = max(limit, HYBRID_CANDIDATES)
+            dense, lexical = await asyncio.gather(
+                dense_search(query, depth, timings, qdrant_filter),
+                lexical_search(query, depth, timings, filters)
+            )
+            hits = rrf_fuse(
+                [(dense, HYBRID_DENSE_WEIGHT), (lexical, HYBRID_LEXICAL_WEIGHT)],
+                limit
+            )
+        else:
+            hits = await dense_search(query, limit, timings, qdrant_filter)
+
+        t0 = time.perf_counter()
+        payloads = await fetch_payloads([h["id"] for h in hits if h["payload"] is None])
+        results = [
+            {
+                "id": h["id"],
+                "score": h["score"],
+                "payload": h["payload"] if h["payload"] is not None else payloads.get(str(h["id"]), {})
+            }
+            for h in hits
+        ]
+        await backfill_excerpts(results)
+        timings.payloadMs = elapsed_ms(t0)
+        return results
     except Exception as e:
-        logger.error(f"Qdrant search failed: {e}")
+        logger.error(f"Search failed: {e}")
     return []
 
 
+LLM_ERROR_PREFIX = "Fehler bei der Antwortgenerierung"
+
+
 async def generate_llm_response(
     query: str,
     sources: List[Source],
@@ -434,7 +1479,7 @@ ANTWORT (mit Quellenverweisen ¹²³):"""
 
     except Exception as e:
         logger.error(f"LLM generation failed: {e}")
-        yield f"Fehler bei der Antwortgenerierung: {str(e)}"
+        yield f"{LLM_ERROR_PREFIX}: {str(e)}"
 
 
 def extract_citations(answer: str, sources: List[Source]) -> List[Citation]:
@@ -531,8 +1576,24 @@ async def neural_search(request: SearchRequest):
 
     logger.info(f"[{search_id}] Neural search: {request.query}")
 
+    timings = SearchTimings()
+    scope = QueryResultCache.scope(request.limit, request.filters, cache_options(request))
+    cached, cache_version = await cached_result(request.query, scope, timings)
+    if cached:
+        sources = [Source(**s) for s in cached["sources"]]
+        return SearchResponse(
+            id=search_id,
+            query=request.query,
+            answer=cached["answer"],
+            citations=extract_citations(cached["answer"], sources),
+            sources=sources,
+            timestamp=datetime.now(),
+            processingTimeMs=int((datetime.now() - start_time).total_seconds() * 1000),
+            timings=timings
+        )
+
     # Step 1: Search Qdrant
-    hits = await search_qdrant(request.query, request.limit)
+    hits = await retrieve(request, timings)
 
     if not hits:
         return SearchResponse(
@@ -542,20 +1603,25 @@ async def neural_search(request: SearchRequest):
             citations=[],
             sources=[],
             timestamp=datetime.now(),
-            processingTimeMs=int((datetime.now() - start_time).total_seconds() * 1000)
+            processingTimeMs=int((datetime.now() - start_time).total_seconds() * 1000),
+            timings=timings
         )
 
     # Step 2: Convert hits to sources
     sources = [convert_hit_to_source(hit, i) for i, hit in enumerate(hits)]
 
     # Step 3: Generate LLM response
+    t0 = time.perf_counter()
     answer_parts = []
     async for chunk in generate_llm_response(request.query, sources, stream=False):
         answer_parts.append(chunk)
     answer = "".join(answer_parts)
+    timings.llmMs = elapsed_ms(t0)
 
     # Step 4: Extract citations
     citations = extract_citations(answer, sources)
+    if not answer.startswith(LLM_ERROR_PREFIX) and fully_reranked(request, timings):
+        await store_result(request.query, scope, cache_version, sources, answer)
 
     processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
 
@@ -566,7 +1632,8 @@ async def neural_search(request: SearchRequest):
         citations=citations,
         sources=sources,
         timestamp=datetime.now(),
-        processingTimeMs=processing_time
+        processingTimeMs=processing_time,
+        timings=timings
     )
 
 
@@ -580,17 +1647,17 @@ async def neural_search_stream(request: SearchRequest):
 
     async def event_generator():
         start_time = datetime.now()
+        keywords = extract_keywords(request.query)
 
-        # Step 1: Analyzing
+        # Step 1: Analyzing (progress events only mark real stage transitions)
         yield {
             "event": "progress",
             "data": json.dumps({
                 "step": "analyzing",
                 "progress": 10,
-                "keywords": extract_keywords(request.query)
+                "keywords": keywords
             })
         }
-        await asyncio.sleep(0.5)
 
         # Step 2: Searching
         yield {
@@ -598,76 +1665,86 @@ async def neural_search_stream(request: SearchRequest):
             "data": json.dumps({
                 "step": "searching",
                 "progress": 30,
-                "keywords": extract_keywords(request.query)
+                "keywords": keywords
             })
         }
 
-        hits = await search_qdrant(request.query, request.limit)
-        total_docs = 0
-        try:
-            response = await http_client.get(
-                f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}",
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                stats = response.json().get("result", {})
-                total_docs = stats.get("points_count", 0) or stats.get("vectors_count", 0)
-        except Exception:
-            pass
+        timings = SearchTimings()
+        scope = QueryResultCache.scope(request.limit, request.filters, cache_options(request))
+        cached, cache_version = await cached_result(request.query, scope, timings)
+        if cached:
+            sources = [Source(**s) for s in cached["sources"]]
+        else:
+            hits = await retrieve(request, timings)
+            sources = [convert_hit_to_source(hit, i) for i, hit in enumerate(hits)]
 
         yield {
             "event": "progress",
             "data": json.dumps({
                 "step": "searching",
                 "progress": 50,
-                "documentsFound": len(hits),
-                "documentsTotal": total_docs
+                "documentsFound": len(sources),
+                "documentsTotal": collection_stats["documentsTotal"]
             })
         }
 
-        # Step 3: Reading sources
-        sources = [convert_hit_to_source(hit, i) for i, hit in enumerate(hits)]
+        # Step 3: Reading - start the LLM as soon as the top hits are known;
+        # sources are serialized and sent while the prompt is processed.
+        # A cached answer is replayed through the same queue.
+        t0 = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        llm_task: Optional[asyncio.Task] = None
+        if cached:
+            queue.put_nowait(cached["answer"])
+            queue.put_nowait(None)
+        else:
+            llm_task = asyncio.create_task(stream_llm_tokens(request.query, sources, queue))
 
-        for i, source in enumerate(sources):
+        try:
+            yield {
+                "event": "sources",
+                "data": json.dumps([s.model_dump() for s in sources])
+            }
             yield {
                 "event": "progress",
                 "data": json.dumps({
                     "step": "reading",
-                    "progress": 50 + int((i + 1) / len(sources) * 25),
-                    "currentSource": source.filename,
-                    "sourcesRead": i + 1,
+                    "progress": 75,
+                    "sourcesRead": len(sources),
                     "sourcesTotal": len(sources)
                 })
             }
-            await asyncio.sleep(0.1)
-
-        # Send sources
-        yield {
-            "event": "sources",
-            "data": json.dumps([s.model_dump() for s in sources])
-        }
 
-        # Step 4: Synthesizing
-        yield {
-            "event": "progress",
-            "data": json.dumps({
-                "step": "synthesizing",
-                "progress": 80
-            })
-        }
-
-        # Stream LLM response
-        full_answer = ""
-        async for chunk in generate_llm_response(request.query, sources, stream=True):
-            full_answer += chunk
+            # Step 4: Synthesizing
             yield {
-                "event": "token",
-                "data": chunk
+                "event": "progress",
+                "data": json.dumps({
+                    "step": "synthesizing",
+                    "progress": 80
+                })
             }
 
+            # Stream LLM tokens
+            full_answer = ""
+            while (chunk := await queue.get()) is not None:
+                if not full_answer:
+                    timings.firstTokenMs = elapsed_ms(t0)
+                full_answer += chunk
+                yield {
+                    "event": "token",
+                    "data": chunk
+                }
+            timings.llmMs = elapsed_ms(t0)
+        finally:
+            # Client disconnected mid-stream → stop the LLM call
+            if llm_task and not llm_task.done():
+                llm_task.cancel()
+
         # Complete
         citations = extract_citations(full_answer, sources)
         processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        if not cached and not full_answer.startswith(LLM_ERROR_PREFIX) and fully_reranked(request, timings):
+            await store_result(request.query, scope, cache_version, sources, full_answer)
 
         yield {
             "event": "complete",
@@ -676,7 +1753,8 @@ async def neural_search_stream(request: SearchRequest):
                 "query": request.query,
                 "answer": full_answer,
                 "citations": [c.model_dump() for c in citations],
-                "processingTimeMs": processing_time
+                "processingTimeMs": processing_time,
+                "timings": timings.model_dump()
             })
         }
 
@@ -693,76 +1771,17 @@ async def neural_search_stream(request: SearchRequest):
 @app.get("/api/pipeline/status", response_model=PipelineStatus)
 async def get_pipeline_status():
     """
-    Get aggregated pipeline status from all services.
-    """
-    status = PipelineStatus(
-        gpuStatus="offline",
-        gpuModel="Unknown",
-        vramUsage=0,
-        workersActive=0,
-        workersTotal=3,
-        queueDepth=0,
-        indexedDocuments=0,
-        lastSync=datetime.now()
-    )
-
-    # Get GPU status from document-processor
-    try:
-        response = await http_client.get(
-            "http://document-processor:8005/health",
-            timeout=5.0
-        )
-        if response.status_code == 200:
-            data = response.json()
-            if 'gpu' in data:
-                status.gpuStatus = "online" if data['gpu'].get('available') else "offline"
-                status.gpuModel = data['gpu'].get('name', 'Unknown')
-                status.vramUsage = data['gpu'].get('memory_used_percent', 0)
-    except Exception as e:
-        logger.debug(f"Document processor not available: {e}")
-
-    # Get queue depth from Redis
-    if redis_client:
-        try:
-            # Count items in priority queues
-            queues = ['intake:priority', 'intake:normal', 'intake:bulk']
-            total_depth = 0
-            for queue in queues:
-                try:
-                    length = await redis_client.xlen(queue)
-                    total_depth += length
-                except:
-                    pass
-            status.queueDepth = total_depth
-        except Exception as e:
-            logger.debug(f"Redis queue check failed: {e}")
-
-    # Get worker status from orchestrator
-    try:
-        response = await http_client.get(
-            "http://orchestrator:8020/stats",
-            timeout=5.0
-        )
-        if response.status_code == 200:
-            data = response.json()
-            status.workersActive = data.get('active_workers', 0)
-            status.workersTotal = data.get('total_workers', 3)
-    except Exception as e:
-        logger.debug(f"Orchestrator not available: {e}")
+    Aggregated pipeline status, served from the background snapshot.
 
-    # Get index stats from Qdrant
-    try:
-        response = await http_client.get(
-            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}",
-            timeout=5.0
-        )
-        if response.status_code == 200:
-            stats = response.json().get("result", {})
-            status.indexedDocuments = stats.get("points_count", 0) or stats.get("vectors_count", 0)
-    except Exception as e:
-        logger.debug(f"Qdrant stats failed: {e}")
-
-    return status
+    The probes run concurrently every PIPELINE_STATUS_INTERVAL_S in
+    pipeline_status_loop(); this endpoint does no I/O except on the very
+    first call before the snapshot exists.
+    """
+    if pipeline_snapshot["status"] is None:
+        await refresh_pipeline_status()
+    return pipeline_snapshot["status"].model_copy(
+        update={"snapshotAgeS": round(time.time() - pipeline_snapshot["refreshedAt"], 3)}
+    )
 
 
 @app.post("/api/neural-search/follow-ups")
@@ -784,9 +1803,49 @@ async def get_follow_ups(request: SearchRequest):
     ]
 
 
+@app.post("/api/rerank", response_model=RerankResponse)
+async def rerank_candidates(request: RerankRequest):
+    """
+    Rerank externally retrieved candidates (used by conductor-api /rag/search).
+
+    Candidates not scored within the budget keep their input order behind
+    the scored ones and are returned with score None.
+    """
+    if reranker is None:
+        raise HTTPException(status_code=503, detail="Reranking disabled")
+
+    hits = [{"id": c.id, "payload": {"text": c.text}} for c in request.candidates]
+    t0 = time.perf_counter()
+    budget_ms = request.budgetMs if request.budgetMs is not None else RERANK_BUDGET_MS
+    ranked, reranked = await reranker.rerank(request.query, hits, request.topK, budget_ms)
+    return RerankResponse(
+        results=[RerankResult(id=h["id"], score=h.get("rerankScore")) for h in ranked],
+        reranked=reranked,
+        rerankMs=elapsed_ms(t0)
+    )
+
+
+async def fetch_full_text(payload: dict) -> str:
+    """
+    Full document text for a point.
+
+    Chunk points only carry their chunk text; the document's extracted_text
+    lives on chunk 0 (scripts/utils/chunking.chunk_payload).
+    """
+    if payload.get("extracted_text"):
+        return payload["extracted_text"]
+    parent_id = payload.get("parent_id")
+    if parent_id and payload.get("chunk_index"):
+        first_id = str(uuid.uuid5(POINT_ID_NAMESPACE, f"{parent_id}:0"))
+        first = (await fetch_payloads([first_id], ["extracted_text"])).get(first_id, {})
+        if first.get("extracted_text"):
+            return first["extracted_text"]
+    return payload.get("content") or payload.get("text") or ""
+
+
 @app.get("/api/sources/{source_id}")
 async def get_source(source_id: str):
-    """Get detailed source information."""
+    """Get detailed source information including the full text (lazy, not part of search hits)."""
     try:
         response = await http_client.get(
             f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/{source_id}",
@@ -795,26 +1854,146 @@ async def get_source(source_id: str):
         if response.status_code == 200:
             data = response.json().get("result")
             if data:
-                return convert_hit_to_source(data, 0)
+                source = convert_hit_to_source(data, 0)
+                source.fullText = await fetch_full_text(data.get("payload") or {})
+                return source
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     raise HTTPException(status_code=404, detail="Source not found")
 
 
-@app.get("/api/sources/{source_id}/similar")
-async def get_similar_sources(source_id: str, limit: int = Query(default=5, ge=1, le=10)):
-    """Find sources similar to the given source."""
+# Related documents cache: (source_id, limit, filters) -> (expires_at, version, sources)
+similar_cache: "OrderedDict[str, Tuple[float, int, List[Source]]]" = OrderedDict()
+
+
+def similar_filter(
+    payload: dict,
+    same_type: bool = False,
+    same_folder: bool = False,
+    days: Optional[int] = None
+) -> dict:
+    """
+    Qdrant filter for related documents of the point with `payload`.
+
+    Always excludes the source document's own chunks; optionally restricts
+    to the same source type (by extension), the same folder or a window of
+    +/- `days` around its file_modified date.
+    """
+    must, must_not = [], []
+    parent_id = payload.get("parent_id")
+    if parent_id:
+        must_not.append({"key": "parent_id", "match": {"value": parent_id}})
+
+    if same_type:
+        source_type = detect_source_type(payload.get("filename", ""), payload)
+        extensions = [f".{ext}" for ext, kind in SOURCE_TYPE_MAP.items() if kind == source_type]
+        if extensions:
+            must.append({"key": "extension", "match": {"any": extensions}})
+
+    folder = payload.get("folder") or os.path.dirname(payload.get("file_path") or "")
+    if same_folder and folder:
+        must.append({"key": "folder", "match": {"value": folder}})
+
+    if days is not None and payload.get("file_modified"):
+        try:
+            modified = datetime.fromisoformat(payload["file_modified"])
+            window = timedelta(days=days)
+            must.append({"key": "file_modified", "range": {
+                "gte": (modified - window).isoformat(),
+                "lte": (modified + window).isoformat(),
+            }})
+        except ValueError:
+            logger.debug(f"Unparseable file_modified: {payload['file_modified']}")
+
+    result = {}
+    if must:
+        result["must"] = must
+    if must_not:
+        result["must_not"] = must_not
+    return result
+
+
+async def recommend_similar(source_id: str, payload: dict, limit: int, qdrant_filter: dict) -> List[Source]:
+    """Qdrant recommend on the stored vector of `source_id` (no re-embedding), one hit per parent."""
+    body = {
+        "positive": [source_id],
+        "limit": limit * CHUNK_OVERFETCH,
+        "with_payload": {"include": SOURCE_PAYLOAD_FIELDS},
+        "with_vector": False,
+    }
+    if qdrant_filter:
+        body["filter"] = qdrant_filter
+    if QDRANT_SEARCH_PARAMS:
+        body["params"] = QDRANT_SEARCH_PARAMS
+    response = await http_client.post(
+        f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/recommend",
+        json=body,
+        timeout=10.0
+    )
+    if response.status_code != 200:
+        logger.warning(f"Qdrant recommend failed: {response.status_code}")
+        return []
+
+    own_parent = payload.get("parent_id") or source_id
+    points = [
+        p for p in response.json().get("result", [])
+        if ((p.get("payload") or {}).get("parent_id") or p["id"]) != own_parent
+    ]
+    points = collapse_by_parent(points, limit)
+    await backfill_excerpts(points)
+    return [convert_hit_to_source(p, i) for i, p in enumerate(points)]
+
+
+@app.get("/api/sources/{source_id}/similar", response_model=List[Source])
+async def get_similar_sources(
+    source_id: str,
+    limit: int = Query(default=5, ge=1, le=10),
+    sameType: bool = Query(default=False),
+    sameFolder: bool = Query(default=False),
+    days: Optional[int] = Query(default=None, ge=0, le=3650)
+):
+    """
+    Related documents for the Evidence Board.
+
+    Uses the stored vector of the source point (Qdrant recommend), so no
+    embedding or LLM round trip is needed. Chunks of the same document are
+    collapsed; the source document itself is excluded.
+    """
+    cache_key = f"{source_id}:{limit}:{int(sameType)}{int(sameFolder)}:{days}"
+    version = 0
+    if query_cache:
+        try:
+            version = await query_cache.version()
+        except Exception as e:
+            logger.debug(f"Collection version unavailable: {e}")
+    cached = similar_cache.get(cache_key)
+    if cached and cached[0] > time.monotonic() and cached[1] == version:
+        similar_cache.move_to_end(cache_key)
+        return cached[2]
+
+    try:
+        payloads = await fetch_payloads(
+            [source_id],
+            ["parent_id", "filename", "extension", "folder", "file_path", "file_modified"]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if source_id not in payloads:
+        raise HTTPException(status_code=404, detail="Source not found")
+
+    payload = payloads[source_id]
     try:
-        response = await http_client.get(
-            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}/points/{source_id}",
-            timeout=5.0
+        sources = await recommend_similar(
+            source_id, payload, limit, similar_filter(payload, sameType, sameFolder, days)
         )
-        if response.status_code != 200:
-            raise HTTPException(status_code=404, detail="Source not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    return []
+    similar_cache[cache_key] = (time.monotonic() + SIMILAR_CACHE_TTL_S, version, sources)
+    similar_cache.move_to_end(cache_key)
+    while len(similar_cache) > SIMILAR_CACHE_SIZE:
+        similar_cache.popitem(last=False)
+    return sources
 
 
 # =============================================================================
@@ -825,16 +2004,7 @@ async def get_similar_sources(source_id: str, limit: int = Query(default=5, ge=1
 async def get_system_status():
     """System status for dashboard compatibility."""
     pipeline = await get_pipeline_status()
-    qdrant_status = "offline"
-    try:
-        response = await http_client.get(
-            f"{QDRANT_URL}/collections/{QDRANT_COLLECTION}",
-            timeout=5.0
-        )
-        if response.status_code == 200:
-            qdrant_status = "online"
-    except Exception:
-        pass
+    qdrant_status = "online" if pipeline_snapshot["qdrantOnline"] else "offline"
 
     return {
         "worker": "IDLE" if pipeline.gpuStatus == "online" else "OFFLINE",
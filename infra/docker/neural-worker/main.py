@@ -56,6 +56,28 @@ def get_embed_model():
         embed_model = SentenceTransformer(MODEL_NAME)
     return embed_model
 
+# Shared micro-batching embedding server; empty = local model in this process
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "")
+EMBED_MODEL = os.getenv("EMBED_MODEL", "Alibaba-NLP/gte-Qwen3-Embedding-0.6B")
+# Same setting for server and local model (config/embeddings.py: normalize=True)
+EMBED_NORMALIZE = os.getenv("EMBED_NORMALIZE", "true").lower() == "true"
+
+def encode_texts(texts: List[str]) -> List[List[float]]:
+    """Embed via the embedding server, falling back to the local model."""
+    if EMBEDDING_SERVICE_URL:
+        import httpx
+        try:
+            response = httpx.post(
+                f"{EMBEDDING_SERVICE_URL}/embed/batch",
+                json={"texts": texts, "model": EMBED_MODEL, "normalize": EMBED_NORMALIZE},
+                timeout=60.0,
+            )
+            response.raise_for_status()
+            return response.json()["embeddings"]
+        except Exception as e:
+            logger.warning(f"Embedding server failed, using local model: {e}")
+    return get_embed_model().encode(texts, normalize_embeddings=EMBED_NORMALIZE).tolist()
+
 def get_db():
     global db_connection
     if db_connection is None:
@@ -93,8 +115,7 @@ def create_embedding(payload: VectorStoreRequest):
     """
     Generate embedding for text (Internal utility).
     """
-    model = get_embed_model()
-    vector = model.encode(payload.text).tolist()
+    [vector] = encode_texts([payload.text])
     return {"vector": vector, "dim": len(vector)}
 
 @app.post("/vector/store")
@@ -102,11 +123,10 @@ def store_document(payload: VectorStoreRequest):
     """
     Store document in LanceDB.
     """
-    model = get_embed_model()
     db = get_db()
     
     # Generate Vector
-    vector = model.encode(payload.text).tolist()
+    [vector] = encode_texts([payload.text])
     
     # Open/Create Table
     table_name = "conductor_docs"
@@ -150,10 +170,9 @@ def search_vector(payload: VectorSearchRequest):
     """
     Semantic Search in LanceDB.
     """
-    model = get_embed_model()
     db = get_db()
     
-    query_vec = model.encode(payload.query).tolist()
+    [query_vec] = encode_texts([payload.query])
     
     try:
         table = db.open_table("conductor_docs")
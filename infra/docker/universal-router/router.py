@@ -15,6 +15,7 @@ Features:
 import os
 import json
 import asyncio
+import hashlib
 import mimetypes
 from pathlib import Path
 from datetime import datetime
@@ -22,6 +23,7 @@ from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, asdict
 import logging
 import struct
+import time
 
 import redis.asyncio as redis
 from fastapi import FastAPI, HTTPException, UploadFile, File
@@ -42,6 +44,43 @@ logger = logging.getLogger(__name__)
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
 
+# Pending-Entry Reclaimer für die Intake-Streams
+INTAKE_GROUP = "router-consumers"
+INTAKE_DLQ = os.getenv("INTAKE_DLQ", "dlq:intake")
+RECLAIM_INTERVAL_S = int(os.getenv("RECLAIM_INTERVAL_S", "30"))
+RECLAIM_MIN_IDLE_MS = int(os.getenv("RECLAIM_MIN_IDLE_MS", "60000"))
+RECLAIM_BATCH = int(os.getenv("RECLAIM_BATCH", "100"))
+MAX_DELIVERIES = int(os.getenv("MAX_DELIVERIES", "5"))
+
+# Intake-Scheduling
+# - "weighted": pro Runde `weight` Nachrichten je Stream (INTAKE_WEIGHTS)
+# - "strict":   höchste Priorität zuerst, Starvation-Schutz für niedrigere Streams
+INTAKE_STREAMS = ["intake:priority", "intake:normal", "intake:bulk"]
+INTAKE_SCHEDULING = os.getenv("INTAKE_SCHEDULING", "weighted").lower()
+INTAKE_WEIGHTS = os.getenv("INTAKE_WEIGHTS", "intake:priority=8,intake:normal=3,intake:bulk=1")
+INTAKE_BATCH = int(os.getenv("INTAKE_BATCH", "10"))
+STARVATION_TIMEOUT_S = float(os.getenv("STARVATION_TIMEOUT_S", "30"))
+
+# Content-Hash Deduplizierung vor dem Enqueue
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUP_BLOCK_SIZE = int(os.getenv("DEDUP_BLOCK_SIZE", str(64 * 1024)))
+DEDUP_PARTIAL_KEY = "dedup:partial"      # size:partial_hash → erster Kandidat
+DEDUP_CLAIM_PREFIX = "dedup:sha256:"     # sha256 → kanonischer Job (pending mit TTL / done)
+DEDUP_PENDING_PATHS = "dedup:pending"    # Pfad → sha256 laufender kanonischer Jobs
+DEDUP_RESULTS_KEY = "dedup:results"      # Pfad → Ergebnis-ID in DEDUP_RESULT_STREAM
+DEDUP_WAITING_PREFIX = "dedup:waiting:"  # sha256 → Duplikate, die auf das Ergebnis warten
+# Claims ohne Ergebnis verfallen nach dieser Zeit (länger als Extraktion inkl. Retries)
+DEDUP_PENDING_TTL_S = int(os.getenv("DEDUP_PENDING_TTL_S", str(6 * 3600)))
+# Output bzw. DLQ der Extraction Worker: Erfolg → Duplikate verknüpfen, Fehler → Claim freigeben
+DEDUP_RESULT_STREAM = os.getenv("DEDUP_RESULT_STREAM", "enrich:ner")
+DEDUP_FAILURE_STREAM = os.getenv("DEDUP_FAILURE_STREAM", "dlq:extract")
+DEDUP_GROUP = "dedup-linker"
+DEDUP_SWEEP_INTERVAL_S = int(os.getenv("DEDUP_SWEEP_INTERVAL_S", "300"))
+
+# Priority-Bänder für die extract:* Queues (Schwellen wie im Orchestrator)
+HIGH_PRIORITY_THRESHOLD = 75
+BULK_PRIORITY_THRESHOLD = 40
+
 
 # =============================================================================
 # MAGIC BYTES DATABASE
@@ -396,6 +435,364 @@ PROCESSOR_QUEUES = {
 }
 
 
+def priority_stream(queue: str, priority: int) -> str:
+    """
+    Priority-Sub-Stream einer Extraction Queue.
+
+    extract:documents:high (>= 75), extract:documents (normal),
+    extract:documents:bulk (< 40). Der Basis-Stream bleibt das Normal-Band,
+    damit bestehende Consumer weiter funktionieren.
+    """
+    if priority >= HIGH_PRIORITY_THRESHOLD:
+        return f"{queue}:high"
+    if priority < BULK_PRIORITY_THRESHOLD:
+        return f"{queue}:bulk"
+    return queue
+
+
+def priority_streams(queue: str) -> List[str]:
+    """Alle Sub-Streams einer Queue, höchste Priorität zuerst."""
+    return [f"{queue}:high", queue, f"{queue}:bulk"]
+
+
+def parse_weights(spec: str) -> Dict[str, int]:
+    """Parst 'stream=weight,stream=weight'."""
+    weights = {}
+    for part in spec.split(","):
+        if "=" in part:
+            stream, weight = part.rsplit("=", 1)
+            weights[stream.strip()] = max(0, int(weight))
+    return weights
+
+
+class IntakeScheduler:
+    """
+    Entscheidet, wie viele Nachrichten pro Runde aus welchem Intake-Stream
+    gelesen werden.
+
+    streams ist nach Priorität sortiert (höchste zuerst). `read(stream, count)`
+    liest nicht-blockierend und liefert eine Liste von (stream, id, data).
+    """
+
+    def __init__(
+        self,
+        streams: List[str],
+        mode: str = "weighted",
+        weights: Optional[Dict[str, int]] = None,
+        batch: int = 10,
+        starvation_timeout: float = 30.0,
+        clock=time.monotonic
+    ):
+        self.streams = streams
+        self.mode = mode
+        self.weights = weights or {}
+        self.batch = batch
+        self.starvation_timeout = starvation_timeout
+        self.clock = clock
+        now = clock()
+        self.last_served = {stream: now for stream in streams}
+
+    async def next_batch(self, read) -> List[Tuple[str, str, dict]]:
+        if self.mode == "strict":
+            return await self._strict(read)
+        return await self._weighted(read)
+
+    async def _weighted(self, read) -> List[Tuple[str, str, dict]]:
+        batch = []
+        for stream in self.streams:
+            weight = self.weights.get(stream, 1)
+            if weight > 0:
+                batch += await read(stream, weight)
+        return batch
+
+    async def _strict(self, read) -> List[Tuple[str, str, dict]]:
+        now = self.clock()
+        batch = []
+
+        # Starvation-Schutz: niedrigere Streams bekommen eine Nachricht,
+        # wenn sie länger als starvation_timeout nicht dran waren
+        for stream in self.streams[1:]:
+            if now - self.last_served[stream] >= self.starvation_timeout:
+                batch += await read(stream, 1)
+                self.last_served[stream] = now
+
+        # Strikte Priorität: erster nicht-leerer Stream bekommt die Runde.
+        # Ein leerer Stream gilt als bedient (er verhungert nicht).
+        for stream in self.streams:
+            messages = await read(stream, self.batch)
+            self.last_served[stream] = now
+            if messages:
+                batch += messages
+                break
+        return batch
+
+
+# =============================================================================
+# CONTENT DEDUPLICATION
+# =============================================================================
+
+def partial_content_hash(filepath: str, block_size: int = DEDUP_BLOCK_SIZE) -> Tuple[int, str]:
+    """
+    Günstiger Vorab-Hash: Größe + erster und letzter Block.
+
+    Returns:
+        (size, hash) - bei Dateien <= 2 Blöcken ist der Hash der SHA-256
+        des gesamten Inhalts.
+    """
+    size = os.path.getsize(filepath)
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        if size <= 2 * block_size:
+            h.update(f.read())
+        else:
+            h.update(str(size).encode())
+            h.update(f.read(block_size))
+            f.seek(-block_size, os.SEEK_END)
+            h.update(f.read(block_size))
+    return size, h.hexdigest()
+
+
+def full_content_hash(filepath: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 des gesamten Inhalts."""
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ContentDeduplicator:
+    """
+    Content-adressierter Fast-Path vor dem Enqueue.
+
+    1. Partial-Hash (Größe + Head/Tail) gegen DEDUP_PARTIAL_KEY prüfen.
+       Unbekannt → kein Duplikat, kein Full-Hash nötig.
+    2. Kollision → Full SHA-256 für beide Dateien, Abgleich über den Claim
+       DEDUP_CLAIM_PREFIX + sha256.
+
+    Lebenszyklus eines Claims:
+    - pending: kanonischer Job ist eingereiht (TTL DEDUP_PENDING_TTL_S).
+      Duplikate warten in DEDUP_WAITING_PREFIX + sha256.
+    - done: Extraktion erfolgreich (complete), Claim ohne TTL mit Ergebnis-ID.
+      Duplikate bekommen sofort eine Kopie des Ergebnisses (link).
+    - Enqueue- oder Extraktionsfehler (release/fail) löschen den Claim;
+      wartende Duplikate werden neu geroutet.
+    """
+
+    def __init__(self, redis_client, block_size: int = DEDUP_BLOCK_SIZE):
+        self.redis = redis_client
+        self.block_size = block_size
+
+    async def find_duplicate(self, filepath: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Returns:
+            (canonical_record | None, sha256 | None)
+            canonical_record ist der bereits geroutete Job mit gleichem Inhalt.
+        """
+        size, partial = await asyncio.to_thread(partial_content_hash, filepath, self.block_size)
+        partial_key = f"{size}:{partial}"
+
+        if size <= 2 * self.block_size:
+            # Partial-Hash ist bereits der Full-Hash
+            return await self._claim_sha256(partial, filepath)
+
+        record = {"path": filepath}
+        if await self.redis.hsetnx(DEDUP_PARTIAL_KEY, partial_key, json.dumps(record)):
+            return None, None
+
+        # Kollision auf dem Partial-Hash → Full-Hash für beide Seiten
+        first = json.loads(await self.redis.hget(DEDUP_PARTIAL_KEY, partial_key) or "{}")
+        if first.get("path") and not first.get("sha256") and first["path"] != filepath:
+            try:
+                first_sha = await asyncio.to_thread(full_content_hash, first["path"])
+                first["sha256"] = first_sha
+                await self.redis.hset(DEDUP_PARTIAL_KEY, partial_key, json.dumps(first))
+                await self._adopt(first_sha, first["path"])
+            except OSError:
+                pass  # Erster Kandidat nicht mehr lesbar
+
+        sha = await asyncio.to_thread(full_content_hash, filepath)
+        return await self._claim_sha256(sha, filepath)
+
+    async def _adopt(self, sha: str, filepath: str):
+        """Claim für eine früher ohne sha256 geroutete Datei nachtragen."""
+        result_id = await self.redis.hget(DEDUP_RESULTS_KEY, filepath)
+        record = {"path": filepath, "sha256": sha}
+        if result_id:
+            await self.redis.set(
+                DEDUP_CLAIM_PREFIX + sha,
+                json.dumps({**record, "state": "done", "result_id": result_id}),
+                nx=True,
+            )
+        elif await self.redis.set(
+            DEDUP_CLAIM_PREFIX + sha, json.dumps({**record, "state": "pending"}),
+            nx=True, ex=DEDUP_PENDING_TTL_S,
+        ):
+            await self.redis.hset(DEDUP_PENDING_PATHS, filepath, sha)
+
+    async def _claim_sha256(self, sha: str, filepath: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        key = DEDUP_CLAIM_PREFIX + sha
+        record = json.dumps({"path": filepath, "sha256": sha, "state": "pending"})
+        raw = None
+        for _ in range(2):
+            if await self.redis.set(key, record, nx=True, ex=DEDUP_PENDING_TTL_S):
+                await self.redis.hset(DEDUP_PENDING_PATHS, filepath, sha)
+                return None, sha
+            raw = await self.redis.get(key)
+            if raw:
+                break  # sonst zwischen SET und GET verfallen → erneut versuchen
+        canonical = json.loads(raw or "{}")
+        if not canonical or canonical.get("path") == filepath:
+            # Erneutes Einreichen derselben Datei ist kein Duplikat
+            return None, sha
+        return canonical, sha
+
+    async def _record(self, sha: str) -> Dict[str, Any]:
+        return json.loads(await self.redis.get(DEDUP_CLAIM_PREFIX + sha) or "{}")
+
+    async def register(self, sha: Optional[str], filepath: str, queue: str, message_id: str):
+        """Merkt sich Queue und Message-ID des kanonischen Jobs (TTL beginnt neu)."""
+        if not sha:
+            return
+        record = await self._record(sha)
+        if record.get("path") != filepath or record.get("state") != "pending":
+            return
+        await self.redis.set(DEDUP_CLAIM_PREFIX + sha, json.dumps({
+            **record,
+            "queue": queue,
+            "message_id": message_id,
+            "routed_at": datetime.now().isoformat(),
+        }), ex=DEDUP_PENDING_TTL_S)
+
+    async def release(self, sha: str, filepath: str) -> bool:
+        """Gibt den pending-Claim von `filepath` frei (Enqueue oder Extraktion fehlgeschlagen)."""
+        await self.redis.hdel(DEDUP_PENDING_PATHS, filepath)
+        record = await self._record(sha)
+        if record.get("path") != filepath or record.get("state") != "pending":
+            return False
+        await self.redis.delete(DEDUP_CLAIM_PREFIX + sha)
+        return True
+
+    async def link(self, sha: str, decision: "RoutingDecision", canonical: Dict[str, Any]) -> Optional[str]:
+        """
+        Verknüpft ein Duplikat mit dem Extraktionsergebnis des kanonischen Jobs.
+
+        Returns:
+            ID des verknüpften Ergebnisses bzw. der Warteliste; None, wenn das
+            kanonische Ergebnis nicht mehr existiert und das Duplikat den Claim
+            übernommen hat (→ normal einreihen).
+        """
+        duplicate = {
+            "path": decision.filepath,
+            "filename": decision.filename,
+            "priority": decision.priority,
+            "processing_path": decision.processing_path,
+        }
+        if canonical.get("state") == "done":
+            result = await self._result(canonical.get("result_id"))
+            if result is not None:
+                return await self._emit_linked(result, duplicate, canonical)
+            # Ergebnis aus dem Stream getrimmt → Duplikat wird kanonisch
+            await self.redis.set(DEDUP_CLAIM_PREFIX + sha, json.dumps(
+                {"path": decision.filepath, "sha256": sha, "state": "pending"}
+            ), ex=DEDUP_PENDING_TTL_S)
+            await self.redis.hset(DEDUP_PENDING_PATHS, decision.filepath, sha)
+            return None
+
+        waiting_key = DEDUP_WAITING_PREFIX + sha
+        await self.redis.rpush(waiting_key, json.dumps(duplicate))
+        await self.redis.expire(waiting_key, 2 * DEDUP_PENDING_TTL_S)
+        return waiting_key
+
+    async def complete(self, filepath: str, result_id: str, result: Dict[str, Any]) -> int:
+        """
+        Extraktion von `filepath` erfolgreich: Claim auf done setzen und
+        wartende Duplikate verknüpfen.
+
+        Returns:
+            Anzahl verknüpfter Duplikate
+        """
+        await self.redis.hset(DEDUP_RESULTS_KEY, filepath, result_id)
+        sha = await self.redis.hget(DEDUP_PENDING_PATHS, filepath)
+        if not sha:
+            return 0
+        await self.redis.hdel(DEDUP_PENDING_PATHS, filepath)
+        record = await self._record(sha)
+        if record.get("path") != filepath:
+            return 0
+        record = {**record, "state": "done", "result_id": result_id}
+        await self.redis.set(DEDUP_CLAIM_PREFIX + sha, json.dumps(record))
+
+        waiting = await self._pop_waiting(sha)
+        for duplicate in waiting:
+            await self._emit_linked(result, duplicate, record)
+        return len(waiting)
+
+    async def fail(self, filepath: str, sha: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Kanonischer Job endgültig fehlgeschlagen (DLQ): Claim freigeben.
+
+        Returns:
+            Wartende Duplikate, die neu geroutet werden müssen
+        """
+        sha = sha or await self.redis.hget(DEDUP_PENDING_PATHS, filepath)
+        if not sha or not await self.release(sha, filepath):
+            return []
+        return await self._pop_waiting(sha)
+
+    async def sweep(self) -> List[Dict[str, Any]]:
+        """
+        Aufräumen nach verfallenen Claims (kein Ergebnis und kein DLQ-Eintrag).
+
+        Returns:
+            Verwaiste Duplikate, die neu geroutet werden müssen
+        """
+        for filepath, sha in (await self.redis.hgetall(DEDUP_PENDING_PATHS)).items():
+            if (await self._record(sha)).get("path") != filepath:
+                await self.redis.hdel(DEDUP_PENDING_PATHS, filepath)
+
+        orphaned = []
+        async for waiting_key in self.redis.scan_iter(match=f"{DEDUP_WAITING_PREFIX}*"):
+            sha = waiting_key[len(DEDUP_WAITING_PREFIX):]
+            if not await self.redis.exists(DEDUP_CLAIM_PREFIX + sha):
+                orphaned += await self._pop_waiting(sha)
+        return orphaned
+
+    async def _pop_waiting(self, sha: str) -> List[Dict[str, Any]]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(DEDUP_WAITING_PREFIX + sha, 0, -1)
+            pipe.delete(DEDUP_WAITING_PREFIX + sha)
+            entries, _ = await pipe.execute()
+        return [json.loads(entry) for entry in entries]
+
+    async def _result(self, result_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not result_id:
+            return None
+        entries = await self.redis.xrange(DEDUP_RESULT_STREAM, min=result_id, max=result_id)
+        if not entries:
+            return None
+        return json.loads(entries[0][1].get("data", "{}"))
+
+    async def _emit_linked(self, result: Dict[str, Any], duplicate: Dict[str, Any], canonical: Dict[str, Any]) -> str:
+        """Kopie des kanonischen Ergebnisses für den Pfad des Duplikats in den Result-Stream."""
+        linked = {
+            **result,
+            "file_path": duplicate["path"],
+            "filename": duplicate.get("filename") or Path(duplicate["path"]).name,
+            "processing_time_ms": 0,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                **(result.get("metadata") or {}),
+                "dedup_linked": True,
+                "duplicate_of": canonical.get("path"),
+                "content_sha256": canonical.get("sha256"),
+            },
+        }
+        return await self.redis.xadd(
+            DEDUP_RESULT_STREAM, {"data": json.dumps(linked)}, maxlen=10000
+        )
+
+
 # =============================================================================
 # FILE TYPE DETECTOR
 # =============================================================================
@@ -588,6 +985,8 @@ class RoutingDecision:
     priority: int
     processing_path: str
     metadata: Dict[str, Any]
+    content_sha256: Optional[str] = None
+    duplicate_of: Optional[str] = None
 
 
 class UniversalRouter:
@@ -596,6 +995,7 @@ class UniversalRouter:
     def __init__(self):
         self.detector = FileTypeDetector()
         self.redis: Optional[redis.Redis] = None
+        self.dedup: Optional[ContentDeduplicator] = None
 
     async def connect(self):
         self.redis = await redis.from_url(
@@ -603,6 +1003,8 @@ class UniversalRouter:
             password=REDIS_PASSWORD if REDIS_PASSWORD else None,
             decode_responses=True
         )
+        if DEDUP_ENABLED:
+            self.dedup = ContentDeduplicator(self.redis)
 
     async def disconnect(self):
         if self.redis:
@@ -699,7 +1101,27 @@ class UniversalRouter:
         return "fast"
 
     async def enqueue(self, decision: RoutingDecision) -> str:
-        """Fügt Job in Queue ein."""
+        """
+        Fügt Job in Queue ein.
+
+        Inhaltsgleiche Dateien werden nicht erneut extrahiert, sondern mit dem
+        Ergebnis des kanonischen Jobs verknüpft, sobald es vorliegt
+        (decision.duplicate_of enthält dann dessen Pfad).
+        """
+        sha = None
+        if self.dedup and decision.target_queue != "skip":
+            try:
+                canonical, sha = await self.dedup.find_duplicate(decision.filepath)
+                decision.content_sha256 = sha
+                if canonical:
+                    link_id = await self.dedup.link(sha, decision, canonical)
+                    if link_id:
+                        decision.duplicate_of = canonical.get("path")
+                        logger.info(f"Duplicate {decision.filename} → {decision.duplicate_of}")
+                        return link_id
+            except OSError as e:
+                logger.warning(f"Dedup check failed for {decision.filepath}: {e}")
+
         # Get file stats for Worker FileJob compatibility
         try:
             file_stat = Path(decision.filepath).stat()
@@ -723,13 +1145,25 @@ class UniversalRouter:
             "created_at": datetime.now().isoformat()
         }
 
-        message_id = await self.redis.xadd(
-            decision.target_queue,
-            {"data": json.dumps(job_data)},
-            maxlen=50000
-        )
+        if sha:
+            job_data["content_sha256"] = sha
+
+        stream = priority_stream(decision.target_queue, decision.priority)
+        try:
+            message_id = await self.redis.xadd(
+                stream,
+                {"data": json.dumps(job_data)},
+                maxlen=50000
+            )
+        except Exception:
+            # Ohne eingereihten Job darf der Claim keine Duplikate binden
+            if self.dedup and sha:
+                await self.dedup.release(sha, decision.filepath)
+            raise
+        if self.dedup:
+            await self.dedup.register(sha, decision.filepath, stream, message_id)
 
-        logger.info(f"Routed {decision.filename} → {decision.target_queue} (P{decision.priority})")
+        logger.info(f"Routed {decision.filename} → {stream} (P{decision.priority})")
 
         return message_id
 
@@ -772,8 +1206,8 @@ async def startup():
     await router.connect()
     
     # Create consumer group for intake streams
-    intake_streams = ["intake:priority", "intake:normal", "intake:bulk"]
-    consumer_group = "router-consumers"
+    intake_streams = INTAKE_STREAMS
+    consumer_group = INTAKE_GROUP
     
     for stream in intake_streams:
         try:
@@ -791,76 +1225,285 @@ async def startup():
     )
     logger.info("Started intake consumer background task")
 
+    # Start pending-entry reclaimer
+    app.state.reclaim_task = asyncio.create_task(
+        reclaim_intake_pending(router, intake_streams, consumer_group)
+    )
+    logger.info("Started intake reclaim background task")
 
-async def consume_intake_queues(router_instance, streams: list, group: str):
-    """Background task that consumes from intake streams and routes to extraction queues."""
+    # Duplikate mit den Ergebnissen ihrer kanonischen Jobs verknüpfen
+    if router.dedup:
+        app.state.dedup_task = asyncio.create_task(link_duplicates(router))
+        logger.info("Started dedup linker background task")
+
+
+def get_consumer_name() -> str:
     import socket
-    consumer_name = f"router-{socket.gethostname()}-{os.getpid()}"
-    
-    logger.info(f"Consumer '{consumer_name}' starting for streams: {streams}")
+    return f"router-{socket.gethostname()}-{os.getpid()}"
+
+
+async def process_intake_message(router_instance, stream_name: str, group: str, message_id: str, message_data: dict):
+    """
+    Routet eine Intake-Nachricht und ackt sie.
+
+    Bei Fehlern bleibt die Nachricht un-acked in der Pending-Liste
+    und wird von reclaim_intake_pending erneut zugestellt.
+    """
+    try:
+        # Parse the job data
+        raw_data = message_data.get("data") or message_data.get("job")
+        if not raw_data:
+            logger.warning(f"Empty message data: {message_data}")
+            await router_instance.redis.xack(stream_name, group, message_id)
+            return
+        
+        job = json.loads(raw_data) if isinstance(raw_data, str) else raw_data
+        filepath = job.get("path") or job.get("filepath")
+        
+        if not filepath:
+            logger.warning(f"No filepath in job: {job}")
+            await router_instance.redis.xack(stream_name, group, message_id)
+            return
+        
+        # Route the file to the correct extraction queue
+        decision = await router_instance.route(filepath)
+        # Triage des Orchestrators hat Vorrang vor der eigenen Schätzung
+        if job.get("priority") is not None:
+            decision.priority = int(job["priority"])
+        if job.get("processing_path"):
+            decision.processing_path = job["processing_path"]
+        await router_instance.enqueue(decision)
+        
+        # Acknowledge the message
+        await router_instance.redis.xack(stream_name, group, message_id)
+        if decision.duplicate_of:
+            logger.info(f"Linked duplicate from {stream_name}: {filepath} → {decision.duplicate_of}")
+        else:
+            logger.info(f"Routed job from {stream_name}: {filepath} → {decision.target_queue}")
+        
+    except Exception as e:
+        logger.error(f"Error processing message {message_id}: {e}")
+        # Don't ack - message will be reclaimed and reprocessed
+
+
+async def consume_intake_queues(router_instance, streams: list, group: str):
+    """
+    Background task that consumes from intake streams and routes to extraction queues.
+
+    Die Lesereihenfolge bestimmt IntakeScheduler (INTAKE_SCHEDULING); sind alle
+    Streams leer, wird blockierend auf allen Streams gewartet.
+    """
+    consumer_name = get_consumer_name()
+    scheduler = IntakeScheduler(
+        streams,
+        mode=INTAKE_SCHEDULING,
+        weights=parse_weights(INTAKE_WEIGHTS),
+        batch=INTAKE_BATCH,
+        starvation_timeout=STARVATION_TIMEOUT_S
+    )
+
+    async def read(stream_names: List[str], count: int, block: Optional[int] = None):
+        messages = await router_instance.redis.xreadgroup(
+            groupname=group,
+            consumername=consumer_name,
+            streams={s: ">" for s in stream_names},
+            count=count,
+            block=block
+        )
+        return [
+            (stream_name, message_id, message_data)
+            for stream_name, stream_messages in (messages or [])
+            for message_id, message_data in stream_messages
+        ]
+
+    logger.info(
+        f"Consumer '{consumer_name}' starting for streams: {streams} "
+        f"(scheduling={INTAKE_SCHEDULING})"
+    )
     
     while True:
         try:
-            # Read from all intake streams
+            batch = await scheduler.next_batch(lambda stream, count: read([stream], count))
+            if not batch:
+                # Block for 5 seconds on all intake streams
+                batch = await read(streams, INTAKE_BATCH, block=5000)
+
+            for stream_name, message_id, message_data in batch:
+                await process_intake_message(
+                    router_instance, stream_name, group, message_id, message_data
+                )
+                        
+        except asyncio.CancelledError:
+            logger.info("Consumer task cancelled, shutting down...")
+            break
+        except Exception as e:
+            logger.error(f"Consumer loop error: {e}")
+            await asyncio.sleep(1)  # Backoff on error
+
+
+async def dead_letter_intake(router_instance, stream_name: str, group: str, message_id: str, deliveries: int):
+    """Eskaliert eine wiederholt fehlgeschlagene Intake-Nachricht in die DLQ."""
+    entries = await router_instance.redis.xrange(stream_name, min=message_id, max=message_id)
+    if entries:
+        _, message_data = entries[0]
+        await router_instance.redis.xadd(
+            INTAKE_DLQ,
+            {
+                **message_data,
+                "source_stream": stream_name,
+                "source_id": message_id,
+                "deliveries": str(deliveries),
+                "error": "max deliveries exceeded",
+                "failed_at": datetime.now().isoformat(),
+            },
+            maxlen=50000
+        )
+        logger.error(f"Dead-lettered {message_id} from {stream_name} after {deliveries} deliveries")
+    await router_instance.redis.xack(stream_name, group, message_id)
+
+
+async def reclaim_intake_pending(router_instance, streams: list, group: str):
+    """
+    Background task: übernimmt hängende Intake-Nachrichten.
+
+    - idle > RECLAIM_MIN_IDLE_MS: per XCLAIM übernehmen und erneut routen
+    - times_delivered >= MAX_DELIVERIES: in INTAKE_DLQ eskalieren
+    """
+    consumer_name = get_consumer_name()
+
+    while True:
+        try:
+            await asyncio.sleep(RECLAIM_INTERVAL_S)
+            for stream_name in streams:
+                pending = await router_instance.redis.xpending_range(
+                    stream_name, group, min="-", max="+",
+                    count=RECLAIM_BATCH, idle=RECLAIM_MIN_IDLE_MS
+                )
+                to_claim = []
+                for entry in pending:
+                    if entry["times_delivered"] >= MAX_DELIVERIES:
+                        await dead_letter_intake(
+                            router_instance, stream_name, group,
+                            entry["message_id"], entry["times_delivered"]
+                        )
+                    else:
+                        to_claim.append(entry["message_id"])
+
+                if not to_claim:
+                    continue
+
+                claimed = await router_instance.redis.xclaim(
+                    stream_name, group, consumer_name, RECLAIM_MIN_IDLE_MS, to_claim
+                )
+                logger.warning(f"Reclaimed {len(claimed)} pending messages from {stream_name}")
+                for message_id, message_data in claimed:
+                    if not message_data:
+                        # Eintrag wurde inzwischen getrimmt
+                        await router_instance.redis.xack(stream_name, group, message_id)
+                        continue
+                    await process_intake_message(
+                        router_instance, stream_name, group, message_id, message_data
+                    )
+
+        except asyncio.CancelledError:
+            logger.info("Reclaim task cancelled, shutting down...")
+            break
+        except Exception as e:
+            logger.error(f"Reclaim loop error: {e}")
+
+
+async def reroute_duplicates(router_instance, duplicates: List[Dict[str, Any]]):
+    """Routet Duplikate neu, deren kanonischer Job fehlgeschlagen oder verfallen ist."""
+    for duplicate in duplicates:
+        try:
+            decision = await router_instance.route(duplicate["path"])
+            if duplicate.get("priority") is not None:
+                decision.priority = int(duplicate["priority"])
+            if duplicate.get("processing_path"):
+                decision.processing_path = duplicate["processing_path"]
+            await router_instance.enqueue(decision)
+            logger.info(f"Re-routed duplicate {duplicate['path']}")
+        except Exception as e:
+            logger.error(f"Re-routing duplicate {duplicate.get('path')} failed: {e}")
+
+
+async def process_dedup_message(router_instance, stream_name: str, message_id: str, message_data: dict):
+    """Wendet ein Ergebnis bzw. einen DLQ-Eintrag der Extraction Worker auf die Dedup-Claims an."""
+    data = json.loads(message_data.get("data") or "{}")
+    if stream_name == DEDUP_RESULT_STREAM:
+        if (data.get("metadata") or {}).get("dedup_linked") or not data.get("file_path"):
+            return
+        linked = await router_instance.dedup.complete(data["file_path"], message_id, data)
+        if linked:
+            logger.info(f"Linked {linked} duplicates to {data['file_path']}")
+    elif data.get("path"):
+        duplicates = await router_instance.dedup.fail(data["path"], data.get("content_sha256"))
+        await reroute_duplicates(router_instance, duplicates)
+
+
+async def link_duplicates(router_instance):
+    """
+    Background task: verknüpft Duplikate, sobald die Extraktion des
+    kanonischen Jobs fertig ist.
+
+    - DEDUP_RESULT_STREAM (Worker-Output): Claim → done, wartende Duplikate
+      bekommen eine Kopie des Ergebnisses mit metadata.duplicate_of
+    - DEDUP_FAILURE_STREAM (Worker-DLQ): Claim freigeben, Duplikate neu routen
+    - alle DEDUP_SWEEP_INTERVAL_S: Wartelisten verfallener Claims neu routen
+    """
+    consumer_name = get_consumer_name()
+    streams = [DEDUP_RESULT_STREAM, DEDUP_FAILURE_STREAM]
+    for stream in streams:
+        try:
+            # Eigene Gruppe: liest mit, ohne den eigentlichen Consumern Nachrichten wegzunehmen
+            await router_instance.redis.xgroup_create(stream, DEDUP_GROUP, id="$", mkstream=True)
+        except redis.ResponseError:
+            pass  # BUSYGROUP
+    last_sweep = time.monotonic()
+
+    while True:
+        try:
             messages = await router_instance.redis.xreadgroup(
-                groupname=group,
+                groupname=DEDUP_GROUP,
                 consumername=consumer_name,
                 streams={s: ">" for s in streams},
-                count=10,
-                block=5000  # Block for 5 seconds
+                count=100,
+                block=5000
             )
-            
-            if not messages:
-                continue
-                
-            for stream_name, stream_messages in messages:
-                for message_id, message_data in stream_messages:
+            for stream_name, entries in messages or []:
+                for message_id, message_data in entries:
                     try:
-                        # Parse the job data
-                        raw_data = message_data.get("data") or message_data.get("job")
-                        if not raw_data:
-                            logger.warning(f"Empty message data: {message_data}")
-                            await router_instance.redis.xack(stream_name, group, message_id)
-                            continue
-                        
-                        job = json.loads(raw_data) if isinstance(raw_data, str) else raw_data
-                        filepath = job.get("path") or job.get("filepath")
-                        
-                        if not filepath:
-                            logger.warning(f"No filepath in job: {job}")
-                            await router_instance.redis.xack(stream_name, group, message_id)
-                            continue
-                        
-                        # Route the file to the correct extraction queue
-                        decision = await router_instance.route(filepath)
-                        await router_instance.enqueue(decision)
-                        
-                        # Acknowledge the message
-                        await router_instance.redis.xack(stream_name, group, message_id)
-                        logger.info(f"Routed job from {stream_name}: {filepath} → {decision.target_queue}")
-                        
+                        await process_dedup_message(router_instance, stream_name, message_id, message_data)
                     except Exception as e:
-                        logger.error(f"Error processing message {message_id}: {e}")
-                        # Don't ack - message will be reprocessed
-                        
+                        logger.error(f"Dedup linking failed for {message_id}: {e}")
+                    # Nicht erneut zustellen: TTL und Sweep räumen verwaiste Claims auf
+                    await router_instance.redis.xack(stream_name, DEDUP_GROUP, message_id)
+
+            if time.monotonic() - last_sweep >= DEDUP_SWEEP_INTERVAL_S:
+                last_sweep = time.monotonic()
+                await reroute_duplicates(router_instance, await router_instance.dedup.sweep())
+
         except asyncio.CancelledError:
-            logger.info("Consumer task cancelled, shutting down...")
+            logger.info("Dedup linker cancelled, shutting down...")
             break
         except Exception as e:
-            logger.error(f"Consumer loop error: {e}")
-            await asyncio.sleep(1)  # Backoff on error
+            logger.error(f"Dedup linker error: {e}")
+            await asyncio.sleep(1)
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    # Cancel consumer task
-    if hasattr(app.state, 'consumer_task'):
-        app.state.consumer_task.cancel()
+    # Cancel consumer, reclaim + dedup tasks
+    for task_name in ("consumer_task", "reclaim_task", "dedup_task"):
+        task = getattr(app.state, task_name, None)
+        if task is None:
+            continue
+        task.cancel()
         try:
-            await app.state.consumer_task
+            await task
         except asyncio.CancelledError:
             pass
-        logger.info("Consumer task stopped")
+        logger.info(f"{task_name} stopped")
     
     await router.disconnect()
 
@@ -897,7 +1540,8 @@ async def route_file(request: RouteRequest) -> Dict[str, Any]:
 
     return {
         "message_id": message_id,
-        "queue": decision.target_queue,
+        "queue": priority_stream(decision.target_queue, decision.priority),
+        "duplicate_of": decision.duplicate_of,
         "extension": decision.extension,
         "priority": decision.priority,
         "processing_path": decision.processing_path
@@ -914,9 +1558,10 @@ async def route_batch(request: BatchRouteRequest) -> Dict[str, Any]:
             message_id = await router.enqueue(decision)
             results.append({
                 "filepath": filepath,
-                "status": "queued",
-                "queue": decision.target_queue,
-                "message_id": message_id
+                "status": "duplicate" if decision.duplicate_of else "queued",
+                "queue": priority_stream(decision.target_queue, decision.priority),
+                "message_id": message_id,
+                "duplicate_of": decision.duplicate_of
             })
         except Exception as e:
             results.append({
@@ -928,6 +1573,7 @@ async def route_batch(request: BatchRouteRequest) -> Dict[str, Any]:
     return {
         "total": len(request.filepaths),
         "queued": len([r for r in results if r["status"] == "queued"]),
+        "duplicates": len([r for r in results if r["status"] == "duplicate"]),
         "results": results
     }
 
@@ -936,16 +1582,49 @@ async def route_batch(request: BatchRouteRequest) -> Dict[str, Any]:
 async def list_queues():
     """Listet alle Queues mit Statistiken."""
     stats = {}
-    for ext, queue in PROCESSOR_QUEUES.items():
-        if queue not in stats:
-            try:
-                info = await router.redis.xinfo_stream(queue)
-                stats[queue] = info.get("length", 0)
-            except Exception:
-                stats[queue] = 0
+    for base_queue in PROCESSOR_QUEUES.values():
+        for queue in priority_streams(base_queue):
+            if queue not in stats:
+                try:
+                    info = await router.redis.xinfo_stream(queue)
+                    stats[queue] = info.get("length", 0)
+                except Exception:
+                    stats[queue] = 0
     return stats
 
 
+@app.get("/queues/pending")
+async def list_pending():
+    """
+    Größe der Pending-Entry-List (PEL) je Stream und Consumer-Gruppe.
+
+    Wächst dieser Wert dauerhaft, hängen Nachrichten bei abgestürzten
+    oder überlasteten Consumern.
+    """
+    streams = INTAKE_STREAMS + [INTAKE_DLQ]
+    for queue in sorted({q for q in PROCESSOR_QUEUES.values() if q != "skip"}):
+        streams += priority_streams(queue)
+
+    stats = {}
+    for stream in streams:
+        try:
+            groups = await router.redis.xinfo_groups(stream)
+        except Exception:
+            continue
+        stats[stream] = {
+            group["name"]: {
+                "pending": group.get("pending", 0),
+                "consumers": group.get("consumers", 0),
+                "lag": group.get("lag"),
+            }
+            for group in groups
+        }
+    return {
+        "total_pending": sum(g["pending"] for s in stats.values() for g in s.values()),
+        "streams": stats,
+    }
+
+
 @app.get("/formats")
 async def list_formats():
     """Listet alle unterstützten Formate."""
@@ -19,6 +19,7 @@ import os
 import json
 import asyncio
 import hashlib
+import sqlite3
 import tempfile
 import shutil
 from pathlib import Path
@@ -54,11 +55,40 @@ WHISPER_URL = os.getenv("WHISPER_URL", WHISPERX_URL)  # Backward compat
 WHISPER_FAST_URL = os.getenv("WHISPER_FAST_URL", WHISPERX_URL)
 PARSER_URL = os.getenv("PARSER_URL", "http://parser-service:8000")
 EBOOK_PARSER_URL = os.getenv("EBOOK_PARSER_URL", "http://ebook-parser:8000")
+SPECIAL_PARSER_URL = os.getenv("SPECIAL_PARSER_URL", "http://special-parser:8015")
 
 # Worker Configuration
 WORKER_TYPE = os.getenv("WORKER_TYPE", "documents")
 CONSUMER_GROUP = os.getenv("CONSUMER_GROUP", "extraction-workers")
 CONSUMER_NAME = os.getenv("HOSTNAME", f"worker-{WORKER_TYPE}-1")
+# In-flight window: Jobs pro XREADGROUP / gleichzeitig in Bearbeitung
+WORKER_CONCURRENCY = max(1, int(os.getenv("WORKER_CONCURRENCY", "4")))
+
+# File Hand-off
+# - "path": keine lokale Kopie; Services mit gleichem Volume-Mount bekommen
+#           den übersetzten Pfad, alle anderen einen Stream direkt aus der Quelle
+# - "copy": Legacy-Verhalten, Kopie nach /tmp/extraction (z.B. bei SMB-Locks)
+FILE_HANDOFF_MODE = os.getenv("FILE_HANDOFF_MODE", "path").lower()
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Pending-Entry Reclaimer (Nachrichten abgestürzter Worker übernehmen)
+RECLAIM_INTERVAL_S = int(os.getenv("RECLAIM_INTERVAL_S", "60"))
+# Muss über der längsten Jobdauer liegen; laufende Jobs senden Heartbeats
+RECLAIM_MIN_IDLE_MS = int(os.getenv("RECLAIM_MIN_IDLE_MS", str(10 * 60 * 1000)))
+MAX_DELIVERIES = int(os.getenv("MAX_DELIVERIES", "5"))
+# Heartbeat-Takt für laufende Jobs (eigener Task, deutlich unter RECLAIM_MIN_IDLE_MS)
+HEARTBEAT_INTERVAL_S = float(os.getenv("HEARTBEAT_INTERVAL_S", str(min(60.0, RECLAIM_MIN_IDLE_MS / 3000))))
+
+# Persistenter Extraction Cache (gleiches Schema wie scripts/services/extraction_cache.py)
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", "")  # leer = deaktiviert
+# Bei Änderungen an Parsern/Optionen hochzählen → alte Einträge verfallen
+WORKER_EXTRACTOR_VERSION = os.getenv("WORKER_EXTRACTOR_VERSION", "1")
+
+# Priority-Sub-Streams (vom Universal Router befüllt): :high → Basis → :bulk
+HIGH_PRIORITY_THRESHOLD = 75
+BULK_PRIORITY_THRESHOLD = 40
+# Niedrigere Bänder bekommen spätestens nach dieser Zeit einen Slot
+PRIORITY_STARVATION_S = float(os.getenv("PRIORITY_STARVATION_S", "60"))
 
 
 # =============================================================================
@@ -81,6 +111,8 @@ class FileJob:
     status: str = "pending"
     retries: int = 0
     error: Optional[str] = None
+    stream: Optional[str] = None  # Stream, aus dem der Job gelesen wurde
+    content_sha256: Optional[str] = None  # vom Router (Dedup) mitgeliefert
 
     def to_dict(self) -> Dict:
         return asdict(self)
@@ -90,6 +122,20 @@ class FileJob:
         return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
 
+def priority_stream(queue: str, priority: int) -> str:
+    """Priority-Sub-Stream einer Queue (gleiche Bänder wie im Universal Router)."""
+    if priority >= HIGH_PRIORITY_THRESHOLD:
+        return f"{queue}:high"
+    if priority < BULK_PRIORITY_THRESHOLD:
+        return f"{queue}:bulk"
+    return queue
+
+
+def priority_streams(queue: str) -> List[str]:
+    """Alle Sub-Streams einer Queue, höchste Priorität zuerst."""
+    return [f"{queue}:high", queue, f"{queue}:bulk"]
+
+
 @dataclass
 class ExtractionResult:
     """Ergebnis einer Extraktion."""
@@ -112,6 +158,80 @@ class ExtractionResult:
         return asdict(self)
 
 
+# =============================================================================
+# EXTRACTION CACHE
+# =============================================================================
+
+class ExtractionCache:
+    """
+    SQLite-Cache für Extraktionsergebnisse.
+
+    Key: (sha256, extractor, version). Wird mit smart_ingest/batch_processor
+    geteilt, wenn EXTRACTION_CACHE_PATH auf dieselbe Datei zeigt.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS extraction_cache (
+        sha256 TEXT NOT NULL,
+        extractor TEXT NOT NULL,
+        version TEXT NOT NULL,
+        source TEXT,
+        text TEXT NOT NULL,
+        confidence REAL,
+        metadata TEXT,
+        created_at TEXT,
+        PRIMARY KEY (sha256, extractor, version)
+    )
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def get(self, sha256: str, extractor: str, version: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source, text, confidence, metadata FROM extraction_cache "
+                "WHERE sha256 = ? AND extractor = ? AND version = ?",
+                (sha256, extractor, version)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "source": row[0],
+            "text": row[1],
+            "confidence": row[2],
+            "metadata": json.loads(row[3]) if row[3] else {},
+        }
+
+    def put(self, sha256: str, extractor: str, version: str, result: "ExtractionResult"):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache "
+                "(sha256, extractor, version, source, text, confidence, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    sha256, extractor, version, result.extraction_method, result.text,
+                    result.confidence, json.dumps(result.metadata, default=str),
+                    datetime.now().isoformat()
+                )
+            )
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 des Dateiinhalts."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 # =============================================================================
 # ERROR CLASSIFICATION SYSTEM
 # =============================================================================
@@ -430,6 +550,7 @@ class QueueManager:
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
         self.logger = logging.getLogger("QueueManager")
+        self._groups_ready: set = set()
 
     async def connect(self):
         self.redis = await redis.from_url(
@@ -443,30 +564,117 @@ class QueueManager:
         if self.redis:
             await self.redis.close()
 
-    async def dequeue(self, queue: str, consumer_group: str, consumer: str, count: int = 1) -> List[FileJob]:
+    async def ensure_group(self, queue: str, consumer_group: str):
+        if (queue, consumer_group) in self._groups_ready:
+            return
         try:
-            try:
-                await self.redis.xgroup_create(queue, consumer_group, id="0", mkstream=True)
-            except redis.ResponseError:
-                pass
+            await self.redis.xgroup_create(queue, consumer_group, id="0", mkstream=True)
+        except redis.ResponseError:
+            pass
+        self._groups_ready.add((queue, consumer_group))
+
+    async def dequeue(
+        self,
+        queue,
+        consumer_group: str,
+        consumer: str,
+        count: int = 1,
+        block: Optional[int] = 5000
+    ) -> List[FileJob]:
+        """Liest neue Jobs aus einer Queue oder einer Liste von Queues."""
+        queues = [queue] if isinstance(queue, str) else list(queue)
+        try:
+            for q in queues:
+                await self.ensure_group(q, consumer_group)
 
             messages = await self.redis.xreadgroup(
-                consumer_group, consumer, {queue: ">"}, count=count, block=5000
+                consumer_group, consumer, {q: ">" for q in queues}, count=count, block=block
             )
 
             jobs = []
-            for stream, entries in messages:
+            for stream, entries in messages or []:
                 for entry_id, data in entries:
-                    job_data = json.loads(data.get("data", "{}"))
-                    job = FileJob.from_dict(job_data)
-                    job.id = entry_id
-                    jobs.append(job)
+                    jobs.append(self._parse_job(entry_id, data, stream))
             return jobs
 
         except Exception as e:
             self.logger.error(f"Dequeue error: {e}")
             return []
 
+    def _parse_job(self, entry_id: str, data: Dict, stream: Optional[str] = None) -> FileJob:
+        job_data = json.loads(data.get("data", "{}"))
+        job = FileJob.from_dict(job_data)
+        job.id = entry_id
+        job.stream = stream
+        return job
+
+    async def claim_stale(
+        self,
+        queue: str,
+        consumer_group: str,
+        consumer: str,
+        min_idle_ms: int,
+        count: int,
+        max_deliveries: int,
+        dlq: str
+    ) -> List[FileJob]:
+        """
+        Übernimmt hängende Nachrichten (XPENDING + XCLAIM).
+
+        Nachrichten, die bereits max_deliveries mal zugestellt wurden
+        (z.B. Datei bringt Worker zum Absturz), gehen in die DLQ.
+        """
+        pending = await self.redis.xpending_range(
+            queue, consumer_group, min="-", max="+", count=count, idle=min_idle_ms
+        )
+        to_claim = []
+        for entry in pending:
+            if entry["times_delivered"] >= max_deliveries:
+                await self._dead_letter_pending(
+                    queue, consumer_group, dlq, entry["message_id"], entry["times_delivered"]
+                )
+            else:
+                to_claim.append(entry["message_id"])
+
+        if not to_claim:
+            return []
+
+        claimed = await self.redis.xclaim(
+            queue, consumer_group, consumer, min_idle_ms, to_claim
+        )
+        jobs = []
+        for entry_id, data in claimed:
+            if data:
+                jobs.append(self._parse_job(entry_id, data, queue))
+            else:
+                # Eintrag wurde inzwischen getrimmt (maxlen)
+                await self.ack(queue, consumer_group, entry_id)
+        if jobs:
+            self.logger.warning(f"Reclaimed {len(jobs)} stale messages from {queue}")
+        return jobs
+
+    async def _dead_letter_pending(
+        self, queue: str, consumer_group: str, dlq: str, message_id: str, deliveries: int
+    ):
+        entries = await self.redis.xrange(queue, min=message_id, max=message_id)
+        if entries:
+            job = self._parse_job(*entries[0], queue)
+            await self.move_to_dlq(dlq, job, f"Max deliveries exceeded ({deliveries})")
+            self.logger.error(f"Dead-lettered {job.filename} after {deliveries} deliveries")
+        await self.ack(queue, consumer_group, message_id)
+
+    async def heartbeat(self, queue: str, consumer_group: str, consumer: str, message_ids: List[str]):
+        """Setzt die Idle-Zeit laufender Nachrichten zurück (XCLAIM JUSTID)."""
+        if message_ids:
+            await self.redis.xclaim(
+                queue, consumer_group, consumer, 0, message_ids, justid=True
+            )
+
+    async def pending_count(self, queue: str, consumer_group: str) -> int:
+        """Größe der Pending-Entry-List (PEL) für Queue/Gruppe."""
+        summary = await self.redis.xpending(queue, consumer_group)
+        return summary.get("pending", 0)
+
     async def enqueue(self, queue: str, data: Dict) -> str:
         return await self.redis.xadd(queue, {"data": json.dumps(data)}, maxlen=10000)
 
@@ -511,9 +719,12 @@ class BaseExtractionWorker(ABC):
         input_queue: str,
         output_queue: str,
         dlq: str,
-        worker_name: str
+        worker_name: str,
+        concurrency: int = WORKER_CONCURRENCY
     ):
         self.input_queue = input_queue
+        # Priority-Sub-Streams, höchste Priorität zuerst
+        self.input_streams = priority_streams(input_queue)
         self.output_queue = output_queue
         self.dlq = dlq
         self.worker_name = worker_name
@@ -521,95 +732,234 @@ class BaseExtractionWorker(ABC):
         self.http_client: Optional[httpx.AsyncClient] = None
         self.running = False
         self.logger = logging.getLogger(worker_name)
+
+        # In-flight window (N Jobs gleichzeitig, einzeln ge-ackt)
+        self.concurrency = max(1, concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._in_flight: set = set()
+        self._in_flight_ids: Dict[str, str] = {}  # message id → stream
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._last_reclaim = 0.0
+        self._last_served: Dict[str, float] = {}
         
         # Error Classification System
         self.file_validator = SourceFileValidator()
         self.error_classifier = ErrorClassifier()
 
+        # Extraction Cache (optional, Key-Präfix = Worker-Typ)
+        self.cache_extractor = f"worker:{input_queue.split(':')[-1]}"
+        self.extraction_cache: Optional[ExtractionCache] = None
+        if EXTRACTION_CACHE_PATH:
+            try:
+                self.extraction_cache = ExtractionCache(EXTRACTION_CACHE_PATH)
+            except (OSError, sqlite3.Error) as e:
+                self.logger.warning(f"Extraction cache disabled: {e}")
+
     async def start(self):
         await self.queue_manager.connect()
         self.http_client = httpx.AsyncClient(timeout=300.0)
         self.running = True
-        self.logger.info(f"Worker started, listening on {self.input_queue}")
+        self.logger.info(
+            f"Worker started, listening on {self.input_streams} "
+            f"(concurrency={self.concurrency})"
+        )
+        # Läuft unabhängig von der Hauptschleife, die bei vollen Slots in asyncio.wait hängt
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
 
         while self.running:
             try:
-                jobs = await self.queue_manager.dequeue(
-                    self.input_queue, CONSUMER_GROUP, self.worker_name, count=1
-                )
+                # Nur so viele Nachrichten lesen wie Slots frei sind,
+                # sonst liegen sie unbearbeitet in der Pending-Liste.
+                free_slots = self.concurrency - len(self._in_flight)
+                if free_slots <= 0:
+                    await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                jobs = []
+                if asyncio.get_running_loop().time() - self._last_reclaim >= RECLAIM_INTERVAL_S:
+                    jobs = await self._reclaim_stale(free_slots)
+
+                if len(jobs) < free_slots:
+                    jobs += await self._dequeue_prioritized(free_slots - len(jobs))
 
                 for job in jobs:
-                    start_time = datetime.now()
-                    try:
-                        self.logger.info(f"Processing: {job.filename}")
-
-                        # Datei lokal kopieren (vermeidet SMB-Lock-Probleme)
-                        local_path = await self._copy_to_local(job.path)
-
-                        try:
-                            # Extraktion durchführen
-                            result = await self.extract(job, local_path)
-                            result.processing_time_ms = int(
-                                (datetime.now() - start_time).total_seconds() * 1000
-                            )
-
-                            # In Output Queue schreiben
-                            await self.queue_manager.enqueue(
-                                self.output_queue, result.to_dict()
-                            )
-
-                            # Als verarbeitet markieren
-                            await self.queue_manager.ack(
-                                self.input_queue, CONSUMER_GROUP, job.id
-                            )
-
-                            self.logger.info(
-                                f"Completed: {job.filename} in {result.processing_time_ms}ms"
-                            )
-
-                        finally:
-                            # Lokale Kopie löschen
-                            await self._cleanup_local(local_path)
-
-                    except Exception as e:
-                        # Fehler klassifizieren
-                        classified = self.error_classifier.classify(
-                            exception=e,
-                            context={
-                                'file_path': job.path,
-                                'extension': job.extension,
-                                'worker': self.worker_name,
-                                'retries': job.retries
-                            }
-                        )
-                        
-                        self.logger.error(
-                            f"Error processing {job.filename}: "
-                            f"source={classified.source.value}, "
-                            f"type={classified.error_type.value}, "
-                            f"retry={classified.retry_recommended}"
-                        )
-                        
-                        # Entscheidung: Retry oder DLQ?
-                        if classified.retry_recommended and job.retries < self.MAX_RETRIES:
-                            # Re-queue für Retry
-                            self.logger.info(f"Scheduling retry {job.retries + 1}/{self.MAX_RETRIES} for {job.filename}")
-                            job.retries += 1
-                            await self.queue_manager.enqueue(self.input_queue, job.to_dict())
-                        else:
-                            # Ab in DLQ mit Klassifikation
-                            await self.queue_manager.move_to_dlq_classified(self.dlq, job, classified)
-                        
-                        await self.queue_manager.ack(
-                            self.input_queue, CONSUMER_GROUP, job.id
-                        )
+                    await self._slots.acquire()
+                    task = asyncio.create_task(self._run_job(job))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._in_flight.discard)
 
             except Exception as e:
                 self.logger.error(f"Worker loop error: {e}")
                 await asyncio.sleep(5)
 
+    async def _dequeue_prioritized(self, count: int) -> List[FileJob]:
+        """
+        Strikte Priorität über die Sub-Streams (:high → Basis → :bulk).
+
+        Starvation-Schutz: ein niedrigeres Band, das länger als
+        PRIORITY_STARVATION_S nicht bedient wurde, bekommt vorab einen Slot.
+        Sind alle Bänder leer, wird blockierend auf allen gewartet.
+        """
+        now = asyncio.get_running_loop().time()
+        jobs = []
+
+        for stream in self.input_streams[1:]:
+            last = self._last_served.setdefault(stream, now)
+            if len(jobs) < count and now - last >= PRIORITY_STARVATION_S:
+                jobs += await self.queue_manager.dequeue(
+                    stream, CONSUMER_GROUP, self.worker_name, count=1, block=None
+                )
+                self._last_served[stream] = now
+
+        for stream in self.input_streams:
+            if len(jobs) >= count:
+                break
+            jobs += await self.queue_manager.dequeue(
+                stream, CONSUMER_GROUP, self.worker_name,
+                count=count - len(jobs), block=None
+            )
+            # Auch ein leeres Band gilt als bedient
+            self._last_served[stream] = now
+
+        if not jobs:
+            jobs = await self.queue_manager.dequeue(
+                self.input_streams, CONSUMER_GROUP, self.worker_name, count=count
+            )
+        return jobs
+
+    async def _run_job(self, job: FileJob):
+        """Verarbeitet einen Job im Semaphore-Slot und gibt den Slot danach frei."""
+        self._in_flight_ids[job.id] = job.stream or self.input_queue
+        try:
+            await self.process_job(job)
+        finally:
+            self._in_flight_ids.pop(job.id, None)
+            self._slots.release()
+
+    async def _heartbeat(self):
+        """Setzt die Idle-Zeit aller eigenen laufenden Jobs zurück."""
+        for stream in self.input_streams:
+            message_ids = [mid for mid, s in self._in_flight_ids.items() if s == stream]
+            if not message_ids:
+                continue
+            try:
+                await self.queue_manager.heartbeat(
+                    stream, CONSUMER_GROUP, self.worker_name, message_ids
+                )
+            except Exception as e:
+                self.logger.warning(f"Heartbeat failed for {stream}: {e}")
+
+    async def _heartbeat_loop(self):
+        """Heartbeat alle HEARTBEAT_INTERVAL_S, auch wenn alle Slots belegt sind."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL_S)
+            await self._heartbeat()
+
+    async def _reclaim_stale(self, count: int) -> List[FileJob]:
+        """
+        Heartbeat für eigene laufende Jobs, dann hängende Nachrichten
+        abgestürzter Consumer übernehmen (oder in die DLQ eskalieren).
+        """
+        self._last_reclaim = asyncio.get_running_loop().time()
+        await self._heartbeat()
+        jobs = []
+        pending = 0
+        for stream in self.input_streams:
+            try:
+                if len(jobs) < count:
+                    jobs += await self.queue_manager.claim_stale(
+                        stream, CONSUMER_GROUP, self.worker_name,
+                        min_idle_ms=RECLAIM_MIN_IDLE_MS,
+                        count=count - len(jobs),
+                        max_deliveries=MAX_DELIVERIES,
+                        dlq=self.dlq
+                    )
+                pending += await self.queue_manager.pending_count(stream, CONSUMER_GROUP)
+            except Exception as e:
+                # z.B. NOGROUP vor dem ersten XREADGROUP
+                self.logger.warning(f"Reclaim skipped for {stream}: {e}")
+        self.logger.info(f"Pending entries on {self.input_queue} (all bands): {pending}")
+        return jobs
+
+    async def process_job(self, job: FileJob):
+        """Extrahiert einen Job und ackt ihn, sobald er fertig ist."""
+        start_time = datetime.now()
+        try:
+            self.logger.info(f"Processing: {job.filename}")
+
+            # Pfad-Referenz auf das Volume oder lokale Kopie (FILE_HANDOFF_MODE)
+            local_path = await self._resolve_source(job.path)
+
+            try:
+                # Extraktion durchführen (oder aus dem Cache)
+                result = await self._extract_cached(job, local_path)
+                result.processing_time_ms = int(
+                    (datetime.now() - start_time).total_seconds() * 1000
+                )
+
+                # In Output Queue schreiben
+                await self.queue_manager.enqueue(
+                    self.output_queue, result.to_dict()
+                )
+
+                # Als verarbeitet markieren
+                await self.queue_manager.ack(
+                    job.stream or self.input_queue, CONSUMER_GROUP, job.id
+                )
+
+                self.logger.info(
+                    f"Completed: {job.filename} in {result.processing_time_ms}ms"
+                )
+
+            finally:
+                # Lokale Kopie löschen (Pfad-Referenzen bleiben unangetastet)
+                if not self.uses_path_reference:
+                    await self._cleanup_local(local_path)
+
+        except Exception as e:
+            # Fehler klassifizieren
+            classified = self.error_classifier.classify(
+                exception=e,
+                context={
+                    'file_path': job.path,
+                    'extension': job.extension,
+                    'worker': self.worker_name,
+                    'retries': job.retries
+                }
+            )
+            
+            self.logger.error(
+                f"Error processing {job.filename}: "
+                f"source={classified.source.value}, "
+                f"type={classified.error_type.value}, "
+                f"retry={classified.retry_recommended}"
+            )
+            
+            # Entscheidung: Retry oder DLQ?
+            if classified.retry_recommended and job.retries < self.MAX_RETRIES:
+                # Re-queue für Retry
+                self.logger.info(f"Scheduling retry {job.retries + 1}/{self.MAX_RETRIES} for {job.filename}")
+                job.retries += 1
+                await self.queue_manager.enqueue(
+                    priority_stream(self.input_queue, job.priority), job.to_dict()
+                )
+            else:
+                # Ab in DLQ mit Klassifikation
+                await self.queue_manager.move_to_dlq_classified(self.dlq, job, classified)
+            
+            await self.queue_manager.ack(
+                job.stream or self.input_queue, CONSUMER_GROUP, job.id
+            )
+
     async def stop(self):
         self.running = False
+        # Laufende Jobs zu Ende bringen, damit sie ge-ackt werden
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
         if self.http_client:
             await self.http_client.aclose()
         await self.queue_manager.disconnect()
@@ -660,18 +1010,57 @@ class BaseExtractionWorker(ABC):
         # Already a container path or relative path - pass through
         return source_path
 
+    @property
+    def uses_path_reference(self) -> bool:
+        """True wenn Jobs direkt vom gemounteten Volume gelesen werden."""
+        return FILE_HANDOFF_MODE == "path"
+
+    async def _resolve_source(self, source_path: str) -> Path:
+        """Liefert den zu verarbeitenden Pfad (Volume-Pfad oder lokale Kopie)."""
+        if self.uses_path_reference:
+            return Path(self._translate_path(source_path))
+        return await self._copy_to_local(source_path)
+
     async def _copy_to_local(self, source_path: str) -> Path:
         """Kopiert Datei in lokales temp-Verzeichnis."""
         # Cross-platform path translation for Docker volume mounts
         translated_path = self._translate_path(source_path)
         
         source = Path(translated_path)
+        local_path = self._scratch_path(source_path, source.name)
+        # Kopie im Thread, blockiert den Event-Loop (und parallele Jobs) nicht
+        await asyncio.to_thread(shutil.copy2, source, local_path)
+        return local_path
+
+    def _scratch_path(self, source_path: str, name: str) -> Path:
+        """Pfad im lokalen temp-Verzeichnis für Kopien und abgeleitete Dateien."""
         temp_dir = Path(tempfile.gettempdir()) / "extraction"
         temp_dir.mkdir(exist_ok=True)
+        return temp_dir / f"{hashlib.md5(source_path.encode()).hexdigest()}_{name}"
+
+    async def _iter_file(self, path: Path):
+        """Streamt eine Datei chunkweise (für PUT-Uploads ohne f.read())."""
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
 
-        local_path = temp_dir / f"{hashlib.md5(source_path.encode()).hexdigest()}_{source.name}"
-        shutil.copy2(source, local_path)
-        return local_path
+    async def _post_path_reference(self, url: str, local_path: Path, **kwargs) -> Optional[httpx.Response]:
+        """
+        Übergibt den Volume-Pfad an einen Service mit /path-Endpoint.
+
+        Returns None wenn kein Pfad-Modus aktiv ist oder der Service die Datei
+        nicht sieht (404) - der Aufrufer lädt dann per Stream hoch.
+        """
+        if not self.uses_path_reference:
+            return None
+        response = await self.http_client.post(url, **kwargs)
+        if response.status_code == 404:
+            self.logger.info(f"Path reference not visible to {url}, uploading {local_path.name}")
+            return None
+        return response
 
     async def _cleanup_local(self, local_path: Path):
         """Löscht lokale Kopie."""
@@ -680,6 +1069,45 @@ class BaseExtractionWorker(ABC):
         except Exception:
             pass
 
+    async def _extract_cached(self, job: FileJob, local_path: Path) -> ExtractionResult:
+        """extract() mit persistentem Cache nach (sha256, Worker-Typ, Version)."""
+        if not self.extraction_cache:
+            return await self.extract(job, local_path)
+
+        sha = job.content_sha256 or await asyncio.to_thread(file_sha256, local_path)
+        version = f"{WORKER_EXTRACTOR_VERSION}:{job.processing_path}"
+
+        try:
+            cached = await asyncio.to_thread(
+                self.extraction_cache.get, sha, self.cache_extractor, version
+            )
+        except sqlite3.Error as e:
+            self.logger.warning(f"Cache read failed for {job.filename}: {e}")
+            cached = None
+        if cached:
+            self.logger.info(f"Cache hit: {job.filename}")
+            return ExtractionResult(
+                job_id=job.id,
+                file_path=job.path,
+                filename=job.filename,
+                text=cached["text"],
+                metadata={**cached["metadata"], "cache_hit": True},
+                confidence=cached["confidence"] if cached["confidence"] is not None else 1.0,
+                extraction_method=cached["source"] or "cache",
+            )
+
+        result = await self.extract(job, local_path)
+        # Fallback-Ergebnisse (z.B. Tika nach transientem Docling-Fehler) nicht
+        # cachen, sonst wird der primäre Extraktor für diesen Inhalt nie wieder versucht
+        if result.text and not result.metadata.get("fallback_used"):
+            try:
+                await asyncio.to_thread(
+                    self.extraction_cache.put, sha, self.cache_extractor, version, result
+                )
+            except sqlite3.Error as e:
+                self.logger.warning(f"Cache write failed for {job.filename}: {e}")
+        return result
+
     @abstractmethod
     async def extract(self, job: FileJob, local_path: Path) -> ExtractionResult:
         """Extraktion durchführen - muss von Subklassen implementiert werden."""
@@ -709,18 +1137,27 @@ class DocumentWorker(BaseExtractionWorker):
             self.logger.warning(f"Docling failed, falling back to Tika: {e}")
             # Fallback: Tika
             if job.processing_path == "deep":
-                return await self._extract_tika_deep(job, local_path)
-            return await self._extract_tika_fast(job, local_path)
+                result = await self._extract_tika_deep(job, local_path)
+            else:
+                result = await self._extract_tika_fast(job, local_path)
+            result.metadata["fallback_used"] = True
+            return result
 
     async def _extract_docling(self, job: FileJob, local_path: Path) -> ExtractionResult:
         """Primary: Document Processor (Docling - 97.9% Table Accuracy)."""
-        with open(local_path, "rb") as f:
-            files = {"file": (job.filename, f)}
-            response = await self.http_client.post(
-                f"{DOCUMENT_PROCESSOR_URL}/process/document",
-                files=files,
-                params={"processor": "auto"}
-            )
+        response = await self._post_path_reference(
+            f"{DOCUMENT_PROCESSOR_URL}/process/document/path",
+            local_path,
+            json={"filepath": str(local_path), "processor": "auto"}
+        )
+        if response is None:
+            with open(local_path, "rb") as f:
+                files = {"file": (job.filename, f)}
+                response = await self.http_client.post(
+                    f"{DOCUMENT_PROCESSOR_URL}/process/document",
+                    files=files,
+                    params={"processor": "auto"}
+                )
 
         if response.status_code != 200:
             raise Exception(f"Document Processor error: {response.status_code}")
@@ -743,12 +1180,11 @@ class DocumentWorker(BaseExtractionWorker):
 
     async def _extract_tika_fast(self, job: FileJob, local_path: Path) -> ExtractionResult:
         """Fallback Fast: Tika Plain Text."""
-        with open(local_path, "rb") as f:
-            response = await self.http_client.put(
-                f"{TIKA_URL}/tika",
-                content=f.read(),
-                headers={"Accept": "text/plain"}
-            )
+        response = await self.http_client.put(
+            f"{TIKA_URL}/tika",
+            content=self._iter_file(local_path),
+            headers={"Accept": "text/plain"}
+        )
 
         text = response.text if response.status_code == 200 else ""
 
@@ -763,12 +1199,11 @@ class DocumentWorker(BaseExtractionWorker):
 
     async def _extract_tika_deep(self, job: FileJob, local_path: Path) -> ExtractionResult:
         """Fallback Deep: Tika HTML → Markdown."""
-        with open(local_path, "rb") as f:
-            response = await self.http_client.put(
-                f"{TIKA_URL}/tika",
-                content=f.read(),
-                headers={"Accept": "text/html"}
-            )
+        response = await self.http_client.put(
+            f"{TIKA_URL}/tika",
+            content=self._iter_file(local_path),
+            headers={"Accept": "text/html"}
+        )
 
         html = response.text if response.status_code == 200 else ""
         text = self._html_to_markdown(html)
@@ -817,12 +1252,18 @@ class EbookWorker(BaseExtractionWorker):
         )
 
     async def extract(self, job: FileJob, local_path: Path) -> ExtractionResult:
-        with open(local_path, "rb") as f:
-            files = {"file": (job.filename, f)}
-            response = await self.http_client.post(
-                f"{EBOOK_PARSER_URL}/extract",
-                files=files
-            )
+        response = await self._post_path_reference(
+            f"{EBOOK_PARSER_URL}/extract/path",
+            local_path,
+            params={"filepath": str(local_path)}
+        )
+        if response is None:
+            with open(local_path, "rb") as f:
+                files = {"file": (job.filename, f)}
+                response = await self.http_client.post(
+                    f"{EBOOK_PARSER_URL}/extract",
+                    files=files
+                )
 
         if response.status_code != 200:
             raise Exception(f"Ebook Parser error: {response.status_code}")
@@ -920,7 +1361,7 @@ class ImageWorker(BaseExtractionWorker):
                     from PIL import Image
                     register_heif_opener()
                     img = Image.open(local_path)
-                    ocr_path = local_path.with_suffix(".png")
+                    ocr_path = self._scratch_path(job.path, f"{local_path.stem}.png")
                     img.save(ocr_path, format="PNG")
                     self.logger.info(f"Converted HEIC to PNG: {ocr_path}")
                 except ImportError:
@@ -929,13 +1370,17 @@ class ImageWorker(BaseExtractionWorker):
             elif ext == "svg":
                 try:
                     import cairosvg
-                    ocr_path = local_path.with_suffix(".png")
+                    ocr_path = self._scratch_path(job.path, f"{local_path.stem}.png")
                     cairosvg.svg2png(url=str(local_path), write_to=str(ocr_path))
                     self.logger.info(f"Converted SVG to PNG: {ocr_path}")
                 except ImportError:
                     self.logger.warning("cairosvg not installed, skipping conversion")
             
-            return await self._extract_surya(job, ocr_path)
+            try:
+                return await self._extract_surya(job, ocr_path)
+            finally:
+                if ocr_path != local_path:
+                    await self._cleanup_local(ocr_path)
         except Exception as e:
             self.logger.warning(f"Surya OCR failed: {e}")
             # No fallback - Tesseract deprecated
@@ -995,16 +1440,18 @@ class VideoWorker(BaseExtractionWorker):
         import subprocess
 
         # 1. Audio-Track extrahieren (FFmpeg now installed directly in container)
-        audio_path = local_path.with_suffix(".wav")
+        # Audio-Spur immer ins temp-Verzeichnis (Quell-Volume ist read-only)
+        audio_path = self._scratch_path(job.path, f"{local_path.stem}.wav")
 
-        subprocess.run([
+        # In Threads ausführen, damit parallele Jobs nicht blockiert werden
+        await asyncio.to_thread(subprocess.run, [
             "ffmpeg", "-y", "-i", str(local_path),
             "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
             str(audio_path)
         ], capture_output=True, timeout=300)
 
         # 2. Video-Metadaten extrahieren
-        metadata_result = subprocess.run([
+        metadata_result = await asyncio.to_thread(subprocess.run, [
             "ffprobe", "-v", "quiet", "-print_format", "json",
             "-show_format", "-show_streams", str(local_path)
         ], capture_output=True, text=True, timeout=60)
@@ -1211,13 +1658,19 @@ class SpecialParserWorker(BaseExtractionWorker):
         )
 
     async def extract(self, job: FileJob, local_path: Path) -> ExtractionResult:
-        with open(local_path, "rb") as f:
-            files = {"file": (job.filename, f)}
-            response = await self.http_client.post(
-                f"{SPECIAL_PARSER_URL}/parse",
-                files=files,
-                params={"category": self.category}
-            )
+        response = await self._post_path_reference(
+            f"{SPECIAL_PARSER_URL}/parse/path",
+            local_path,
+            json={"filepath": str(local_path), "category": self.category}
+        )
+        if response is None:
+            with open(local_path, "rb") as f:
+                files = {"file": (job.filename, f)}
+                response = await self.http_client.post(
+                    f"{SPECIAL_PARSER_URL}/parse",
+                    files=files,
+                    params={"category": self.category}
+                )
 
         if response.status_code != 200:
             raise Exception(f"Special parser error: {response.status_code} {response.text}")
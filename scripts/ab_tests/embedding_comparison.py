@@ -7,12 +7,18 @@ Vergleicht multilingual-e5-large (aktuell) mit Qwen3-Embedding (empfohlen).
 Usage:
     python scripts/ab_tests/embedding_comparison.py --samples 1000
     python scripts/ab_tests/embedding_comparison.py --samples 100 --quick
+    python scripts/ab_tests/embedding_comparison.py --reduce pca --dims 128,256,512
 
 Metriken:
     - Retrieval Precision@10
     - Embedding Speed (docs/sec)
     - RAM-Verbrauch
     - Clustering Quality (Silhouette Score)
+
+Mit --reduce (Dimensionsreduktion zur Index-Zeit, EmbeddingService):
+    - Recall@10 der reduzierten Suche gegenüber voller Dimension
+    - Recall@10 nach Rerank der Kandidaten mit voller Dimension
+    - Precision@10 und Bytes pro Vektor im HNSW
 """
 
 import os
@@ -37,6 +43,7 @@ from config.embeddings import (
     get_embedding_config,
     EMBEDDING_MODEL_ACTIVE,
     EMBEDDING_MODEL_EXPERIMENTAL,
+    EMBEDDING_RERANK_OVERSAMPLING,
 )
 from config.paths import LEDGER_DB_PATH, DATA_DIR
 
@@ -535,6 +542,129 @@ def run_ab_test(sample_size: int = 1000) -> ABTestResult:
     return ab_result
 
 
+# =============================================================================
+# DIMENSIONSREDUKTION
+# =============================================================================
+
+def _neighbours(embeddings: np.ndarray, k: int) -> np.ndarray:
+    """Top-K Nachbarn je Dokument (exkl. sich selbst), Embeddings L2-normalisiert."""
+    sim = embeddings @ embeddings.T
+    np.fill_diagonal(sim, -np.inf)
+    k = min(k, len(embeddings) - 1)
+    top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(sim, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+    return hits / max(1, truth.size)
+
+
+def evaluate_reduction(
+    embeddings: np.ndarray,
+    categories: List[str],
+    mode: str,
+    dims: List[int],
+    k: int = 10,
+    oversampling: int = EMBEDDING_RERANK_OVERSAMPLING,
+) -> List[Dict]:
+    """
+    Vergleicht reduzierte mit voller Dimension (jedes Dokument als Query).
+
+    Die PCA wird auf derselben Stichprobe gefittet - für den Vergleich der
+    Zieldimensionen reicht das, absolute Werte sind leicht optimistisch.
+    """
+    from scripts.services.embedding_service import DimensionReducer
+
+    full = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    full = full.astype(np.float32)
+    truth = _neighbours(full, k)
+    rows = [{
+        "dim": full.shape[1],
+        "recall_at_10": 1.0,
+        "recall_at_10_reranked": 1.0,
+        "retrieval_precision_at_10": round(calculate_retrieval_precision(full, categories, k=k), 4),
+        "bytes_per_vector": full.shape[1] * 4,
+    }]
+
+    for dim in sorted(d for d in dims if d < full.shape[1]):
+        reducer = DimensionReducer(mode, dim)
+        if mode == "pca":
+            if len(full) < dim:
+                print(f"  ⚠ PCA {dim}: zu wenige Dokumente ({len(full)})")
+                continue
+            reducer.fit(full)
+        reduced = reducer.transform(full)
+
+        # Stufe 1: Kandidaten aus dem reduzierten Raum, Stufe 2: Rerank mit voller Dimension
+        candidates = _neighbours(reduced, k * oversampling)
+        reranked = []
+        for i, cand in enumerate(candidates):
+            scores = full[cand] @ full[i]
+            reranked.append(cand[np.argsort(-scores)[:k]])
+
+        rows.append({
+            "dim": dim,
+            "recall_at_10": round(_recall(candidates[:, :k], truth), 4),
+            "recall_at_10_reranked": round(_recall(np.array(reranked), truth), 4),
+            "retrieval_precision_at_10": round(calculate_retrieval_precision(reduced, categories, k=k), 4),
+            "bytes_per_vector": dim * 4,
+        })
+    return rows
+
+
+def run_reduction_test(mode: str, dims: List[int], sample_size: int, experimental: bool = False) -> Dict:
+    """Embeddet die Stichprobe einmal mit voller Dimension und bewertet jede Zieldimension."""
+    model_enum = EMBEDDING_MODEL_EXPERIMENTAL if experimental else EMBEDDING_MODEL_ACTIVE
+    config = EMBEDDING_CONFIGS[model_enum]
+    test_id = f"AB-RED-{mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+    print(f"\n{'#'*60}")
+    print(f"# Dimensionsreduktion: {mode} → {dims}")
+    print(f"# Modell: {config.model_id} ({config.dimensions} Dim)")
+    print(f"{'#'*60}")
+
+    if mode == "truncate" and not config.matryoshka:
+        print(f"  ⚠ {config.model_id} ist nicht Matryoshka-trainiert, Truncation wird schlecht abschneiden")
+
+    documents = get_sample_documents(sample_size)
+    service = EmbeddingService(model_enum)
+    if not service.load():
+        sys.exit(1)
+    embeddings = np.asarray(service.embed([doc["text"] for doc in documents]), dtype=np.float32)
+    service.unload()
+
+    rows = evaluate_reduction(
+        embeddings, [doc["category"] for doc in documents], mode, dims,
+    )
+
+    print(f"\n{'Dim':>6} {'Recall@10':>10} {'+Rerank':>10} {'P@10':>8} {'Bytes/Vek':>10}")
+    print("-" * 48)
+    for row in rows:
+        print(f"{row['dim']:>6} {row['recall_at_10']:>10.4f} {row['recall_at_10_reranked']:>10.4f} "
+              f"{row['retrieval_precision_at_10']:>8.4f} {row['bytes_per_vector']:>10}")
+
+    result = {
+        "test_id": test_id,
+        "model_id": config.model_id,
+        "mode": mode,
+        "oversampling": EMBEDDING_RERANK_OVERSAMPLING,
+        "total_docs": len(documents),
+        "rows": rows,
+        "created_at": datetime.now().isoformat(),
+    }
+
+    output_dir = DATA_DIR / "ab_tests"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"{test_id}.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"\n📄 Ergebnis gespeichert: {output_file}")
+    return result
+
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -554,6 +684,22 @@ def main():
         action="store_true",
         help="Quick-Test mit 50 Dokumenten"
     )
+    parser.add_argument(
+        "--reduce",
+        choices=["truncate", "pca"],
+        default=None,
+        help="Statt Modellvergleich: Dimensionsreduktion bewerten"
+    )
+    parser.add_argument(
+        "--dims",
+        default="128,256,512",
+        help="Zieldimensionen für --reduce (default: 128,256,512)"
+    )
+    parser.add_argument(
+        "--experimental",
+        action="store_true",
+        help="--reduce mit dem experimentellen Modell"
+    )
 
     args = parser.parse_args()
 
@@ -571,6 +717,11 @@ def main():
         print("  Install with: pip install sentence-transformers scikit-learn")
         sys.exit(1)
 
+    if args.reduce:
+        dims = [int(d) for d in args.dims.split(",")]
+        run_reduction_test(args.reduce, dims, sample_size, experimental=args.experimental)
+        return
+
     # Test durchführen
     result = run_ab_test(sample_size)
 
@@ -149,7 +149,7 @@ def process_passive_file(filepath: Path):
             text = extract_pdf_native(filepath)
             if not text:
                 print("  ⚠️ Native PDF extraction empty, trying Tika fallback...")
-                text = extract_text_tika(filepath) or ""
+                text = extract_text_tika(filepath, sha256=file_hash) or ""
             data["extracted_text"] = text
             data["extraction_source"] = "pymupdf_native"
             
@@ -166,9 +166,9 @@ def process_passive_file(filepath: Path):
                         data["extracted_text"] = f.read()
                     data["extraction_source"] = "native_text"
                 except:
-                    data["extracted_text"] = extract_text_tika(filepath) or ""
+                    data["extracted_text"] = extract_text_tika(filepath, sha256=file_hash) or ""
             else:
-                data["extracted_text"] = extract_text_tika(filepath) or ""
+                data["extracted_text"] = extract_text_tika(filepath, sha256=file_hash) or ""
         else:
             data["extracted_text"] = ""
             
@@ -4,14 +4,12 @@ Tests if the top search results for a keyword actually contain that keyword or s
 A simple "Sanity Check" for the retrieval system.
 """
 
-import sqlite3
-import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 from tabulate import tabulate
 
 MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
 from config.paths import LEDGER_DB_PATH
+from scripts.services.vector_index import LedgerVectorIndex
 
 LEDGER_DB = str(LEDGER_DB_PATH)
 
@@ -30,22 +28,13 @@ def run_benchmark():
     model = SentenceTransformer(MODEL_NAME)
     
     print("📋 Loading Index...")
-    conn = sqlite3.connect(LEDGER_DB)
-    df = pd.read_sql_query("SELECT id, original_filename, extracted_text, embedding_blob FROM files WHERE embedding_status='DONE'", conn)
-    conn.close()
+    index = LedgerVectorIndex(LEDGER_DB)
     
-    if df.empty:
+    if not index.live_count:
         print("❌ No indexed documents found.")
         return
-
-    # Prepare Corpus
-    embeddings = []
-    for idx, row in df.iterrows():
-        vec = np.frombuffer(row['embedding_blob'], dtype=np.float32)
-        embeddings.append(vec)
-    corpus_embeddings = np.array(embeddings)
     
-    print(f"🔍 Benchmarking {len(TEST_CASES)} queries against {len(df)} docs...\n")
+    print(f"🔍 Benchmarking {len(TEST_CASES)} queries against {index.live_count} docs...\n")
     
     results_table = []
     
@@ -57,23 +46,23 @@ def run_benchmark():
         
         # Search
         query_vec = model.encode(query)
-        hits = util.semantic_search(query_vec, corpus_embeddings, top_k=5)[0]
+        hits = index.search(query_vec, top_k=5)
+        records = index.fetch_records([doc_id for doc_id, _ in hits])
         
         # Evaluate Top 5
         precision_at_5 = 0
         relevant_docs = []
         
-        for hit in hits:
-            doc_idx = hit['corpus_id']
-            record = df.iloc[doc_idx]
-            content = (str(record['original_filename']) + " " + str(record['extracted_text'])).lower()
+        for doc_id, _score in hits:
+            _, filename, text = records.get(doc_id, (doc_id, "", ""))
+            content = (str(filename) + " " + str(text)).lower()
             
             is_relevant = any(k in content for k in expected_keywords)
             if is_relevant:
                 precision_at_5 += 1
-                relevant_docs.append("✅ " + record['original_filename'][:30])
+                relevant_docs.append("✅ " + str(filename)[:30])
             else:
-                relevant_docs.append("❌ " + record['original_filename'][:30])
+                relevant_docs.append("❌ " + str(filename)[:30])
                 
         p5_score = precision_at_5 / 5.0
         total_score += p5_score
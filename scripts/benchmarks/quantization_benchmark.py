@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Quantization Benchmark: Recall vs. Speicher
+===========================================
+
+Misst, wie viel Recall@k die Vektor-Quantisierung kostet und wie viel RAM
+sie spart - auf unseren eigenen Daten und Queries:
+
+- Dokument-Vektoren: embedding_blob aus dem Shadow Ledger
+  oder (--source qdrant) die Vektoren der Collection per Scroll
+- Queries: tests/fixtures/golden_queries.json, eingebettet über den
+  Embedding-Server (Fallback: lokales Modell); ohne Modell dienen
+  zufällige Dokument-Vektoren als Queries
+
+Modi (wie config/embeddings.get_qdrant_collection_config bzw.
+LedgerVectorIndex mit VECTOR_INDEX_DTYPE):
+    float32            Referenz (exakte Cosine-Suche)
+    float16            lokaler NumPy-Index
+    int8 / binary      Qdrant-Quantisierung ohne und mit Rescoring
+                       (Oversampling x k Kandidaten, Rescore in float32)
+
+Speicher pro Vektor im RAM: quantisierte Vektoren + HNSW-Links
+(m=16 → ~2*m*4 Byte); bei int8/binary liegen die float32-Originale auf Disk.
+--project-dims/--project-count rechnen das auf z.B. Qwen3-Embedding-8B
+(4096 Dimensionen) hoch.
+
+Usage:
+    python scripts/benchmarks/quantization_benchmark.py
+    python scripts/benchmarks/quantization_benchmark.py --source qdrant --k 10
+    python scripts/benchmarks/quantization_benchmark.py --project-dims 4096 --project-count 2000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+GOLDEN_QUERIES = ROOT / "tests" / "fixtures" / "golden_queries.json"
+HNSW_M = 16
+OVERSAMPLING = (1.0, 2.0, 3.0, 4.0)
+GIB = 1024 ** 3
+
+
+# =============================================================================
+# QUANTISIERUNG (Nachbildung der Qdrant-Verfahren)
+# =============================================================================
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def quantize_int8(docs: np.ndarray, quantile: float = 0.99) -> Tuple[np.ndarray, float, float]:
+    """Scalar int8 wie Qdrant: Wertebereich per Quantil, linear auf [-127, 127]."""
+    low = float(np.quantile(docs, 1 - quantile))
+    high = float(np.quantile(docs, quantile))
+    scale = (high - low) / 254 or 1.0
+    codes = np.clip(np.round((docs - low) / scale) - 127, -127, 127).astype(np.int8)
+    return codes, low, scale
+
+
+def dequantize_int8(codes: np.ndarray, low: float, scale: float) -> np.ndarray:
+    return (codes.astype(np.float32) + 127) * scale + low
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """1 Bit pro Dimension (Vorzeichen), gepackt."""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+def hamming_scores(doc_bits: np.ndarray, query_bits: np.ndarray) -> np.ndarray:
+    """Übereinstimmende Bits (höher = ähnlicher), wie Qdrants Binary-Scoring."""
+    xor = np.bitwise_xor(doc_bits, query_bits)
+    return -np.unpackbits(xor, axis=-1).sum(axis=-1).astype(np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def recall(found: List[np.ndarray], truth: List[np.ndarray]) -> float:
+    hits = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+    return hits / max(1, sum(len(t) for t in truth))
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def bytes_per_vector(mode: str, dims: int) -> Dict[str, float]:
+    """RAM- und Disk-Bedarf pro Vektor (ohne Payload)."""
+    links = 2 * HNSW_M * 4
+    ram = {
+        "float32": dims * 4,
+        "float16": dims * 2,
+        "int8": dims,
+        "binary": dims / 8,
+    }[mode]
+    disk = dims * 4 if mode in ("int8", "binary") else 0
+    return {"ram": ram + links, "disk": disk}
+
+
+def run_benchmark(docs: np.ndarray, queries: np.ndarray, k: int = 10) -> List[Dict]:
+    """
+    Recall@k je Modus gegenüber exakter float32-Suche.
+
+    Returns:
+        Zeilen {mode, oversampling, recall, ram_bytes_per_vector, disk_bytes_per_vector}
+    """
+    docs = normalize(docs)
+    queries = normalize(queries)
+    dims = docs.shape[1]
+    truth = [top_k(docs @ q, k) for q in queries]
+    rows = []
+
+    def add(mode: str, found: List[np.ndarray], oversampling: Optional[float] = None):
+        size = bytes_per_vector(mode, dims)
+        rows.append({
+            "mode": mode,
+            "oversampling": oversampling,
+            "recall": round(recall(found, truth), 4),
+            "ram_bytes_per_vector": size["ram"],
+            "disk_bytes_per_vector": size["disk"],
+        })
+
+    add("float32", truth)
+
+    half = docs.astype(np.float16)
+    add("float16", [top_k(half.astype(np.float32) @ q, k) for q in queries])
+
+    codes, low, scale = quantize_int8(docs)
+    approx = dequantize_int8(codes, low, scale)
+    int8_scores = [approx @ q for q in queries]
+
+    bits = quantize_binary(docs)
+    binary_scores = [hamming_scores(bits, quantize_binary(q)) for q in queries]
+
+    for mode, scores in (("int8", int8_scores), ("binary", binary_scores)):
+        add(mode, [top_k(s, k) for s in scores])
+        for factor in OVERSAMPLING[1:]:
+            found = []
+            for q, s in zip(queries, scores):
+                candidates = top_k(s, int(k * factor))
+                # Rescoring mit den float32-Originalen (in Qdrant: von Disk)
+                found.append(candidates[top_k(docs[candidates] @ q, k)])
+            add(mode, found, factor)
+    return rows
+
+
+def project_memory(dims: int, count: int) -> List[Dict]:
+    """RAM/Disk in GiB für `count` Vektoren mit `dims` Dimensionen je Modus."""
+    projected = []
+    for mode in ("float32", "float16", "int8", "binary"):
+        size = bytes_per_vector(mode, dims)
+        projected.append({
+            "mode": mode,
+            "ram_gib": round(size["ram"] * count / GIB, 2),
+            "disk_gib": round(size["disk"] * count / GIB, 2),
+        })
+    return projected
+
+
+# =============================================================================
+# DATEN
+# =============================================================================
+
+def load_ledger_vectors(limit: int) -> np.ndarray:
+    from config.paths import LEDGER_DB_PATH
+
+    with sqlite3.connect(LEDGER_DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT embedding_blob FROM files WHERE embedding_status='DONE' "
+            "AND embedding_blob IS NOT NULL LIMIT ?", (limit,)
+        ).fetchall()
+    vectors = [np.frombuffer(blob, dtype=np.float32) for (blob,) in rows]
+    if not vectors:
+        return np.zeros((0, 0), np.float32)
+    # Häufigste Dimension (Altbestände eines anderen Modells überspringen)
+    dim = Counter(len(v) for v in vectors).most_common(1)[0][0]
+    return np.vstack([v for v in vectors if len(v) == dim])
+
+
+def load_qdrant_vectors(limit: int, collection: str) -> np.ndarray:
+    import requests
+    from config.paths import QDRANT_URL
+
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        body = {"limit": min(1000, limit - len(vectors)), "with_vector": True, "with_payload": False}
+        if offset is not None:
+            body["offset"] = offset
+        response = requests.post(f"{QDRANT_URL}/collections/{collection}/points/scroll", json=body, timeout=60)
+        response.raise_for_status()
+        result = response.json()["result"]
+        vectors.extend(p["vector"] for p in result["points"] if p.get("vector"))
+        offset = result.get("next_page_offset")
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def embed_queries(model: str) -> Optional[np.ndarray]:
+    """Golden Queries über den Embedding-Server, sonst lokal (None wenn beides fehlt)."""
+    queries = [q["query"] for q in json.loads(GOLDEN_QUERIES.read_text(encoding="utf-8"))["queries"]]
+    try:
+        from scripts.services.embedding_client import embed_remote
+        vectors = embed_remote(queries, model=model, normalize=False)  # wie encode() unten
+        if vectors:
+            return np.asarray(vectors, dtype=np.float32)
+    except ImportError:
+        pass
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model).encode(queries, convert_to_numpy=True)
+    except Exception as e:
+        print(f"⚠️ Queries nicht einbettbar ({e}), nutze Dokument-Vektoren als Queries")
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall vs. Speicher für Vektor-Quantisierung")
+    parser.add_argument("--source", choices=["ledger", "qdrant"], default="ledger")
+    parser.add_argument("--collection", default="neural_vault")
+    parser.add_argument("--model", default=None,
+                        help="Query-Modell (Default: Ledger → paraphrase-multilingual-MiniLM-L12-v2, Qdrant → nomic-embed-text)")
+    parser.add_argument("--limit", type=int, default=50000, help="Max. Dokument-Vektoren")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sample-queries", type=int, default=100, help="Dokument-Vektoren als Queries (Fallback)")
+    parser.add_argument("--project-dims", type=int, default=4096, help="Hochrechnung: Dimensionen (8B: 4096)")
+    parser.add_argument("--project-count", type=int, default=0, help="Hochrechnung: Anzahl Chunks (0 = aus)")
+    parser.add_argument("--json", type=Path, default=None, help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args()
+
+    if args.source == "qdrant":
+        docs = load_qdrant_vectors(args.limit, args.collection)
+        model = args.model or "nomic-embed-text"
+    else:
+        docs = load_ledger_vectors(args.limit)
+        model = args.model or "paraphrase-multilingual-MiniLM-L12-v2"
+    if len(docs) <= args.k:
+        print(f"❌ Zu wenige Vektoren ({len(docs)}) in {args.source}")
+        sys.exit(1)
+
+    queries = embed_queries(model)
+    if queries is None or queries.shape[1] != docs.shape[1]:
+        rng = np.random.default_rng(42)
+        queries = docs[rng.choice(len(docs), size=min(args.sample_queries, len(docs)), replace=False)]
+
+    print(f"🔍 {len(docs)} Vektoren × {docs.shape[1]} Dim, {len(queries)} Queries, k={args.k}\n")
+    rows = run_benchmark(docs, queries, k=args.k)
+    print(f"{'Modus':<8} {'Oversampl.':>10} {'Recall@k':>9} {'RAM B/Vek':>10} {'Disk B/Vek':>11}")
+    for row in rows:
+        oversampling = f"{row['oversampling']:.0f}x" if row["oversampling"] else "-"
+        print(f"{row['mode']:<8} {oversampling:>10} {row['recall']:>9.4f} "
+              f"{row['ram_bytes_per_vector']:>10.0f} {row['disk_bytes_per_vector']:>11.0f}")
+
+    result = {"source": args.source, "count": len(docs), "dims": int(docs.shape[1]), "k": args.k, "rows": rows}
+    if args.project_count:
+        result["projection"] = project_memory(args.project_dims, args.project_count)
+        print(f"\n📦 Hochrechnung: {args.project_count} Chunks × {args.project_dims} Dim")
+        for row in result["projection"]:
+            print(f"   {row['mode']:<8} RAM {row['ram_gib']:>7.2f} GiB   Disk {row['disk_gib']:>7.2f} GiB")
+
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"\n💾 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
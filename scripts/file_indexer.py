@@ -20,6 +20,11 @@ if __name__ == "__main__":
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from config.paths import BASE_DIR
+from config.embeddings import get_qdrant_payload_indexes, get_qdrant_quantization_config
+from scripts.utils.chunking import chunk_document, chunk_payload
+from scripts.utils.enhanced_extraction import prepare_for_indexing
+from scripts.services.qdrant_indexer import get_indexer, point_id
+from scripts.services.embedding_client import embed_remote
 
 # Konfiguration aus .env
 TIKA_URL = "http://localhost:9998/tika"
@@ -39,6 +44,9 @@ def load_env():
 
 ENV = load_env()
 QDRANT_KEY = ENV.get("QDRANT_API_KEY", "")
+REDIS_URL = ENV.get("REDIS_URL", "")
+REDIS_PASSWORD = ENV.get("REDIS_PASSWORD", "")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
 
 # Unterstützte Dateitypen für Volltext
 TEXT_EXTENSIONS = {
@@ -90,6 +98,32 @@ def generate_embedding(text: str) -> Optional[List[float]]:
         print(f"  WARN Embedding Fehler: {e}")
     return None
 
+def generate_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """Batch-Embeddings via Embedding-Server, sonst Ollama /api/embed bzw. Einzel-Calls."""
+    # Ollama /api/embed (Fallback) liefert L2-normalisierte Vektoren
+    remote = embed_remote([text[:8000] for text in texts], model="nomic-embed-text", normalize=True)
+    if remote is not None:
+        return remote
+
+    vectors: List[Optional[List[float]]] = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[i:i + EMBED_BATCH_SIZE]
+        try:
+            response = requests.post(
+                f"{OLLAMA_URL}/api/embed",
+                json={"model": "nomic-embed-text", "input": batch},
+                timeout=120
+            )
+            if response.status_code == 200:
+                embeddings = response.json().get("embeddings", [])
+                if len(embeddings) == len(batch):
+                    vectors.extend(embeddings)
+                    continue
+        except Exception as e:
+            print(f"  WARN Batch-Embedding Fehler: {e}")
+        vectors.extend(generate_embedding(text) for text in batch)
+    return vectors
+
 def classify_with_ollama(text: str, filename: str) -> Dict[str, Any]:
     """Klassifiziere Dokument via Ollama."""
     prompt = f"""Analysiere diese Datei und antworte NUR mit JSON.
@@ -131,22 +165,53 @@ Antworte mit exakt diesem JSON-Format:
         "tags": []
     }
 
+def get_qdrant_indexer():
+    """Gepufferter Qdrant-Indexer (bumpt die Collection-Version in Redis)."""
+    return get_indexer(QDRANT_URL, "neural_vault", api_key=QDRANT_KEY,
+                       redis_url=REDIS_URL, redis_password=REDIS_PASSWORD,
+                       payload_indexes=get_qdrant_payload_indexes(),
+                       quantization_config=get_qdrant_quantization_config())
+
 def index_to_qdrant(doc_id: str, vector: List[float], payload: Dict):
-    """Indexiere Vektor in Qdrant."""
-    headers = {"api-key": QDRANT_KEY}
-    response = requests.put(
-        f"{QDRANT_URL}/collections/neural_vault/points",
-        headers=headers,
-        json={
-            "points": [{
-                "id": hash(doc_id) % (2**63),
-                "vector": vector,
-                "payload": payload
-            }]
-        },
-        timeout=30
-    )
-    return response.status_code == 200
+    """Indexiere Vektor in Qdrant (sofort geschrieben, stabile ID)."""
+    return get_qdrant_indexer().upsert([
+        {"id": point_id(doc_id), "vector": vector, "payload": payload}
+    ])
+
+def index_document(doc: Dict) -> int:
+    """
+    Indexiert ein Dokument als Chunk-Points mit parent_id = doc["id"].
+
+    Returns:
+        Anzahl gepufferter Chunks (0 = Fehler)
+    """
+    # Filterfelder (source_type, file_created_timestamp, year_created, ...)
+    payload = prepare_for_indexing(doc, add_headers=False)
+    payload["file_path"] = payload.pop("current_path", "")
+    payload.setdefault("filename", doc.get("original_filename", ""))
+
+    text = doc.get("extracted_text") or doc.get("meta_description", "")
+    chunks = chunk_document(text)
+    if not chunks:
+        return 0
+
+    vectors = generate_embeddings([
+        c.to_rag_text(payload["filename"], category=doc.get("category")) for c in chunks
+    ])
+    points = [
+        {
+            "id": point_id(doc["id"], chunk.index),
+            "vector": vector,
+            "payload": chunk_payload(payload, chunk, doc["id"], len(chunks)),
+        }
+        for chunk, vector in zip(chunks, vectors)
+        if vector
+    ]
+    if not points:
+        return 0
+
+    get_qdrant_indexer().add_document(doc["id"], points)
+    return len(points)
 
 def process_file(filepath: Path) -> Optional[Dict]:
     """Verarbeite eine einzelne Datei."""
@@ -198,6 +263,7 @@ def main(path: str, limit: int = 100):
     total = len(files)
     success = 0
     errors = 0
+    indexed_ids = set()
     start_time = time.time()
     
     for i, filepath in enumerate(files, 1):
@@ -209,26 +275,29 @@ def main(path: str, limit: int = 100):
                 errors += 1
                 continue
             
-            text_for_embedding = doc.get("extracted_text") or doc.get("meta_description", "")
-            vector = generate_embedding(text_for_embedding)
-            if not vector:
-                print("  FAIL Kein Embedding erzeugt")
-                errors += 1
-                continue
-
-            payload = doc.copy()
-            payload["file_path"] = payload.pop("current_path", "")
-
             print("  INFO Indexiere in Qdrant...")
-            if index_to_qdrant(doc["id"], vector, payload):
+            if index_document(doc):
                 success += 1
+                indexed_ids.add(doc["id"])
             else:
+                print("  FAIL Kein Embedding erzeugt")
                 errors += 1
                 
         except Exception as e:
             print(f"  FAIL Fehler: {e}")
             errors += 1
     
+    indexer = get_qdrant_indexer()
+    indexer.flush()
+    if indexer.failed:
+        print(f"  FAIL Qdrant: {indexer.failed} Points nicht geschrieben")
+    # Dokumente, deren Batch auch nach Retries verloren ging, zählen als Fehler
+    lost = indexer.pop_failed_parents() & indexed_ids
+    for doc_id in sorted(lost):
+        print(f"  FAIL Nicht indexiert: {doc_id}")
+    success -= len(lost)
+    errors += len(lost)
+
     duration = time.time() - start_time
     rate = success / duration if duration > 0 else 0
     
@@ -15,7 +15,7 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from config.paths import BASE_DIR, LEDGER_DB_PATH, INBOX_DIR, QUARANTINE_DIR, ARCHIVE_DIR, TEST_SUITE_DIR
 from scripts.bulk_scanner import BulkScanner
-from scripts.file_indexer import process_file, generate_embedding, index_to_qdrant
+from scripts.file_indexer import process_file, index_document
 
 # Config
 SCAN_ROOT = BASE_DIR
@@ -96,9 +96,7 @@ def main():
                 
                 # Qdrant: Embedding + Index
                 if doc.get('extracted_text'):
-                    vec = generate_embedding(doc['extracted_text'])
-                    if vec:
-                        index_to_qdrant(doc['id'], vec, doc)
+                    index_document(doc)
                 
                 # Update DB status
                 status = 'INDEXED'
@@ -9,22 +9,22 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 import gradio as gr
-import sqlite3
-import numpy as np
-from sentence_transformers import SentenceTransformer, util
-import pandas as pd
+from sentence_transformers import SentenceTransformer
 
 # Config
 import requests
 import json
 from config.paths import LEDGER_DB_PATH, DATA_DIR, OLLAMA_URL
+from scripts.services.vector_index import LedgerVectorIndex
 
 LEDGER_DB = LEDGER_DB_PATH
 MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2" # Must match Vector Service!
 
 print("🚀 Loading Search Engine...")
 model = SentenceTransformer(MODEL_NAME)
-print("✅ Ready.")
+vector_index = LedgerVectorIndex(LEDGER_DB)
+vector_index.start_auto_refresh()
+print(f"✅ Ready. ({vector_index.live_count} Vektoren im Index)")
 
 def _search_core(query, top_k=5, threshold=0.35):
     """Core search logic returning structured data."""
@@ -32,33 +32,18 @@ def _search_core(query, top_k=5, threshold=0.35):
         return []
     
     query_vec = model.encode(query)
-    
-    conn = sqlite3.connect(LEDGER_DB)
-    df = pd.read_sql_query("SELECT id, original_filename, extracted_text, embedding_blob FROM files WHERE embedding_status='DONE'", conn)
-    conn.close()
-    
-    if df.empty:
-        return []
-        
-    embeddings = []
-    for idx, row in df.iterrows():
-        vec = np.frombuffer(row['embedding_blob'], dtype=np.float32)
-        embeddings.append(vec)
-        
-    corpus_embeddings = np.array(embeddings)
-    hits = util.semantic_search(query_vec, corpus_embeddings, top_k=top_k)[0]
+    hits = [(doc_id, score) for doc_id, score in vector_index.search(query_vec, top_k=top_k) if score >= threshold]
+    records = vector_index.fetch_records([doc_id for doc_id, _ in hits])
     
     results = []
-    for hit in hits:
-        if hit['score'] < threshold:
+    for doc_id, score in hits:
+        record = records.get(doc_id)
+        if not record:
             continue
-            
-        doc_idx = hit['corpus_id']
-        record = df.iloc[doc_idx]
         results.append({
-            "score": hit['score'],
-            "filename": record['original_filename'],
-            "text": record['extracted_text'] or ""
+            "score": score,
+            "filename": record[1],
+            "text": record[2] or ""
         })
     
     return results
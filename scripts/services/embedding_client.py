@@ -0,0 +1,92 @@
+"""
+Neural Vault Embedding Client
+=============================
+
+Client für den Embedding-Server (infra/docker/embedding-server).
+
+Der Server bündelt gleichzeitige Anfragen aller Ingest-Pfade zu dynamischen
+Batches; Skripte schicken daher alle Texte eines Dokuments in einem Request
+und überlassen Batch-Größe und Sortierung dem Server.
+
+Ist der Server nicht erreichbar, liefert embed_remote() None und der Aufrufer
+fällt auf seinen bisherigen Weg (Ollama bzw. lokales Modell) zurück. Nach
+einem Fehlschlag wird der Server EMBEDDING_SERVICE_RETRY_S lang nicht erneut
+gefragt, damit ein fehlender Container nicht jeden Chunk ausbremst.
+
+Usage:
+    from scripts.services.embedding_client import embed_remote
+
+    vectors = embed_remote(["Text 1", "Text 2"], model="nomic-embed-text", normalize=True)
+    if vectors is None:
+        ...  # Fallback
+"""
+
+import os
+import time
+from typing import List, Optional
+
+import requests
+
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "http://localhost:8045")
+EMBEDDING_SERVICE_TIMEOUT_S = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT_S", "120"))
+EMBEDDING_SERVICE_RETRY_S = float(os.getenv("EMBEDDING_SERVICE_RETRY_S", "60"))
+# Texte pro Request (Server-Limit: EMBED_REQUEST_MAX_TEXTS)
+EMBEDDING_REQUEST_SIZE = int(os.getenv("EMBEDDING_REQUEST_SIZE", "512"))
+
+_session: Optional[requests.Session] = None
+_unavailable_until = 0.0
+
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+def embed_remote(
+    texts: List[str],
+    model: Optional[str] = None,
+    *,
+    normalize: bool,
+    url: str = EMBEDDING_SERVICE_URL,
+) -> Optional[List[List[float]]]:
+    """
+    Embeddings über den Embedding-Server.
+
+    Args:
+        texts: Texte (Reihenfolge bleibt erhalten)
+        model: Modellname, None = Default des Servers
+        normalize: L2-Normalisierung; muss zum Fallback-Pfad des Aufrufers
+            passen, damit Server- und Fallback-Vektoren vergleichbar bleiben
+
+    Returns:
+        Ein Vektor pro Text, oder None wenn der Server nicht verfügbar ist
+    """
+    global _unavailable_until
+    if not texts:
+        return []
+    if not url or time.monotonic() < _unavailable_until:
+        return None
+
+    vectors: List[List[float]] = []
+    try:
+        for i in range(0, len(texts), EMBEDDING_REQUEST_SIZE):
+            batch = texts[i:i + EMBEDDING_REQUEST_SIZE]
+            response = _get_session().post(
+                f"{url}/embed/batch",
+                json={"texts": batch, "model": model, "normalize": normalize},
+                timeout=EMBEDDING_SERVICE_TIMEOUT_S,
+            )
+            if response.status_code != 200:
+                print(f"  ⚠️ Embedding-Server HTTP {response.status_code}: {response.text[:200]}")
+                return None
+            embeddings = response.json().get("embeddings", [])
+            if len(embeddings) != len(batch):
+                return None
+            vectors.extend(embeddings)
+    except requests.RequestException as e:
+        print(f"  ⚠️ Embedding-Server nicht erreichbar ({e}), Fallback für {EMBEDDING_SERVICE_RETRY_S:.0f}s")
+        _unavailable_until = time.monotonic() + EMBEDDING_SERVICE_RETRY_S
+        return None
+    return vectors
@@ -7,6 +7,7 @@ Produktions-Service für Embedding-Generierung mit:
 - Batch Processing
 - Caching
 - Qdrant Integration
+- Optionale Dimensionsreduktion zur Index-Zeit (Matryoshka / PCA)
 
 Usage:
     from scripts.services.embedding_service import EmbeddingService
@@ -20,6 +21,9 @@ import os
 import sys
 import hashlib
 import json
+import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Optional, Union, Tuple
 from dataclasses import dataclass
@@ -36,9 +40,21 @@ from config.embeddings import (
     get_embedding_model,
     EMBEDDING_MODEL_ACTIVE,
     EMBEDDING_MODEL_EXPERIMENTAL,
+    EMBEDDING_RERANK_OVERSAMPLING,
+    REDUCED_VECTOR_NAME,
+    FULL_VECTOR_NAME,
+    get_reduction,
+    get_qdrant_collection_config,
 )
 from config.paths import QDRANT_URL, DATA_DIR
 
+# Gefittete PCA-Projektionen, eine Datei pro (Collection, Modell, Dimension)
+EMBEDDING_REDUCER_DIR = Path(os.getenv("EMBEDDING_REDUCER_DIR", str(DATA_DIR / "embedding_reducers")))
+
+# Embedding-Cache: LRU-Größe im RAM und Speicherformat der Vektor-Datei
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "20000"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")  # float32 | float16
+
 
 # =============================================================================
 # CACHE
@@ -46,60 +62,325 @@ from config.paths import QDRANT_URL, DATA_DIR
 
 class EmbeddingCache:
     """
-    Einfacher Disk-Cache für Embeddings.
+    Kompakter Disk-Cache für Embeddings.
 
     Verhindert Re-Embedding von bereits verarbeiteten Texten.
+
+    Layout (pro Modell eine Datei statt einer .npy pro Text):
+    - <model>.vec: append-only, feste Zeilenbreite (float32 oder float16),
+      per np.memmap gelesen
+    - index.sqlite: Hash(Modell + Text) → Zeilennummer
+    - davor ein begrenzter LRU im RAM (max_memory_items)
+
+    get_many()/set_many() arbeiten batchweise: eine SQL-Abfrage pro Batch,
+    ein Fancy-Index-Zugriff auf die Memmap, ein write() pro Batch.
+
+    Mehrere Prozesse dürfen denselben Cache nutzen: set_many() hält während
+    "Dateiende bestimmen, anhängen, Index schreiben" die Schreibsperre der
+    SQLite-DB (BEGIN IMMEDIATE), die zugleich die .vec-Dateien schützt.
     """
 
-    def __init__(self, cache_dir: Path = None):
+    # SQLite-Limit für Parameter pro Statement
+    _SQL_CHUNK = 900
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        max_memory_items: int = EMBEDDING_CACHE_LRU_SIZE,
+        dtype: str = EMBEDDING_CACHE_DTYPE,
+    ):
         self.cache_dir = cache_dir or (DATA_DIR / "embedding_cache")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.memory_cache = {}  # In-Memory für Session
+        self.dtype = np.dtype(dtype)
+        self.max_memory_items = max_memory_items
+        self.memory_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()  # LRU
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.cache_dir / "index.sqlite", timeout=30, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS stores (
+                model TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                dtype TEXT NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                row INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._db.commit()
+        self._maps: Dict[str, np.memmap] = {}
 
     def _hash_text(self, text: str, model_id: str) -> str:
         """Generiert Hash für Text + Modell."""
         content = f"{model_id}:{text}"
         return hashlib.sha256(content.encode()).hexdigest()[:16]
 
-    def get(self, text: str, model_id: str) -> Optional[np.ndarray]:
-        """Holt Embedding aus Cache."""
-        key = self._hash_text(text, model_id)
+    # -------------------------------------------------------------------------
+    # Vektor-Datei pro Modell
+    # -------------------------------------------------------------------------
+
+    def _store(self, model_id: str, dim: Optional[int] = None) -> Optional[Tuple[Path, int, np.dtype]]:
+        """(Datei, Dimension, dtype) des Modells; legt den Store bei Bedarf an."""
+        row = self._db.execute(
+            "SELECT file, dim, dtype FROM stores WHERE model = ?", (model_id,)
+        ).fetchone()
+        if row:
+            return self.cache_dir / row[0], row[1], np.dtype(row[2])
+        if dim is None:
+            return None
+        slug = hashlib.sha256(model_id.encode()).hexdigest()[:12]
+        filename = f"{slug}_{dim}_{self.dtype.name}.vec"
+        self._db.execute(
+            "INSERT INTO stores (model, file, dim, dtype) VALUES (?, ?, ?, ?)",
+            (model_id, filename, dim, self.dtype.name),
+        )
+        return self.cache_dir / filename, dim, self.dtype
+
+    def _rows(self, path: Path, dim: int, dtype: np.dtype) -> int:
+        """Vollständig geschriebene Zeilen (Dateigröße ist die Wahrheit)."""
+        return path.stat().st_size // (dim * dtype.itemsize) if path.exists() else 0
+
+    def _memmap(self, path: Path, dim: int, dtype: np.dtype, min_rows: int) -> np.memmap:
+        """Read-only Memmap, neu gemappt sobald die Datei gewachsen ist."""
+        mapped = self._maps.get(str(path))
+        if mapped is None or mapped.shape[0] < min_rows:
+            rows = self._rows(path, dim, dtype)
+            mapped = np.memmap(path, dtype=dtype, mode="r", shape=(rows, dim))
+            self._maps[str(path)] = mapped
+        return mapped
+
+    # -------------------------------------------------------------------------
+    # Batch-API
+    # -------------------------------------------------------------------------
+
+    def get_many(self, texts: List[str], model_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Holt Embeddings für einen Batch.
 
-        # Memory-Cache zuerst
-        if key in self.memory_cache:
-            return self.memory_cache[key]
+        Returns:
+            (hit_mask, vectors): bool-Maske (len(texts),) und float32-Matrix
+            (hit_mask.sum(), dim) in der Reihenfolge der Treffer
+        """
+        keys = [self._hash_text(text, model_id) for text in texts]
+        hit_mask = np.zeros(len(keys), dtype=bool)
+        if not keys:
+            return hit_mask, np.empty((0, 0), dtype=np.float32)
+
+        with self._lock:
+            found: Dict[str, np.ndarray] = {}
+            for key in keys:
+                vector = self.memory_cache.get(key)
+                if vector is not None:
+                    self.memory_cache.move_to_end(key)
+                    found[key] = vector
+
+            missing = list(dict.fromkeys(k for k in keys if k not in found))
+            store = self._store(model_id) if missing else None
+            if store:
+                path, dim, dtype = store
+                rows = {}
+                for start in range(0, len(missing), self._SQL_CHUNK):
+                    chunk = missing[start:start + self._SQL_CHUNK]
+                    rows.update(self._db.execute(
+                        f"SELECT key, row FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall())
+                if rows:
+                    disk_keys = list(rows)
+                    offsets = np.fromiter((rows[k] for k in disk_keys), dtype=np.int64, count=len(disk_keys))
+                    mapped = self._memmap(path, dim, dtype, int(offsets.max()) + 1)
+                    vectors = np.asarray(mapped[offsets], dtype=np.float32)
+                    for key, vector in zip(disk_keys, vectors):
+                        found[key] = vector
+                        self._remember(key, vector)
+
+        if not found:
+            return hit_mask, np.empty((0, 0), dtype=np.float32)
+        hit_mask[:] = [key in found for key in keys]
+        vectors = np.stack([found[key] for key, hit in zip(keys, hit_mask) if hit])
+        return hit_mask, vectors
+
+    def set_many(self, texts: List[str], model_id: str, embeddings: np.ndarray):
+        """Speichert einen Batch (Zeilen von embeddings entsprechen texts)."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not len(texts):
+            return
+        keys = [self._hash_text(text, model_id) for text in texts]
+
+        with self._lock:
+            for key, vector in zip(keys, embeddings):
+                self._remember(key, vector)
+            try:
+                # Prozessübergreifende Schreibsperre bis zum Commit
+                if self._db.in_transaction:
+                    self._db.commit()
+                self._db.execute("BEGIN IMMEDIATE")
+                path, dim, dtype = self._store(model_id, embeddings.shape[1])
+                if dim != embeddings.shape[1]:
+                    raise ValueError(f"Dimension {embeddings.shape[1]} passt nicht zu Store ({dim})")
+
+                # Nur neue Keys anhängen (auch Duplikate im Batch)
+                existing = set()
+                for start in range(0, len(keys), self._SQL_CHUNK):
+                    chunk = keys[start:start + self._SQL_CHUNK]
+                    existing.update(k for (k,) in self._db.execute(
+                        f"SELECT key FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ))
+                new = {}
+                for i, key in enumerate(keys):
+                    if key not in existing and key not in new:
+                        new[key] = i
+                if not new:
+                    self._db.commit()
+                    return
+
+                first_row = self._append(path, embeddings[list(new.values())].astype(dtype))
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO entries (key, row) VALUES (?, ?)",
+                    [(key, first_row + n) for n, key in enumerate(new)],
+                )
+                self._db.commit()
+            except (OSError, sqlite3.Error, ValueError) as e:
+                self._db.rollback()
+                print(f"[EmbeddingCache] ⚠ Schreiben fehlgeschlagen: {e}")
+
+    def _append(self, path: Path, rows: np.ndarray) -> int:
+        """
+        Hängt Zeilen an die Vektor-Datei an; nur unter der Schreibsperre aufrufen.
 
-        # Disk-Cache
-        cache_file = self.cache_dir / f"{key}.npy"
-        if cache_file.exists():
+        Returns:
+            Zeilennummer der ersten geschriebenen Zeile (aus der tatsächlichen
+            Schreibposition, nicht aus einer vorher gelesenen Dateigröße)
+        """
+        row_bytes = rows.shape[1] * rows.dtype.itemsize
+        data = rows.tobytes()
+        with open(path, "ab", buffering=0) as f:
+            end = f.seek(0, os.SEEK_END)
+            start = end - end % row_bytes
+            if start != end:
+                # Halbe Zeile eines abgebrochenen Schreibvorgangs verwerfen
+                f.truncate(start)
             try:
-                embedding = np.load(cache_file)
-                self.memory_cache[key] = embedding
-                return embedding
-            except:
-                pass
+                written = f.write(data)
+                if written != len(data):
+                    raise OSError(f"nur {written} von {len(data)} Bytes geschrieben")
+            except OSError:
+                # Auf ganze Zeilen zurücksetzen, sonst verschieben sich alle folgenden
+                f.truncate(start)
+                raise
+        return start // row_bytes
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self.memory_cache[key] = vector
+        self.memory_cache.move_to_end(key)
+        while len(self.memory_cache) > self.max_memory_items:
+            self.memory_cache.popitem(last=False)
+
+    # -------------------------------------------------------------------------
+    # Einzel-API (kompatibel)
+    # -------------------------------------------------------------------------
 
-        return None
+    def get(self, text: str, model_id: str) -> Optional[np.ndarray]:
+        """Holt Embedding aus Cache."""
+        hit_mask, vectors = self.get_many([text], model_id)
+        return vectors[0] if hit_mask[0] else None
 
     def set(self, text: str, model_id: str, embedding: np.ndarray):
         """Speichert Embedding im Cache."""
-        key = self._hash_text(text, model_id)
-
-        # Memory-Cache
-        self.memory_cache[key] = embedding
-
-        # Disk-Cache (optional, für Persistenz)
-        try:
-            cache_file = self.cache_dir / f"{key}.npy"
-            np.save(cache_file, embedding)
-        except:
-            pass
+        self.set_many([text], model_id, np.asarray(embedding)[None, :])
 
     def clear(self):
         """Leert den Cache."""
-        self.memory_cache.clear()
-        for f in self.cache_dir.glob("*.npy"):
-            f.unlink()
+        with self._lock:
+            self.memory_cache.clear()
+            self._maps.clear()
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM stores")
+            self._db.commit()
+            for pattern in ("*.vec", "*.npy"):  # *.npy: altes Format (eine Datei pro Text)
+                for f in self.cache_dir.glob(pattern):
+                    f.unlink()
+
+
+# =============================================================================
+# DIMENSIONSREDUKTION
+# =============================================================================
+
+class DimensionReducer:
+    """
+    Reduziert Embeddings vor dem HNSW-Index.
+
+    - truncate: erste `dim` Dimensionen (nur Matryoshka-trainierte Modelle)
+    - pca: Projektion auf die ersten `dim` Hauptkomponenten; Mittelwert und
+      Komponenten werden per fit() bestimmt und als .npz neben der
+      Collection gespeichert (EMBEDDING_REDUCER_DIR)
+
+    Das Ergebnis ist wieder L2-normalisiert (Cosine-Distanz in Qdrant).
+    """
+
+    def __init__(self, mode: str, dim: int, path: Optional[Path] = None):
+        self.mode = mode
+        self.dim = dim
+        self.path = path
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        if mode == "pca" and path is not None and path.exists():
+            self.load()
+
+    @classmethod
+    def for_collection(cls, mode: str, dim: int, collection_name: str, model_id: str) -> "DimensionReducer":
+        slug = hashlib.sha256(model_id.encode()).hexdigest()[:12]
+        return cls(mode, dim, EMBEDDING_REDUCER_DIR / f"{collection_name}_{slug}_{dim}.npz")
+
+    @property
+    def ready(self) -> bool:
+        return self.mode == "truncate" or self.components is not None
+
+    def fit(self, embeddings: np.ndarray) -> "DimensionReducer":
+        """Fittet die PCA (SVD der zentrierten Stichprobe) und speichert sie."""
+        if self.mode != "pca":
+            return self
+        sample = np.asarray(embeddings, dtype=np.float64)
+        if len(sample) < self.dim:
+            raise ValueError(f"PCA auf {self.dim} Dimensionen braucht mindestens {self.dim} Embeddings, nicht {len(sample)}")
+        self.mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+        self.components = vt[:self.dim].astype(np.float32)
+        self.mean = self.mean.astype(np.float32)
+        if self.path is not None:
+            self.save()
+        return self
+
+    def transform(self, embeddings: np.ndarray) -> np.ndarray:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.mode == "truncate":
+            reduced = embeddings[..., :self.dim]
+        elif self.components is None:
+            raise RuntimeError(f"PCA für {self.path} ist nicht gefittet (EmbeddingService.fit_reducer)")
+        else:
+            reduced = (embeddings - self.mean) @ self.components.T
+        norms = np.linalg.norm(reduced, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (reduced / norms).astype(np.float32)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp.npz")
+        np.savez(tmp, mean=self.mean, components=self.components)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        with np.load(self.path) as data:
+            self.mean = data["mean"]
+            self.components = data["components"]
 
 
 # =============================================================================
@@ -126,6 +407,8 @@ class EmbeddingService:
     - Caching
     - A/B-Test Support
     - Qdrant Integration
+    - Dimensionsreduktion: reduzierte Vektoren im HNSW, volle Vektoren
+      nur für das Rerank der Kandidaten (benannte Vektoren in Qdrant)
     """
 
     def __init__(
@@ -133,6 +416,8 @@ class EmbeddingService:
         experimental: bool = False,
         use_cache: bool = True,
         device: str = None,
+        reduce: str = None,
+        reduced_dim: int = None,
     ):
         """
         Initialisiert den Service.
@@ -141,10 +426,14 @@ class EmbeddingService:
             experimental: True für experimentelles Modell (A/B-Test)
             use_cache: Embedding-Cache verwenden
             device: cuda, cpu, oder mps
+            reduce: none, truncate oder pca (Default: EMBEDDING_REDUCE)
+            reduced_dim: Zieldimension (Default: EMBEDDING_REDUCED_DIM)
         """
         self.experimental = experimental
         self.config = get_embedding_config(experimental)
         self.use_cache = use_cache
+        self.reduce_mode, self.reduced_dim = get_reduction(experimental, reduce, reduced_dim)
+        self._reducers: Dict[str, DimensionReducer] = {}
 
         # Device Override
         if device:
@@ -155,6 +444,7 @@ class EmbeddingService:
 
         # Qdrant Client (lazy loading)
         self._qdrant = None
+        self._checked_collections: set = set()
 
     @property
     def model_id(self) -> str:
@@ -254,57 +544,40 @@ class EmbeddingService:
 
         batch_size = batch_size or self.config.batch_size
 
-        # Cache-Lookup
-        cached_embeddings = {}
-        texts_to_compute = []
-        indices_to_compute = []
-
+        # Cache-Lookup: ein Bulk-Zugriff pro Batch
         if self.cache:
-            for i, text in enumerate(texts):
-                cached = self.cache.get(text, self.model_id)
-                if cached is not None:
-                    cached_embeddings[i] = cached
-                else:
-                    texts_to_compute.append(text)
-                    indices_to_compute.append(i)
+            hit_mask, cached = self.cache.get_many(texts, self.model_id)
         else:
-            texts_to_compute = texts
-            indices_to_compute = list(range(len(texts)))
+            hit_mask, cached = np.zeros(len(texts), dtype=bool), None
+        compute_idx = np.flatnonzero(~hit_mask)
 
         # Neue Embeddings berechnen
-        computed_embeddings = {}
-        if texts_to_compute:
-            new_embeddings = self.model.encode(
+        computed = None
+        if len(compute_idx):
+            texts_to_compute = [texts[i] for i in compute_idx]
+            computed = np.asarray(self.model.encode(
                 texts_to_compute,
                 batch_size=batch_size,
                 show_progress_bar=show_progress,
                 normalize_embeddings=self.config.normalize,
-            )
-
-            for i, idx in enumerate(indices_to_compute):
-                embedding = new_embeddings[i]
-                computed_embeddings[idx] = embedding
-
-                # Cache speichern
-                if self.cache:
-                    self.cache.set(texts_to_compute[i], self.model_id, embedding)
+            ), dtype=np.float32)
+            if self.cache:
+                self.cache.set_many(texts_to_compute, self.model_id, computed)
 
         # Ergebnis zusammenbauen
-        all_embeddings = []
-        for i in range(len(texts)):
-            if i in cached_embeddings:
-                all_embeddings.append(cached_embeddings[i])
-            else:
-                all_embeddings.append(computed_embeddings[i])
-
-        embeddings_array = np.array(all_embeddings)
+        dim = computed.shape[1] if computed is not None else cached.shape[1]
+        embeddings_array = np.empty((len(texts), dim), dtype=np.float32)
+        if hit_mask.any():
+            embeddings_array[hit_mask] = cached
+        if computed is not None:
+            embeddings_array[compute_idx] = computed
 
         return EmbeddingResult(
             embeddings=embeddings_array,
             model_id=self.model_id,
-            dimensions=embeddings_array.shape[1] if len(embeddings_array) > 0 else self.config.dimensions,
-            cached_count=len(cached_embeddings),
-            computed_count=len(computed_embeddings),
+            dimensions=dim,
+            cached_count=int(hit_mask.sum()),
+            computed_count=len(compute_idx),
         )
 
     def embed_single(self, text: str) -> np.ndarray:
@@ -312,6 +585,38 @@ class EmbeddingService:
         result = self.embed(text)
         return result.embeddings[0]
 
+    # =========================================================================
+    # DIMENSIONSREDUKTION
+    # =========================================================================
+
+    @property
+    def reduces(self) -> bool:
+        return self.reduce_mode != "none"
+
+    def reducer(self, collection_name: str = "documents") -> Optional[DimensionReducer]:
+        """Reducer der Collection (None ohne Reduktion)."""
+        if not self.reduces:
+            return None
+        if collection_name not in self._reducers:
+            self._reducers[collection_name] = DimensionReducer.for_collection(
+                self.reduce_mode, self.reduced_dim, collection_name, self.model_id
+            )
+        return self._reducers[collection_name]
+
+    def fit_reducer(self, texts_or_embeddings, collection_name: str = "documents") -> Optional[DimensionReducer]:
+        """
+        Fittet die PCA der Collection auf einer Stichprobe (Texte oder Embeddings).
+
+        Nötig vor dem ersten store_in_qdrant mit EMBEDDING_REDUCE=pca.
+        Nach einem Re-Fit muss die Collection neu indexiert werden.
+        """
+        reducer = self.reducer(collection_name)
+        if reducer is None:
+            return None
+        if len(texts_or_embeddings) and isinstance(texts_or_embeddings[0], str):
+            texts_or_embeddings = self.embed(list(texts_or_embeddings)).embeddings
+        return reducer.fit(texts_or_embeddings)
+
     # =========================================================================
     # QDRANT INTEGRATION
     # =========================================================================
@@ -328,6 +633,67 @@ class EmbeddingService:
                 return None
         return self._qdrant
 
+    def ensure_collection(self, collection_name: str = "documents") -> bool:
+        """
+        Legt die Collection aus get_qdrant_collection_config an, falls sie fehlt.
+
+        Eine bestehende Collection muss zum Reduktionsmodus passen (benannte
+        Vektoren REDUCED_VECTOR_NAME/FULL_VECTOR_NAME vs. ein unbenannter
+        Vektor), sonst ValueError.
+
+        Returns:
+            False, wenn Qdrant nicht erreichbar ist
+        """
+        if collection_name in self._checked_collections:
+            return True
+        if self.qdrant is None:
+            return False
+        expected = get_qdrant_collection_config(
+            self.experimental, reduce=self.reduce_mode, reduced_dim=self.reduced_dim,
+        )
+        try:
+            from qdrant_client import models
+
+            if self.qdrant.collection_exists(collection_name):
+                info = self.qdrant.get_collection(collection_name)
+                actual = info.config.params.vectors
+            else:
+                spec = models.CreateCollection(**expected)
+                self.qdrant.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=spec.vectors,
+                    hnsw_config=spec.hnsw_config,
+                    optimizers_config=spec.optimizers_config,
+                    quantization_config=spec.quantization_config,
+                )
+                print(f"[EmbeddingService] ✓ Created collection {collection_name}")
+                actual = None
+        except Exception as e:
+            print(f"[EmbeddingService] ✗ Collection setup failed: {e}")
+            return False
+
+        if actual is not None:
+            self._check_vector_layout(collection_name, actual, expected["vectors"])
+        self._checked_collections.add(collection_name)
+        return True
+
+    def _check_vector_layout(self, collection_name: str, actual, expected: Dict):
+        """Vergleicht die Vektor-Konfiguration der Collection mit dem Reduktionsmodus."""
+        if self.reduces:
+            wanted = {name: spec["size"] for name, spec in expected.items()}
+            found = {
+                name: actual[name].size for name in wanted
+                if isinstance(actual, dict) and name in actual
+            }
+        else:
+            wanted = expected["size"]
+            found = None if isinstance(actual, dict) else actual.size
+        if found != wanted:
+            raise ValueError(
+                f"Collection {collection_name} hat Vektoren {found}, erwartet {wanted} "
+                f"(reduce={self.reduce_mode}); Collection neu anlegen und neu indexieren"
+            )
+
     def store_in_qdrant(
         self,
         texts: List[str],
@@ -346,8 +712,11 @@ class EmbeddingService:
 
         Returns:
             True bei Erfolg
+
+        Raises:
+            ValueError: Collection passt nicht zum Reduktionsmodus
         """
-        if self.qdrant is None:
+        if self.qdrant is None or not self.ensure_collection(collection_name):
             return False
 
         try:
@@ -360,14 +729,21 @@ class EmbeddingService:
             if ids is None:
                 ids = [hashlib.sha256(t.encode()).hexdigest()[:16] for t in texts]
 
+            # Reduziert fürs HNSW, voll nur fürs Rerank
+            reducer = self.reducer(collection_name)
+            reduced = reducer.transform(result.embeddings) if reducer else None
+
             # Points erstellen
             points = []
             for i, (embedding, meta, doc_id) in enumerate(zip(
                 result.embeddings, metadata, ids
             )):
+                vector = embedding.tolist()
+                if reduced is not None:
+                    vector = {REDUCED_VECTOR_NAME: reduced[i].tolist(), FULL_VECTOR_NAME: vector}
                 points.append(PointStruct(
                     id=doc_id,
-                    vector=embedding.tolist(),
+                    vector=vector,
                     payload=meta,
                 ))
 
@@ -402,21 +778,42 @@ class EmbeddingService:
 
         Returns:
             Liste von {id, score, payload}
+
+        Raises:
+            ValueError: Collection passt nicht zum Reduktionsmodus
         """
-        if self.qdrant is None:
+        if self.qdrant is None or not self.ensure_collection(collection_name):
             return []
 
         try:
             # Query embedden
             query_embedding = self.embed_single(query)
 
-            # Suche
-            results = self.qdrant.search(
-                collection_name=collection_name,
-                query_vector=query_embedding.tolist(),
-                limit=top_k,
-                score_threshold=score_threshold,
-            )
+            reducer = self.reducer(collection_name)
+            if reducer is not None:
+                # Stufe 1: Kandidaten im reduzierten HNSW, Stufe 2: Rerank mit voller Dimension
+                from qdrant_client import models
+
+                results = self.qdrant.query_points(
+                    collection_name=collection_name,
+                    prefetch=models.Prefetch(
+                        query=reducer.transform(query_embedding).tolist(),
+                        using=REDUCED_VECTOR_NAME,
+                        limit=top_k * EMBEDDING_RERANK_OVERSAMPLING,
+                    ),
+                    query=query_embedding.tolist(),
+                    using=FULL_VECTOR_NAME,
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                ).points
+            else:
+                # Suche
+                results = self.qdrant.search(
+                    collection_name=collection_name,
+                    query_vector=query_embedding.tolist(),
+                    limit=top_k,
+                    score_threshold=score_threshold,
+                )
 
             return [
                 {
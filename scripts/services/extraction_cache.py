@@ -0,0 +1,174 @@
+"""
+Neural Vault Extraction Cache
+=============================
+
+Persistenter Cache für Extraktionsergebnisse.
+
+Schlüssel: (Content SHA-256, Extractor, Extractor-Version/Optionen).
+Ein erneuter Lauf von smart_ingest.py / batch_processor.py oder den Workern
+nach Absturz, Config-Änderung oder Embedding-Modellwechsel
+(siehe config.embeddings.get_migration_info) überspringt so die Extraktion.
+
+Das Schema ist identisch mit dem Cache in infra/docker/workers/extraction_worker.py,
+beide können dieselbe Datei nutzen (EXTRACTION_CACHE_PATH).
+
+Usage:
+    from scripts.services.extraction_cache import get_extraction_cache
+
+    cache = get_extraction_cache()
+    hit = cache.get(sha256, "docling", extractor_version("docling"))
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config.paths import DATA_DIR
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+EXTRACTION_CACHE_PATH = Path(os.getenv(
+    "EXTRACTION_CACHE_PATH",
+    str(DATA_DIR / "extraction_cache" / "extraction_cache.db")
+))
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Bei Parser-Upgrades hochzählen → alte Einträge werden nicht mehr getroffen
+EXTRACTOR_VERSIONS = {
+    "docling": "1",
+    "tika": "1",
+    "tika_enhanced": "1",
+    "surya": "1",
+    "whisperx": "1",
+    "archive": "1",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    sha256 TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    version TEXT NOT NULL,
+    source TEXT,
+    text TEXT NOT NULL,
+    confidence REAL,
+    metadata TEXT,
+    created_at TEXT,
+    PRIMARY KEY (sha256, extractor, version)
+)
+"""
+
+
+def extractor_version(extractor: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Versions-String für den Cache-Key.
+
+    Optionen (z.B. OCR-Sprachen, Markdown-Modus) fließen als Kurz-Hash ein,
+    damit unterschiedliche Einstellungen nicht denselben Eintrag treffen.
+    """
+    version = EXTRACTOR_VERSIONS.get(extractor, "1")
+    if options:
+        digest = hashlib.sha256(
+            json.dumps(options, sort_keys=True, default=str).encode()
+        ).hexdigest()[:12]
+        version = f"{version}:{digest}"
+    return version
+
+
+def file_sha256(filepath: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 des Dateiinhalts."""
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class ExtractionCache:
+    """SQLite-basierter Cache für extrahierten Text + Metadaten."""
+
+    def __init__(self, db_path: Path = EXTRACTION_CACHE_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def get(self, sha256: str, extractor: str, version: str) -> Optional[Dict[str, Any]]:
+        """Gecachtes Ergebnis oder None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source, text, confidence, metadata FROM extraction_cache "
+                "WHERE sha256 = ? AND extractor = ? AND version = ?",
+                (sha256, extractor, version)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "source": row[0],
+            "text": row[1],
+            "confidence": row[2],
+            "metadata": json.loads(row[3]) if row[3] else {},
+        }
+
+    def put(
+        self,
+        sha256: str,
+        extractor: str,
+        version: str,
+        text: str,
+        source: str = None,
+        confidence: float = None,
+        metadata: Dict[str, Any] = None,
+    ):
+        """Speichert ein erfolgreiches Ergebnis (überschreibt vorhandene Einträge)."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache "
+                "(sha256, extractor, version, source, text, confidence, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    sha256, extractor, version, source or extractor, text, confidence,
+                    json.dumps(metadata or {}, default=str), datetime.now().isoformat()
+                )
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Anzahl Einträge pro Extractor."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT extractor, COUNT(*) FROM extraction_cache GROUP BY extractor"
+            ).fetchall()
+        return {"path": str(self.db_path), "entries": dict(rows)}
+
+
+_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Singleton; None wenn deaktiviert oder nicht beschreibbar."""
+    global _cache
+    if not EXTRACTION_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        try:
+            _cache = ExtractionCache()
+        except (OSError, sqlite3.Error) as e:
+            print(f"[WARN] Extraction Cache nicht verfügbar: {e}")
+            return None
+    return _cache
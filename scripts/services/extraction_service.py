@@ -34,6 +34,9 @@ from config.parser_routing import (
     ParserType, ParserConfig, PARSER_CONFIGS
 )
 from config.feature_flags import is_enabled
+from scripts.services.extraction_cache import (
+    get_extraction_cache, extractor_version, file_sha256
+)
 
 
 # =============================================================================
@@ -457,6 +460,8 @@ def extract_text(
     force_parser: ParserType = None,
     use_fallback: bool = True,
     langs: List[str] = None,
+    sha256: Optional[str] = None,
+    use_cache: bool = True,
 ) -> ExtractionResult:
     """
     Extrahiert Text aus einer Datei mit Docling-First Strategie.
@@ -472,6 +477,8 @@ def extract_text(
         force_parser: Parser erzwingen (überschreibt Routing)
         use_fallback: Fallback Chain nutzen wenn primärer Parser fehlschlägt
         langs: Sprachen für OCR/Transcription
+        sha256: Bereits berechneter Content-Hash (spart erneutes Hashen)
+        use_cache: Persistenten Extraction Cache nutzen
 
     Returns:
         ExtractionResult mit Text, Source und Metadaten
@@ -508,6 +515,15 @@ def extract_text(
         ParserType.ARCHIVE: lambda: _extract_archive(path),
     }
 
+    # Extraktions-Optionen pro Parser (Teil des Cache-Keys)
+    parser_options = {
+        ParserType.SURYA: {"langs": langs or ["de", "en"]},
+    }
+
+    cache = get_extraction_cache() if use_cache else None
+    if cache and not sha256:
+        sha256 = file_sha256(path)
+
     # Fallback Chain durchlaufen
     last_result = None
     for i, parser in enumerate(parser_chain):
@@ -515,7 +531,25 @@ def extract_text(
         if not extractor:
             continue
 
-        result = extractor()
+        version = extractor_version(parser.value, parser_options.get(parser))
+        cached = cache.get(sha256, parser.value, version) if cache else None
+        if cached:
+            result = ExtractionResult(
+                text=cached["text"],
+                source=cached["source"],
+                success=True,
+                confidence=cached["confidence"] or 0.0,
+                metadata={**cached["metadata"], "cache_hit": True},
+            )
+        else:
+            result = extractor()
+            # Lokale Fallbacks (Tesseract, faster-whisper) nicht cachen
+            if cache and result.success and result.text and not result.fallback_used:
+                cache.put(
+                    sha256, parser.value, version, result.text,
+                    source=result.source, confidence=result.confidence,
+                    metadata=result.metadata
+                )
 
         if result.success and result.text:
             # Markiere wenn Fallback verwendet wurde
@@ -0,0 +1,384 @@
+"""
+Neural Vault Qdrant Indexer
+===========================
+
+Gepufferter Upsert-Client für Qdrant.
+
+- Puffert Points und flusht nach Größe (batch_size) oder Zeit (flush_interval_s)
+- Wiederholt fehlgeschlagene Upserts mit Backoff (Netzwerk, 429, 5xx);
+  endgültig fehlgeschlagene Dokumente werden per parent_id gemeldet
+  (on_failure-Callback bzw. pop_failed_parents)
+- Eine gepoolte requests.Session für alle Requests
+- Deterministische Point-IDs (UUIDv5 aus Content-Hash + Chunk-Index):
+  Re-Indexierung überschreibt statt zu duplizieren
+- Nach jedem Schreibvorgang wird die Collection-Version in Redis erhöht;
+  die Query-Caches der Such-APIs verwerfen damit veraltete Antworten
+- Legt beim ersten Indexer die Payload-Indexe für serverseitige Filter an
+  (config/embeddings.get_qdrant_payload_indexes)
+- Stellt die Vektor-Quantisierung der Collection ein bzw. schaltet sie ab
+  (config/embeddings.get_qdrant_quantization_config, Originale auf Disk);
+  existiert die Collection noch nicht, wird nach dem ersten Upsert nachgezogen
+
+Usage:
+    from scripts.services.qdrant_indexer import QdrantIndexer, point_id
+
+    with QdrantIndexer(QDRANT_URL, "neural_vault", api_key=QDRANT_KEY) as indexer:
+        indexer.add(point_id(sha256, 0), vector, payload)
+"""
+
+import os
+import time
+import uuid
+import atexit
+import threading
+from typing import Callable, List, Dict, Any, Optional, Set
+
+import requests
+
+# Optionale Abhängigkeit: ohne redis keine Cache-Invalidierung
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+QDRANT_BATCH_SIZE = int(os.getenv("QDRANT_BATCH_SIZE", "128"))
+QDRANT_FLUSH_INTERVAL_S = float(os.getenv("QDRANT_FLUSH_INTERVAL_S", "5"))
+# Wiederholungen pro Batch; Wartezeit verdoppelt sich ab QDRANT_RETRY_BACKOFF_S
+QDRANT_UPSERT_RETRIES = int(os.getenv("QDRANT_UPSERT_RETRIES", "3"))
+QDRANT_RETRY_BACKOFF_S = float(os.getenv("QDRANT_RETRY_BACKOFF_S", "1.0"))
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", "")
+# Gleicher Key wie COLLECTION_VERSION_KEY in neural-search-api
+COLLECTION_VERSION_KEY = "neural:collection_version:{collection}"
+
+# Fester Namespace → gleiche Eingabe ergibt überall dieselbe ID
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1b55-2a4e-5c57-9a8e-3d1f0e6b9c21")
+
+
+def point_id(content_hash: str, chunk_index: int = 0) -> str:
+    """Stabile Point-ID (UUIDv5) für (Content-Hash, Chunk-Index)."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{content_hash}:{chunk_index}"))
+
+
+class QdrantIndexer:
+    """Batching Upsert-Client mit Größen- und Zeit-Flush."""
+
+    def __init__(
+        self,
+        url: str,
+        collection: str,
+        api_key: str = "",
+        batch_size: int = QDRANT_BATCH_SIZE,
+        flush_interval_s: float = QDRANT_FLUSH_INTERVAL_S,
+        timeout: int = 60,
+        redis_url: str = REDIS_URL,
+        redis_password: str = REDIS_PASSWORD,
+        retries: int = QDRANT_UPSERT_RETRIES,
+        retry_backoff_s: float = QDRANT_RETRY_BACKOFF_S,
+        on_failure: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.url = url.rstrip("/")
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_backoff_s = retry_backoff_s
+        # Wird mit den parent_ids eines endgültig fehlgeschlagenen Batches aufgerufen
+        self.on_failure = on_failure
+
+        self.session = requests.Session()
+        if api_key:
+            self.session.headers["api-key"] = api_key
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._replaced: List[tuple] = []  # (parent_id, keep_ids) nach Upsert bereinigen
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+        self._redis = None
+        if REDIS_AVAILABLE and redis_url:
+            self._redis = redis.Redis.from_url(
+                redis_url, password=redis_password or None, socket_timeout=2
+            )
+        self.version_key = COLLECTION_VERSION_KEY.format(collection=collection)
+
+        self.upserted = 0
+        self.failed = 0
+        self.failed_parents: Set[str] = set()
+        self.indexed_fields: set = set()
+        # Gewünschte Quantisierung; pending, solange die Collection fehlte
+        self.quantization_config: Optional[Dict[str, Any]] = None
+        self.quantization_pending = False
+
+    # -------------------------------------------------------------------------
+    # Buffering
+    # -------------------------------------------------------------------------
+
+    def add(self, id: str, vector: List[float], payload: Dict[str, Any]):
+        """Puffert einen Point; flusht wenn batch_size erreicht ist."""
+        self._ensure_flusher()
+        with self._lock:
+            self._buffer.append({"id": id, "vector": vector, "payload": payload})
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def add_document(self, parent_id: str, points: List[Dict[str, Any]]):
+        """
+        Puffert alle Points eines Dokuments ({"id", "vector", "payload"}).
+
+        Nach erfolgreichem Upsert werden ältere Points desselben Dokuments,
+        die nicht mehr dazugehören, gelöscht (siehe delete_stale_points).
+        """
+        self._ensure_flusher()
+        with self._lock:
+            self._buffer.extend(points)
+            self._replaced.append((parent_id, [p["id"] for p in points]))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Schreibt alle gepufferten Points in einem Request."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            replaced, self._replaced = self._replaced, []
+            self._last_flush = time.monotonic()
+        if not batch:
+            return True
+
+        ok = self.upsert(batch)
+        if ok:
+            for parent_id, keep_ids in replaced:
+                self.delete_stale_points(parent_id, keep_ids)
+        else:
+            self._report_failure(batch)
+        return ok
+
+    def upsert(self, points: List[Dict[str, Any]]) -> bool:
+        """
+        Schreibt Points sofort (ohne Puffer), mit Retries und Backoff.
+
+        Client-Fehler (4xx außer 429) werden nicht wiederholt.
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.retry_backoff_s * 2 ** (attempt - 1))
+            try:
+                response = self.session.put(
+                    f"{self.url}/collections/{self.collection}/points",
+                    params={"wait": "true"},
+                    json={"points": points},
+                    timeout=self.timeout,
+                )
+                if response.status_code == 200:
+                    self.upserted += len(points)
+                    self.bump_collection_version()
+                    if self.quantization_pending:
+                        # Collection existiert jetzt: Quantisierung nachziehen
+                        self.ensure_quantization(self.quantization_config)
+                    return True
+                print(f"  ⚠️ Qdrant Upsert fehlgeschlagen: HTTP {response.status_code} {response.text[:200]}")
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+            except requests.RequestException as e:
+                print(f"  ⚠️ Qdrant Upsert fehlgeschlagen: {e}")
+        self.failed += len(points)
+        return False
+
+    def _report_failure(self, batch: List[Dict[str, Any]]):
+        """Meldet die Dokumente eines verlorenen Batches (parent_id, sonst Payload-"id")."""
+        parents = sorted({
+            p["payload"].get("parent_id") or p["payload"].get("id") or p["id"] for p in batch
+        })
+        with self._lock:
+            self.failed_parents.update(parents)
+        print(f"  ❌ Qdrant: {len(batch)} Points von {len(parents)} Dokument(en) nach {self.retries} Retries verworfen")
+        if self.on_failure:
+            try:
+                self.on_failure(parents)
+            except Exception as e:
+                print(f"  ⚠️ on_failure fehlgeschlagen: {e}")
+
+    def pop_failed_parents(self) -> Set[str]:
+        """parent_ids, deren Points seit dem letzten Aufruf nicht geschrieben wurden."""
+        with self._lock:
+            failed, self.failed_parents = self.failed_parents, set()
+        return failed
+
+    def delete_stale_points(self, parent_id: str, keep_ids: List[str]) -> bool:
+        """
+        Entfernt alte Points eines Dokuments, die nicht in keep_ids sind.
+
+        Betrifft überzählige Chunks nach Re-Extraktion sowie Points aus
+        früheren Läufen mit nicht-deterministischen IDs (inkl. Legacy-Points
+        ohne parent_id, deren Payload-"id" der Content-Hash ist).
+        """
+        try:
+            response = self.session.post(
+                f"{self.url}/collections/{self.collection}/points/delete",
+                params={"wait": "true"},
+                json={"filter": {
+                    "should": [
+                        {"key": "parent_id", "match": {"value": parent_id}},
+                        {"must": [
+                            {"key": "id", "match": {"value": parent_id}},
+                            {"is_empty": {"key": "parent_id"}},
+                        ]},
+                    ],
+                    "must_not": [{"has_id": keep_ids}],
+                }},
+                timeout=self.timeout,
+            )
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def ensure_payload_indexes(self, schema: Dict[str, str]) -> int:
+        """
+        Legt Payload-Indexe an (Feld -> field_schema, z.B. "keyword", "integer").
+
+        Qdrant behandelt bestehende Indexe idempotent; pro Indexer wird jedes
+        Feld nur einmal angefragt.
+
+        Returns:
+            Anzahl erfolgreich angelegter/bestätigter Indexe
+        """
+        created = 0
+        for field_name, field_schema in schema.items():
+            if field_name in self.indexed_fields:
+                continue
+            try:
+                response = self.session.put(
+                    f"{self.url}/collections/{self.collection}/index",
+                    params={"wait": "true"},
+                    json={"field_name": field_name, "field_schema": field_schema},
+                    timeout=self.timeout,
+                )
+                if response.status_code == 200:
+                    self.indexed_fields.add(field_name)
+                    created += 1
+                else:
+                    print(f"  ⚠️ Payload-Index {field_name} fehlgeschlagen: HTTP {response.status_code}")
+            except requests.RequestException as e:
+                print(f"  ⚠️ Payload-Index {field_name} fehlgeschlagen: {e}")
+        return created
+
+    def ensure_quantization(self, quantization_config: Optional[Dict[str, Any]]) -> bool:
+        """
+        Stellt die Quantisierung der Collection ein (PATCH nur bei Abweichung).
+
+        Mit Quantisierung werden die Original-Vektoren auf Disk verschoben;
+        Qdrant baut die quantisierten Segmente im Hintergrund neu. None
+        schaltet eine bestehende Quantisierung ab. Fehlt die Collection noch
+        (oder ist Qdrant nicht erreichbar), wird nach dem nächsten
+        erfolgreichen Upsert erneut geprüft.
+
+        Returns:
+            True wenn die Collection die gewünschte Konfiguration hat
+        """
+        self.quantization_config = quantization_config
+        self.quantization_pending = False
+        try:
+            response = self.session.get(f"{self.url}/collections/{self.collection}", timeout=self.timeout)
+            if response.status_code != 200:
+                print(f"  ⚠️ Collection {self.collection} nicht lesbar: HTTP {response.status_code}")
+                self.quantization_pending = response.status_code == 404
+                return False
+            current = (response.json().get("result") or {}).get("config", {}).get("quantization_config")
+            if current == quantization_config:
+                return True
+            body: Dict[str, Any] = {"quantization_config": quantization_config or "Disabled"}
+            if quantization_config:
+                body["vectors"] = {"": {"on_disk": True}}
+            response = self.session.patch(
+                f"{self.url}/collections/{self.collection}",
+                json=body,
+                timeout=self.timeout,
+            )
+            if response.status_code == 200:
+                print(f"  ✓ Quantisierung für {self.collection}: {quantization_config or 'aus'}")
+                return True
+            print(f"  ⚠️ Quantisierung fehlgeschlagen: HTTP {response.status_code} {response.text[:200]}")
+        except requests.RequestException as e:
+            print(f"  ⚠️ Quantisierung fehlgeschlagen: {e}")
+            self.quantization_pending = True
+        return False
+
+    def bump_collection_version(self) -> Optional[int]:
+        """Erhöht die Collection-Version (invalidiert Query-Caches)."""
+        if self._redis is None:
+            return None
+        try:
+            return self._redis.incr(self.version_key)
+        except redis.RedisError as e:
+            print(f"  ⚠️ Collection-Version nicht erhöht: {e}")
+            return None
+
+    # -------------------------------------------------------------------------
+    # Zeit-Flush
+    # -------------------------------------------------------------------------
+
+    def _ensure_flusher(self):
+        if self._flusher is None and self.flush_interval_s > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval_s / 2):
+            with self._lock:
+                due = self._buffer and time.monotonic() - self._last_flush >= self.flush_interval_s
+            if due:
+                self.flush()
+
+    def close(self):
+        """Restpuffer schreiben und Session schließen."""
+        self._stop.set()
+        self.flush()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_indexers: Dict[tuple, QdrantIndexer] = {}
+
+
+def get_indexer(
+    url: str,
+    collection: str,
+    api_key: str = "",
+    redis_url: str = REDIS_URL,
+    redis_password: str = REDIS_PASSWORD,
+    payload_indexes: Optional[Dict[str, str]] = None,
+    quantization_config: Optional[Dict[str, Any]] = None,
+    on_failure: Optional[Callable[[List[str]], None]] = None,
+) -> QdrantIndexer:
+    """
+    Prozessweiter Indexer pro (URL, Collection); flusht beim Beenden.
+
+    payload_indexes, quantization_config und on_failure werden beim
+    Erzeugen des Indexers angewendet. quantization_config wird immer
+    abgeglichen (None = ohne Quantisierung, z.B. QDRANT_QUANTIZATION=none).
+    """
+    key = (url, collection)
+    if key not in _indexers:
+        _indexers[key] = QdrantIndexer(
+            url, collection, api_key=api_key,
+            redis_url=redis_url, redis_password=redis_password,
+            on_failure=on_failure,
+        )
+        if payload_indexes:
+            _indexers[key].ensure_payload_indexes(payload_indexes)
+        _indexers[key].ensure_quantization(quantization_config)
+        atexit.register(_indexers[key].close)
+    return _indexers[key]
@@ -0,0 +1,424 @@
+"""
+Neural Vault Ledger Vector Index
+================================
+
+Residenter Vektor-Index für den SQLite embedding_blob Pfad
+(search_ui.py, benchmark_search.py).
+
+- Einmaliger Aufbau in eine zusammenhängende Matrix (L2-normalisiert),
+  als Sidecar-.npy gespeichert und per Memory-Map geladen
+- Speicherformat float32 oder float16 (VECTOR_INDEX_DTYPE): float16 halbiert
+  RAM/Page-Cache, gerechnet wird blockweise in float32
+- Inkrementeller Refresh über files.updated_at (neue/geänderte Zeilen landen
+  in einem Delta, ersetzte Zeilen werden als tot markiert); gescannt wird ab
+  Watermark minus VECTOR_INDEX_OVERLAP_S, weil Schreiber vor dem Commit stempeln
+- Top-k per Matrix-Vektor-Produkt + np.argpartition
+
+Usage:
+    from scripts.services.vector_index import LedgerVectorIndex
+
+    index = LedgerVectorIndex()
+    index.start_auto_refresh()
+    hits = index.search(model.encode(query), top_k=10)  # [(file_id, score), ...]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Tuple, Optional, Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config.paths import LEDGER_DB_PATH, DATA_DIR
+
+
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", str(DATA_DIR / "vector_index")))
+VECTOR_INDEX_REFRESH_S = float(os.getenv("VECTOR_INDEX_REFRESH_S", "30"))
+# Delta-Zeilen bzw. Anteil toter Zeilen, ab dem neu geschrieben wird
+VECTOR_INDEX_COMPACT_ROWS = int(os.getenv("VECTOR_INDEX_COMPACT_ROWS", "10000"))
+VECTOR_INDEX_COMPACT_DEAD_RATIO = 0.2
+# Überlappung unter der Watermark (spät committete Zeilen mit älterem updated_at)
+VECTOR_INDEX_OVERLAP_S = float(os.getenv("VECTOR_INDEX_OVERLAP_S", "300"))
+READ_BATCH = 5000
+# SQLite-Limit für Parameter pro Statement
+SQL_CHUNK = 900
+# float32 | float16 (Ledger-Blobs bleiben float32)
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")
+# Zeilen pro float32-Block bei der Suche über eine float16-Basis
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+class LedgerVectorIndex:
+    """Memory-mapped Embedding-Matrix mit inkrementellem Refresh."""
+
+    def __init__(
+        self,
+        db_path: Path = LEDGER_DB_PATH,
+        index_dir: Path = VECTOR_INDEX_DIR,
+        refresh_interval_s: float = VECTOR_INDEX_REFRESH_S,
+        compact_rows: int = VECTOR_INDEX_COMPACT_ROWS,
+        dtype: str = VECTOR_INDEX_DTYPE,
+    ):
+        self.db_path = str(db_path)
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float16):
+            raise ValueError(f"VECTOR_INDEX_DTYPE muss float32 oder float16 sein, nicht {dtype}")
+        self.index_dir = Path(index_dir)
+        self.refresh_interval_s = refresh_interval_s
+        self.compact_rows = compact_rows
+
+        self.matrix_path = self.index_dir / "embeddings.npy"
+        self.ids_path = self.index_dir / "ids.npy"
+        self.state_path = self.index_dir / "state.json"
+
+        self._lock = threading.RLock()          # kurz: Zustand lesen/eintauschen
+        self._refresh_lock = threading.RLock()  # lang: Refresh/Rebuild/Compact serialisieren
+        self.dim: Optional[int] = None
+        self.base = np.zeros((0, 0), dtype=np.float32)
+        self.base_ids = np.zeros(0, dtype=np.int64)   # aufsteigend sortiert
+        self.alive = np.zeros(0, dtype=bool)
+        self.delta: Dict[int, np.ndarray] = {}
+        self._delta_ids = np.zeros(0, dtype=np.int64)
+        self._delta_matrix: Optional[np.ndarray] = None
+        self.watermark: Optional[str] = None
+        self._seen: Dict[int, str] = {}  # id → updated_at, im Überlappungsfenster schon übernommen
+        self._reconciled: Optional[Tuple[int, int]] = None
+        self._last_refresh = 0.0
+        self._has_updated_at = True
+
+        self._load_or_build()
+
+    # -------------------------------------------------------------------------
+    # Laden / Aufbau
+    # -------------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _load_or_build(self):
+        with self._connect() as conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
+        self._has_updated_at = "updated_at" in columns
+
+        if self._has_updated_at and self.state_path.exists() and self.matrix_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text())
+                if state.get("dtype", "float32") != self.dtype.name:
+                    raise ValueError(f"Sidecar ist {state.get('dtype', 'float32')}, erwartet {self.dtype.name}")
+                self.base = np.load(self.matrix_path, mmap_mode="r")
+                self.base_ids = np.load(self.ids_path)
+                self.alive = np.ones(len(self.base_ids), dtype=bool)
+                self.dim = state.get("dim")
+                self.watermark = state.get("watermark")
+                self.refresh(force=True)
+                return
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Vector Index Sidecar unbrauchbar, baue neu: {e}")
+        self.rebuild()
+
+    def rebuild(self):
+        """Vollständiger Aufbau aus dem Ledger (streamend) + Sidecar schreiben."""
+        with self._refresh_lock:
+            with self._connect() as conn:
+                watermark = None
+                if self._has_updated_at:
+                    watermark = conn.execute("SELECT MAX(updated_at) FROM files").fetchone()[0]
+                scan_from = self._scan_from(watermark)
+
+                ids: List[int] = []
+                blocks: List[np.ndarray] = []
+                seen: Dict[int, str] = {}
+                stamp = "updated_at" if self._has_updated_at else "NULL"
+                cursor = conn.execute(
+                    f"SELECT id, embedding_blob, {stamp} FROM files "
+                    "WHERE embedding_status='DONE' AND embedding_blob IS NOT NULL ORDER BY id"
+                )
+                while True:
+                    rows = cursor.fetchmany(READ_BATCH)
+                    if not rows:
+                        break
+                    batch_ids, vectors = self._decode([(row_id, blob) for row_id, blob, _ in rows])
+                    ids.extend(batch_ids)
+                    if vectors is not None:
+                        blocks.append(vectors)
+                    # Schon enthalten, muss im Überlappungsfenster nicht erneut übernommen werden
+                    seen.update((row_id, ts) for row_id, _, ts in rows if ts and ts >= scan_from)
+
+            matrix = np.vstack(blocks) if blocks else np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._install(np.asarray(ids, dtype=np.int64), matrix, watermark)
+            self._seen = seen
+            self._reconciled = None
+            self._last_refresh = time.monotonic()
+
+    def _decode(self, rows) -> Tuple[List[int], Optional[np.ndarray]]:
+        """(id, blob)-Zeilen → ids + normalisierte Matrix (falsche Dimension wird übersprungen)."""
+        ids, vectors = [], []
+        for row_id, blob in rows:
+            vec = np.frombuffer(blob, dtype=np.float32)
+            if self.dim is None:
+                self.dim = len(vec)
+            if len(vec) != self.dim:
+                continue
+            ids.append(row_id)
+            vectors.append(vec)
+        if not vectors:
+            return ids, None
+        return ids, _normalize(np.vstack(vectors))
+
+    def _install(self, ids: np.ndarray, matrix: np.ndarray, watermark: Optional[str]):
+        """
+        Schreibt Matrix + IDs als Sidecar und lädt sie per Memory-Map.
+
+        Geschrieben wird ohne _lock; unter dem Lock werden nur die Dateien
+        ersetzt und die neue Memory-Map eingetauscht.
+        """
+        order = np.argsort(ids, kind="stable")
+        ids, matrix = ids[order], matrix[order].astype(self.dtype, copy=False)
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_matrix = self.matrix_path.with_suffix(".tmp.npy")
+        tmp_ids = self.ids_path.with_suffix(".tmp.npy")
+        np.save(tmp_matrix, matrix)
+        np.save(tmp_ids, ids)
+
+        with self._lock:
+            # Alte Memory-Map freigeben, bevor die Datei ersetzt wird (Windows)
+            self.base = np.zeros((0, self.dim or 0), dtype=self.dtype)
+            os.replace(tmp_matrix, self.matrix_path)
+            os.replace(tmp_ids, self.ids_path)
+            self.state_path.write_text(json.dumps({
+                "dim": self.dim,
+                "count": int(len(ids)),
+                "dtype": self.dtype.name,
+                "watermark": watermark,
+            }))
+
+            self.base = np.load(self.matrix_path, mmap_mode="r")
+            self.base_ids = ids
+            self.alive = np.ones(len(ids), dtype=bool)
+            self.delta = {}
+            self._delta_ids = np.zeros(0, dtype=np.int64)
+            self._delta_matrix = None
+            self.watermark = watermark
+
+    # -------------------------------------------------------------------------
+    # Inkrementeller Refresh
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _scan_from(watermark: Optional[str]) -> str:
+        """
+        Untergrenze des Scans: Watermark minus VECTOR_INDEX_OVERLAP_S.
+
+        updated_at wird vor dem Commit gesetzt; eine Zeile kann also sichtbar
+        werden, nachdem die Watermark schon über ihren Stempel hinaus ist.
+        """
+        if not watermark:
+            return ""
+        try:
+            stamp = datetime.fromisoformat(watermark)
+        except ValueError:
+            return ""
+        sep = watermark[10] if len(watermark) > 10 else "T"
+        return (stamp - timedelta(seconds=VECTOR_INDEX_OVERLAP_S)).isoformat(sep=sep)
+
+    def refresh(self, force: bool = False):
+        """
+        Übernimmt Zeilen ab Watermark minus Überlappung (höchstens alle refresh_interval_s).
+
+        Ledger-Scan und Neuaufbau laufen ohne _lock auf Kopien des Zustands;
+        Suchen sehen bis zum Eintauschen den alten Stand.
+        """
+        if not force and time.monotonic() - self._last_refresh < self.refresh_interval_s:
+            return
+        with self._refresh_lock:
+            if not self._has_updated_at:
+                self.rebuild()
+                return
+            self._last_refresh = time.monotonic()
+
+            with self._lock:
+                base_ids, alive, delta = self.base_ids, self.alive.copy(), dict(self.delta)
+            watermark = self.watermark
+            seen: Dict[int, str] = {}
+            changed = False
+
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "SELECT id, embedding_status, embedding_blob, updated_at FROM files "
+                    "WHERE updated_at >= ? ORDER BY updated_at",
+                    (self._scan_from(self.watermark),)
+                )
+                while True:
+                    rows = cursor.fetchmany(READ_BATCH)
+                    if not rows:
+                        break
+                    fresh = [row for row in rows if self._seen.get(row[0]) != row[3]]
+                    seen.update((row[0], row[3]) for row in rows)
+                    if fresh:
+                        changed = True
+                        self._apply(fresh, base_ids, alive, delta)
+                    watermark = max(watermark or "", rows[-1][3] or "")
+
+                # Ersetzte/gelöschte Zeilen (INSERT OR REPLACE vergibt neue IDs) und
+                # Zeilen, die der Scan verpasst hat; nur wenn sich die Zählung bewegt hat
+                db_count = conn.execute(
+                    "SELECT COUNT(*) FROM files WHERE embedding_status='DONE' AND embedding_blob IS NOT NULL"
+                ).fetchone()[0]
+                counts = (db_count, int(alive.sum()) + len(delta))
+                if counts[0] != counts[1] and counts != self._reconciled:
+                    self._reconcile(conn, base_ids, alive, delta)
+                    self._reconciled = (db_count, int(alive.sum()) + len(delta))
+                    changed = True
+
+            self._seen = seen
+            if not changed:
+                self.watermark = watermark
+                return
+            delta_ids = np.fromiter(delta.keys(), dtype=np.int64, count=len(delta))
+            delta_matrix = np.vstack(list(delta.values())) if delta else None
+            with self._lock:
+                self.alive, self.delta = alive, delta
+                self._delta_ids, self._delta_matrix = delta_ids, delta_matrix
+                self.watermark = watermark
+
+            dead = len(alive) - int(alive.sum())
+            if len(delta) > self.compact_rows or dead > VECTOR_INDEX_COMPACT_DEAD_RATIO * max(1, len(alive)):
+                self.compact()
+
+    def _apply(self, rows, base_ids: np.ndarray, alive: np.ndarray, delta: Dict[int, np.ndarray]):
+        """Geänderte Zeilen: Basiszeile tot markieren, aktuellen Vektor ins Delta."""
+        for row_id, status, blob, _ in rows:
+            pos = np.searchsorted(base_ids, row_id)
+            if pos < len(base_ids) and base_ids[pos] == row_id:
+                alive[pos] = False
+            delta.pop(row_id, None)
+            if status == "DONE" and blob:
+                _, vec = self._decode([(row_id, blob)])
+                if vec is not None:
+                    delta[row_id] = vec[0]
+
+    def _reconcile(self, conn: sqlite3.Connection, base_ids: np.ndarray, alive: np.ndarray,
+                   delta: Dict[int, np.ndarray]):
+        """Gleicht die ID-Menge mit dem Ledger ab: Tote entfernen, Fehlende nachladen."""
+        live_ids = np.fromiter(
+            (r[0] for r in conn.execute(
+                "SELECT id FROM files WHERE embedding_status='DONE' AND embedding_blob IS NOT NULL"
+            )),
+            dtype=np.int64,
+        )
+        alive &= np.isin(base_ids, live_ids)
+        for stale in set(delta) - set(live_ids.tolist()):
+            delta.pop(stale)
+
+        known = np.concatenate([base_ids[alive], np.fromiter(delta.keys(), dtype=np.int64, count=len(delta))])
+        missing = live_ids[~np.isin(live_ids, known)].tolist()
+        for start in range(0, len(missing), SQL_CHUNK):
+            chunk = missing[start:start + SQL_CHUNK]
+            rows = conn.execute(
+                "SELECT id, embedding_status, embedding_blob, updated_at FROM files "
+                f"WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            self._apply(rows, base_ids, alive, delta)
+
+    def compact(self):
+        """Führt Basis (lebende Zeilen) und Delta zusammen und schreibt den Sidecar neu."""
+        with self._refresh_lock:
+            with self._lock:
+                base, base_ids, alive = self.base, self.base_ids, self.alive
+                delta_matrix, delta_ids = self._delta_matrix, self._delta_ids
+            parts = [np.asarray(base[alive])] if len(base_ids) else []
+            ids = [base_ids[alive]] if len(base_ids) else []
+            if delta_matrix is not None:
+                parts.append(delta_matrix)
+                ids.append(delta_ids)
+            matrix = np.vstack(parts) if parts else np.zeros((0, self.dim or 0), dtype=np.float32)
+            all_ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+            self._install(all_ids, matrix, self.watermark)
+
+    def start_auto_refresh(self):
+        """Refresh im Hintergrund-Thread, damit Queries nie auf das Ledger warten."""
+        def loop():
+            while True:
+                time.sleep(self.refresh_interval_s)
+                try:
+                    self.refresh(force=True)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Vector Index Refresh fehlgeschlagen: {e}")
+
+        threading.Thread(target=loop, daemon=True, name="vector-index-refresh").start()
+
+    @property
+    def live_count(self) -> int:
+        return int(self.alive.sum()) + len(self.delta)
+
+    # -------------------------------------------------------------------------
+    # Suche
+    # -------------------------------------------------------------------------
+
+    def search(self, query_vec, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Cosine Top-k über Basis + Delta (ohne Ledger-Zugriff).
+
+        Returns:
+            [(file_id, score), ...] absteigend nach Score
+        """
+        with self._lock:
+            base, base_ids, alive = self.base, self.base_ids, self.alive
+            delta_matrix, delta_ids = self._delta_matrix, self._delta_ids
+
+        q = _normalize(np.asarray(query_vec, dtype=np.float32).reshape(1, -1))[0]
+        scores, ids = [], []
+        if len(base_ids):
+            base_scores = self._base_scores(base, q)
+            base_scores[~alive] = -np.inf
+            scores.append(base_scores)
+            ids.append(base_ids)
+        if delta_matrix is not None:
+            scores.append(delta_matrix @ q)
+            ids.append(delta_ids)
+        if not scores:
+            return []
+
+        scores = np.concatenate(scores)
+        ids = np.concatenate(ids)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    @staticmethod
+    def _base_scores(base: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """base @ q; float16-Basis blockweise nach float32 (kein BLAS für float16)."""
+        if base.dtype == np.float32:
+            return base @ q
+        scores = np.empty(len(base), dtype=np.float32)
+        for start in range(0, len(base), SEARCH_BLOCK_ROWS):
+            block = base[start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ q
+        return scores
+
+    def fetch_records(self, ids: List[int], columns: str = "id, original_filename, extracted_text") -> Dict[int, tuple]:
+        """Lädt Anzeige-Spalten nur für die Treffer."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {columns} FROM files WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {row[0]: row for row in rows}
@@ -55,6 +55,7 @@ try:
         detect_file_type,
         extract_text_enhanced,
         get_all_supported_extensions as get_enhanced_extensions,
+        prepare_for_indexing,
         FileTypeInfo
     )
     ENHANCED_EXTRACTION_AVAILABLE = True
@@ -100,6 +101,20 @@ except ImportError as e:
     UNIFIED_EXTRACTION_AVAILABLE = False
     print(f"[WARN] Unified Extraction nicht verfügbar: {e}")
 
+# Chunking für Multi-Vector Indexierung
+from scripts.utils.chunking import chunk_document, chunk_payload
+from scripts.services.qdrant_indexer import QdrantIndexer, get_indexer, point_id
+from scripts.services.embedding_client import embed_remote
+from config.embeddings import get_qdrant_payload_indexes, get_qdrant_quantization_config
+
+# Persistenter Extraction Cache (sha256, extractor, version)
+try:
+    from scripts.services.extraction_cache import get_extraction_cache, extractor_version
+    EXTRACTION_CACHE_AVAILABLE = True
+except ImportError as e:
+    EXTRACTION_CACHE_AVAILABLE = False
+    print(f"[WARN] Extraction Cache nicht verfügbar: {e}")
+
 # Docker Parser Service Client (bevorzugt für Produktion)
 try:
     from parser_service_client import (
@@ -143,6 +158,7 @@ def load_env():
 
 ENV = load_env()
 QDRANT_KEY = os.environ.get("QDRANT_API_KEY") or ENV.get("QDRANT_API_KEY", "")
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "32"))
 TELEGRAM_TOKEN = ENV.get("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = ENV.get("TELEGRAM_CHAT_ID", "")
 
@@ -183,10 +199,72 @@ def init_shadow_ledger():
             updated_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    init_fulltext_index(cursor)
     conn.commit()
     conn.close()
     print("📊 Shadow Ledger initialisiert")
 
+# Volltext-Index (FTS5, External Content auf files) für die lexikalische
+# Suche (BM25) der Hybrid-Suche in neural-search-api / conductor-api.
+# save_to_shadow_ledger nutzt INSERT OR REPLACE: der REPLACE-Delete feuert
+# keine DELETE-Trigger, daher entfernt der BEFORE-INSERT-Trigger den alten Eintrag.
+FILES_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5(
+        original_filename, current_filename, category, meta_description, extracted_text,
+        content='files', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS files_fts_before_insert BEFORE INSERT ON files BEGIN
+        INSERT INTO files_fts(files_fts, rowid, original_filename, current_filename,
+                              category, meta_description, extracted_text)
+        SELECT 'delete', id, original_filename, current_filename,
+               category, meta_description, extracted_text
+        FROM files WHERE sha256 = new.sha256;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS files_fts_after_insert AFTER INSERT ON files BEGIN
+        INSERT INTO files_fts(rowid, original_filename, current_filename,
+                              category, meta_description, extracted_text)
+        VALUES (new.id, new.original_filename, new.current_filename,
+                new.category, new.meta_description, new.extracted_text);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS files_fts_after_delete AFTER DELETE ON files BEGIN
+        INSERT INTO files_fts(files_fts, rowid, original_filename, current_filename,
+                              category, meta_description, extracted_text)
+        VALUES ('delete', old.id, old.original_filename, old.current_filename,
+                old.category, old.meta_description, old.extracted_text);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS files_fts_after_update AFTER UPDATE OF
+        original_filename, current_filename, category, meta_description, extracted_text
+    ON files BEGIN
+        INSERT INTO files_fts(files_fts, rowid, original_filename, current_filename,
+                              category, meta_description, extracted_text)
+        VALUES ('delete', old.id, old.original_filename, old.current_filename,
+                old.category, old.meta_description, old.extracted_text);
+        INSERT INTO files_fts(rowid, original_filename, current_filename,
+                              category, meta_description, extracted_text)
+        VALUES (new.id, new.original_filename, new.current_filename,
+                new.category, new.meta_description, new.extracted_text);
+    END;
+"""
+
+def init_fulltext_index(cursor: sqlite3.Cursor) -> bool:
+    """Legt files_fts samt Triggern an; bestehende Ledger werden einmalig befüllt."""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'files_fts'"
+    ).fetchone()
+    try:
+        cursor.executescript(FILES_FTS_SCHEMA)
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ FTS5 nicht verfügbar, keine lexikalische Suche: {e}")
+        return False
+    if not exists:
+        cursor.execute("INSERT INTO files_fts(files_fts) VALUES ('rebuild')")
+    return True
+
 def sha256_hash(filepath: Path) -> str:
     """Berechne SHA-256 Hash einer Datei."""
     h = hashlib.sha256()
@@ -221,17 +299,35 @@ def get_mime_type(filepath: Path) -> str:
         print(f"  ⚠️ MIME-Type Fehler: {e}")
     return "application/octet-stream"
 
-def extract_text_tika(filepath: Path, prefer_markdown: bool = True) -> Optional[str]:
+def extract_text_tika(filepath: Path, prefer_markdown: bool = True, sha256: Optional[str] = None) -> Optional[str]:
     """
-    Extrahiere Text via Apache Tika.
+    Extrahiere Text via Apache Tika (mit persistentem Extraction Cache).
 
     Args:
         filepath: Pfad zur Datei
         prefer_markdown: HTML holen und zu Markdown konvertieren (Tabellenerhalt)
+        sha256: Bereits berechneter Content-Hash
 
     Returns:
         Extrahierter Text oder None
     """
+    cache = get_extraction_cache() if EXTRACTION_CACHE_AVAILABLE else None
+    if not cache:
+        return _extract_text_tika_uncached(filepath, prefer_markdown)
+
+    sha256 = sha256 or sha256_hash(filepath)
+    version = extractor_version("tika_enhanced", {"prefer_markdown": prefer_markdown})
+    cached = cache.get(sha256, "tika_enhanced", version)
+    if cached:
+        return cached["text"]
+
+    text = _extract_text_tika_uncached(filepath, prefer_markdown)
+    if text:
+        cache.put(sha256, "tika_enhanced", version, text, source="tika")
+    return text
+
+
+def _extract_text_tika_uncached(filepath: Path, prefer_markdown: bool = True) -> Optional[str]:
     # Bevorzugt: Enhanced Extraction mit HTML→Markdown
     if ENHANCED_EXTRACTION_AVAILABLE and prefer_markdown:
         try:
@@ -407,24 +503,96 @@ def generate_embedding(text: str) -> Optional[List[float]]:
         print(f"  ⚠️ Embedding Fehler: {e}")
     return None
 
+def generate_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Batch-Embeddings über den Embedding-Server (bündelt mit anderen Ingest-Pfaden).
+
+    Ohne Server: Ollama /api/embed (EMBED_BATCH_SIZE Texte pro Request),
+    bei älteren Ollama-Versionen einzelne /api/embeddings Calls.
+    """
+    # Ollama /api/embed (Fallback) liefert L2-normalisierte Vektoren
+    remote = embed_remote([text[:8000] for text in texts], model="nomic-embed-text", normalize=True)
+    if remote is not None:
+        return remote
+
+    vectors: List[Optional[List[float]]] = []
+    for i in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[i:i + EMBED_BATCH_SIZE]
+        try:
+            response = requests.post(
+                f"{OLLAMA_URL}/api/embed",
+                json={"model": "nomic-embed-text", "input": batch},
+                timeout=120
+            )
+            if response.status_code == 200:
+                embeddings = response.json().get("embeddings", [])
+                if len(embeddings) == len(batch):
+                    vectors.extend(embeddings)
+                    continue
+        except Exception as e:
+            print(f"  ⚠️ Batch-Embedding Fehler: {e}")
+        vectors.extend(generate_embedding(text) for text in batch)
+    return vectors
+
+def index_chunks_to_qdrant(doc_id: str, text: str, payload: Dict[str, Any]) -> int:
+    """
+    Indexiert ein Dokument als Chunk-Points (parent_id = doc_id).
+
+    Returns:
+        Anzahl indexierter Chunks
+    """
+    filename = payload.get("current_filename") or payload.get("original_filename", "")
+    chunks = chunk_document(text)
+    if not chunks:
+        return 0
+
+    vectors = generate_embeddings([
+        c.to_rag_text(filename, payload.get("mime_type"), payload.get("category"))
+        for c in chunks
+    ])
+    points = [
+        {
+            "id": point_id(doc_id, chunk.index),
+            "vector": vector,
+            "payload": chunk_payload(payload, chunk, doc_id, len(chunks)),
+        }
+        for chunk, vector in zip(chunks, vectors)
+        if vector
+    ]
+    if not points:
+        return 0
+
+    # Gepuffert: Flush nach Größe/Zeit bzw. am Ende des Laufs
+    get_qdrant_indexer().add_document(doc_id, points)
+    return len(points)
+
 def index_to_qdrant(doc_id: str, vector: List[float], payload: Dict[str, Any]) -> bool:
-    """Indexiere Dokument in Qdrant."""
-    headers = {"api-key": QDRANT_KEY} if QDRANT_KEY else {}
-    response = requests.put(
-        f"{QDRANT_URL}/collections/neural_vault/points",
-        headers=headers,
-        json={
-            "points": [
-                {
-                    "id": hash(doc_id) % (2**63),
-                    "vector": vector,
-                    "payload": payload
-                }
-            ]
-        },
-        timeout=30
+    """Indexiere Dokument in Qdrant (ein Point, sofort geschrieben)."""
+    return get_qdrant_indexer().upsert([
+        {"id": point_id(doc_id), "vector": vector, "payload": payload}
+    ])
+
+def mark_index_failed(parent_ids: List[str]):
+    """Markiert Dateien, deren Points nicht in Qdrant ankamen, im Shadow Ledger."""
+    now = datetime.now().isoformat()
+    conn = sqlite3.connect(SHADOW_LEDGER_PATH)
+    conn.executemany(
+        "UPDATE files SET status = 'index_failed', updated_at = ? WHERE sha256 = ?",
+        [(now, parent_id) for parent_id in parent_ids],
+    )
+    conn.commit()
+    conn.close()
+
+def get_qdrant_indexer() -> QdrantIndexer:
+    """Prozessweiter Batching-Indexer für die neural_vault Collection."""
+    return get_indexer(
+        QDRANT_URL, "neural_vault", api_key=QDRANT_KEY,
+        redis_url=os.environ.get("REDIS_URL") or ENV.get("REDIS_URL", ""),
+        redis_password=os.environ.get("REDIS_PASSWORD") or ENV.get("REDIS_PASSWORD", ""),
+        payload_indexes=get_qdrant_payload_indexes(),
+        quantization_config=get_qdrant_quantization_config(),
+        on_failure=mark_index_failed,
     )
-    return response.status_code == 200
 
 def process_file(filepath: Path) -> bool:
     """
@@ -474,7 +642,7 @@ def process_file(filepath: Path) -> bool:
             parser = get_parser(ext)
             print(f"     ℹ️ Parser Routing: {parser.value}")
 
-            extraction_result = unified_extract(filepath)
+            extraction_result = unified_extract(filepath, sha256=file_hash)
 
             if extraction_result.success:
                 data["extracted_text"] = extraction_result.text
@@ -543,7 +711,7 @@ def process_file(filepath: Path) -> bool:
                 data["extraction_source"] = "tika_fallback"
 
         elif ext in TEXT_EXTENSIONS:
-            text = extract_text_tika(filepath)
+            text = extract_text_tika(filepath, sha256=file_hash)
             data["extracted_text"] = text or ""
             data["extraction_source"] = "tika"
         else:
@@ -643,13 +811,18 @@ def process_file(filepath: Path) -> bool:
             "mime_type": data.get("mime_type"),
         }
 
-        embedding_text = qdrant_payload.get("extracted_text") or qdrant_payload.get("meta_description", "")
-        vector = generate_embedding(embedding_text)
-        if not vector:
-            raise RuntimeError("Kein Embedding erzeugt")
-
+        qdrant_payload["filename"] = new_filename
         qdrant_payload["file_path"] = qdrant_payload.pop("current_path", "")
-        index_to_qdrant(qdrant_payload["id"], vector, qdrant_payload)
+        if ENHANCED_EXTRACTION_AVAILABLE:
+            # Filterfelder (source_type, file_created_timestamp, year_created, ...)
+            qdrant_payload = prepare_for_indexing(qdrant_payload, add_headers=False)
+
+        # Multi-Vector: ein Point pro Chunk (Seiten/Timestamps/Sheets), parent_id = sha256
+        embedding_text = data.get("extracted_text") or qdrant_payload.get("meta_description", "")
+        chunk_count = index_chunks_to_qdrant(file_hash, embedding_text, qdrant_payload)
+        if not chunk_count:
+            raise RuntimeError("Kein Embedding erzeugt")
+        print(f"     → {chunk_count} Chunks indexiert")
         
         print(f"\n  ✅ ERFOLGREICH!")
         print(f"     Von: {filepath.name}")
@@ -712,9 +885,16 @@ def run_once():
             success += 1
         else:
             errors += 1
+
+    indexer = get_qdrant_indexer()
+    indexer.flush()
     
     print("\n" + "=" * 60)
     print(f"✅ Fertig! Erfolg: {success}, Fehler: {errors}")
+    print(f"   Qdrant: {indexer.upserted} Points geschrieben, {indexer.failed} fehlgeschlagen")
+    failed_docs = indexer.pop_failed_parents()
+    if failed_docs:
+        print(f"   ❌ {len(failed_docs)} Datei(en) im Ledger als index_failed markiert")
 
 def run_watch():
     """Überwache Inbox kontinuierlich."""
@@ -15,6 +15,13 @@ from .context_header import (
     format_timestamp
 )
 
+from .chunking import (
+    TextChunk,
+    chunk_document,
+    chunk_payload,
+    make_excerpt
+)
+
 from .feedback_tracker import (
     FeedbackTracker,
     CorrectionEvent,
@@ -30,6 +37,11 @@ __all__ = [
     "create_chunk_for_rag",
     "detect_source_type",
     "format_timestamp",
+    # Chunking
+    "TextChunk",
+    "chunk_document",
+    "chunk_payload",
+    "make_excerpt",
     # Feedback Tracker
     "FeedbackTracker",
     "CorrectionEvent",
@@ -0,0 +1,254 @@
+"""
+Neural Vault Chunking
+=====================
+
+Zerlegt extrahierten Text in Chunks für Multi-Vector Indexierung.
+
+Grenzen werden respektiert:
+- Seiten (Form-Feed oder "Page N"/"Seite N"-Marker)
+- Timestamps (WhisperX-Format "[MM:SS-MM:SS] Text")
+- Sheets (Markdown-Überschriften "## Sheet: Name")
+
+Jeder Chunk trägt eine ChunkLocation und wird für das Embedding mit
+create_chunk_for_rag() um einen Context Header ergänzt.
+
+Usage:
+    from scripts.utils.chunking import chunk_document
+
+    for chunk in chunk_document(text):
+        embed(chunk.to_rag_text("Vertrag.pdf"))
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Dict, Any
+
+from .context_header import ChunkLocation, create_chunk_for_rag
+
+
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1500"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+MAX_CHUNKS_PER_DOC = int(os.getenv("MAX_CHUNKS_PER_DOC", "500"))
+# Vorberechneter Trefferauszug im Payload (Such-APIs laden nur diesen)
+EXCERPT_MAX_CHARS = int(os.getenv("EXCERPT_MAX_CHARS", "500"))
+
+PAGE_MARKER = re.compile(r"^\s*(?:-{2,}\s*)?(?:Page|Seite)\s+(\d+)\s*(?:-{2,})?\s*$", re.IGNORECASE)
+SHEET_MARKER = re.compile(r"^\s*#{1,3}\s*(?:Sheet|Tabelle|Blatt)\s*:?\s*(.+?)\s*$", re.IGNORECASE)
+TIMESTAMP_LINE = re.compile(r"^\[(\d{1,2}:\d{2}(?::\d{2})?)-(\d{1,2}:\d{2}(?::\d{2})?)\]")
+
+
+@dataclass
+class TextChunk:
+    """Ein Chunk mit Position innerhalb des Dokuments."""
+    text: str
+    index: int
+    location: ChunkLocation = field(default_factory=ChunkLocation)
+
+    def to_rag_text(
+        self,
+        filename: str,
+        mime_type: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> str:
+        """Chunk mit Context Header (Eingabe für das Embedding)."""
+        return create_chunk_for_rag(
+            text=self.text,
+            filename=filename,
+            mime_type=mime_type,
+            page=self.location.page,
+            timestamp_start=self.location.timestamp_start,
+            timestamp_end=self.location.timestamp_end,
+            sheet_name=self.location.sheet_name,
+            category=category,
+        )
+
+    def location_payload(self) -> Dict[str, Any]:
+        """Positionsfelder für den Qdrant-Payload (nur gesetzte)."""
+        fields = {
+            "page": self.location.page,
+            "timestamp_start": self.location.timestamp_start,
+            "timestamp_end": self.location.timestamp_end,
+            "sheet_name": self.location.sheet_name,
+        }
+        return {k: v for k, v in fields.items() if v is not None}
+
+
+def parse_timestamp(value: str) -> float:
+    """'MM:SS' oder 'HH:MM:SS' → Sekunden."""
+    seconds = 0.0
+    for part in value.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def split_text(text: str, max_chars: int = CHUNK_MAX_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """
+    Teilt Text in Fenster <= max_chars.
+
+    Bevorzugt Absatz-, dann Satz-, dann Wortgrenzen; benachbarte Fenster
+    überlappen um bis zu `overlap` Zeichen.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    parts = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            window = text[start:end]
+            cut = max(window.rfind("\n\n"), window.rfind(". "), window.rfind("\n"))
+            if cut < max_chars // 2:
+                cut = window.rfind(" ")
+            if cut > max_chars // 2:
+                end = start + cut + 1
+        part = text[start:end].strip()
+        if part:
+            parts.append(part)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return parts
+
+
+def _sections(text: str) -> List[Tuple[ChunkLocation, str]]:
+    """Zerlegt Text an Seiten- und Sheet-Grenzen."""
+    sections: List[Tuple[ChunkLocation, str]] = []
+    pages = text.split("\f")
+    paged = len(pages) > 1
+
+    for page_no, page_text in enumerate(pages, 1):
+        location = ChunkLocation(page=page_no if paged else None)
+        lines: List[str] = []
+
+        for line in page_text.splitlines():
+            page_match = PAGE_MARKER.match(line)
+            sheet_match = SHEET_MARKER.match(line)
+            if page_match or sheet_match:
+                if lines:
+                    sections.append((location, "\n".join(lines)))
+                    lines = []
+                if page_match:
+                    location = ChunkLocation(page=int(page_match.group(1)))
+                else:
+                    location = ChunkLocation(page=location.page, sheet_name=sheet_match.group(1))
+                continue
+            lines.append(line)
+
+        if lines:
+            sections.append((location, "\n".join(lines)))
+    return sections
+
+
+def _chunk_transcript(lines: List[str], max_chars: int) -> List[TextChunk]:
+    """Gruppiert Transcript-Segmente, ohne ein Segment zu teilen."""
+    chunks: List[TextChunk] = []
+    buffer: List[str] = []
+    start = end = None
+
+    def flush():
+        if buffer:
+            chunks.append(TextChunk(
+                text="\n".join(buffer),
+                index=len(chunks),
+                location=ChunkLocation(timestamp_start=start, timestamp_end=end),
+            ))
+
+    for line in lines:
+        match = TIMESTAMP_LINE.match(line)
+        if not match:
+            if line.strip():
+                buffer.append(line)
+            continue
+        seg_start, seg_end = parse_timestamp(match.group(1)), parse_timestamp(match.group(2))
+        if buffer and sum(len(l) + 1 for l in buffer) + len(line) > max_chars:
+            flush()
+            buffer = []
+            start = None
+        if start is None:
+            start = seg_start
+        end = seg_end
+        buffer.append(line)
+    flush()
+    return chunks
+
+
+def chunk_document(
+    text: str,
+    max_chars: int = CHUNK_MAX_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    max_chunks: int = MAX_CHUNKS_PER_DOC,
+) -> List[TextChunk]:
+    """
+    Zerlegt extrahierten Text in positionierte Chunks.
+
+    Args:
+        text: Extrahierter Volltext
+        max_chars: Maximale Chunk-Länge
+        overlap: Überlappung zwischen Fenstern derselben Sektion
+        max_chunks: Obergrenze pro Dokument
+
+    Returns:
+        Liste von TextChunks (index fortlaufend ab 0)
+    """
+    if not text or not text.strip():
+        return []
+
+    lines = text.splitlines()
+    timestamped = sum(1 for l in lines if TIMESTAMP_LINE.match(l))
+    if timestamped and timestamped >= len([l for l in lines if l.strip()]) // 2:
+        return _chunk_transcript(lines, max_chars)[:max_chunks]
+
+    chunks: List[TextChunk] = []
+    for location, section in _sections(text):
+        for part in split_text(section, max_chars, overlap):
+            chunks.append(TextChunk(text=part, index=len(chunks), location=location))
+            if len(chunks) >= max_chunks:
+                return chunks
+    return chunks
+
+
+def make_excerpt(text: str, max_chars: int = EXCERPT_MAX_CHARS) -> str:
+    """Auszug für Suchtreffer: Whitespace normalisiert, an Wortgrenze gekürzt."""
+    text = " ".join((text or "").split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    if space > max_chars // 2:
+        cut = cut[:space]
+    return cut + " …"
+
+
+def chunk_payload(
+    base_payload: Dict[str, Any],
+    chunk: TextChunk,
+    parent_id: str,
+    chunk_count: int,
+) -> Dict[str, Any]:
+    """
+    Qdrant-Payload für einen Chunk-Point.
+
+    Übernimmt die Dokument-Metadaten, ersetzt den Volltext durch den Chunk-Text
+    ("text") und verweist über parent_id auf das Dokument. Der Volltext
+    (extracted_text) bleibt nur am ersten Chunk erhalten; "excerpt" ist der
+    kurze Auszug, den die Such-APIs per Payload-Projektion laden.
+    """
+    payload = {k: v for k, v in base_payload.items() if k != "extracted_text"}
+    payload.update(chunk.location_payload())
+    if base_payload.get("file_path"):
+        # Exakter Ordner für Payload-Filter ("gleicher Ordner" bei ähnlichen Quellen)
+        payload["folder"] = os.path.dirname(base_payload["file_path"])
+    payload.update({
+        "parent_id": parent_id,
+        "chunk_index": chunk.index,
+        "chunk_count": chunk_count,
+        "text": chunk.text,
+        "excerpt": make_excerpt(chunk.text),
+        "location": chunk.location.to_string(),
+    })
+    if chunk.index == 0 and base_payload.get("extracted_text"):
+        payload["extracted_text"] = base_payload["extracted_text"]
+    return payload
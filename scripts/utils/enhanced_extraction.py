@@ -576,7 +576,7 @@ def prepare_for_indexing(
         result["entities_flat"] = " ".join(flat_parts)
 
     # Source Type aus Extension
-    if "extension" in doc:
+    if doc.get("extension"):
         ext = doc["extension"].lower().lstrip(".")
         type_mapping = {
             "pdf": "pdf",
@@ -2,120 +2,395 @@
 Vector Service (Native)
 Phase 3: High-Performance Embedding Generation (Docker-Free)
 Uses sentence-transformers (all-MiniLM-L6-v2) for fast CPU inference.
+
+Pipeline (ein Thread je Aufgabe, damit das Modell nicht auf SQLite wartet):
+- Reader:  holt offene Zeilen seitenweise (id > letzte id) und packt sie
+           nach Token-Budget (VECTOR_TOKEN_BUDGET) statt nach Zeilenzahl
+- Encoder: ein encode(list, batch_size=...) Aufruf pro Batch (Hauptthread)
+- Writer:  executemany + commit auf eigener Verbindung (Retry bei "database
+           is locked"), updated_at wird erst beim Schreiben gesetzt
+Leerlauf: statt alle 2s neu zu scannen wird PRAGMA data_version beobachtet
+und erst bei einer Änderung am Ledger wieder gelesen.
+Fehler in Reader/Writer landen über die Batch-Queue in run(); der Daemon
+(serve) startet die Pipeline danach neu.
+
+Usage:
+    python scripts/vector_service.py               # Daemon
+    python scripts/vector_service.py --once        # Einmal alle offenen Zeilen
+    python scripts/vector_service.py --benchmark   # Docs/s auf diesem Host (nur lesen)
 """
 
-from sentence_transformers import SentenceTransformer
+import os
+import sys
+import queue
 import sqlite3
-import json
+import threading
 import time
-from typing import List, Dict, Any
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 # Konfiguration
 from config.paths import LEDGER_DB_PATH
+from scripts.services.embedding_client import embed_remote
 
 MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2" # Besser für Deutsch/Multilingual
 LEDGER_DB = LEDGER_DB_PATH
 
+# Token-Budget pro Encode-Batch (Summe der geschätzten Tokens)
+VECTOR_TOKEN_BUDGET = int(os.getenv("VECTOR_TOKEN_BUDGET", "8192"))
+# Sub-Batch-Größe innerhalb von encode()
+VECTOR_ENCODE_BATCH_SIZE = int(os.getenv("VECTOR_ENCODE_BATCH_SIZE", "32"))
+# Zeilen pro Lese-Seite und vorgelesene Batches (Reader läuft dem Encoder voraus)
+VECTOR_FETCH_ROWS = int(os.getenv("VECTOR_FETCH_ROWS", "512"))
+VECTOR_PREFETCH_BATCHES = int(os.getenv("VECTOR_PREFETCH_BATCHES", "2"))
+# Abfrageintervall für PRAGMA data_version im Leerlauf
+VECTOR_IDLE_POLL_S = float(os.getenv("VECTOR_IDLE_POLL_S", "1.0"))
+# Wiederholungen pro Schreib-Batch (Backoff verdoppelt sich) und Pause vor Neustart
+VECTOR_WRITE_RETRIES = int(os.getenv("VECTOR_WRITE_RETRIES", "5"))
+VECTOR_WRITE_BACKOFF_S = float(os.getenv("VECTOR_WRITE_BACKOFF_S", "0.5"))
+VECTOR_RESTART_DELAY_S = 5.0
+# Das Modell schneidet nach max_seq_length ab; längere Texte kosten nicht mehr
+MAX_SEQ_TOKENS = 128
+
+PENDING_QUERY = """
+    SELECT id, extracted_text, original_filename FROM files
+    WHERE (status='indexed_passive' OR status='indexed_pilot')
+    AND (embedding_status IS NULL OR embedding_status='PENDING')
+    AND length(extracted_text) > 50
+    AND id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+
+def build_context(text: str, filename: str = "") -> str:
+    """Smart Context: Filename + Start (800) + Mitte (800), max. 2000 Zeichen."""
+    # Dies fängt den Titel UND den Kerninhalt
+    text_len = len(text)
+    start_chunk = text[:800]
+
+    middle_start = text_len // 2
+    middle_chunk = text[middle_start:middle_start+800] if text_len > 1600 else ""
+
+    return f"Filename: {filename}\nContent: {start_chunk} ... {middle_chunk}"[:2000]
+
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (~4 Zeichen/Token), gedeckelt auf MAX_SEQ_TOKENS."""
+    return min(len(text) // 4 + 1, MAX_SEQ_TOKENS)
+
+
+def token_batches(rows: List[Tuple[int, str]], token_budget: int = VECTOR_TOKEN_BUDGET) -> List[List[Tuple[int, str]]]:
+    """Teilt (id, context)-Zeilen in Batches, deren geschätzte Tokensumme das Budget nicht übersteigt."""
+    batches, current, used = [], [], 0
+    for row in rows:
+        tokens = estimate_tokens(row[1])
+        if current and used + tokens > token_budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(row)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 class VectorService:
-    def __init__(self):
-        print(f"🚀 Loading Embedding Model: {MODEL_NAME}...")
-        self.model = SentenceTransformer(MODEL_NAME)
+    def __init__(self, db_path=LEDGER_DB, device: Optional[str] = None, use_remote: bool = True):
+        self.db_path = str(db_path)
+        self.device = device
+        self.use_remote = use_remote
+        self._model = None
         self.embedding_dimension = 384
-        print("✅ Model loaded.")
+
+    @property
+    def model(self):
+        """Lokales Modell, nur geladen wenn der Embedding-Server nicht erreichbar ist."""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"🚀 Loading Embedding Model: {MODEL_NAME}...")
+            self._model = SentenceTransformer(MODEL_NAME, device=self.device)
+            print("✅ Model loaded.")
+        return self._model
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Ein Encode-Aufruf für den ganzen Batch (Server oder lokales Modell)."""
+        if self.use_remote:
+            # Embedding-Server bündelt mit den anderen Ingest-Pfaden
+            # Unnormalisiert wie self.model.encode(); der Index normalisiert beim Laden
+            remote = embed_remote(texts, model=MODEL_NAME, normalize=False)
+            if remote:
+                return np.asarray(remote, dtype=np.float32)
+        return np.asarray(
+            self.model.encode(texts, batch_size=VECTOR_ENCODE_BATCH_SIZE, convert_to_numpy=True),
+            dtype=np.float32,
+        )
 
     def embed_text(self, text: str, filename: str = "") -> List[float]:
         """Generiert Embedding mit Smart-Context Strategie."""
         if not text:
             return [0.0] * self.embedding_dimension
-        
-        # Smart Context: Filename + Start (500) + Middle (500)
-        # Dies fängt den Titel UND den Kerninhalt
-        text_len = len(text)
-        start_chunk = text[:800]
-        
-        middle_start = text_len // 2
-        middle_chunk = text[middle_start:middle_start+800] if text_len > 1600 else ""
-        
-        combined_text = f"Filename: {filename}\nContent: {start_chunk} ... {middle_chunk}"
-        
-        return self.model.encode(combined_text[:2000]).tolist()
-
-    def process_queue(self, batch_size=50):
-        """Verarbeitet Dateien aus dem Ledger, die noch keine Embeddings haben."""
-        conn = sqlite3.connect(LEDGER_DB)
-        cursor = conn.cursor()
-        
-        # Check column
+        return self.embed_texts([build_context(text, filename)])[0].tolist()
+
+    # -------------------------------------------------------------------------
+    # SQLite (läuft in Reader-/Writer-Thread, je eigene Verbindung)
+    # -------------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
         try:
-            cursor.execute("SELECT embedding_status FROM files LIMIT 1")
+            conn.execute("SELECT embedding_status FROM files LIMIT 1")
         except sqlite3.OperationalError:
             print("🔧 Adding embedding columns to schema...")
-            cursor.execute("ALTER TABLE files ADD COLUMN embedding_status TEXT DEFAULT 'PENDING'")
-            cursor.execute("ALTER TABLE files ADD COLUMN embedding_blob BLOB")
+            conn.execute("ALTER TABLE files ADD COLUMN embedding_status TEXT DEFAULT 'PENDING'")
+            conn.execute("ALTER TABLE files ADD COLUMN embedding_blob BLOB")
             conn.commit()
 
-        # Fetch pending
-        query = """
-            SELECT id, extracted_text, original_filename FROM files 
-            WHERE (status='indexed_passive' OR status='indexed_pilot') 
-            AND (embedding_status IS NULL OR embedding_status='PENDING')
-            AND length(extracted_text) > 50
-            LIMIT ?
+    def _read_loop(self, batches: queue.Queue, stop: threading.Event, halt: threading.Event,
+                   once: bool, limit: Optional[int]):
+        """Reader: offene Zeilen seitenweise lesen, nach Token-Budget packen, in die Queue legen."""
+        conn = None
+        end: Optional[Exception] = None
+        try:
+            conn = self._connect()
+            self._ensure_schema(conn)
+            read = 0
+            while not (stop.is_set() or halt.is_set()):
+                last_id = 0
+                found = 0
+                while not (stop.is_set() or halt.is_set()):
+                    page = VECTOR_FETCH_ROWS if limit is None else min(VECTOR_FETCH_ROWS, limit - read)
+                    if page <= 0:
+                        break
+                    rows = conn.execute(PENDING_QUERY, (last_id, page)).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    found += len(rows)
+                    read += len(rows)
+                    contexts = [(doc_id, build_context(text or "", filename or "")) for doc_id, text, filename in rows]
+                    for batch in token_batches(contexts):
+                        batches.put(batch)
+                if once or (limit is not None and read >= limit):
+                    break
+                # Bis der Writer fertig ist, sind die Zeilen noch PENDING
+                batches.join()
+                if not found:
+                    self._wait_for_change(conn, stop, halt)
+        except Exception as e:
+            end = e
+        finally:
+            if conn is not None:
+                conn.close()
+            # None = regulär fertig, Exception = run() bricht damit ab
+            batches.put(end)
+
+    def _wait_for_change(self, conn: sqlite3.Connection, stop: threading.Event, halt: threading.Event):
+        """Leerlauf: warten, bis eine andere Verbindung ins Ledger geschrieben hat."""
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        while not stop.wait(VECTOR_IDLE_POLL_S) and not halt.is_set():
+            if conn.execute("PRAGMA data_version").fetchone()[0] != version:
+                return
+
+    def _write(self, conn: sqlite3.Connection, updates: List[Tuple[Optional[bytes], str, int]]):
+        """Ein Batch (blob, status, id) mit Retry; updated_at = Zeitpunkt des Schreibens."""
+        for attempt in range(VECTOR_WRITE_RETRIES + 1):
+            try:
+                # Erst hier stempeln: der LedgerVectorIndex liest nach updated_at
+                now = datetime.now().isoformat()
+                conn.executemany(
+                    "UPDATE files SET embedding_blob=?, embedding_status=?, updated_at=? WHERE id=?",
+                    [(blob, status, now, doc_id) for blob, status, doc_id in updates],
+                )
+                conn.commit()
+                return
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                if attempt == VECTOR_WRITE_RETRIES:
+                    raise
+                delay = VECTOR_WRITE_BACKOFF_S * 2 ** attempt
+                print(f"⚠️ Ledger-Schreiben fehlgeschlagen ({e}), neuer Versuch in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _write_loop(self, results: queue.Queue, batches: queue.Queue):
         """
-        cursor.execute(query, (batch_size,))
-        rows = cursor.fetchall()
-        
-        if not rows:
-            print("📭 No pending contents for vectorization.")
-            conn.close()
-            return 0
-
-        print(f"🧬 Vectorizing {len(rows)} documents (Multilingual)...")
-        updates = []
-        
-        start = time.time()
-        for doc_id, text, filename in rows:
+        Writer: Updates pro Batch schreiben (updated_at → inkrementeller Refresh des LedgerVectorIndex).
+
+        task_done() kommt auch bei Fehlern, sonst hängt der Reader in batches.join().
+        Nach einem endgültigen Fehler geht die Exception an run(), weitere
+        Batches werden nur noch quittiert.
+        """
+        conn = None
+        failed = False
+        try:
+            while True:
+                updates = results.get()
+                if updates is None:
+                    break
+                try:
+                    if not failed:
+                        conn = conn or self._connect()
+                        self._write(conn, updates)
+                except Exception as e:
+                    failed = True
+                    batches.put(e)
+                finally:
+                    batches.task_done()
+        finally:
+            if conn is not None:
+                conn.close()
+
+    @staticmethod
+    def _drain(batches: queue.Queue):
+        """Verwirft liegengebliebene Batches, damit Reader (join/put) nicht hängen."""
+        while True:
+            try:
+                batches.get_nowait()
+            except queue.Empty:
+                return
+            batches.task_done()
+
+    # -------------------------------------------------------------------------
+    # Pipeline
+    # -------------------------------------------------------------------------
+
+    def run(self, once: bool = False, limit: Optional[int] = None, stop: Optional[threading.Event] = None) -> int:
+        """
+        Reader → Encoder → Writer.
+
+        Args:
+            once: Nach einem Durchlauf über alle offenen Zeilen beenden
+            limit: Maximal so viele Zeilen lesen (impliziert Ende danach)
+            stop: Event zum Beenden des Daemons
+
+        Returns:
+            Anzahl verarbeiteter Dokumente
+
+        Raises:
+            Fehler aus Reader oder Writer (z.B. sqlite3.OperationalError)
+        """
+        stop = stop or threading.Event()
+        halt = threading.Event()  # beendet nur diesen Durchlauf, nicht den Daemon
+        batches: queue.Queue = queue.Queue(maxsize=VECTOR_PREFETCH_BATCHES)
+        results: queue.Queue = queue.Queue()
+        reader = threading.Thread(target=self._read_loop, args=(batches, stop, halt, once, limit), daemon=True)
+        writer = threading.Thread(target=self._write_loop, args=(results, batches), daemon=True)
+        reader.start()
+        writer.start()
+
+        processed = 0
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None or isinstance(batch, Exception):
+                    batches.task_done()
+                    if batch is None:
+                        break
+                    raise batch
+                ids = [doc_id for doc_id, _ in batch]
+                start = time.time()
+                try:
+                    vectors = self.embed_texts([context for _, context in batch])
+                    # Store as binary blob (float32 bytes) for efficiency
+                    updates = [(vec.tobytes(), "DONE", doc_id) for doc_id, vec in zip(ids, vectors)]
+                    duration = time.time() - start
+                    print(f"✅ Vectorized {len(ids)} docs in {duration:.2f}s ({len(ids) / max(duration, 1e-6):.1f} docs/s)")
+                except Exception as e:
+                    print(f"❌ Error batch {ids[0]}..{ids[-1]}: {e}")
+                    updates = [(None, "FAILED", doc_id) for doc_id in ids]
+                results.put(updates)
+                processed += len(ids)
+        finally:
+            halt.set()
+            results.put(None)
+            # Queue leeren, bis beide Threads raus sind (Reader kann in put/join stecken)
+            while writer.is_alive() or reader.is_alive():
+                self._drain(batches)
+                writer.join(timeout=0.05)
+                reader.join(timeout=0.05)
+        return processed
+
+    def serve(self, stop: Optional[threading.Event] = None):
+        """Daemon: run() nach einem Fehler nach VECTOR_RESTART_DELAY_S neu starten."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
             try:
-                vec = self.embed_text(text, filename)
-                # Store as binary blob (float32 bytes) for efficiency
-                vec_blob = np.array(vec, dtype=np.float32).tobytes()
-                updates.append((vec_blob, "DONE", doc_id))
+                self.run(stop=stop)
             except Exception as e:
-                print(f"❌ Error doc {doc_id}: {e}")
-                updates.append((None, "FAILED", doc_id))
-
-        # Bulk Update
-        cursor.executemany("UPDATE files SET embedding_blob=?, embedding_status=? WHERE id=?", updates)
-        conn.commit()
-        conn.close()
-        
-        duration = time.time() - start
-        rate = len(rows) / duration
-        print(f"✅ Vectorized {len(rows)} docs in {duration:.2f}s ({rate:.1f} docs/s)")
-        return len(rows)
+                print(f"❌ Critical Error: {e}")
+                stop.wait(VECTOR_RESTART_DELAY_S)
+
+    def process_queue(self, batch_size: Optional[int] = None) -> int:
+        """Verarbeitet alle offenen Dateien einmal (batch_size = max. Zeilen, None = alle)."""
+        count = self.run(once=True, limit=batch_size)
+        if not count:
+            print("📭 No pending contents for vectorization.")
+        return count
+
+    # -------------------------------------------------------------------------
+    # Benchmark
+    # -------------------------------------------------------------------------
+
+    def benchmark(self, docs: int = 500, batch_sizes: Tuple[int, ...] = (1, 8, 32, 64)) -> List[dict]:
+        """
+        Misst Docs/s des lokalen Modells auf diesem Host (z.B. CPU-only).
+
+        Texte kommen aus dem Ledger (nur lesend), sonst synthetisch.
+        batch_size=1 entspricht dem früheren encode() pro Zeile.
+        """
+        contexts: List[str] = []
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT extracted_text, original_filename FROM files "
+                    "WHERE length(extracted_text) > 50 LIMIT ?", (docs,)
+                ).fetchall()
+            contexts = [build_context(text, filename or "") for text, filename in rows]
+        except sqlite3.Error as e:
+            print(f"⚠️ Ledger nicht lesbar ({e}), nutze synthetische Texte")
+        while len(contexts) < docs:
+            i = len(contexts)
+            contexts.append(build_context(f"Rechnung Nr. {i} über Beratungsleistungen. " * (5 + i % 40), f"doc_{i}.pdf"))
+
+        self.model.encode(contexts[:8])  # Warm-up
+        results = []
+        print(f"🏁 Benchmark: {len(contexts)} Docs, Modell {MODEL_NAME} ({self.model.device})")
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            self.model.encode(contexts, batch_size=batch_size, convert_to_numpy=True)
+            duration = time.perf_counter() - start
+            rate = len(contexts) / duration
+            results.append({"batch_size": batch_size, "seconds": round(duration, 2), "docs_per_s": round(rate, 1)})
+            print(f"   batch_size={batch_size:>4}: {duration:6.2f}s  {rate:7.1f} docs/s")
+        return results
+
 
 if __name__ == "__main__":
-    service = VectorService()
-    print("⏳ Vector Service Daemon started...")
-    
-    no_work_strikes = 0
-    
-    while True:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vector Service Daemon")
+    parser.add_argument("--once", action="store_true", help="Offene Zeilen einmal verarbeiten und beenden")
+    parser.add_argument("--benchmark", action="store_true", help="Docs/s messen (schreibt nichts)")
+    parser.add_argument("--docs", type=int, default=500, help="Anzahl Dokumente für --benchmark")
+    parser.add_argument("--batch-sizes", default="1,8,32,64", help="Batch-Größen für --benchmark")
+    parser.add_argument("--device", default=None, help="z.B. cpu (Default: automatisch)")
+    args = parser.parse_args()
+
+    service = VectorService(device=args.device)
+    if args.benchmark:
+        service.benchmark(args.docs, tuple(int(b) for b in args.batch_sizes.split(",")))
+    elif args.once:
+        service.process_queue()
+    else:
+        print("⏳ Vector Service Daemon started...")
         try:
-            count = service.process_queue(batch_size=50)
-            if count == 0:
-                no_work_strikes += 1
-                if no_work_strikes > 10:
-                    print("💤 Idle... (Waiting for input)")
-                    time.sleep(10)
-                else:
-                    time.sleep(2)
-            else:
-                no_work_strikes = 0
+            service.serve()
         except KeyboardInterrupt:
             print("🛑 Stopping Service.")
-            break
-        except Exception as e:
-            print(f"❌ Critical Error: {e}")
-            time.sleep(5)
@@ -7,11 +7,38 @@ Enhances search relevance using Cross-Encoders or Qwen3-Reranker-8B.
 A/B Test Configuration:
 - USE_QWEN3_RERANKER=False: Cross-Encoder (svalabs/cross-electra-melange-german)
 - USE_QWEN3_RERANKER=True: Qwen3-Reranker-8B (quantized for 8GB VRAM)
+
+Scoring:
+- Pairs are scored in bounded micro-batches; candidates are sorted by
+  snippet length first so each batch pads to similar lengths
+- Pair scores are cached (LRU) by (query hash, snippet hash, model), so paging
+  or repeating a query does not re-score the same pairs; keying on the text
+  actually scored keeps hits that share a chunk id (lexical snippets) apart
+- rerank_async() runs scoring in a dedicated executor (event loop stays free)
+- An optional latency budget stops scoring early; the best candidates
+  scored so far are returned first
 """
 
+import asyncio
+import hashlib
+import os
+import threading
 import time
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from config.feature_flags import is_enabled
+from config.reranker_config import get_reranker_config
+
+# Pair-score LRU size and padded-size budget per micro-batch
+# (items x longest snippet in chars)
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+RERANK_MAX_BATCH_CHARS = int(os.getenv("RERANK_MAX_BATCH_CHARS", "32000"))
+# Latency samples kept per batch size for p50/p95
+RERANK_LATENCY_SAMPLES = 500
+# With a latency budget misses are scored in retrieval-order windows of
+# this many batches (length-sorted within each window)
+RERANK_WINDOW_BATCHES = int(os.getenv("RERANK_WINDOW_BATCHES", "2"))
 
 # Model imports with lazy loading
 _cross_encoder = None
@@ -65,14 +92,38 @@ def _load_qwen3_reranker():
     return _qwen3_reranker
 
 
+def _percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample list."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return round(ordered[index], 2)
+
+
 class RerankingService:
     """Re-ranks search results using Cross-Encoder or Qwen3-Reranker-8B."""
 
-    def __init__(self):
+    def __init__(self, cache_size: int = RERANK_CACHE_SIZE, max_batch_chars: int = RERANK_MAX_BATCH_CHARS):
         self._enabled = is_enabled("ENABLE_RERANKING")
         self._use_qwen3 = is_enabled("USE_QWEN3_RERANKER")
         self._model = None
-        self._metrics = {"calls": 0, "total_time_ms": 0, "avg_improvement": 0}
+        self._model_name = "qwen3-8b" if self._use_qwen3 else "cross-electra"
+        self._snippet_chars = 2000 if self._use_qwen3 else 1000
+        self._metrics = {
+            "calls": 0,
+            "total_time_ms": 0,
+            "avg_improvement": 0,
+            "pairs_scored": 0,
+            "cache_hits": 0,
+            "batch_latency_ms": defaultdict(lambda: deque(maxlen=RERANK_LATENCY_SAMPLES)),
+        }
+
+        # Pair-score LRU: (query hash, chunk id, model) -> score
+        self._cache: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._max_batch_chars = max_batch_chars
+        self.batch_size = get_reranker_config(experimental=self._use_qwen3).batch_size
+        self._executor: Optional[ThreadPoolExecutor] = None
         
         if self._enabled:
             try:
@@ -84,49 +135,171 @@ class RerankingService:
                 print(f"⚠️ Reranker Init Failed: {e}")
                 self._enabled = False
 
-    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int = 10) -> List[Dict[str, Any]]:
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int = 10,
+        budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """
         Reranks a list of candidate documents based on the query.
-        Each candidate must have a 'text' or 'extracted_text' field.
+        Each candidate must have a 'text' or 'extracted_text' field; its
+        'id' (or parent_id) keys the pair-score cache.
         """
-        if not self._enabled or not self._model or not candidates:
-            return candidates[:top_k]
+        return self.rerank_within_budget(query, candidates, top_k, budget_ms)[0]
 
-        start_time = time.time()
-        
-        # Prepare pairs
-        pairs = []
-        valid_candidates = []
-        
-        for doc in candidates:
-            text = doc.get("extracted_text", "") or doc.get("text", "")
-            text_snippet = text[:2000] if self._use_qwen3 else text[:1000]
-            pairs.append((query, text_snippet))
-            valid_candidates.append(doc)
+    def rerank_within_budget(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int = 10,
+        budget_ms: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Reranks under a latency budget.
 
-        if not pairs:
-            return candidates[:top_k]
+        Candidates are scored in retrieval order; when the budget runs out
+        the highest-scoring candidates so far come first, followed by the
+        unscored ones in retrieval order.
 
-        # Score based on model type
-        if self._use_qwen3:
-            scores = self._score_qwen3(pairs)
-        else:
-            scores = self._model.predict(pairs)
+        Returns:
+            (top_k candidates, number of candidates actually reranked)
+        """
+        if not self._enabled or not self._model or not candidates:
+            return candidates[:top_k], 0
+
+        start_time = time.time()
+        deadline = time.perf_counter() + budget_ms / 1000 if budget_ms is not None else None
+        scores = self.score(query, candidates, deadline)
 
         # Attach scores and sort
-        for i, doc in enumerate(valid_candidates):
-            doc["rerank_score"] = float(scores[i])
+        scored = []
+        for doc, score in zip(candidates, scores):
+            if score is None:
+                continue
+            doc["rerank_score"] = score
             doc["_reranked"] = True
-            doc["_reranker"] = "qwen3-8b" if self._use_qwen3 else "cross-electra"
+            doc["_reranker"] = self._model_name
+            scored.append(doc)
 
-        reranked = sorted(valid_candidates, key=lambda x: x["rerank_score"], reverse=True)
+        reranked = sorted(scored, key=lambda x: x["rerank_score"], reverse=True)
+        reranked += [doc for doc, score in zip(candidates, scores) if score is None]
         
         # Update metrics
         elapsed_ms = (time.time() - start_time) * 1000
         self._metrics["calls"] += 1
         self._metrics["total_time_ms"] += elapsed_ms
         
-        return reranked[:top_k]
+        return reranked[:top_k], len(scored)
+
+    async def rerank_async(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        top_k: int = 10,
+        budget_ms: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """rerank() in the reranker's own executor (one worker: the model is not thread-safe)."""
+        if not self._enabled or not self._model or not candidates:
+            return candidates[:top_k]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.rerank, query, candidates, top_k, budget_ms)
+
+    def score(
+        self,
+        query: str,
+        candidates: List[Dict[str, Any]],
+        deadline: Optional[float] = None
+    ) -> List[Optional[float]]:
+        """
+        Pair scores for all candidates (cached pairs are not re-scored).
+
+        With a deadline (time.perf_counter() value) misses are scored in
+        windows of RERANK_WINDOW_BATCHES batches in retrieval order; a batch
+        is skipped once it would end past the deadline (estimated from the
+        last batch of that size). Unscored candidates get None.
+        """
+        query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+        snippets = [self._snippet(doc) for doc in candidates]
+        keys = [
+            (query_hash, hashlib.sha1(snippet.encode("utf-8")).hexdigest(), self._model_name)
+            for snippet in snippets
+        ]
+        scores: List[Optional[float]] = [None] * len(candidates)
+
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+        misses = [i for i, score in enumerate(scores) if score is None]
+        self._metrics["cache_hits"] += len(candidates) - len(misses)
+
+        if misses:
+            window = len(misses) if deadline is None else self.batch_size * RERANK_WINDOW_BATCHES
+            batches = [
+                batch
+                for start in range(0, len(misses), window)
+                for batch in self._length_buckets(misses[start:start + window], snippets)
+            ]
+            scored: List[int] = []
+            for batch in batches:
+                if deadline is not None and self._past_deadline(deadline, len(batch)):
+                    break
+                pairs = [(query, snippets[i]) for i in batch]
+                t0 = time.perf_counter()
+                batch_scores = self._score_batch(pairs)
+                self._metrics["batch_latency_ms"][len(batch)].append((time.perf_counter() - t0) * 1000)
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = float(score)
+                scored.extend(batch)
+            self._metrics["pairs_scored"] += len(scored)
+
+            with self._cache_lock:
+                for i in scored:
+                    self._cache[keys[i]] = scores[i]
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def _past_deadline(self, deadline: float, batch_len: int) -> bool:
+        """True if a batch of this size would not finish before the deadline."""
+        samples = self._metrics["batch_latency_ms"].get(batch_len)
+        expected_s = samples[-1] / 1000 if samples else 0.0
+        return time.perf_counter() + expected_s > deadline
+
+    def _length_buckets(self, indices: List[int], snippets: List[str]) -> List[List[int]]:
+        """
+        Length-sorted micro-batches: at most batch_size items and at most
+        max_batch_chars of padded size (items x longest snippet) per batch.
+        """
+        ordered = sorted(indices, key=lambda i: len(snippets[i]))
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for i in ordered:
+            padded = (len(current) + 1) * max(1, len(snippets[i]))
+            if current and (len(current) >= self.batch_size or padded > self._max_batch_chars):
+                batches.append(current)
+                current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _score_batch(self, pairs: List[tuple]) -> List[float]:
+        if self._use_qwen3:
+            return self._score_qwen3(pairs)
+        return list(self._model.predict(pairs, batch_size=len(pairs), show_progress_bar=False))
+
+    def _snippet(self, doc: Dict[str, Any]) -> str:
+        text = doc.get("extracted_text", "") or doc.get("text", "")
+        return text[:self._snippet_chars]
 
     def _score_qwen3(self, pairs: List[tuple]) -> List[float]:
         """Score using Qwen3-Reranker-8B."""
@@ -161,10 +334,21 @@ class RerankingService:
         return scores
 
     def get_metrics(self) -> dict:
-        """Return reranking performance metrics."""
+        """Return reranking performance metrics (incl. p50/p95 per batch size)."""
+        batches = {
+            size: {
+                "count": len(samples),
+                "p50_ms": _percentile(list(samples), 50),
+                "p95_ms": _percentile(list(samples), 95),
+            }
+            for size, samples in sorted(self._metrics["batch_latency_ms"].items())
+            if samples
+        }
         return {
-            **self._metrics,
-            "model": "qwen3-8b" if self._use_qwen3 else "cross-electra",
+            **{k: v for k, v in self._metrics.items() if k != "batch_latency_ms"},
+            "model": self._model_name,
             "avg_time_ms": self._metrics["total_time_ms"] / max(1, self._metrics["calls"]),
+            "cache_size": len(self._cache),
+            "batches": batches,
         }
 
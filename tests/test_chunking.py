@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from scripts.utils.chunking import chunk_document, chunk_payload, make_excerpt, split_text  # noqa: E402
+
+
+def test_page_boundaries_from_form_feed():
+    text = "Vertrag Seite eins\fKündigungsfrist drei Monate\fUnterschrift"
+    chunks = chunk_document(text)
+    assert [c.location.page for c in chunks] == [1, 2, 3]
+    assert chunks[1].text == "Kündigungsfrist drei Monate"
+    assert "Page 2" in chunks[1].to_rag_text("Vertrag.pdf")
+
+
+def test_sheet_boundaries():
+    text = "## Sheet: Q1\n| Monat | Betrag |\n## Sheet: Q2\n| April | 750 |"
+    chunks = chunk_document(text)
+    assert [c.location.sheet_name for c in chunks] == ["Q1", "Q2"]
+
+
+def test_transcript_chunks_keep_segments_and_timestamps():
+    lines = [f"[00:{i:02d}-00:{i + 1:02d}] Satz Nummer {i}" for i in range(40)]
+    chunks = chunk_document("\n".join(lines), max_chars=200)
+    assert len(chunks) > 1
+    assert chunks[0].location.timestamp_start == 0
+    assert chunks[-1].location.timestamp_end == 40
+    assert all(line in "\n".join(c.text for c in chunks) for line in lines)
+
+
+def test_long_text_is_split_with_overlap():
+    text = " ".join(f"Wort{i}" for i in range(2000))
+    parts = split_text(text, max_chars=500, overlap=100)
+    assert all(len(p) <= 500 for p in parts)
+    assert parts[-1].endswith("Wort1999")
+    assert parts[0][-50:] in text and parts[1].split()[0] in parts[0]
+
+
+def test_chunk_payload_links_parent_and_keeps_fulltext_once():
+    chunks = chunk_document("a\fb")
+    base = {"filename": "x.pdf", "extracted_text": "a b"}
+    first = chunk_payload(base, chunks[0], "sha", len(chunks))
+    second = chunk_payload(base, chunks[1], "sha", len(chunks))
+    assert first["parent_id"] == second["parent_id"] == "sha"
+    assert first["extracted_text"] == "a b" and "extracted_text" not in second
+    assert second["page"] == 2 and second["text"] == "b" and second["chunk_count"] == 2
+
+
+def test_chunk_payload_has_short_excerpt():
+    chunks = chunk_document("Rechnung   Telekom\n" + "Position " * 200)
+    payload = chunk_payload({"filename": "x.pdf"}, chunks[0], "sha", len(chunks))
+    assert payload["excerpt"].startswith("Rechnung Telekom Position")
+    assert len(payload["excerpt"]) <= 502 and payload["excerpt"].endswith(" …")
+    assert make_excerpt("kurz") == "kurz"
+
+
+def test_chunk_payload_stores_folder_for_filters():
+    chunks = chunk_document("Text")
+    payload = chunk_payload({"file_path": "/vault/Finanzen/a.pdf"}, chunks[0], "sha", 1)
+    assert payload["folder"] == "/vault/Finanzen"
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "requests"):
+    pytest.importorskip(dep)
+
+import httpx  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "conductor-api"))
+
+import api_service as api  # noqa: E402
+
+
+def test_extract_async_converts_markdown_off_loop(tmp_path):
+    doc = tmp_path / "bericht.docx"
+    doc.write_bytes(b"x" * 3000)
+    seen = {}
+
+    async def tika(request):
+        seen["body"] = len(await request.aread())
+        return httpx.Response(200, text="<h1>Bericht</h1><p>Umsatz 2024</p>")
+
+    converter_threads = []
+    original = api.TikaExtractor._html_to_markdown
+
+    def tracking(self, html):
+        converter_threads.append(threading.current_thread().name)
+        return original(self, html)
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(tika))
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="markdown") as executor:
+            extractor = api.TikaExtractor(tika_url="http://tika/tika")
+            extractor._html_to_markdown = tracking.__get__(extractor)
+            result = await extractor.extract_async(client, executor, doc)
+        await client.aclose()
+        return result
+
+    result = asyncio.run(run())
+
+    assert result["success"] and result["format"] == "markdown"
+    assert "# Bericht" in result["text"]
+    assert seen["body"] == 3000
+    assert converter_threads and converter_threads[0].startswith("markdown")
+
+
+def test_endpoint_slot_rejects_when_saturated(monkeypatch):
+    monkeypatch.setattr(api, "CONCURRENCY_WAIT_S", 0.05)
+
+    async def run():
+        monkeypatch.setitem(api.ENDPOINT_LIMITS, "extract", asyncio.Semaphore(1))
+        async with api.endpoint_slot("extract"):
+            with pytest.raises(HTTPException) as exc:
+                async with api.endpoint_slot("extract"):
+                    pass
+        # Slot wieder frei
+        async with api.endpoint_slot("extract"):
+            pass
+        return exc.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+
+
+def test_rag_rerank_reorders_and_reports_count():
+    candidates = [(f"p{i}", {"text": f"Dokument {i}"}, "document") for i in range(6)]
+    seen = {}
+
+    async def neural(request):
+        body = json.loads(await request.aread())
+        seen["body"] = body
+        seen["timeout"] = request.extensions["timeout"]["read"]
+        return httpx.Response(200, json={
+            "results": [{"id": "p4", "score": 2.0}, {"id": "p1", "score": 1.0}, {"id": "p0", "score": None}],
+            "reranked": 2,
+            "rerankMs": 12.0,
+        })
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(neural))
+        result = await api._rag_rerank(client, "Rechnung", candidates, top_k=3, budget_ms=200)
+        await client.aclose()
+        return result
+
+    ranked, reranked = asyncio.run(run())
+
+    assert [point_id for point_id, _, _ in ranked] == ["p4", "p1", "p0"]
+    assert reranked == 2
+    assert len(seen["body"]["candidates"]) == 6 and seen["body"]["budgetMs"] == 200
+    assert seen["timeout"] == pytest.approx(0.2 + api.RERANK_TIMEOUT_SLACK_S)
+
+
+def test_source_types_become_qdrant_filter():
+    qdrant_filter = api._source_type_filter(["audio", "document"])
+    audio, document = qdrant_filter["should"]
+    assert audio == {"key": "extension", "match": {"any": api.MEDIA_EXTENSIONS["audio"]}}
+    assert ".mp4" in document["must_not"][0]["match"]["any"]
+    assert api._source_type_filter(None) is None
+
+
+def test_qdrant_api_key_is_only_sent_to_qdrant(monkeypatch):
+    monkeypatch.setattr(api, "QDRANT_HEADERS", {"api-key": "geheim"})
+    monkeypatch.setattr(api.redis, "Redis", lambda **kwargs: type("R", (), {"ping": lambda self: True})())
+    keys = {}
+
+    async def handler(request):
+        keys[request.url.host] = request.headers.get("api-key")
+        return httpx.Response(200, json={"result": {"collections": []}})
+
+    async def run():
+        monkeypatch.setattr(api, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        status = await api.health_check()
+        await api.http_client.aclose()
+        return status
+
+    assert asyncio.run(run()).status == "healthy"
+    assert keys == {"tika": None, "qdrant": "geheim", "ollama": None}
@@ -0,0 +1,162 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.services import embedding_service  # noqa: E402
+from scripts.services.embedding_service import EmbeddingCache, EmbeddingService  # noqa: E402
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_set_many_get_many_roundtrip_in_single_file(tmp_path):
+    cache = EmbeddingCache(cache_dir=tmp_path, max_memory_items=2)
+    texts = [f"Chunk {i}" for i in range(50)]
+    vectors = _vectors(50)
+    cache.set_many(texts, "model-a", vectors)
+
+    # Frischer Cache auf demselben Verzeichnis: alles von der Platte (Memmap)
+    reopened = EmbeddingCache(cache_dir=tmp_path)
+    hit_mask, found = reopened.get_many(["Chunk 3", "neu", "Chunk 49", "Chunk 3"], "model-a")
+    assert hit_mask.tolist() == [True, False, True, True]
+    np.testing.assert_array_equal(found, vectors[[3, 49, 3]])
+
+    assert len(list(tmp_path.glob("*.vec"))) == 1 and not list(tmp_path.glob("*.npy"))
+    assert not reopened.get_many(["Chunk 3"], "model-b")[0].any()
+
+
+def test_duplicates_are_not_appended_and_lru_is_bounded(tmp_path):
+    cache = EmbeddingCache(cache_dir=tmp_path, max_memory_items=3)
+    vectors = _vectors(4)
+    cache.set_many(["a", "b", "a", "c"], "m", vectors)
+    cache.set_many(["a", "d"], "m", _vectors(2, seed=1))
+
+    vec_file = next(tmp_path.glob("*.vec"))
+    assert vec_file.stat().st_size == 4 * 8 * 4  # a, b, c, d
+    assert len(cache.memory_cache) == 3
+    np.testing.assert_array_equal(cache.get("b", "m"), vectors[1])
+
+
+def test_float16_store(tmp_path):
+    cache = EmbeddingCache(cache_dir=tmp_path, dtype="float16")
+    vectors = _vectors(3)
+    cache.set_many(["x", "y", "z"], "m", vectors)
+    cache.memory_cache.clear()
+
+    hit_mask, found = cache.get_many(["x", "y", "z"], "m")
+    assert hit_mask.all() and found.dtype == np.float32
+    np.testing.assert_allclose(found, vectors, atol=1e-2)
+    assert next(tmp_path.glob("*.vec")).stat().st_size == 3 * 8 * 2
+
+
+def test_concurrent_writers_get_their_own_rows(tmp_path):
+    # Eigene Instanzen = eigene SQLite-Verbindungen, wie getrennte Prozesse
+    caches = [EmbeddingCache(cache_dir=tmp_path) for _ in range(4)]
+    vectors = {w: _vectors(60, seed=w) for w in range(4)}
+
+    def write(worker):
+        for start in range(0, 60, 5):
+            texts = [f"w{worker}-{i}" for i in range(start, start + 5)]
+            caches[worker].set_many(texts, "m", vectors[worker][start:start + 5])
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    reader = EmbeddingCache(cache_dir=tmp_path)
+    assert next(tmp_path.glob("*.vec")).stat().st_size == 4 * 60 * 8 * 4
+    for w in range(4):
+        hit_mask, found = reader.get_many([f"w{w}-{i}" for i in range(60)], "m")
+        assert hit_mask.all()
+        np.testing.assert_array_equal(found, vectors[w])
+
+
+def test_partial_row_is_dropped_before_append(tmp_path):
+    cache = EmbeddingCache(cache_dir=tmp_path)
+    vectors = _vectors(3)
+    cache.set_many(["a"], "m", vectors[:1])
+    vec_file = next(tmp_path.glob("*.vec"))
+    with open(vec_file, "ab") as f:
+        f.write(b"\0" * 5)  # abgebrochener Schreibvorgang
+
+    cache.set_many(["b", "c"], "m", vectors[1:])
+    assert vec_file.stat().st_size == 3 * 8 * 4
+    cache.memory_cache.clear()
+    np.testing.assert_array_equal(cache.get_many(["a", "b", "c"], "m")[1], vectors)
+
+
+class FailingFile:
+    """Schreibt die Hälfte der Daten und wirft dann (z.B. Platte voll)."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.f.close()
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+    def write(self, data):
+        self.f.write(data[:len(data) // 2])
+        raise OSError(28, "No space left on device")
+
+
+def test_failed_write_is_truncated_and_not_indexed(tmp_path, monkeypatch):
+    cache = EmbeddingCache(cache_dir=tmp_path)
+    vectors = _vectors(4)
+    cache.set_many(["a"], "m", vectors[:1])
+    vec_file = next(tmp_path.glob("*.vec"))
+
+    monkeypatch.setattr(
+        embedding_service, "open",
+        lambda *args, **kwargs: FailingFile(open(*args, **kwargs)), raising=False,
+    )
+    cache.set_many(["b", "c"], "m", vectors[1:3])
+    monkeypatch.undo()
+    assert vec_file.stat().st_size == 8 * 4  # nur "a"
+
+    cache.memory_cache.clear()
+    assert cache.get_many(["a", "b", "c"], "m")[0].tolist() == [True, False, False]
+
+    # Der nächste Batch landet direkt hinter "a"
+    cache.set_many(["d"], "m", vectors[3:])
+    cache.memory_cache.clear()
+    np.testing.assert_array_equal(cache.get_many(["a", "d"], "m")[1], vectors[[0, 3]])
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=None, show_progress_bar=False, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_embed_uses_one_bulk_lookup_per_batch(tmp_path):
+    service = EmbeddingService(use_cache=False)
+    service.cache = EmbeddingCache(cache_dir=tmp_path)
+    service.model = FakeModel()
+
+    first = service.embed(["aa", "bbb"])
+    lookups = []
+    original = service.cache.get_many
+    service.cache.get_many = lambda texts, model_id: lookups.append(texts) or original(texts, model_id)
+    second = service.embed(["bbb", "c", "aa"])
+
+    assert first.computed_count == 2 and second.cached_count == 2 and second.computed_count == 1
+    assert len(lookups) == 1 and service.model.calls[-1] == ["c"]
+    np.testing.assert_array_equal(second.embeddings, [[3, 1], [1, 1], [2, 1]])
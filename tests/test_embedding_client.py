@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.services import embedding_client  # noqa: E402
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, texts):
+        self._texts = texts
+
+    def json(self):
+        return {"embeddings": [[float(len(t))] for t in self._texts]}
+
+
+class FakeSession:
+    def __init__(self, down=False):
+        self.requests = []
+        self.down = down
+
+    def post(self, url, json=None, timeout=None):
+        if self.down:
+            raise requests.ConnectionError("refused")
+        self.requests.append(json)
+        return FakeResponse(json["texts"])
+
+
+def test_embed_remote_splits_requests_and_keeps_order(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(embedding_client, "_session", session)
+    monkeypatch.setattr(embedding_client, "_unavailable_until", 0.0)
+    monkeypatch.setattr(embedding_client, "EMBEDDING_REQUEST_SIZE", 2)
+
+    vectors = embedding_client.embed_remote(["a", "bbb", "cc"], model="nomic-embed-text", normalize=True)
+    assert vectors == [[1.0], [3.0], [2.0]]
+    assert [len(r["texts"]) for r in session.requests] == [2, 1]
+    assert session.requests[0]["model"] == "nomic-embed-text"
+    assert all(r["normalize"] is True for r in session.requests)
+
+
+def test_unreachable_server_backs_off(monkeypatch):
+    session = FakeSession(down=True)
+    monkeypatch.setattr(embedding_client, "_session", session)
+    monkeypatch.setattr(embedding_client, "_unavailable_until", 0.0)
+
+    assert embedding_client.embed_remote(["a"], normalize=False) is None
+    session.down = False
+    # Innerhalb des Backoffs wird der Server nicht erneut gefragt
+    assert embedding_client.embed_remote(["a"], normalize=False) is None
+    assert session.requests == []
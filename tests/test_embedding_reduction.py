@@ -0,0 +1,187 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config.embeddings import (  # noqa: E402
+    FULL_VECTOR_NAME,
+    REDUCED_VECTOR_NAME,
+    get_embedding_config,
+    get_qdrant_collection_config,
+    get_reduction,
+)
+from scripts.services.embedding_service import (  # noqa: E402
+    DimensionReducer,
+    EmbeddingResult,
+    EmbeddingService,
+)
+
+
+def _low_rank(n=200, dim=64, rank=8, seed=0):
+    """Daten in einem rank-dimensionalen Unterraum plus etwas Rauschen."""
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((rank, dim))
+    data = rng.standard_normal((n, rank)) @ basis + 0.01 * rng.standard_normal((n, dim))
+    return data.astype(np.float32)
+
+
+def test_pca_fit_save_load_roundtrip(tmp_path):
+    data = _low_rank()
+    path = tmp_path / "documents_abc_8.npz"
+    reducer = DimensionReducer("pca", 8, path).fit(data)
+
+    reduced = reducer.transform(data)
+    assert reduced.shape == (200, 8)
+    np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1.0, rtol=1e-5)
+
+    # Frischer Reducer lädt die gespeicherte Projektion
+    reloaded = DimensionReducer("pca", 8, path)
+    assert reloaded.ready
+    np.testing.assert_allclose(reloaded.transform(data), reduced, rtol=1e-5, atol=1e-6)
+
+    # Auf dem Unterraum bleiben die Nachbarn (der zentrierten Daten) erhalten
+    centered = data - data.mean(axis=0)
+    centered /= np.linalg.norm(centered, axis=1, keepdims=True)
+    for query in range(10):
+        expected = np.argsort(-(centered @ centered[query]))[:5]
+        assert set(np.argsort(-(reduced @ reduced[query]))[:5]) == set(expected)
+
+
+def test_unfitted_pca_refuses_to_transform(tmp_path):
+    reducer = DimensionReducer("pca", 8, tmp_path / "missing.npz")
+    assert not reducer.ready
+    with pytest.raises(RuntimeError):
+        reducer.transform(_low_rank(n=4))
+    with pytest.raises(ValueError):
+        reducer.fit(_low_rank(n=4))
+
+
+def test_truncate_keeps_prefix_and_renormalizes():
+    data = np.array([[3.0, 4.0, 12.0, 0.0]], dtype=np.float32)
+    reduced = DimensionReducer("truncate", 2).transform(data)
+    np.testing.assert_allclose(reduced, [[0.6, 0.8]], rtol=1e-6)
+
+
+def test_get_reduction_modes():
+    active = get_embedding_config(False)
+    experimental = get_embedding_config(True)
+
+    assert get_reduction(False, "none") == ("none", active.dimensions)
+    assert get_reduction(False, "pca", 256) == ("pca", 256)
+    # Zieldimension >= volle Dimension: keine Reduktion
+    assert get_reduction(False, "pca", active.dimensions) == ("none", active.dimensions)
+    with pytest.raises(ValueError):
+        get_reduction(False, "umap", 256)
+
+    if not active.matryoshka:
+        with pytest.raises(ValueError):
+            get_reduction(False, "truncate", 256)
+    if experimental.matryoshka:
+        assert get_reduction(True, "truncate", 256) == ("truncate", 256)
+
+
+def test_collection_config_uses_named_vectors_with_reduction():
+    dims = get_embedding_config(False).dimensions
+    plain = get_qdrant_collection_config(quantization="none", reduce="none")
+    assert plain["vectors"] == {"size": dims, "distance": "Cosine"}
+
+    reduced = get_qdrant_collection_config(quantization="int8", reduce="pca", reduced_dim=128)
+    vectors = reduced["vectors"]
+    assert vectors[REDUCED_VECTOR_NAME] == {"size": 128, "distance": "Cosine", "on_disk": True}
+    assert vectors[FULL_VECTOR_NAME]["size"] == dims
+    assert vectors[FULL_VECTOR_NAME]["on_disk"] is True
+    assert vectors[FULL_VECTOR_NAME]["hnsw_config"] == {"m": 0}
+    assert "quantization_config" in reduced
+
+
+class FakeQdrant:
+    """Minimaler QdrantClient: merkt sich Collection-Layout und Aufrufe."""
+
+    def __init__(self, vectors=None):
+        self.vectors = vectors
+        self.created = []
+        self.upserts = []
+        self.queries = []
+
+    def collection_exists(self, name):
+        return self.vectors is not None
+
+    def get_collection(self, name):
+        return SimpleNamespace(config=SimpleNamespace(params=SimpleNamespace(vectors=self.vectors)))
+
+    def create_collection(self, collection_name, vectors_config, **kwargs):
+        self.created.append(collection_name)
+        self.vectors = vectors_config
+
+    def upsert(self, collection_name, points):
+        self.upserts.append(points)
+
+    def query_points(self, **kwargs):
+        self.queries.append(kwargs)
+        return SimpleNamespace(points=[SimpleNamespace(id="a", score=0.9, payload={"n": 1})])
+
+
+def _service(tmp_path, qdrant, reduce="pca", dim=8):
+    service = EmbeddingService(use_cache=False, reduce=reduce, reduced_dim=dim)
+    full = service.config.dimensions
+    data = _low_rank(dim=full, rank=dim)
+
+    def embed(texts, show_progress=False):
+        texts = [texts] if isinstance(texts, str) else texts
+        return EmbeddingResult(data[:len(texts)], service.model_id, full, 0, len(texts))
+
+    service.embed = embed
+    service._qdrant = qdrant
+    if service.reduces:
+        service._reducers["documents"] = DimensionReducer("pca", dim, tmp_path / "pca.npz").fit(data)
+    return service
+
+
+def test_store_and_search_create_reduced_collection(tmp_path):
+    pytest.importorskip("qdrant_client")
+    qdrant = FakeQdrant()
+    service = _service(tmp_path, qdrant)
+
+    assert service.store_in_qdrant(["a", "b"], [{}, {}], ids=["1", "2"])
+    assert qdrant.created == ["documents"]
+    assert set(qdrant.vectors) == {REDUCED_VECTOR_NAME, FULL_VECTOR_NAME}
+    assert len(qdrant.upserts[0][0].vector[REDUCED_VECTOR_NAME]) == 8
+
+    hits = service.search_similar("a")
+    assert hits == [{"id": "a", "score": 0.9, "payload": {"n": 1}}]
+    assert qdrant.queries[0]["using"] == FULL_VECTOR_NAME
+    assert qdrant.queries[0]["prefetch"].using == REDUCED_VECTOR_NAME
+    assert qdrant.created == ["documents"]  # nur einmal angelegt
+
+
+def test_store_and_search_reject_mismatched_collection(tmp_path):
+    models = pytest.importorskip("qdrant_client.models")
+    dims = get_embedding_config(False).dimensions
+
+    # Alte Collection mit einem unbenannten Vektor, Service reduziert
+    qdrant = FakeQdrant(models.VectorParams(size=dims, distance=models.Distance.COSINE))
+    service = _service(tmp_path, qdrant)
+    with pytest.raises(ValueError):
+        service.store_in_qdrant(["a"], [{}])
+    with pytest.raises(ValueError):
+        service.search_similar("a")
+    assert qdrant.upserts == [] and qdrant.queries == []
+
+    # Benannte Vektoren, Service ohne Reduktion
+    named = {
+        REDUCED_VECTOR_NAME: models.VectorParams(size=8, distance=models.Distance.COSINE),
+        FULL_VECTOR_NAME: models.VectorParams(size=dims, distance=models.Distance.COSINE),
+    }
+    service = _service(tmp_path, FakeQdrant(named), reduce="none")
+    with pytest.raises(ValueError):
+        service.store_in_qdrant(["a"], [{}])
+
+    # Passende reduzierte Collection mit anderer Zieldimension
+    service = _service(tmp_path, FakeQdrant(named), dim=16)
+    with pytest.raises(ValueError):
+        service.search_similar("a")
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "numpy"):
+    pytest.importorskip(dep)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "embedding-server"))
+
+import embedding_server as server  # noqa: E402
+
+
+class FakeEncoder:
+    """Vector = [len(text)]; records batch shapes."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.batches.append([len(t) for t in texts])
+        if self.fail:
+            raise RuntimeError("backend down")
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_plan_batches_sorts_by_length_and_bounds_padding():
+    texts = ["x" * 400, "x" * 4, "x" * 40, "x" * 4000, "x" * 8]
+    batches = server.plan_batches(texts, max_batch=3, max_batch_tokens=300)
+
+    lengths = [len(texts[i]) for batch in batches for i in batch]
+    assert lengths == sorted(lengths)
+    assert all(len(batch) <= 3 for batch in batches)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(texts)))
+    # Der lange Text landet allein im letzten Batch
+    assert batches[-1] == [3]
+
+
+def test_concurrent_callers_are_coalesced_into_one_batch():
+    encoder = FakeEncoder()
+
+    async def scenario():
+        batcher = server.MicroBatcher(encoder, max_batch=16, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.embed(["a" * n]) for n in (5, 1, 3)))
+        await batcher.stop()
+        return results, batcher.metrics()
+
+    results, metrics = asyncio.run(scenario())
+    assert [r[0][0] for r in results] == [5.0, 1.0, 3.0]
+    assert encoder.batches == [[1, 3, 5]]
+    assert metrics["batches"] == 1 and metrics["avg_batch_size"] == 3
+
+
+def test_max_batch_splits_and_order_is_preserved():
+    encoder = FakeEncoder()
+
+    async def scenario():
+        batcher = server.MicroBatcher(encoder, max_batch=2, max_wait_ms=5)
+        vectors = await batcher.embed(["ccc", "a", "bb", "dddd", "e"])
+        await batcher.stop()
+        return vectors
+
+    vectors = asyncio.run(scenario())
+    assert [v[0] for v in vectors] == [3.0, 1.0, 2.0, 4.0, 1.0]
+    assert all(len(batch) <= 2 for batch in encoder.batches)
+
+
+def test_backend_error_reaches_every_caller():
+    async def scenario():
+        batcher = server.MicroBatcher(FakeEncoder(fail=True), max_wait_ms=5)
+        with pytest.raises(RuntimeError):
+            await batcher.embed(["a", "b"])
+        await batcher.stop()
+
+    asyncio.run(scenario())
+
+
+def test_batch_endpoint_normalizes_per_request(monkeypatch):
+    import httpx
+
+    encoder = FakeEncoder()
+    monkeypatch.setattr(server, "batchers", {"fake": server.MicroBatcher(encoder, max_wait_ms=5)})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            normalized = await client.post("/embed/batch", json={"texts": ["abc"], "model": "fake"})
+            raw = await client.post("/embed/batch", json={"texts": ["abc"], "model": "fake", "normalize": False})
+            unknown = await client.post("/embed/batch", json={"texts": ["abc"], "model": "nope"})
+        await server.batchers["fake"].stop()
+        return normalized.json(), raw.json(), unknown.status_code
+
+    normalized, raw, unknown = asyncio.run(scenario())
+    assert raw["embeddings"] == [[3.0, 1.0]] and raw["dim"] == 2
+    assert normalized["embeddings"][0] == pytest.approx([3 / 10 ** 0.5, 1 / 10 ** 0.5], rel=1e-5)
+    assert unknown == 400
@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("httpx")
+
+ROOT = Path(__file__).resolve().parents[1]
+WORKERS_PATH = ROOT / "infra" / "docker" / "workers"
+sys.path.insert(0, str(WORKERS_PATH))
+
+import extraction_worker  # noqa: E402
+
+
+def _result(text):
+    return extraction_worker.ExtractionResult(
+        job_id="1-0",
+        file_path="/mnt/data/a.pdf",
+        filename="a.pdf",
+        text=text,
+        metadata={"pages": 2},
+        confidence=0.9,
+        extraction_method="docling",
+    )
+
+
+def test_cache_roundtrip_is_keyed_by_version(tmp_path):
+    cache = extraction_worker.ExtractionCache(str(tmp_path / "cache.db"))
+    cache.put("abc", "worker:documents", "1:fast", _result("Rechnung 2024"))
+
+    hit = cache.get("abc", "worker:documents", "1:fast")
+    assert hit["text"] == "Rechnung 2024"
+    assert hit["source"] == "docling"
+    assert hit["metadata"] == {"pages": 2}
+
+    assert cache.get("abc", "worker:documents", "1:deep") is None
+    assert cache.get("abc", "worker:images", "1:fast") is None
+
+
+def test_file_sha256(tmp_path):
+    f = tmp_path / "a.bin"
+    f.write_bytes(b"x" * (3 * 1024 * 1024 + 7))
+    assert extraction_worker.file_sha256(f) == hashlib.sha256(f.read_bytes()).hexdigest()
+
+
+def test_worker_does_not_cache_fallback_results(tmp_path):
+    worker = extraction_worker.DocumentWorker()
+    worker.extraction_cache = extraction_worker.ExtractionCache(str(tmp_path / "cache.db"))
+    docling_calls = []
+
+    async def docling(job, local_path):
+        docling_calls.append(job.id)
+        if len(docling_calls) == 1:
+            raise RuntimeError("document-processor timeout")
+        return _result("Rechnung 2024 (Docling)")
+
+    async def tika(job, local_path):
+        return extraction_worker.ExtractionResult(
+            job_id=job.id, file_path=job.path, filename=job.filename,
+            text="Rechnung 2024", extraction_method="tika-fast-fallback",
+        )
+
+    worker._extract_docling = docling
+    worker._extract_tika_fast = tika
+    job = extraction_worker.FileJob(
+        id="1-0", path="/mnt/data/a.pdf", filename="a.pdf", extension=".pdf",
+        size=1, modified="2025-01-01", content_sha256="abc",
+    )
+
+    async def scenario():
+        return [await worker._extract_cached(job, Path("/mnt/data/a.pdf")) for _ in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+    assert first.extraction_method == "tika-fast-fallback" and first.metadata["fallback_used"]
+    # Docling wird beim nächsten Mal wieder versucht und erst dann gecacht
+    assert second.extraction_method == "docling"
+    assert third.metadata.get("cache_hit") and third.text == "Rechnung 2024 (Docling)"
+    assert len(docling_calls) == 2
@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CONDUCTOR_ROOT", tempfile.mkdtemp())
+
+
+def _save(smart_ingest, sha256, filename, text, category="Finanzen"):
+    smart_ingest.save_to_shadow_ledger({
+        "sha256": sha256,
+        "original_filename": filename,
+        "original_path": f"/inbox/{filename}",
+        "current_path": f"/vault/{filename}",
+        "category": category,
+        "extracted_text": text,
+    })
+
+
+def _match(db_path, query):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT f.sha256 FROM files_fts JOIN files f ON f.id = files_fts.rowid "
+        "WHERE files_fts MATCH ? ORDER BY bm25(files_fts)",
+        (query,),
+    ).fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+@pytest.fixture
+def smart_ingest(tmp_path, monkeypatch):
+    pytest.importorskip("requests")
+    pytest.importorskip("watchdog")
+    import scripts.smart_ingest as module
+
+    monkeypatch.setattr(module, "SHADOW_LEDGER_PATH", tmp_path / "shadow_ledger.db")
+    module.init_shadow_ledger()
+    return module
+
+
+def test_fts_follows_insert_or_replace(smart_ingest):
+    db_path = smart_ingest.SHADOW_LEDGER_PATH
+    _save(smart_ingest, "a" * 64, "Rechnung_Telekom.pdf", "Rechnungsnummer RE-2024-0815 Telekom")
+    _save(smart_ingest, "b" * 64, "Vertrag.pdf", "Mietvertrag Wohnung")
+
+    assert _match(db_path, '"re-2024-0815"') == ["a" * 64]
+    assert _match(db_path, '"telekom"') == ["a" * 64]
+
+    # Re-Ingest desselben Inhalts ersetzt die Zeile (neue rowid) → kein Geister-Treffer
+    _save(smart_ingest, "a" * 64, "Rechnung_Vodafone.pdf", "Rechnungsnummer RE-2024-0815 Vodafone")
+    assert _match(db_path, '"telekom"') == []
+    assert _match(db_path, '"vodafone"') == ["a" * 64]
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM files WHERE sha256 = ?", ("b" * 64,))
+    conn.commit()
+    conn.close()
+    assert _match(db_path, '"mietvertrag"') == []
+
+
+def test_fts_backfills_existing_ledger(smart_ingest, tmp_path, monkeypatch):
+    legacy = tmp_path / "legacy.db"
+    conn = sqlite3.connect(legacy)
+    conn.execute("CREATE TABLE files (id INTEGER PRIMARY KEY, sha256 TEXT UNIQUE, original_filename TEXT, "
+                 "current_filename TEXT, current_path TEXT, category TEXT, meta_description TEXT, "
+                 "extracted_text TEXT)")
+    conn.execute("INSERT INTO files VALUES (1, 'c', 'Steuer.pdf', 'Steuer.pdf', '/v', 'Finanzen', '', "
+                 "'Einkommensteuerbescheid 2023')")
+    conn.commit()
+
+    assert smart_ingest.init_fulltext_index(conn.cursor())
+    conn.commit()
+    conn.close()
+    assert _match(legacy, '"einkommensteuerbescheid"') == ["c"]
+
+
+@pytest.fixture
+def neural_search():
+    for dep in ("fastapi", "httpx", "redis", "sse_starlette"):
+        pytest.importorskip(dep)
+    sys.path.insert(0, str(ROOT / "infra" / "docker" / "neural-search-api"))
+    import neural_search_api
+    return neural_search_api
+
+
+def test_fts_query_quotes_terms(neural_search):
+    assert neural_search.fts_query('Rechnung "RE-2024-0815" rechnung?') == '"rechnung" OR "re-2024-0815"'
+    assert neural_search.fts_query("?!") == ""
+
+
+def test_rrf_prefers_documents_found_by_both_legs(neural_search):
+    dense = [{"id": "p1", "key": "a", "payload": None}, {"id": "p2", "key": "b", "payload": None}]
+    lexical = [{"id": "l3", "key": "c", "payload": {}}, {"id": "l2", "key": "b", "payload": {}}]
+
+    fused = neural_search.rrf_fuse([(dense, 1.0), (lexical, 1.0)], limit=3, k=60)
+
+    assert [h["key"] for h in fused] == ["b", "a", "c"]
+    # Dense-Treffer gewinnt (Chunk-Point-ID, Payload wird nachgeladen)
+    assert fused[0]["id"] == "p2" and fused[0]["payload"] is None
+    assert fused[0]["score"] == pytest.approx(1 / 62 + 1 / 62)
+
+
+def test_lexical_search_reads_ledger(neural_search, smart_ingest, monkeypatch):
+    _save(smart_ingest, "d" * 64, "Kfz_Versicherung.pdf", "Versicherungsschein HUK Kennzeichen B-XY 123")
+    monkeypatch.setattr(neural_search, "LEDGER_DB_PATH", str(smart_ingest.SHADOW_LEDGER_PATH))
+
+    hits = neural_search._lexical_search("HUK Versicherungsschein", 5)
+
+    assert [h["key"] for h in hits] == ["d" * 64]
+    assert hits[0]["payload"]["filename"] == "Kfz_Versicherung.pdf"
+    assert "HUK" in hits[0]["payload"]["text"]
+
+
+def test_request_filters_become_qdrant_filter(neural_search):
+    qdrant_filter = neural_search.build_qdrant_filter({
+        "types": ["audio"], "categories": ["Finanzen"], "tags": ["steuer"],
+        "yearFrom": 2023, "createdBefore": "2024-01-01T00:00:00+00:00",
+    })
+    must = {c["key"]: c for c in qdrant_filter["must"]}
+    assert set(must["extension"]["match"]["any"]) == {".mp3", ".wav", ".m4a", ".ogg"}
+    assert must["category"]["match"]["any"] == ["Finanzen"]
+    assert must["tags"]["match"]["any"] == ["steuer"]
+    assert must["year_created"]["range"] == {"gte": 2023}
+    assert must["file_created_timestamp"]["range"] == {"lte": 1704067200}
+    assert neural_search.build_qdrant_filter({}) is None
+
+
+def test_lexical_leg_applies_filters_in_sql(neural_search, smart_ingest, monkeypatch):
+    _save(smart_ingest, "e" * 64, "Rechnung_Telekom.pdf", "Rechnung Telekom Januar")
+    _save(smart_ingest, "f" * 64, "Rechnung_Diktat.mp3", "Rechnung Telekom Diktat", category="Audio")
+    monkeypatch.setattr(neural_search, "LEDGER_DB_PATH", str(smart_ingest.SHADOW_LEDGER_PATH))
+
+    where, params = neural_search.ledger_filter({"types": ["audio"]})
+    assert [h["key"] for h in neural_search._lexical_search("Rechnung", 5, where, params)] == ["f" * 64]
+    where, params = neural_search.ledger_filter({"categories": ["Finanzen"], "extensions": ["PDF"]})
+    assert [h["key"] for h in neural_search._lexical_search("Rechnung", 5, where, params)] == ["e" * 64]
+    # Erstellungsdatum steht nur im Qdrant-Payload → lexikalisches Leg entfällt
+    assert neural_search.ledger_filter({"yearFrom": 2020}) is None
@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("fastapi")
+
+ROOT = Path(__file__).resolve().parents[1]
+ROUTER_PATH = ROOT / "infra" / "docker" / "universal-router"
+sys.path.insert(0, str(ROUTER_PATH))
+
+import router  # noqa: E402
+
+
+class FakeStreams:
+    def __init__(self, **lengths):
+        self.queues = {name: list(range(n)) for name, n in lengths.items()}
+
+    async def read(self, stream, count):
+        taken = self.queues[stream][:count]
+        del self.queues[stream][:count]
+        return [(stream, str(i), {}) for i in taken]
+
+
+def _streams(batch):
+    return [entry[0] for entry in batch]
+
+
+def test_weighted_reads_per_weight():
+    fake = FakeStreams(p=20, n=20, b=20)
+    scheduler = router.IntakeScheduler(
+        ["p", "n", "b"], weights=router.parse_weights("p=3,n=2,b=1")
+    )
+    batch = asyncio.run(scheduler.next_batch(fake.read))
+    assert _streams(batch) == ["p"] * 3 + ["n"] * 2 + ["b"]
+
+
+def test_strict_serves_highest_stream_until_starvation_timeout():
+    fake = FakeStreams(p=50, n=10, b=10)
+    now = [0.0]
+    scheduler = router.IntakeScheduler(
+        ["p", "n", "b"], mode="strict", batch=5, starvation_timeout=30, clock=lambda: now[0]
+    )
+
+    assert set(_streams(asyncio.run(scheduler.next_batch(fake.read)))) == {"p"}
+
+    now[0] = 30.0
+    batch = _streams(asyncio.run(scheduler.next_batch(fake.read)))
+    assert batch[:2] == ["n", "b"]
+    assert batch[2:] == ["p"] * 5
+
+
+def test_priority_stream_bands():
+    assert router.priority_stream("extract:documents", 100) == "extract:documents:high"
+    assert router.priority_stream("extract:documents", 50) == "extract:documents"
+    assert router.priority_stream("extract:documents", 10) == "extract:documents:bulk"
+    assert router.priority_streams("extract:audio")[0] == "extract:audio:high"
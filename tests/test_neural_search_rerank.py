@@ -0,0 +1,139 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "sse_starlette", "numpy"):
+    pytest.importorskip(dep)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "neural-search-api"))
+
+import neural_search_api as api  # noqa: E402
+
+
+class FakeCrossEncoder:
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        return [doc.count("Telekom") for _, doc in pairs]
+
+
+def _hits(n):
+    return [
+        {"id": f"p{i}", "score": 1.0 - i / 100, "payload": {"text": "Telekom " * (i % 4)}}
+        for i in range(n)
+    ]
+
+
+def test_retrieve_overfetches_and_reports_reranked(monkeypatch):
+    seen = {}
+
+    async def fake_search(query, limit, timings, filters=None):
+        seen["limit"] = limit
+        return _hits(limit)
+
+    reranker = api.CrossEncoderReranker(batch_size=4)
+    reranker.model = FakeCrossEncoder()
+    monkeypatch.setattr(api, "search_qdrant", fake_search)
+    monkeypatch.setattr(api, "reranker", reranker)
+
+    request = api.SearchRequest(query="Telekom", limit=4, rerankMultiplier=5, rerankBudgetMs=1000)
+    timings = api.SearchTimings()
+    hits = asyncio.run(api.retrieve(request, timings))
+    reranker.executor.shutdown()
+
+    assert seen["limit"] == 20
+    assert timings.rerankCandidates == 20 and timings.reranked == 20
+    assert len(hits) == 4
+    assert all(h["rerankScore"] == 3 for h in hits)
+
+
+def test_pair_cache_distinguishes_texts_with_the_same_id():
+    reranker = api.CrossEncoderReranker(batch_size=4)
+    reranker.model = FakeCrossEncoder()
+
+    assert reranker.score("Telekom", [("p0", "Urlaub")]) == [0.0]
+    # Lexikalischer Treffer: gleiche Chunk-0-ID, anderer (FTS-)Text
+    assert reranker.score("Telekom", [("p0", "Telekom Telekom")]) == [2.0]
+    assert reranker.score("Telekom", [("p1", "Urlaub")]) == [0.0]
+    assert len(reranker._cache) == 2
+    reranker.executor.shutdown()
+
+
+def test_retrieve_without_rerank_keeps_limit(monkeypatch):
+    async def fake_search(query, limit, timings, filters=None):
+        return _hits(limit)
+
+    monkeypatch.setattr(api, "search_qdrant", fake_search)
+    monkeypatch.setattr(api, "reranker", None)
+
+    timings = api.SearchTimings()
+    hits = asyncio.run(api.retrieve(api.SearchRequest(query="Telekom", limit=3), timings))
+    assert [h["id"] for h in hits] == ["p0", "p1", "p2"]
+    assert timings.reranked == 0
+
+
+def test_rerank_options_are_part_of_cache_scope():
+    plain = api.SearchRequest(query="x", limit=8)
+    wide = api.SearchRequest(query="x", limit=8, rerankMultiplier=6)
+    scope = api.QueryResultCache.scope
+    assert scope(8, None, api.cache_options(plain)) != scope(8, None, api.cache_options(wide))
+
+
+def test_fully_reranked_gates_caching(monkeypatch):
+    request = api.SearchRequest(query="Telekom", limit=4)
+    reranker = api.CrossEncoderReranker()
+    monkeypatch.setattr(api, "reranker", reranker)
+    full = api.SearchTimings(rerankCandidates=12, reranked=12)
+    partial = api.SearchTimings(rerankCandidates=12, reranked=5)
+
+    assert not api.fully_reranked(request, full)  # Modell lädt noch
+    reranker.model = FakeCrossEncoder()
+    assert api.fully_reranked(request, full)
+    assert not api.fully_reranked(request, partial)  # Budget aufgebraucht
+    assert api.fully_reranked(request.model_copy(update={"rerank": False}), partial)
+    reranker.executor.shutdown()
+
+
+def _search_and_record_store(monkeypatch, model, budget_ms):
+    stored = []
+
+    async def fake_search(query, limit, timings, filters=None):
+        return _hits(limit)
+
+    async def fake_llm(query, sources, stream=True):
+        yield "Antwort ¹"
+
+    async def no_cache(query, scope, timings):
+        return None, 0
+
+    async def record_store(*args):
+        stored.append(args)
+
+    reranker = api.CrossEncoderReranker(batch_size=4)
+    reranker.model = model
+    monkeypatch.setattr(reranker, "start_loading", lambda: None)
+    monkeypatch.setattr(api, "reranker", reranker)
+    monkeypatch.setattr(api, "search_qdrant", fake_search)
+    monkeypatch.setattr(api, "generate_llm_response", fake_llm)
+    monkeypatch.setattr(api, "cached_result", no_cache)
+    monkeypatch.setattr(api, "store_result", record_store)
+
+    request = api.SearchRequest(query="Telekom", limit=4, rerankBudgetMs=budget_ms)
+    response = asyncio.run(api.neural_search(request))
+    reranker.executor.shutdown()
+    return response, stored
+
+
+def test_unreranked_results_are_not_cached(monkeypatch):
+    response, stored = _search_and_record_store(monkeypatch, None, 1000)
+    assert response.sources and response.timings.reranked == 0
+    assert stored == []
+
+    # Budget 0: keine Batch passt vor die Deadline
+    response, stored = _search_and_record_store(monkeypatch, FakeCrossEncoder(), 0)
+    assert response.timings.reranked < response.timings.rerankCandidates
+    assert stored == []
+
+    response, stored = _search_and_record_store(monkeypatch, FakeCrossEncoder(), 1000)
+    assert response.timings.reranked == response.timings.rerankCandidates
+    assert len(stored) == 1
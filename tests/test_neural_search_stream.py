@@ -0,0 +1,59 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "sse_starlette"):
+    pytest.importorskip(dep)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "neural-search-api"))
+
+import neural_search_api as api  # noqa: E402
+
+
+def _collect(monkeypatch):
+    hits = [
+        {"id": f"p{i}", "score": 0.9, "payload": {"filename": f"doc{i}.pdf", "text": "Inhalt"}}
+        for i in range(8)
+    ]
+
+    async def fake_search(query, limit, timings, filters=None):
+        return hits
+
+    async def fake_llm(query, sources, stream=True):
+        for token in ("Antwort ", "¹"):
+            yield token
+
+    async def fake_follow_ups(query, answer, sources):
+        return []
+
+    monkeypatch.setattr(api, "search_qdrant", fake_search)
+    monkeypatch.setattr(api, "generate_llm_response", fake_llm)
+    monkeypatch.setattr(api, "generate_follow_ups", fake_follow_ups)
+    monkeypatch.setitem(api.collection_stats, "documentsTotal", 1234)
+
+    async def run():
+        response = await api.neural_search_stream(api.SearchRequest(query="Was kostet der Vertrag?"))
+        return [event async for event in response.body_iterator]
+
+    return asyncio.run(run())
+
+
+def test_stream_has_no_artificial_delays(monkeypatch):
+    start = time.perf_counter()
+    events = _collect(monkeypatch)
+
+    assert time.perf_counter() - start < 0.3
+    names = [e["event"] for e in events]
+    assert names[:3] == ["progress", "progress", "progress"]
+    assert names.count("progress") == 5  # analyzing, searching x2, reading, synthesizing
+    assert "".join(e["data"] for e in events if e["event"] == "token") == "Antwort ¹"
+    assert names[-2:] == ["complete", "followups"]
+
+
+def test_stream_reports_cached_collection_size(monkeypatch):
+    events = _collect(monkeypatch)
+    searched = [e for e in events if e["event"] == "progress" and "documentsFound" in e["data"]]
+    assert '"documentsTotal": 1234' in searched[0]["data"]
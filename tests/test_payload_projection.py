@@ -0,0 +1,102 @@
+import asyncio
+import json
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "sse_starlette", "numpy"):
+    pytest.importorskip(dep)
+
+import httpx  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "neural-search-api"))
+
+import neural_search_api as api  # noqa: E402
+
+PARENT = "a" * 64
+CHUNK_ID = str(uuid.uuid5(api.POINT_ID_NAMESPACE, f"{PARENT}:2"))
+FIRST_ID = str(uuid.uuid5(api.POINT_ID_NAMESPACE, f"{PARENT}:0"))
+
+
+def _qdrant(requests_seen):
+    async def handler(request):
+        body = json.loads(await request.aread()) if request.method == "POST" else None
+        requests_seen.append((request.method, request.url.path, body))
+        if request.method == "GET":
+            return httpx.Response(200, json={"result": {"id": CHUNK_ID, "payload": {
+                "filename": "Vertrag.pdf", "parent_id": PARENT, "chunk_index": 2,
+                "text": "Kündigungsfrist drei Monate", "excerpt": "Kündigungsfrist drei Monate",
+            }}})
+        ids = body["ids"]
+        return httpx.Response(200, json={"result": [
+            {"id": i, "payload": {"extracted_text": "Volltext " * 1000, "filename": "Vertrag.pdf"}} for i in ids
+        ]})
+    return handler
+
+
+def test_search_payloads_are_projected(monkeypatch):
+    seen = []
+
+    async def run():
+        monkeypatch.setattr(api, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(_qdrant(seen))))
+        result = await api.fetch_payloads([CHUNK_ID])
+        await api.http_client.aclose()
+        return result
+
+    asyncio.run(run())
+    include = seen[0][2]["with_payload"]["include"]
+    assert "excerpt" in include
+    assert "extracted_text" not in include and "content" not in include
+
+
+def test_hits_without_excerpt_get_their_text_backfilled(monkeypatch):
+    seen = []
+
+    async def handler(request):
+        body = json.loads(await request.aread())
+        seen.append(body)
+        return httpx.Response(200, json={"result": [
+            {"id": i, "payload": {"text": "Alter Chunk ohne Excerpt " * 40}} for i in body["ids"]
+        ]})
+
+    hits = [
+        {"id": "new", "score": 0.9, "payload": {"filename": "neu.pdf", "excerpt": "vorberechnet"}},
+        {"id": "old", "score": 0.8, "payload": {"filename": "alt.pdf"}},
+    ]
+
+    async def run():
+        monkeypatch.setattr(api, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        await api.backfill_excerpts(hits)
+        await api.backfill_excerpts(hits)  # nichts mehr offen: kein weiterer Request
+        await api.http_client.aclose()
+
+    asyncio.run(run())
+    assert seen == [{"ids": ["old"], "with_payload": {"include": ["text", "content"]}, "with_vector": False}]
+    sources = [api.convert_hit_to_source(h, i) for i, h in enumerate(hits)]
+    assert sources[0].excerpt == "vorberechnet"
+    assert sources[1].excerpt.startswith("Alter Chunk") and sources[1].filename == "alt.pdf"
+    assert len(sources[1].excerpt) == api.EXCERPT_MAX_CHARS
+
+
+def test_excerpt_field_preferred_over_text():
+    source = api.convert_hit_to_source({"id": "p", "payload": {"filename": "a.pdf", "excerpt": "kurz", "text": "lang"}}, 0)
+    legacy = api.convert_hit_to_source({"id": "p", "payload": {"filename": "a.pdf", "text": "x" * 900}}, 0)
+    assert source.excerpt == "kurz" and source.fullText is None
+    assert len(legacy.excerpt) == api.EXCERPT_MAX_CHARS
+
+
+def test_source_detail_loads_full_text_from_first_chunk(monkeypatch):
+    seen = []
+
+    async def run():
+        monkeypatch.setattr(api, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(_qdrant(seen))))
+        source = await api.get_source(CHUNK_ID)
+        await api.http_client.aclose()
+        return source
+
+    source = asyncio.run(run())
+    assert source.fullText.startswith("Volltext")
+    assert source.excerpt == "Kündigungsfrist drei Monate"
+    assert seen[1][2] == {"ids": [FIRST_ID], "with_payload": {"include": ["extracted_text"]}, "with_vector": False}
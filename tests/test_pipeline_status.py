@@ -0,0 +1,71 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "sse_starlette", "numpy"):
+    pytest.importorskip(dep)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "neural-search-api"))
+
+import neural_search_api as api  # noqa: E402
+
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    monkeypatch.setattr(api, "pipeline_snapshot", {"status": None, "qdrantOnline": False, "refreshedAt": None})
+    calls = []
+
+    def slow(name, result):
+        async def probe():
+            calls.append(name)
+            await asyncio.sleep(0.1)
+            return result
+        return probe
+
+    monkeypatch.setattr(api, "probe_gpu", slow("gpu", {"available": True, "name": "RTX 4090", "memory_used_percent": 41}))
+    monkeypatch.setattr(api, "probe_queue_depth", slow("queues", 7))
+    monkeypatch.setattr(api, "probe_workers", slow("workers", {"active_workers": 2, "total_workers": 3}))
+    monkeypatch.setattr(api, "probe_qdrant", slow("qdrant", 1234))
+    return calls
+
+
+def test_probes_run_concurrently_and_endpoint_serves_snapshot(snapshot):
+    async def run():
+        start = time.perf_counter()
+        await api.refresh_pipeline_status()
+        refresh_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status = await api.get_pipeline_status()
+        system = await api.get_system_status()
+        return refresh_s, time.perf_counter() - start, status, system
+
+    refresh_s, serve_s, status, system = asyncio.run(run())
+
+    assert refresh_s < 0.25  # 4 Probes à 0.1 s parallel statt 0.4 s sequenziell
+    assert serve_s < 0.05 and len(snapshot) == 4  # aus dem Snapshot, keine weiteren Probes
+    assert status.gpuStatus == "online" and status.queueDepth == 7 and status.indexedDocuments == 1234
+    assert status.snapshotAgeS >= 0 and status.refreshMs > 0
+    assert {"name": "Qdrant", "status": "online"} in system["components"]
+
+
+def test_first_request_builds_snapshot(snapshot):
+    status = asyncio.run(api.get_pipeline_status())
+    assert status.workersActive == 2 and len(snapshot) == 4
+
+
+def test_queue_depth_uses_one_pipeline(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        await client.xadd("intake:priority", {"job": "a"})
+        await client.xadd("intake:bulk", {"job": "b"})
+        await client.xadd("intake:bulk", {"job": "c"})
+        monkeypatch.setattr(api, "redis_client", client)
+        return await api.probe_queue_depth()
+
+    assert asyncio.run(run()) == 3
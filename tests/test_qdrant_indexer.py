@@ -0,0 +1,245 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from scripts.services.qdrant_indexer import QdrantIndexer, point_id  # noqa: E402
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+
+class FakeSession:
+    def __init__(self):
+        self.headers = {}
+        self.puts = []
+        self.deletes = []
+
+    def put(self, url, params=None, json=None, timeout=None):
+        self.puts.append(json["points"])
+        return FakeResponse()
+
+    def post(self, url, params=None, json=None, timeout=None):
+        self.deletes.append(json["filter"])
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+
+def test_point_id_is_deterministic_and_chunk_specific():
+    assert point_id("abc", 0) == point_id("abc", 0)
+    assert point_id("abc", 0) != point_id("abc", 1)
+    assert point_id("abc", 0) != point_id("abd", 0)
+
+
+def test_flushes_by_size_and_cleans_up_replaced_documents():
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", batch_size=3, flush_interval_s=0)
+    indexer.session = FakeSession()
+
+    points = [{"id": point_id("doc", i), "vector": [0.1], "payload": {}} for i in range(2)]
+    indexer.add_document("doc", points)
+    assert indexer.session.puts == []
+
+    indexer.add(point_id("other"), [0.2], {})
+    assert len(indexer.session.puts) == 1 and len(indexer.session.puts[0]) == 3
+    assert indexer.session.deletes[0]["must_not"] == [{"has_id": [p["id"] for p in points]}]
+
+    indexer.close()
+    assert indexer.upserted == 3 and indexer.failed == 0
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+
+def test_successful_flush_bumps_collection_version():
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", batch_size=10, flush_interval_s=0)
+    indexer.session = FakeSession()
+    indexer._redis = FakeRedis()
+
+    assert indexer.flush()  # leerer Puffer: kein Schreibvorgang
+    assert indexer._redis.values == {}
+
+    indexer.add(point_id("doc"), [0.1], {})
+    indexer.flush()
+    assert indexer._redis.values == {"neural:collection_version:neural_vault": 1}
+
+
+class FlakySession(FakeSession):
+    """Antwortet der Reihe nach mit den vorgegebenen Statuscodes, danach 200."""
+
+    def __init__(self, statuses):
+        super().__init__()
+        self.statuses = list(statuses)
+
+    def put(self, url, params=None, json=None, timeout=None):
+        self.puts.append(json["points"])
+        response = FakeResponse()
+        if self.statuses:
+            response.status_code = self.statuses.pop(0)
+        return response
+
+
+def _chunks(doc_id, n=2):
+    return [
+        {"id": point_id(doc_id, i), "vector": [0.1], "payload": {"parent_id": doc_id}}
+        for i in range(n)
+    ]
+
+
+def test_transient_upsert_errors_are_retried():
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", flush_interval_s=0,
+                            retries=3, retry_backoff_s=0)
+    indexer.session = FlakySession([503, 429])
+
+    indexer.add_document("doc", _chunks("doc"))
+    assert indexer.flush()
+    assert len(indexer.session.puts) == 3
+    assert indexer.session.deletes  # Aufräumen erst nach erfolgreichem Upsert
+    assert indexer.upserted == 2 and indexer.failed == 0
+    assert indexer.pop_failed_parents() == set()
+
+
+def test_lost_batches_are_reported_per_parent():
+    reported = []
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", flush_interval_s=0,
+                            retries=2, retry_backoff_s=0, on_failure=reported.append)
+    indexer.session = FlakySession([500, 500, 500])
+
+    indexer.add_document("a", _chunks("a"))
+    indexer.add_document("b", _chunks("b", 1))
+    assert not indexer.flush()
+    assert len(indexer.session.puts) == 3
+    assert indexer.session.deletes == []  # alte Chunks bleiben erhalten
+    assert indexer.failed == 3
+    assert reported == [["a", "b"]]
+    assert indexer.pop_failed_parents() == {"a", "b"}
+    assert indexer.pop_failed_parents() == set()
+
+
+def test_client_errors_are_not_retried():
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", flush_interval_s=0,
+                            retries=3, retry_backoff_s=0)
+    indexer.session = FlakySession([400])
+
+    assert not indexer.upsert(_chunks("doc"))
+    assert len(indexer.session.puts) == 1
+
+
+class IndexSession(FakeSession):
+    def __init__(self):
+        super().__init__()
+        self.indexes = []
+
+    def put(self, url, params=None, json=None, timeout=None):
+        self.indexes.append((url, json))
+        return FakeResponse()
+
+
+def test_payload_indexes_are_created_once_per_field():
+    from config.embeddings import get_qdrant_payload_indexes
+
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", flush_interval_s=0)
+    indexer.session = IndexSession()
+    schema = get_qdrant_payload_indexes()
+
+    assert indexer.ensure_payload_indexes(schema) == len(schema)
+    assert indexer.ensure_payload_indexes(schema) == 0
+    urls = {url for url, _ in indexer.session.indexes}
+    assert urls == {"http://qdrant:6333/collections/neural_vault/index"}
+    fields = {body["field_name"]: body["field_schema"] for _, body in indexer.session.indexes}
+    assert fields["year_created"] == "integer" and fields["tags"] == "keyword"
+
+
+class QuantizationSession(FakeSession):
+    def __init__(self, current=None, exists=True):
+        super().__init__()
+        self.current = current
+        self.exists = exists
+        self.patches = []
+
+    def get(self, url, timeout=None):
+        response = FakeResponse()
+        if not self.exists:
+            response.status_code = 404
+        response.json = lambda: {"result": {"config": {"quantization_config": self.current}}}
+        return response
+
+    def put(self, url, params=None, json=None, timeout=None):
+        self.exists = True  # Qdrant legt die Collection hier beim ersten Upsert an
+        return super().put(url, params=params, json=json, timeout=timeout)
+
+    def patch(self, url, json=None, timeout=None):
+        self.patches.append(json)
+        self.current = json["quantization_config"]
+        return FakeResponse()
+
+
+def test_quantization_is_patched_only_when_it_differs():
+    from config.embeddings import get_qdrant_collection_config, get_qdrant_quantization_config
+
+    int8 = get_qdrant_quantization_config("int8")
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", flush_interval_s=0)
+    indexer.session = QuantizationSession()
+
+    assert indexer.ensure_quantization(int8)
+    assert indexer.session.patches == [{"quantization_config": int8, "vectors": {"": {"on_disk": True}}}]
+    assert indexer.ensure_quantization(int8)
+    assert len(indexer.session.patches) == 1
+
+    collection = get_qdrant_collection_config(quantization="binary")
+    assert collection["vectors"]["on_disk"] is True
+    assert "binary" in collection["quantization_config"]
+    assert "quantization_config" not in get_qdrant_collection_config(quantization="none")
+
+
+def test_quantization_none_is_applied_by_get_indexer(monkeypatch):
+    from config.embeddings import get_qdrant_quantization_config
+    from scripts.services import qdrant_indexer
+
+    session = QuantizationSession(current=get_qdrant_quantization_config("int8"))
+    monkeypatch.setattr(qdrant_indexer.requests, "Session", lambda: session)
+    monkeypatch.setattr(qdrant_indexer, "_indexers", {})
+    monkeypatch.setattr(qdrant_indexer.atexit, "register", lambda fn: None)
+
+    qdrant_indexer.get_indexer("http://qdrant:6333", "neural_vault",
+                               quantization_config=get_qdrant_quantization_config("none"))
+    assert session.patches == [{"quantization_config": "Disabled"}]
+
+
+def test_quantization_is_retried_once_the_collection_exists():
+    from config.embeddings import get_qdrant_quantization_config
+
+    int8 = get_qdrant_quantization_config("int8")
+    indexer = QdrantIndexer("http://qdrant:6333", "neural_vault", flush_interval_s=0)
+    indexer.session = QuantizationSession(exists=False)
+
+    assert not indexer.ensure_quantization(int8)
+    assert indexer.quantization_pending and indexer.session.patches == []
+
+    assert indexer.upsert(_chunks("doc"))
+    assert indexer.session.patches == [{"quantization_config": int8, "vectors": {"": {"on_disk": True}}}]
+    assert not indexer.quantization_pending
+
+
+def test_search_params_rescore_with_oversampling():
+    from config.embeddings import get_qdrant_search_params
+
+    assert get_qdrant_search_params("none") == {}
+    params = get_qdrant_search_params("binary")["quantization"]
+    assert params["rescore"] is True and params["oversampling"] == 3.0
+    with pytest.raises(ValueError):
+        get_qdrant_search_params("int4")
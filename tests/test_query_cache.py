@@ -0,0 +1,102 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "sse_starlette", "numpy"):
+    pytest.importorskip(dep)
+fakeredis = pytest.importorskip("fakeredis")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "neural-search-api"))
+
+import neural_search_api as api  # noqa: E402
+
+SOURCES = [{"id": "p1", "filename": "Rechnung_Telekom.pdf"}]
+
+
+def _run(coro_factory, **kwargs):
+    async def run():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        cache = api.QueryResultCache(client, namespace="test", **kwargs)
+        return await coro_factory(cache, client)
+    return asyncio.run(run())
+
+
+def test_normalize_query():
+    assert api.normalize_query("  Telekom   RECHNUNG? ") == "telekom rechnung"
+    assert api.normalize_query("Rechnung RE-2024-0815!") == "rechnung re-2024-0815"
+
+
+def test_exact_hit_after_put_and_invalidation_by_version():
+    async def scenario(cache, client):
+        scope = cache.scope(8)
+        await cache.put("Telekom Rechnung", scope, 0, [1.0, 0.0], SOURCES, "Antwort ¹")
+        hit = await cache.get("telekom  rechnung?", scope)
+        other_scope = await cache.get("Telekom Rechnung", cache.scope(4))
+
+        await client.incr(cache.version_key)  # Indexer hat geschrieben
+        stale = await cache.get("Telekom Rechnung", scope)
+        return hit, other_scope, stale, await client.zcard(cache.lru_key)
+
+    hit, other_scope, stale, lru_size = _run(scenario)
+    assert hit["answer"] == "Antwort ¹" and hit["sources"] == SOURCES
+    assert other_scope is None
+    assert stale is None and lru_size == 0
+
+
+def test_semantic_hit_for_paraphrase():
+    async def scenario(cache, client):
+        scope = cache.scope(8)
+        await cache.put("Telekom Rechnung", scope, 0, [1.0, 0.1, 0.0], SOURCES, "Antwort")
+        near = await cache.get_similar([0.98, 0.12, 0.01], scope)
+        far = await cache.get_similar([0.0, 0.0, 1.0], scope)
+        return near, far
+
+    near, far = _run(scenario, similarity=0.95)
+    assert near["query"] == "Telekom Rechnung"
+    assert far is None
+
+
+def test_lru_bound_evicts_least_recently_used():
+    async def scenario(cache, client):
+        scope = cache.scope(8)
+        await cache.put("a", scope, 0, [1.0, 0.0], SOURCES, "A")
+        await cache.put("b", scope, 0, [0.0, 1.0], SOURCES, "B")
+        await cache.get("a", scope)  # a zuletzt benutzt
+        await cache.put("c", scope, 0, [0.7, 0.7], SOURCES, "C")
+        return (
+            await cache.get("a", scope),
+            await cache.get("b", scope),
+            await client.hlen(cache.vectors_key),
+        )
+
+    a, b, vectors = _run(scenario, max_entries=2)
+    assert a is not None and b is None
+    assert vectors == 2
+
+
+def test_miss_does_not_delete_and_expired_entry_is_cleaned_up():
+    async def scenario(cache, client):
+        drops = []
+        drop = cache._drop
+
+        async def recording_drop(keys):
+            drops.append(list(keys))
+            await drop(keys)
+
+        cache._drop = recording_drop
+        scope = cache.scope(8)
+        miss = await cache.get("nie gespeichert", scope)
+        misses_dropped = list(drops)
+
+        await cache.put("Telekom Rechnung", scope, 0, [1.0, 0.0], SOURCES, "A")
+        key = cache.entry_key("Telekom Rechnung", scope)
+        await client.delete(key)  # TTL abgelaufen, LRU/Vektor verweisen noch darauf
+        expired = await cache.get("Telekom Rechnung", scope)
+        return miss, misses_dropped, expired, drops, await client.zcard(cache.lru_key), await client.hlen(cache.vectors_key)
+
+    miss, misses_dropped, expired, drops, lru_size, vectors = _run(scenario)
+    assert miss is None and misses_dropped == []
+    assert expired is None and len(drops) == 1
+    assert lru_size == 0 and vectors == 0
@@ -0,0 +1,113 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.reranker import RerankingService  # noqa: E402
+
+
+class FakeCrossEncoder:
+    """Scores by query-term overlap; records batch shapes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        self.batches.append([len(doc) for _, doc in pairs])
+        return [sum(doc.lower().count(term) for term in query.lower().split()) for query, doc in pairs]
+
+
+def _service(**kwargs):
+    service = RerankingService(**kwargs)
+    service._enabled = True
+    service._use_qwen3 = False
+    service._model = FakeCrossEncoder()
+    return service
+
+
+def _candidates():
+    return [
+        {"id": "a", "text": "Mietvertrag " * 40},
+        {"id": "b", "text": "Rechnung Telekom Rechnung"},
+        {"id": "c", "text": "Telekom"},
+        {"id": "d", "text": "Urlaub " * 5},
+    ]
+
+
+def test_rerank_orders_by_score_and_caches_pairs():
+    service = _service()
+    ranked = service.rerank("Rechnung Telekom", _candidates(), top_k=2)
+    assert [d["id"] for d in ranked] == ["b", "c"]
+    assert service.get_metrics()["pairs_scored"] == 4
+
+    # Zweite Seite / gleiche Anfrage: alle Paare aus dem Cache
+    service.rerank("Rechnung Telekom", _candidates(), top_k=4)
+    metrics = service.get_metrics()
+    assert metrics["pairs_scored"] == 4 and metrics["cache_hits"] == 4
+    assert len(service._model.batches) == 1
+
+
+def test_pair_cache_is_keyed_on_scored_text_not_id():
+    service = _service()
+    service.rerank("Telekom", [{"id": "chunk-0", "text": "Urlaub"}], top_k=1)
+    # Gleiche Chunk-ID, anderer Text (z. B. FTS-Snippet): neu bewerten
+    [hit] = service.rerank("Telekom", [{"id": "chunk-0", "text": "Telekom Rechnung"}], top_k=1)
+    assert hit["rerank_score"] == 1.0
+    assert service.get_metrics()["pairs_scored"] == 2
+
+
+def test_length_sorted_buckets_respect_batch_and_padding_limits():
+    service = _service(max_batch_chars=600)
+    service.batch_size = 2
+    service.rerank("Telekom", _candidates(), top_k=4)
+
+    batches = service._model.batches
+    assert all(len(batch) <= 2 for batch in batches)
+    assert all(len(batch) * max(batch) <= 600 or len(batch) == 1 for batch in batches)
+    lengths = [length for batch in batches for length in batch]
+    assert lengths == sorted(lengths)
+
+
+def test_cache_is_lru_bounded_and_metrics_have_percentiles():
+    service = _service(cache_size=3)
+    service.rerank("Telekom", _candidates(), top_k=4)
+    assert service.get_metrics()["cache_size"] == 3
+
+    batches = service.get_metrics()["batches"]
+    assert batches and all({"count", "p50_ms", "p95_ms"} <= set(v) for v in batches.values())
+
+
+def test_rerank_async_runs_in_executor():
+    service = _service()
+    ranked = asyncio.run(service.rerank_async("Rechnung", _candidates(), top_k=1))
+    assert ranked[0]["id"] == "b"
+    assert service._executor is not None
+
+
+class SlowCrossEncoder(FakeCrossEncoder):
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        time.sleep(0.05)
+        return super().predict(pairs, batch_size, show_progress_bar)
+
+
+def test_budget_cuts_off_and_keeps_best_scored_first():
+    service = _service()
+    service.batch_size = 1
+    service._model = SlowCrossEncoder()
+    candidates = _candidates()
+
+    ranked, reranked = service.rerank_within_budget("Telekom", candidates, top_k=4, budget_ms=80)
+    assert 0 < reranked < len(candidates)
+    assert all("rerank_score" in d for d in ranked[:reranked])
+    # Nicht bewertete Kandidaten folgen in Retrieval-Reihenfolge
+    rest = [d["id"] for d in ranked[reranked:]]
+    assert rest == [d["id"] for d in candidates if d["id"] in rest]
+
+
+def test_zero_budget_keeps_retrieval_order():
+    service = _service()
+    ranked, reranked = service.rerank_within_budget("Telekom", _candidates(), top_k=4, budget_ms=0)
+    assert reranked == 0
+    assert [d["id"] for d in ranked] == ["a", "b", "c", "d"]
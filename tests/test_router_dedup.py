@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("fastapi")
+
+ROOT = Path(__file__).resolve().parents[1]
+ROUTER_PATH = ROOT / "infra" / "docker" / "universal-router"
+sys.path.insert(0, str(ROUTER_PATH))
+
+import router  # noqa: E402
+
+
+def test_small_file_partial_hash_is_full_sha256(tmp_path):
+    data = b"kleine datei" * 10
+    f = tmp_path / "a.txt"
+    f.write_bytes(data)
+    size, digest = router.partial_content_hash(str(f), block_size=1024)
+    assert size == len(data)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert router.full_content_hash(str(f)) == digest
+
+
+def test_partial_hash_ignores_middle_but_full_hash_does_not(tmp_path):
+    head, tail = b"h" * 16, b"t" * 16
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(head + b"x" * 64 + tail)
+    b.write_bytes(head + b"y" * 64 + tail)
+    assert router.partial_content_hash(str(a), 16) == router.partial_content_hash(str(b), 16)
+    assert router.full_content_hash(str(a)) != router.full_content_hash(str(b))
+
+
+def _router(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    instance = router.UniversalRouter()
+    instance.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    instance.dedup = router.ContentDeduplicator(instance.redis)
+    paths = []
+    for name in ("a.txt", "b.txt", "c.txt"):
+        f = tmp_path / name
+        f.write_bytes(b"Rechnung 2024 Telekom " * 20)
+        paths.append(str(f))
+    return instance, paths
+
+
+async def _route(instance, path):
+    decision = await instance.route(path)
+    message_id = await instance.enqueue(decision)
+    return decision, message_id
+
+
+async def _extracted(instance, path, text="Rechnung 2024"):
+    """Simuliert das Ergebnis eines Extraction Workers und den Dedup-Linker."""
+    data = {"data": json.dumps({"job_id": "1-0", "file_path": path, "filename": Path(path).name,
+                                "text": text, "metadata": {"pages": 1}})}
+    message_id = await instance.redis.xadd(router.DEDUP_RESULT_STREAM, data)
+    await router.process_dedup_message(instance, router.DEDUP_RESULT_STREAM, message_id, data)
+    return message_id
+
+
+async def _linked_results(instance):
+    entries = await instance.redis.xrange(router.DEDUP_RESULT_STREAM)
+    results = [json.loads(data["data"]) for _, data in entries]
+    return [r for r in results if r["metadata"].get("dedup_linked")]
+
+
+def test_duplicates_wait_for_canonical_result_then_get_linked(tmp_path):
+    instance, (a, b, c) = _router(tmp_path)
+
+    async def scenario():
+        first, _ = await _route(instance, a)
+        waiting, _ = await _route(instance, b)
+        assert first.duplicate_of is None and waiting.duplicate_of == a
+        stream = router.priority_stream(first.target_queue, first.priority)
+        assert await instance.redis.xlen(stream) == 1
+        # Noch kein Ergebnis → nichts verknüpft
+        assert await _linked_results(instance) == []
+
+        await _extracted(instance, a)
+        linked = await _linked_results(instance)
+        # Später eingehende Kopie wird sofort mit dem fertigen Ergebnis verknüpft
+        late, _ = await _route(instance, c)
+        return linked, late, await _linked_results(instance)
+
+    linked, late, all_linked = asyncio.run(scenario())
+    assert [(r["file_path"], r["metadata"]["duplicate_of"]) for r in linked] == [(b, a)]
+    assert linked[0]["text"] == "Rechnung 2024"
+    assert late.duplicate_of == a
+    assert [r["file_path"] for r in all_linked] == [b, c]
+
+
+def test_failed_enqueue_releases_claim(tmp_path):
+    instance, (a, b, _) = _router(tmp_path)
+    xadd = instance.redis.xadd
+
+    async def failing_xadd(stream, *args, **kwargs):
+        if stream.startswith("extract:"):
+            raise ConnectionError("redis gone")
+        return await xadd(stream, *args, **kwargs)
+
+    async def scenario():
+        instance.redis.xadd = failing_xadd
+        with pytest.raises(ConnectionError):
+            await _route(instance, a)
+        instance.redis.xadd = xadd
+        decision, _ = await _route(instance, b)
+        return decision
+
+    decision = asyncio.run(scenario())
+    assert decision.duplicate_of is None
+    assert decision.content_sha256
+
+
+def test_dead_lettered_canonical_reroutes_waiting_duplicate(tmp_path):
+    instance, (a, b, _) = _router(tmp_path)
+
+    async def scenario():
+        first, _ = await _route(instance, a)
+        await _route(instance, b)
+        job = {"path": a, "content_sha256": first.content_sha256, "error": "corrupt"}
+        data = {"data": json.dumps(job)}
+        message_id = await instance.redis.xadd(router.DEDUP_FAILURE_STREAM, data)
+        await router.process_dedup_message(instance, router.DEDUP_FAILURE_STREAM, message_id, data)
+
+        entries = await instance.redis.xrange(router.priority_stream(first.target_queue, first.priority))
+        return [json.loads(d["data"])["path"] for _, d in entries]
+
+    # b wird statt verknüpft selbst extrahiert und ist jetzt kanonisch
+    assert asyncio.run(scenario()) == [a, b]
+
+
+def test_sweep_reroutes_duplicates_of_expired_claims(tmp_path):
+    instance, (a, b, _) = _router(tmp_path)
+
+    async def scenario():
+        first, _ = await _route(instance, a)
+        await _route(instance, b)
+        # Claim verfallen (TTL), ohne dass ein Ergebnis oder DLQ-Eintrag kam
+        await instance.redis.delete(router.DEDUP_CLAIM_PREFIX + first.content_sha256)
+        orphaned = await instance.dedup.sweep()
+        assert await instance.redis.hget(router.DEDUP_PENDING_PATHS, a) is None
+        return orphaned
+
+    assert [d["path"] for d in asyncio.run(scenario())] == [b]
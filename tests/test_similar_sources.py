@@ -0,0 +1,68 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+for dep in ("fastapi", "httpx", "redis", "sse_starlette", "numpy"):
+    pytest.importorskip(dep)
+
+import httpx  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "infra" / "docker" / "neural-search-api"))
+
+import neural_search_api as api  # noqa: E402
+
+SOURCE = {
+    "parent_id": "doc-a", "filename": "Rechnung.pdf", "extension": ".pdf",
+    "file_path": "/vault/Finanzen/Rechnung.pdf", "file_modified": "2024-03-10T12:00:00",
+}
+
+
+def _point(pid, parent, score):
+    return {"id": pid, "score": score, "payload": {"parent_id": parent, "filename": f"{parent}.pdf", "excerpt": parent}}
+
+
+def _qdrant(calls):
+    async def handler(request):
+        body = json.loads(await request.aread())
+        calls.append((request.url.path, body))
+        if request.url.path.endswith("/points/recommend"):
+            return httpx.Response(200, json={"result": [
+                _point("c1", "doc-b", 0.9), _point("c2", "doc-b", 0.8),
+                _point("c3", "doc-a", 0.7), _point("c4", "doc-c", 0.6),
+            ]})
+        return httpx.Response(200, json={"result": [{"id": i, "payload": SOURCE} for i in body["ids"]]})
+    return handler
+
+
+def test_similar_filter_combines_type_folder_and_date_window():
+    f = api.similar_filter(SOURCE, same_type=True, same_folder=True, days=30)
+    assert f["must_not"] == [{"key": "parent_id", "match": {"value": "doc-a"}}]
+    keys = {c["key"]: c for c in f["must"]}
+    assert set(keys["extension"]["match"]["any"]) == {".pdf", ".doc", ".docx"}
+    assert keys["folder"]["match"]["value"] == "/vault/Finanzen"
+    assert keys["file_modified"]["range"] == {"gte": "2024-02-09T12:00:00", "lte": "2024-04-09T12:00:00"}
+    assert "must" not in api.similar_filter(SOURCE)
+
+
+def test_similar_sources_use_recommend_collapse_and_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, "similar_cache", api.OrderedDict())
+    monkeypatch.setattr(api, "query_cache", None)
+
+    async def run():
+        monkeypatch.setattr(api, "http_client", httpx.AsyncClient(transport=httpx.MockTransport(_qdrant(calls))))
+        first = await api.get_similar_sources("c0", limit=5, sameType=True, sameFolder=False, days=None)
+        second = await api.get_similar_sources("c0", limit=5, sameType=True, sameFolder=False, days=None)
+        await api.http_client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [s.excerpt for s in first] == ["doc-b", "doc-c"]
+    assert second == first
+    recommend = [body for path, body in calls if path.endswith("/points/recommend")]
+    assert len(recommend) == 1
+    assert recommend[0]["positive"] == ["c0"] and "vector" not in recommend[0]
+    assert recommend[0]["filter"]["must"][0]["key"] == "extension"
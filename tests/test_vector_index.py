@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CONDUCTOR_ROOT", tempfile.mkdtemp())
+
+from scripts.services.vector_index import LedgerVectorIndex  # noqa: E402
+
+
+def _ledger(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE files (id INTEGER PRIMARY KEY, original_filename TEXT, extracted_text TEXT, "
+        "embedding_status TEXT, embedding_blob BLOB, updated_at TEXT)"
+    )
+    return conn
+
+
+def _insert(conn, row_id, vec, ts):
+    conn.execute(
+        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, 'DONE', ?, ?)",
+        (row_id, f"doc{row_id}.pdf", "text", np.asarray(vec, dtype=np.float32).tobytes(), ts),
+    )
+    conn.commit()
+
+
+def test_top_k_and_incremental_refresh(tmp_path):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db)
+    _insert(conn, 1, [1, 0, 0], "2026-01-01T00:00:00")
+    _insert(conn, 2, [0, 1, 0], "2026-01-01T00:00:01")
+
+    index = LedgerVectorIndex(db, tmp_path / "idx", refresh_interval_s=3600)
+    assert (tmp_path / "idx" / "embeddings.npy").exists()
+    assert [i for i, _ in index.search([1, 0.1, 0], top_k=2)] == [1, 2]
+
+    # Neue Zeile + geänderter Vektor für id 1
+    _insert(conn, 3, [0, 0, 1], "2026-01-02T00:00:00")
+    _insert(conn, 1, [0, 0.9, 0.1], "2026-01-02T00:00:01")
+    index.refresh(force=True)
+
+    hits = index.search([0, 0, 1], top_k=3)
+    assert hits[0][0] == 3
+    assert index.live_count == 3
+    assert index.search([1, 0, 0], top_k=1)[0][1] < 0.5
+
+    # Sidecar wird wiederverwendet
+    reopened = LedgerVectorIndex(db, tmp_path / "idx", refresh_interval_s=3600)
+    assert reopened.live_count == 3
+
+
+def test_deleted_rows_are_dropped(tmp_path):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db)
+    for i in range(1, 4):
+        _insert(conn, i, [i, 1, 0], f"2026-01-01T00:00:0{i}")
+    index = LedgerVectorIndex(db, tmp_path / "idx", refresh_interval_s=3600)
+
+    conn.execute("DELETE FROM files WHERE id = 2")
+    conn.commit()
+    index.refresh(force=True)
+    assert 2 not in [i for i, _ in index.search([2, 1, 0], top_k=3)]
+    assert index.fetch_records([1])[1][1] == "doc1.pdf"
+
+
+def test_float16_sidecar_halves_storage_and_keeps_ranking(tmp_path):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db)
+    for i in range(1, 6):
+        _insert(conn, i, [i, 1, 0.5], f"2026-01-01T00:00:0{i}")
+
+    full = LedgerVectorIndex(db, tmp_path / "f32", refresh_interval_s=3600)
+    half = LedgerVectorIndex(db, tmp_path / "f16", refresh_interval_s=3600, dtype="float16")
+    assert half.base.dtype == np.float16
+    assert half.base.nbytes * 2 == full.base.nbytes
+
+    query = [1, 0.2, 0]
+    assert [i for i, _ in half.search(query, top_k=5)] == [i for i, _ in full.search(query, top_k=5)]
+
+    # Sidecar mit anderem Format wird neu aufgebaut statt falsch gelesen
+    reopened = LedgerVectorIndex(db, tmp_path / "f32", refresh_interval_s=3600, dtype="float16")
+    assert reopened.base.dtype == np.float16 and reopened.live_count == 5
+
+
+def test_late_commit_below_watermark_is_picked_up(tmp_path):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db)
+    _insert(conn, 1, [1, 0, 0], "2026-01-01T00:00:00")
+    _insert(conn, 2, [0, 1, 0], "2026-01-01T00:00:10")
+    index = LedgerVectorIndex(db, tmp_path / "idx", refresh_interval_s=3600)
+
+    # Innerhalb der Überlappung: nichts Neues, nichts wandert ins Delta
+    index.refresh(force=True)
+    assert index.delta == {} and index.live_count == 2
+
+    # Gestempelt vor der Watermark, aber erst jetzt committet
+    _insert(conn, 3, [0, 0, 1], "2026-01-01T00:00:05")
+    index.refresh(force=True)
+    assert index.search([0, 0, 1], top_k=1)[0][0] == 3
+    assert index.watermark == "2026-01-01T00:00:10"
+
+
+def test_reconcile_loads_rows_the_scan_missed(tmp_path):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db)
+    _insert(conn, 1, [1, 0, 0], "2026-01-01T00:00:00")
+    _insert(conn, 2, [0, 1, 0], "2026-01-01T00:00:01")
+    index = LedgerVectorIndex(db, tmp_path / "idx", refresh_interval_s=3600)
+
+    # Stempel weit unter der Überlappung, id 2 ersetzt (neue id 4)
+    _insert(conn, 3, [0, 0, 1], "2025-06-01T00:00:00")
+    conn.execute("DELETE FROM files WHERE id = 2")
+    _insert(conn, 4, [0, 1, 0.1], "2025-06-01T00:00:00")
+    index.refresh(force=True)
+
+    assert index.live_count == 3
+    assert index.search([0, 0, 1], top_k=1)[0][0] == 3
+    assert [i for i, _ in index.search([0, 1, 0], top_k=3)][0] == 4
+    assert 2 not in [i for i, _ in index.search([0, 1, 0], top_k=3)]
+
+
+def test_ledger_scan_does_not_block_searches(tmp_path, monkeypatch):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db)
+    _insert(conn, 1, [1, 0, 0], "2026-01-01T00:00:00")
+    index = LedgerVectorIndex(db, tmp_path / "idx", refresh_interval_s=3600)
+    _insert(conn, 2, [0, 1, 0], "2026-01-01T00:00:01")
+
+    searched = []
+    connect = index._connect
+
+    def connect_and_search():
+        # Läuft mitten im Refresh; eine Suche aus einem anderen Thread muss durchkommen
+        worker = threading.Thread(target=lambda: searched.append(index.search([1, 0, 0], top_k=1)))
+        worker.start()
+        worker.join(timeout=2)
+        return connect()
+
+    monkeypatch.setattr(index, "_connect", connect_and_search)
+    index.refresh(force=True)
+    assert searched and searched[0][0][0] == 1
+    assert index.live_count == 2
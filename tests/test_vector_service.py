@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("requests")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("CONDUCTOR_ROOT", tempfile.mkdtemp())
+
+from scripts import vector_service  # noqa: E402
+from scripts.vector_service import VectorService, token_batches  # noqa: E402
+
+
+class FakeModel:
+    """Vector = [len(text), 1, 0]; records one entry per encode() call."""
+
+    device = "cpu"
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append((len(texts), batch_size))
+        return np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+
+def _ledger(path, n, start=1):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, status TEXT, original_filename TEXT, "
+        "extracted_text TEXT, embedding_status TEXT DEFAULT 'PENDING', embedding_blob BLOB, updated_at TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO files (id, status, original_filename, extracted_text) VALUES (?, 'indexed_passive', ?, ?)",
+        [(i, f"doc{i}.pdf", "Rechnung Telekom " * (5 + i)) for i in range(start, start + n)],
+    )
+    conn.commit()
+    return conn
+
+
+def _service(db):
+    service = VectorService(db_path=db, use_remote=False)
+    service._model = FakeModel()
+    return service
+
+
+def test_token_batches_respect_budget():
+    rows = [(i, "x" * 400) for i in range(10)]  # je 101 Tokens
+    batches = token_batches(rows, token_budget=300)
+    assert [len(b) for b in batches] == [2, 2, 2, 2, 2]
+    assert [r for b in batches for r in b] == rows
+
+
+def test_process_queue_encodes_per_batch_and_writes_blobs(tmp_path, monkeypatch):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db, 30)
+    monkeypatch.setattr(vector_service, "VECTOR_FETCH_ROWS", 8)
+    service = _service(db)
+
+    assert service.process_queue() == 30
+    # Ein encode()-Aufruf pro Token-Batch, nicht pro Zeile
+    assert 0 < len(service._model.calls) < 30
+    assert sum(n for n, _ in service._model.calls) == 30
+
+    rows = conn.execute("SELECT embedding_status, embedding_blob, updated_at FROM files").fetchall()
+    assert all(status == "DONE" and updated for status, _, updated in rows)
+    assert np.frombuffer(rows[0][1], dtype=np.float32).shape == (3,)
+    assert service.process_queue() == 0
+
+
+def test_daemon_picks_up_new_rows_after_ledger_change(tmp_path, monkeypatch):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db, 3)
+    monkeypatch.setattr(vector_service, "VECTOR_IDLE_POLL_S", 0.02)
+    service = _service(db)
+    stop = threading.Event()
+    counts = []
+    daemon = threading.Thread(target=lambda: counts.append(service.run(stop=stop)))
+    daemon.start()
+
+    def pending():
+        return conn.execute("SELECT COUNT(*) FROM files WHERE embedding_status='PENDING'").fetchone()[0]
+
+    deadline = time.time() + 5
+    while pending() and time.time() < deadline:
+        time.sleep(0.02)
+    _ledger(db, 2, start=10).close()
+    while pending() and time.time() < deadline:
+        time.sleep(0.02)
+    stop.set()
+    daemon.join(timeout=5)
+
+    assert pending() == 0
+    assert counts == [5]
+
+
+def _lock_ledger(db):
+    """Hält die Schreibsperre (Lesen geht weiter, Schreiben → database is locked)."""
+    locker = sqlite3.connect(db, isolation_level=None, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    return locker
+
+
+def test_locked_writes_are_retried_and_stamped_when_written(tmp_path, monkeypatch):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db, 4)
+    monkeypatch.setattr(vector_service, "VECTOR_WRITE_RETRIES", 8)
+    monkeypatch.setattr(vector_service, "VECTOR_WRITE_BACKOFF_S", 0.01)
+    service = _service(db)
+    monkeypatch.setattr(service, "_connect", lambda: sqlite3.connect(db, timeout=0.01))
+
+    locker = _lock_ledger(db)
+    released = []
+
+    def release():
+        released.append(datetime.now().isoformat())
+        locker.execute("ROLLBACK")
+
+    timer = threading.Timer(0.3, release)
+    timer.start()
+    assert service.process_queue() == 4
+    timer.join()
+
+    rows = conn.execute("SELECT embedding_status, updated_at FROM files").fetchall()
+    assert all(status == "DONE" for status, _ in rows)
+    assert all(updated >= released[0] for _, updated in rows)
+
+
+def test_daemon_restarts_after_persistent_write_failure(tmp_path, monkeypatch):
+    db = tmp_path / "ledger.db"
+    conn = _ledger(db, 3)
+    monkeypatch.setattr(vector_service, "VECTOR_WRITE_RETRIES", 1)
+    monkeypatch.setattr(vector_service, "VECTOR_WRITE_BACKOFF_S", 0.01)
+    monkeypatch.setattr(vector_service, "VECTOR_RESTART_DELAY_S", 0.05)
+    monkeypatch.setattr(vector_service, "VECTOR_IDLE_POLL_S", 0.02)
+    service = _service(db)
+    monkeypatch.setattr(service, "_connect", lambda: sqlite3.connect(db, timeout=0.01))
+
+    errors = []
+    run = service.run
+
+    def recording_run(**kwargs):
+        try:
+            return run(**kwargs)
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    monkeypatch.setattr(service, "run", recording_run)
+    threads_before = threading.active_count()
+    locker = _lock_ledger(db)
+    stop = threading.Event()
+    daemon = threading.Thread(target=service.serve, args=(stop,))
+    daemon.start()
+
+    deadline = time.time() + 5
+    while len(errors) < 2 and time.time() < deadline:
+        time.sleep(0.02)
+    locker.execute("ROLLBACK")
+
+    def pending():
+        return conn.execute("SELECT COUNT(*) FROM files WHERE embedding_status='PENDING'").fetchone()[0]
+
+    while pending() and time.time() < deadline:
+        time.sleep(0.02)
+    stop.set()
+    daemon.join(timeout=5)
+
+    assert len(errors) >= 2 and all(isinstance(e, sqlite3.OperationalError) for e in errors)
+    assert pending() == 0
+    assert not daemon.is_alive()
+    # Reader/Writer der abgebrochenen Durchläufe hängen nicht mehr
+    deadline = time.time() + 2
+    while threading.active_count() > threads_before and time.time() < deadline:
+        time.sleep(0.02)
+    assert threading.active_count() == threads_before
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("redis")
+pytest.importorskip("httpx")
+fakeredis = pytest.importorskip("fakeredis")
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "infra" / "docker" / "workers"))
+
+import extraction_worker  # noqa: E402
+
+IDLE_MS = 300
+
+
+class SlowWorker(extraction_worker.BaseExtractionWorker):
+    """Belegt jeden Slot für `duration` Sekunden und ackt danach."""
+
+    def __init__(self, duration):
+        super().__init__("extract:test", "extract:done", "extract:dlq", "worker-a", concurrency=1)
+        self.duration = duration
+        self.finished = []
+
+    async def extract(self, job, local_path):
+        raise NotImplementedError
+
+    async def process_job(self, job):
+        await asyncio.sleep(self.duration)
+        await self.queue_manager.ack(job.stream, extraction_worker.CONSUMER_GROUP, job.id)
+        self.finished.append(job.id)
+
+
+def test_busy_slots_keep_sending_heartbeats(monkeypatch):
+    monkeypatch.setattr(extraction_worker, "RECLAIM_MIN_IDLE_MS", IDLE_MS)
+    monkeypatch.setattr(extraction_worker, "RECLAIM_INTERVAL_S", 3600)
+    monkeypatch.setattr(extraction_worker, "HEARTBEAT_INTERVAL_S", 0.05)
+
+    async def scenario():
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        worker = SlowWorker(duration=IDLE_MS * 3 / 1000)
+        worker.queue_manager.redis = client
+
+        async def connect():
+            pass
+
+        monkeypatch.setattr(worker.queue_manager, "connect", connect)
+        await client.xadd("extract:test", {"data": json.dumps({
+            "id": "", "path": "/mnt/a.pdf", "filename": "a.pdf", "extension": ".pdf",
+            "size": 1, "modified": "2025-01-01",
+        })})
+
+        # Zweiter Worker, der hängende Nachrichten übernehmen würde
+        other = extraction_worker.QueueManager()
+        other.redis = client
+
+        # Kein Reclaim-Durchlauf beim Start (loop.time() hängt von der Uptime ab):
+        # nur der Heartbeat-Task hält die Jobs frisch
+        worker._last_reclaim = asyncio.get_running_loop().time()
+        loop = asyncio.create_task(worker.start())
+        for _ in range(100):
+            if len(worker._in_flight) == worker.concurrency:
+                break
+            await asyncio.sleep(0.05)
+        assert len(worker._in_flight) == worker.concurrency  # alle Slots belegt
+
+        stolen = []
+        for _ in range(6):
+            await asyncio.sleep(IDLE_MS / 1000 / 2)
+            stolen += await other.claim_stale(
+                "extract:test", extraction_worker.CONSUMER_GROUP, "worker-b",
+                min_idle_ms=IDLE_MS, count=10, max_deliveries=5, dlq="extract:dlq",
+            )
+
+        worker.running = False
+        await worker.stop()
+        loop.cancel()
+        await asyncio.gather(loop, return_exceptions=True)
+        return stolen, worker.finished, await client.xlen("extract:dlq")
+
+    stolen, finished, dead = asyncio.run(scenario())
+    assert stolen == []
+    assert len(finished) == 1
+    assert dead == 0